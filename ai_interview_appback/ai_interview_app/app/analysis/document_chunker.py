@@ -0,0 +1,109 @@
+# app/analysis/document_chunker.py - Splits long documents into sections and merges per-section analyses
+
+import json
+import re
+from typing import Any, Callable, Dict, List
+
+# A heading is a short line on its own: markdown "# Title", "EXPERIENCE", "Work Experience:"
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S.{0,80}|[A-Z][A-Z0-9 &/,()\-]{2,60}|[A-Z][\w &/,()\-]{1,60}:)\s*$")
+_CHARS_PER_TOKEN = 4 # Only used to hard-split text without any line breaks
+_MAX_SUMMARY_SENTENCES = 5 # One per section; the opening sections describe the document best
+
+
+def split_document(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """
+    Splits a document into chunks of at most `max_tokens`, on section boundaries where possible.
+    Adjacent small sections are packed together; an oversized section is split by paragraphs,
+    then lines, then characters. Chunks stay in document order.
+    """
+    pieces: List[str] = []
+    for section in _split_sections(text):
+        pieces.extend(_split_oversized(section, max_tokens, count_tokens))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _split_sections(text: str) -> List[str]:
+    """Cuts the text before every heading line."""
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if _HEADING_RE.match(line) and any(existing.strip() for existing in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(lines) for lines in sections]
+
+
+def _split_oversized(text: str, max_tokens: int, count_tokens: Callable[[str], int], separators=("\n\n", "\n")) -> List[str]:
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    if not separators:
+        size = max_tokens * _CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    parts: List[str] = []
+    for part in text.split(separators[0]):
+        parts.extend(_split_oversized(part, max_tokens, count_tokens, separators[1:]))
+    return parts
+
+
+def merge_partial_analyses(partials: List[Any]) -> Dict[str, Any]:
+    """
+    Merges per-section analyses into one result of the same shape: lists are concatenated
+    without duplicates, objects are merged key by key, the first non-empty scalar wins, and
+    the first section summaries are joined in document order. A section whose JSON isn't an
+    object (a bare list or string) counts as unparseable, like one with `raw_output`.
+    """
+    parsed = [partial for partial in partials if isinstance(partial, dict) and "raw_output" not in partial]
+    if not parsed:
+        first = partials[0] if partials else {}
+        if isinstance(first, dict):
+            return first
+        return {"raw_output": json.dumps(first), "warning": "Could not parse structured JSON."}
+
+    merged: Dict[str, Any] = {}
+    summaries: List[str] = []
+    for partial in parsed:
+        for key, value in partial.items():
+            if key == "summary":
+                if isinstance(value, str) and value.strip():
+                    summaries.append(value.strip())
+                continue
+            merged[key] = _merge_values(merged[key], value) if key in merged else value
+    if summaries:
+        merged["summary"] = " ".join(summaries[:_MAX_SUMMARY_SENTENCES])
+    if len(parsed) < len(partials):
+        merged["warning"] = f"{len(partials) - len(parsed)} of {len(partials)} sections could not be parsed."
+    return merged
+
+
+def _merge_values(existing: Any, new: Any) -> Any:
+    if isinstance(existing, list) and isinstance(new, list):
+        seen = {json.dumps(item, sort_keys=True) for item in existing}
+        merged = list(existing)
+        for item in new:
+            marker = json.dumps(item, sort_keys=True)
+            if marker not in seen:
+                seen.add(marker)
+                merged.append(item)
+        return merged
+    if isinstance(existing, list):
+        return _merge_values(existing, [new])
+    if isinstance(new, list):
+        return _merge_values([existing], new) if existing not in (None, "") else new
+    if isinstance(existing, dict) and isinstance(new, dict):
+        merged = dict(existing)
+        for key, value in new.items():
+            merged[key] = _merge_values(merged[key], value) if key in merged else value
+        return merged
+    return existing if existing not in (None, "", [], {}) else new
@@ -1,6 +1,13 @@
 # app/analysis/pre_interview_analyzer.py - Logic for pre-interview analysis
 
-from typing import Dict, Any
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from app.config.settings import Settings, settings as app_settings
+from app.analysis.document_chunker import split_document, merge_partial_analyses
+from app.core.history_manager import count_tokens
 from app.services.llm_service import LLMService # Needs LLM for analysis
 from app.services.storage_service import StorageService # Needs Storage to load docs
 from app.core.exceptions import LLMServiceError, StorageError # Import exceptions
@@ -12,11 +19,14 @@ class PreInterviewAnalyzer:
     for the interview. Identifies key skills, experience, requirements,
     and potentially generates an initial interview plan/questions.
     """
-    def __init__(self, llm_service: LLMService, storage_service: StorageService):
+    def __init__(self, llm_service: LLMService, storage_service: StorageService, settings: Settings = app_settings):
         self.llm_service = llm_service
         self.storage_service = storage_service
+        self.settings = settings
         # Get the specific prompt for pre-interview analysis
         self.analysis_prompt_template = interview_prompts.get_pre_interview_analysis_prompt()
+        self.section_prompt_template = interview_prompts.get_section_analysis_prompt()
+        self.plan_prompt_template = interview_prompts.get_interview_plan_prompt()
 
     def analyze(self, doc_id: str, document_type: str) -> Dict[str, Any]:
         """
@@ -30,6 +40,14 @@ class PreInterviewAnalyzer:
             doc_content = self.storage_service.load_document_content(doc_id)
             print(f"Loaded content for {doc_id}, length: {len(doc_content)}")
 
+            # Long documents: one LLM call per section, in parallel, merged afterwards
+            if count_tokens(doc_content) >= self.settings.ANALYSIS_CHUNKED_MIN_TOKENS:
+                structured_result = self._analyze_in_sections(doc_id, document_type, doc_content)
+                structured_result["__metadata__"] = {"doc_id": doc_id, "document_type": document_type,
+                                                     "analysis_mode": "chunked", "sections": structured_result.pop("__sections__")}
+                print(f"Pre-interview analysis successful for {document_type} ID: {doc_id}")
+                return structured_result
+
             # Prepare messages for the LLM
             # Include system prompt (from LLMService) and the specific analysis prompt
             # The analysis prompt should instruct the LLM on what to extract and format.
@@ -104,4 +122,68 @@ class PreInterviewAnalyzer:
             raise e
         except Exception as e:
              print(f"Unexpected error during pre-interview analysis for {doc_id}: {e}")
-             raise e
\ No newline at end of file
+             raise e
+
+    def _analyze_in_sections(self, doc_id: str, document_type: str, doc_content: str) -> Dict[str, Any]:
+        """
+        Map-reduce analysis of a long document: it is split on section boundaries (or the token
+        budget), every section is extracted by its own LLM call, in parallel, and the partial JSON
+        results are merged into one. Wall-clock time follows the slowest section, not the length.
+        """
+        sections = split_document(doc_content, self.settings.ANALYSIS_SECTION_MAX_TOKENS, count_tokens)
+        print(f"Analyzing {doc_id} in {len(sections)} sections.")
+
+        def analyze_section(part: int) -> Dict[str, Any]:
+            messages = [{"role": "user", "content": self.section_prompt_template.format(
+                document_type=document_type,
+                part=part + 1,
+                parts=len(sections),
+                document_content=sections[part]
+            )}]
+            return _parse_json_block(self.llm_service._call_llm(messages, temperature=0.1, max_tokens=1000))
+
+        started_at = time.perf_counter()
+        workers = max(1, min(len(sections), self.settings.ANALYSIS_MAX_PARALLEL_SECTIONS))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials: List[Dict[str, Any]] = list(pool.map(analyze_section, range(len(sections)))) # Keeps section order
+        print(f"Analyzed {len(sections)} sections of {doc_id} in {time.perf_counter() - started_at:.2f}s.")
+
+        merged = merge_partial_analyses(partials)
+        merged["__sections__"] = len(sections)
+        return merged
+
+    def build_interview_plan(self, jd_analysis: Dict[str, Any], resume_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Joins the JD and Resume analyses into the interview plan (topics, opening questions,
+        focus areas) and generates the first question, so the interview starts from a
+        precomputed artifact instead of doing this work in the first live turn.
+        """
+        # Drop our own bookkeeping before sending the analyses to the LLM
+        jd_fields = {k: v for k, v in jd_analysis.items() if k != "__metadata__"}
+        resume_fields = {k: v for k, v in resume_analysis.items() if k != "__metadata__"}
+        messages = [{"role": "user", "content": self.plan_prompt_template.format(
+            jd_analysis=json.dumps(jd_fields, indent=2),
+            resume_analysis=json.dumps(resume_fields, indent=2)
+        )}]
+        raw_llm_response = self.llm_service._call_llm(messages, temperature=0.3, max_tokens=800)
+        plan = _parse_json_block(raw_llm_response)
+
+        # The interview manager relies on these two keys being present
+        plan.setdefault("topics", [])
+        if not plan.get("initial_questions"):
+            plan["initial_questions"] = ["Tell me about yourself.", "Walk me through your resume."]
+        plan["first_question"] = self.llm_service.generate_initial_question(plan, jd_analysis, resume_analysis).strip()
+        return plan
+
+
+def _parse_json_block(raw_llm_response: str) -> Dict[str, Any]:
+    """Parses the ```json ... ``` block of an LLM response; falls back to the raw text."""
+    json_match = re.search(r"```json\s*(.*?)\s*```", raw_llm_response, re.DOTALL)
+    if not json_match:
+        print("Warning: No JSON block found in LLM response.")
+        return {"raw_output": raw_llm_response, "warning": "Could not parse structured JSON."}
+    try:
+        return json.loads(json_match.group(1))
+    except json.JSONDecodeError as e:
+        print(f"JSON parsing failed for LLM response: {e}")
+        return {"raw_output": raw_llm_response, "error": f"JSON parsing failed: {e}"}
@@ -25,12 +25,13 @@ def get_settings() -> Settings:
 
 def get_llm_service(settings: Annotated[Settings, Depends(get_settings)]) -> LLMService:
     """Dependency to get the main LLM Service."""
-    # In a real app, you might want to cache/singleton this service instance
+    # The service is a thin wrapper: it borrows the process-wide OpenAI clients created in
+    # the lifespan (see llm_client_pool), so no new connections are opened per request.
     return LLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MAIN_LLM_MODEL)
 
 def get_mini_llm_service(settings: Annotated[Settings, Depends(get_settings)]) -> MiniLLMService:
     """Dependency to get the Mini LLM Service."""
-    # In a real app, you might want to cache/singleton this service instance
+    # Shares the same process-wide clients as the main LLM Service
     return MiniLLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MINI_LLM_MODEL)
 
 def get_storage_service(settings: Annotated[Settings, Depends(get_settings)]) -> StorageService:
@@ -1,24 +1,28 @@
 # app/api/v1/endpoints/documents.py - API endpoints for document handling
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
-from typing import Annotated
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status
+from typing import Annotated, Tuple, List, Dict, Any
+import asyncio
 import os
 import uuid # To generate unique filenames
+import zipfile
 
 from app.config.settings import settings
-from app.tasks.document_tasks import process_document # Assuming this task exists
-from app.api.v1.dependencies import get_settings # Dependency to get settings
+from app.tasks.document_tasks import process_document, start_interview_plan_pipeline, doc_id_for, start_batch_ingestion, batch_progress
+from app.api.v1.dependencies import get_settings, get_storage_service # Dependencies to get settings/storage
+from app.services.storage_service import StorageService
+from app.services.upload_writer import SavedUpload, stream_upload_to_disk, copy_stream_to_disk
+from app.core.exceptions import StorageError, UploadTooLarge
 
 router = APIRouter()
 
-@router.post("/documents/upload/jd")
-async def upload_job_description(
-    file: Annotated[UploadFile, File()],
-    settings: Annotated[get_settings, Depends()] # Use dependency for settings
-):
-    """
-    Uploads a Job Description document and triggers background processing.
-    """
+# File types DocumentParser handles; anything else in a batch is reported as rejected
+BATCH_DOCUMENT_EXTENSIONS = {".pdf", ".docx", ".txt"}
+DOCUMENT_TYPE_PREFIXES = {"job_description": "jd", "resume": "resume"}
+
+
+async def _save_upload(file: UploadFile, prefix: str, settings) -> SavedUpload:
+    """Streams an uploaded file to STORAGE_PATH/uploads under a unique name (size-bounded, hashed on write)."""
     if not file.filename:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file uploaded")
 
@@ -28,63 +32,294 @@ async def upload_job_description(
 
     # Generate a unique filename to prevent conflicts
     file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"jd_{uuid.uuid4()}{file_extension}"
+    unique_filename = f"{prefix}_{uuid.uuid4()}{file_extension}"
     file_path = os.path.join(upload_dir, unique_filename)
 
-    # Save the file asynchronously
     try:
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        return await stream_upload_to_disk(file, file_path, settings.MAX_UPLOAD_BYTES, settings.UPLOAD_CHUNK_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not save file: {e}")
 
-    # Trigger celery task to process the document
-    # The task will parse, analyze, and store the structured data
-    task_result = process_document.delay(file_path, "job_description") # Assuming task takes path and type
+
+async def _dedupe_upload(saved: SavedUpload, document_type: str, storage_service: StorageService, settings) -> Tuple[str, bool]:
+    """
+    Maps an upload to the first upload of `document_type` with the same SHA-256 (the same file
+    uploaded as a JD and as a resume gets two doc_ids, one per analysis). Returns (file_path, duplicate):
+    for a duplicate, the new copy is deleted and the original path (hence doc_id) is returned,
+    so its parsed text and analysis are reused instead of being recomputed.
+    """
+    if not settings.DEDUPE_UPLOADS_ENABLED:
+        return saved.path, False
+    try:
+        entry = await storage_service.aclaim_content_digest(saved.sha256, document_type, {
+            "doc_id": doc_id_for(saved.path), "file_path": saved.path, "size_bytes": saved.size_bytes
+        })
+    except StorageError as e:
+        print(f"Warning: content index unavailable, processing upload as new: {e}")
+        return saved.path, False
+    if entry["file_path"] == saved.path:
+        return saved.path, False
+    await asyncio.to_thread(os.remove, saved.path) # Same bytes are already stored
+    print(f"Upload {os.path.basename(saved.path)} is identical to {entry['doc_id']}; reusing it.")
+    return entry["file_path"], True
+
+
+async def _discard_uploads(paths: List[str]):
+    """
+    Removes the uploads of a request that failed before they were handed to a task. Content
+    index entries still pointing at them are taken over by the next identical upload.
+    """
+    for path in paths:
+        try:
+            await asyncio.to_thread(os.remove, path)
+        except FileNotFoundError:
+            pass # A duplicate's copy, already removed by _dedupe_upload
+
+
+async def _upload_single_document(file: UploadFile, prefix: str, document_type: str, settings, storage_service: StorageService) -> dict:
+    """Saves one JD/Resume upload and starts its processing, unless identical content is already analyzed."""
+    saved = await _save_upload(file, prefix, settings)
+    file_path, duplicate = await _dedupe_upload(saved, document_type, storage_service, settings)
+    doc_id = doc_id_for(file_path)
+
+    task_id = None
+    if not (duplicate and await storage_service.aload_cached_analysis(doc_id, document_type)):
+        # Trigger celery task to process the document
+        # The task will parse, analyze, and store the structured data (reusing what already exists)
+        task_id = process_document.delay(file_path, document_type).id
 
     return {
-        "message": "Job Description uploaded and processing started.",
         "filename": file.filename,
         "stored_path": file_path,
-        "task_id": task_result.id
+        "doc_id": doc_id,
+        "duplicate": duplicate,
+        "size_bytes": saved.size_bytes,
+        "sha256": saved.sha256,
+        "task_id": task_id # None: nothing to do, the analysis of this content already exists
     }
 
+
+@router.post("/documents/upload/jd")
+async def upload_job_description(
+    file: Annotated[UploadFile, File()],
+    settings: Annotated[get_settings, Depends()], # Use dependency for settings
+    storage_service: Annotated[StorageService, Depends(get_storage_service)]
+):
+    """
+    Uploads a Job Description document and triggers background processing.
+    """
+    result = await _upload_single_document(file, "jd", "job_description", settings, storage_service)
+    return {"message": "Job Description uploaded and processing started.", **result}
+
 @router.post("/documents/upload/resume")
 async def upload_resume(
     file: Annotated[UploadFile, File()],
-    settings: Annotated[get_settings, Depends()]
+    settings: Annotated[get_settings, Depends()],
+    storage_service: Annotated[StorageService, Depends(get_storage_service)]
 ):
     """
     Uploads a Resume document and triggers background processing.
     """
-    if not file.filename:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file uploaded")
+    result = await _upload_single_document(file, "resume", "resume", settings, storage_service)
+    return {"message": "Resume uploaded and processing started.", **result}
 
+@router.post("/documents/upload/pair")
+async def upload_document_pair(
+    job_description: Annotated[UploadFile, File()],
+    resume: Annotated[UploadFile, File()],
+    settings: Annotated[get_settings, Depends()],
+    storage_service: Annotated[StorageService, Depends(get_storage_service)]
+):
+    """
+    Uploads a Job Description and a Resume together. Both are parsed and analyzed in parallel,
+    then the interview plan and first question are built as soon as the second one finishes.
+    Start the interview with the returned IDs; it loads the precomputed plan.
+    """
+    jd_path, jd_duplicate = await _dedupe_upload(await _save_upload(job_description, "jd", settings), "job_description", storage_service, settings)
+    try:
+        resume_path, _ = await _dedupe_upload(await _save_upload(resume, "resume", settings), "resume", storage_service, settings)
+    except BaseException:
+        if not jd_duplicate: # A duplicate's path is the original upload: not ours to remove
+            await _discard_uploads([jd_path])
+        raise
+    jd_id, resume_id = doc_id_for(jd_path), doc_id_for(resume_path)
+
+    if await storage_service.aload_interview_plan(jd_id, resume_id) is not None:
+        # This exact pair was uploaded before: its plan is ready
+        return {"message": "Documents already analyzed. Interview plan is ready.",
+                "job_description_id": jd_id, "resume_id": resume_id, "task_id": None}
+
+    # chord([parse -> analyze (JD), parse -> analyze (Resume)]) -> build_interview_plan
+    # Steps already done for identical content are reused by the tasks.
+    plan_result = start_interview_plan_pipeline(jd_path, resume_path)
+
+    return {
+        "message": "Documents uploaded. Analysis and interview plan generation started.",
+        "job_description_id": jd_id,
+        "resume_id": resume_id,
+        "task_id": plan_result.id # The plan-building (chord callback) task
+    }
+
+@router.get("/documents/plan/{job_description_id}/{resume_id}")
+async def get_interview_plan(
+    job_description_id: str,
+    resume_id: str,
+    storage_service: Annotated[StorageService, Depends(get_storage_service)]
+):
+    """Returns the precomputed interview plan for a JD/Resume pair (404 until it is built)."""
+    try:
+        plan = await storage_service.aload_interview_plan(job_description_id, resume_id)
+    except StorageError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if plan is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Interview plan not built yet.")
+    return {"status": "ready", "plan": plan}
+
+def _extract_zip_members(zip_path: str, upload_dir: str, prefix: str, settings, max_members: int) -> Tuple[List[Tuple[str, SavedUpload]], List[Dict[str, Any]]]:
+    """
+    Streams the documents inside a ZIP archive to the upload directory (blocking; run in a thread).
+    At most BATCH_MAX_ARCHIVE_ENTRIES entries are read and BATCH_MAX_EXTRACTED_BYTES written,
+    counted on the bytes actually decompressed (ZIP headers can declare any size).
+    Returns ([(member name, saved upload)], [rejected members with reasons]).
+    """
+    saved, rejected = [], []
+    extracted_bytes, budget_exhausted = 0, False
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for index, info in enumerate(archive.infolist()):
+                name = info.filename
+                if index >= settings.BATCH_MAX_ARCHIVE_ENTRIES:
+                    # Every entry costs a scan (and a rejection record) even if it is skipped
+                    rejected.append({"filename": name, "reason": f"Archive has more than {settings.BATCH_MAX_ARCHIVE_ENTRIES} entries; the rest were skipped."})
+                    break
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue # Folders and OS metadata, not documents
+                extension = os.path.splitext(name)[1].lower()
+                if extension not in BATCH_DOCUMENT_EXTENSIONS:
+                    rejected.append({"filename": name, "reason": f"Unsupported file type '{extension}'."})
+                    continue
+                if len(saved) >= max_members:
+                    rejected.append({"filename": name, "reason": "Batch file limit reached."})
+                    continue
+                if info.file_size > settings.MAX_UPLOAD_BYTES:
+                    rejected.append({"filename": name, "reason": f"Exceeds the maximum size of {settings.MAX_UPLOAD_BYTES} bytes."})
+                    continue
+                remaining_bytes = settings.BATCH_MAX_EXTRACTED_BYTES - extracted_bytes
+                if budget_exhausted or info.file_size > remaining_bytes:
+                    # Stop expanding for good: the declared sizes of the rest can't be trusted either
+                    budget_exhausted = True
+                    rejected.append({"filename": name, "reason": f"Archive expands to more than {settings.BATCH_MAX_EXTRACTED_BYTES} bytes."})
+                    continue
+                max_bytes = min(settings.MAX_UPLOAD_BYTES, remaining_bytes)
+                file_path = os.path.join(upload_dir, f"{prefix}_{uuid.uuid4()}{extension}")
+                try:
+                    with archive.open(info) as member:
+                        upload = copy_stream_to_disk(member, file_path, max_bytes, settings.UPLOAD_CHUNK_BYTES, name)
+                    extracted_bytes += upload.size_bytes
+                    saved.append((name, upload))
+                except UploadTooLarge as e:
+                    if max_bytes < settings.MAX_UPLOAD_BYTES: # Stopped by the archive budget, not the file limit
+                        budget_exhausted = True
+                        rejected.append({"filename": name, "reason": f"Archive expands to more than {settings.BATCH_MAX_EXTRACTED_BYTES} bytes."})
+                    else:
+                        rejected.append({"filename": name, "reason": str(e)})
+                except (zipfile.BadZipFile, RuntimeError, OSError) as e: # RuntimeError: encrypted member
+                    rejected.append({"filename": name, "reason": str(e)})
+    except zipfile.BadZipFile as e:
+        rejected.append({"filename": os.path.basename(zip_path), "reason": f"Invalid ZIP archive: {e}"})
+    return saved, rejected
+
+
+@router.post("/documents/upload/batch")
+async def upload_document_batch(
+    files: Annotated[List[UploadFile], File()],
+    settings: Annotated[get_settings, Depends()],
+    storage_service: Annotated[StorageService, Depends(get_storage_service)],
+    document_type: Annotated[str, Form()] = "resume"
+):
+    """
+    Uploads many documents of one type at once: any mix of PDF/DOCX/TXT files and ZIP archives
+    of them. Every document is streamed to storage, identical content is deduplicated, and the
+    batch is processed with at most BATCH_MAX_CONCURRENCY documents in flight.
+    Poll GET /documents/batch/{batch_id} for progress.
+    """
+    prefix = DOCUMENT_TYPE_PREFIXES.get(document_type)
+    if prefix is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown document_type '{document_type}'.")
     upload_dir = os.path.join(settings.STORAGE_PATH, "uploads")
     os.makedirs(upload_dir, exist_ok=True)
 
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"resume_{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-
+    saved: List[Tuple[str, SavedUpload]] = []
+    rejected: List[Dict[str, Any]] = []
     try:
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not save file: {e}")
+        for file in files:
+            filename = file.filename or ""
+            extension = os.path.splitext(filename)[1].lower()
+            if extension == ".zip":
+                # The archive is streamed to disk first (zipfile needs to seek), then expanded off the event loop
+                zip_path = os.path.join(upload_dir, f"batch_{uuid.uuid4()}.zip")
+                try:
+                    await stream_upload_to_disk(file, zip_path, settings.BATCH_MAX_UPLOAD_BYTES, settings.UPLOAD_CHUNK_BYTES)
+                    members, member_rejects = await asyncio.to_thread(
+                        _extract_zip_members, zip_path, upload_dir, prefix, settings, settings.BATCH_MAX_FILES - len(saved)
+                    )
+                    saved.extend(members)
+                    rejected.extend(member_rejects)
+                except UploadTooLarge as e:
+                    rejected.append({"filename": filename, "reason": str(e)})
+                finally:
+                    if os.path.exists(zip_path):
+                        await asyncio.to_thread(os.remove, zip_path)
+                continue
+            if extension not in BATCH_DOCUMENT_EXTENSIONS:
+                rejected.append({"filename": filename, "reason": f"Unsupported file type '{extension}'."})
+                continue
+            if len(saved) >= settings.BATCH_MAX_FILES:
+                rejected.append({"filename": filename, "reason": "Batch file limit reached."})
+                continue
+            file_path = os.path.join(upload_dir, f"{prefix}_{uuid.uuid4()}{extension}")
+            try:
+                saved.append((filename, await stream_upload_to_disk(file, file_path, settings.MAX_UPLOAD_BYTES, settings.UPLOAD_CHUNK_BYTES)))
+            except UploadTooLarge as e:
+                rejected.append({"filename": filename, "reason": str(e)})
 
-    # Trigger celery task to process the document
-    task_result = process_document.delay(file_path, "resume")
+        if not saved:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "No documents to ingest.", "rejected": rejected})
 
+        items, duplicates = [], 0
+        for filename, upload in saved:
+            file_path, duplicate = await _dedupe_upload(upload, document_type, storage_service, settings)
+            duplicates += duplicate
+            items.append({"file_path": file_path, "filename": filename, "sha256": upload.sha256})
+    except BaseException:
+        # Nothing was handed to a task yet: don't leave the files of a failed request (disk
+        # full, client disconnect, ...) in uploads/ with no batch to process or clean them up
+        await _discard_uploads([upload.path for _, upload in saved])
+        raise
+
+    manifest = await storage_service.run_io(start_batch_ingestion, storage_service, items, document_type, settings.BATCH_MAX_CONCURRENCY)
     return {
-        "message": "Resume uploaded and processing started.",
-        "filename": file.filename,
-        "stored_path": file_path,
-        "task_id": task_result.id
+        "message": "Batch uploaded and processing started.",
+        "batch_id": manifest["batch_id"],
+        "accepted": len(items),
+        "duplicates": duplicates, # Identical to documents already stored; their work is reused
+        "rejected": rejected,
+        "lanes": manifest["lanes"]
     }
 
+@router.get("/documents/batch/{batch_id}")
+async def get_batch_progress(
+    batch_id: str,
+    storage_service: Annotated[StorageService, Depends(get_storage_service)]
+):
+    """Aggregate progress of a batch upload, including ingestion throughput (docs/second)."""
+    progress = await storage_service.run_io(batch_progress, storage_service, batch_id)
+    if not progress:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Batch '{batch_id}' not found.")
+    return progress
+
 # Optional: Endpoint to check document processing status
 # @router.get("/documents/status/{task_id}")
 # async def get_document_status(task_id: str):
@@ -7,6 +7,7 @@ import uuid # To generate interview IDs
 
 from app.core.interview_manager import InterviewManager # Assuming this class exists
 from app.core.exceptions import InterviewNotFound, InvalidInterviewState # Assuming these exist
+from app.core.session_lifecycle import get_session_lifecycle_manager
 from app.api.v1.dependencies import get_interview_manager # Assuming a dependency for the manager
 from app.models.pydantic_models import InterviewStartRequest # Assuming this model exists
 
@@ -31,9 +32,9 @@ class ChatMessage(BaseModel):
 # Model for outgoing messages from the server (LLM response or control)
 class ServerMessage(BaseModel):
     """Represents a message sent from the server to the user."""
-    type: str # e.g., "llm_response", "mini_llm_filler", "interview_state", "error", "end"
-    payload: str # The text content
-    # Could add more fields like 'partial' for streaming, 'timestamp', etc.
+    type: str # e.g., "llm_response", "llm_response_delta", "llm_response_error", "mini_llm_filler", "interview_state", "error", "end"
+    payload: str # The text content (for "llm_response_delta", just the newly streamed fragment)
+    # Could add more fields like 'timestamp', etc.
 
 # --- End Pydantic Models ---
 
@@ -57,6 +58,15 @@ async def start_interview(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to start interview: {e}")
 
 
+@router.get("/interview/sessions/stats")
+async def get_session_stats():
+    """Resident (in memory) and spilled (persisted while idle) interview session counts."""
+    lifecycle_manager = get_session_lifecycle_manager()
+    if lifecycle_manager is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Session lifecycle manager not running.")
+    return lifecycle_manager.stats()
+
+
 @router.websocket("/interview/{interview_id}/chat")
 async def websocket_interview_chat(
     websocket: WebSocket,
@@ -95,7 +105,7 @@ async def websocket_interview_chat(
                 )
 
                 # The manager (or a separate task) will send responses back
-                # via the websocket instance stored in the session state.
+                # via the websocket registered for this interview (connection_registry).
 
             except ValueError:
                 # Handle invalid JSON or Pydantic validation errors
@@ -103,7 +113,7 @@ async def websocket_interview_chat(
             except WebSocketDisconnect:
                 print(f"WebSocket disconnected for interview_id: {interview_id}")
                 # Clean up session in manager
-                await manager.deactivate_interview_session(interview_id)
+                await manager.deactivate_interview_session(interview_id, websocket)
                 break
             except InterviewNotFound:
                  print(f"InterviewNotFound for interview_id: {interview_id}")
@@ -120,7 +130,7 @@ async def websocket_interview_chat(
     except WebSocketDisconnect:
         print(f"WebSocket disconnected for interview_id: {interview_id}")
         # Clean up session in manager if not already done
-        await manager.deactivate_interview_session(interview_id)
+        await manager.deactivate_interview_session(interview_id, websocket)
     except InterviewNotFound:
         print(f"Initial InterviewNotFound for interview_id: {interview_id}")
         # Cannot activate session, close connection immediately
@@ -1,7 +1,53 @@
 # app/config/celery_config.py - Celery configuration settings
 
+from kombu import Queue
 from app.config.settings import settings
 
+# --- Queues ---
+QUEUE_REALTIME_FINAL = "realtime_final" # Final responses: the candidate is waiting on these
+QUEUE_REALTIME_DRAFT = "realtime_draft" # Drafts/speculation, fillers, history summaries
+QUEUE_INGESTION = "ingestion"           # Document parsing (bulk uploads land here)
+QUEUE_ANALYSIS = "analysis"             # Pre/post-interview analysis, plan generation
+QUEUE_DEFAULT = "default"               # Anything not routed explicitly
+
+MAX_PRIORITY = 9
+
+def _priority(urgency: int) -> int:
+    """
+    Broker priority for an urgency from 0 (most urgent) to MAX_PRIORITY.
+    Redis treats 0 as the highest priority while RabbitMQ treats the highest number as the
+    highest priority, so the value depends on the configured broker.
+    """
+    if settings.CELERY_BROKER_URL.startswith(("redis://", "rediss://")):
+        return urgency
+    return MAX_PRIORITY - urgency
+
+TASK_QUEUES = (
+    Queue(QUEUE_REALTIME_FINAL, routing_key=QUEUE_REALTIME_FINAL),
+    Queue(QUEUE_REALTIME_DRAFT, routing_key=QUEUE_REALTIME_DRAFT),
+    Queue(QUEUE_INGESTION, routing_key=QUEUE_INGESTION),
+    Queue(QUEUE_ANALYSIS, routing_key=QUEUE_ANALYSIS),
+    Queue(QUEUE_DEFAULT, routing_key=QUEUE_DEFAULT),
+)
+
+TASK_ROUTES = {
+    "app.tasks.interview_tasks.process_final_response_task": {"queue": QUEUE_REALTIME_FINAL, "priority": _priority(0)},
+    "app.tasks.interview_tasks.process_chunk_task": {"queue": QUEUE_REALTIME_DRAFT, "priority": _priority(2)},
+    "app.tasks.interview_tasks.trigger_mini_llm_surprise_task": {"queue": QUEUE_REALTIME_DRAFT, "priority": _priority(3)},
+    "app.tasks.interview_tasks.summarize_history_task": {"queue": QUEUE_REALTIME_DRAFT, "priority": _priority(6)}, # Off the response path
+    "app.tasks.document_tasks.*": {"queue": QUEUE_INGESTION, "priority": _priority(7)},
+    "app.tasks.analysis_tasks.*": {"queue": QUEUE_ANALYSIS, "priority": _priority(6)},
+    "app.tasks.llm_tasks.*": {"queue": QUEUE_ANALYSIS, "priority": _priority(5)},
+}
+
+# Worker layout (see docker-compose.yml and scripts/run_worker.sh):
+#   realtime: -Q realtime_final,realtime_draft  (I/O bound LLM calls -> threads pool)
+#   batch:    -Q ingestion,analysis,default     (threads pool; large PDFs use the parser's process pool)
+WORKER_QUEUES = {
+    "realtime": [QUEUE_REALTIME_FINAL, QUEUE_REALTIME_DRAFT],
+    "batch": [QUEUE_INGESTION, QUEUE_ANALYSIS, QUEUE_DEFAULT],
+}
+
 # Define the Celery configuration dictionary
 # This will be loaded by the Celery app instance
 celery_config = {
@@ -15,14 +61,28 @@ celery_config = {
     "timezone": "UTC", # Use UTC
     "enable_utc": True,
 
-    # Optional: Define task queues if you want to route tasks
-    # "task_queues": (
-    #     Queue('default', routing_key='default'),
-    #     Queue('mini_llm', routing_key='mini_llm'), # Example queue for mini-LLM tasks
-    # ),
-    # "task_routes": {
-    #     'app.tasks.interview_tasks.run_mini_llm_surprise': {'queue': 'mini_llm'},
-    # },
+    # Realtime interview work gets its own queues (and workers, see docker-compose.yml) so a
+    # bulk document upload can't delay a candidate's next question.
+    "task_queues": TASK_QUEUES,
+    "task_routes": TASK_ROUTES,
+    "task_default_queue": QUEUE_DEFAULT,
+    # Drafts/fillers are worthless once the candidate has moved on: never start them late
+    "task_annotations": {
+        "app.tasks.interview_tasks.process_chunk_task": {"expires": settings.CELERY_DRAFT_TASK_EXPIRES_SECONDS},
+        "app.tasks.interview_tasks.trigger_mini_llm_surprise_task": {"expires": settings.CELERY_DRAFT_TASK_EXPIRES_SECONDS},
+    },
+    # Each worker process reserves one task at a time, so a long PDF job can't hold
+    # queued tasks hostage and priorities are applied at the broker, not in a prefetch buffer
+    "worker_prefetch_multiplier": 1,
+    "task_queue_max_priority": MAX_PRIORITY, # RabbitMQ: declares x-max-priority on the queues
+    "task_default_priority": _priority(5),
+    # Redis emulates priorities with one list per priority step; a worker consuming several
+    # queues drains them in the order given to -Q (realtime_final before realtime_draft)
+    "broker_transport_options": {
+        "priority_steps": list(range(MAX_PRIORITY + 1)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
 
     # Optional: Configure beat for periodic tasks
     # "beat_schedule": {
@@ -20,14 +20,159 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = Field(..., env="OPENAI_API_KEY") # ... means required
     MAIN_LLM_MODEL: str = "gpt-4o-mini"
     MINI_LLM_MODEL: str = "gpt-3.5-turbo-0125"
+    # Stream final responses token-by-token over the interview WebSocket
+    LLM_STREAMING_ENABLED: bool = True
+    # Shared client pool (one sync + one async client per process)
+    LLM_MAX_CONNECTIONS: int = 100 # Upper bound on open connections to the LLM API
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20 # Idle connections kept warm for reuse
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_MAX_CONCURRENT_REQUESTS: int = 50 # Concurrent async LLM calls per API process
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+
+    # --- Speculative Response Settings ---
+    # While the candidate is still speaking, generate a candidate final answer for the
+    # current chunk buffer instead of a throwaway draft. It is committed as-is when the
+    # final utterance matches what was speculated on.
+    SPECULATIVE_RESPONSES_ENABLED: bool = False
+    # Max character edit distance (after lowercasing/whitespace normalization) between the
+    # speculated-on buffer and the final utterance for the speculation to count as a hit
+    SPECULATIVE_MAX_EDIT_DISTANCE: int = 4 # Enough for punctuation/ASR jitter, not for new words
+
+    # --- Chunk Coalescing Settings ---
+    # Incremental chunks are collapsed per session so that at most one draft job is in flight
+    CHUNK_DEBOUNCE_SECONDS: float = 0.75 # Minimum spacing between draft jobs of one session
+    CHUNK_MIN_NEW_WORDS: int = 4 # New words required since the last dispatched buffer
+    CHUNK_DRAFT_INFLIGHT_TIMEOUT_SECONDS: float = 10.0 # Stop waiting on a draft job that never reported back
+
+    # --- Draft Cancellation Settings ---
+    # A final utterance preempts the session's outstanding drafts: queued ones are revoked,
+    # running ones abort their LLM stream. Late draft results are dropped either way.
+    DRAFT_CANCELLATION_ENABLED: bool = True
+    DRAFT_CANCEL_CHECK_INTERVAL_SECONDS: float = 0.1 # How often a Celery draft polls the state store for a newer final
+
+    # --- Conversation History Settings ---
+    HISTORY_VERBATIM_TURNS: int = 6 # Most recent turns always sent word-for-word
+    HISTORY_MAX_PROMPT_TOKENS: int = 3000 # Budget for summary + verbatim turns per LLM call
+    HISTORY_SUMMARY_BATCH_TURNS: int = 4 # Fold older turns into the summary in batches of this size
+    HISTORY_SUMMARY_MAX_WORDS: int = 250
 
     # --- Celery & Broker Settings ---
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str ="redis://localhost:6379/1"
+    # Draft/filler tasks not started within this many seconds are discarded by the worker
+    CELERY_DRAFT_TASK_EXPIRES_SECONDS: float = 5.0
+
+    # --- Worker Warm Start Settings ---
+    # Build the shared services (clients, prompts, parsers, tokenizer) when a worker process
+    # starts rather than in its first task (see app/services/service_container.py)
+    WORKER_WARMUP_ENABLED: bool = True
+    WORKER_WARMUP_OPEN_LLM_CONNECTION: bool = True # One metadata request so the first task reuses a live connection
+    WORKER_WARMUP_TIMEOUT_SECONDS: float = 5.0
+
+    # --- Live Execution Settings ---
+    # Where the live interview handlers (chunk drafts, final responses, fillers, history
+    # summaries) run: "celery" (broker + realtime workers) or "inline" (asyncio tasks in the
+    # API process holding the WebSocket; no broker round trip). Documents/analysis always use Celery.
+    LIVE_EXECUTION_MODE: str = "celery"
+    INLINE_MAX_CONCURRENT_TASKS: int = 32 # Inline handlers running at once per API process
+
+    # --- Interview State Store Settings ---
+    # "redis" shares live sessions across API workers and Celery workers;
+    # "memory" keeps them in the API process (single worker, LIVE_EXECUTION_MODE="inline" only).
+    STATE_STORE_BACKEND: str = "redis"
+    STATE_REDIS_URL: str = "redis://localhost:6379/2"
+    STATE_TTL_SECONDS: int = 6 * 60 * 60 # Abandoned sessions expire after this long without writes
+    STATE_UPDATE_MAX_RETRIES: int = 10 # Optimistic-update retries before giving up on a session write
+
+    # --- WebSocket Delivery Settings ---
+    # How task results reach the API process holding the interview's WebSocket:
+    # "redis" (pub/sub) or "local" (in-process queue; LIVE_EXECUTION_MODE="inline" only).
+    DELIVERY_BACKEND: str = "redis"
+    DELIVERY_REDIS_URL: str = "redis://localhost:6379/2"
+
+    # --- Crash Recovery (Journal) Settings ---
+    # Live interviews are journaled (chunks, finals, responses) under STORAGE_PATH and
+    # snapshotted periodically, so a restarted process can rebuild them on reconnect.
+    JOURNAL_ENABLED: bool = True
+    JOURNAL_FLUSH_INTERVAL_SECONDS: float = 0.2 # Max time an entry waits in the writer's batch
+    JOURNAL_MAX_BATCH_ENTRIES: int = 500
+    JOURNAL_SNAPSHOT_EVERY_ENTRIES: int = 200 # Journal entries per interview between snapshots
+
+    # --- Session Lifecycle Settings ---
+    # Sessions kept in process memory ("memory" state store) are spilled to STORAGE_PATH when
+    # idle or when the memory budget is exceeded, and rehydrated transparently on next use.
+    SESSION_IDLE_TTL_SECONDS: int = 30 * 60 # Spill sessions without candidate activity for this long
+    SESSION_MEMORY_BUDGET_BYTES: int = 256 * 1024 * 1024 # Estimated budget for resident sessions (LRU spill above it)
+    SESSION_SWEEP_INTERVAL_SECONDS: float = 30.0
+
+    # --- Upload Settings ---
+    # Upload request bodies are rejected with 413 on their Content-Length, or as soon as they
+    # grow past the limit while being received (UploadSizeLimitMiddleware). Accepted files are
+    # then copied to storage chunk by chunk, SHA-256 computed on the way.
+    MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024 # Per file
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024 # Bytes held in memory per upload at a time
+
+    # --- Document Analysis Settings ---
+    # Documents longer than ANALYSIS_CHUNKED_MIN_TOKENS are analyzed in sections of at most
+    # ANALYSIS_SECTION_MAX_TOKENS, in parallel, and the partial results are merged.
+    ANALYSIS_CHUNKED_MIN_TOKENS: int = 6000
+    ANALYSIS_SECTION_MAX_TOKENS: int = 2500
+    ANALYSIS_MAX_PARALLEL_SECTIONS: int = 8 # Concurrent LLM calls per analyzed document
+
+    # --- Batch Ingestion Settings ---
+    # /documents/upload/batch takes many files and/or ZIP archives. Items are processed in
+    # BATCH_MAX_CONCURRENCY lanes: each lane runs one document at a time, then queues its next,
+    # so a large batch never floods the ingestion/analysis workers or the LLM API.
+    BATCH_MAX_FILES: int = 5000
+    BATCH_MAX_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024 # Per uploaded ZIP archive
+    BATCH_MAX_REQUEST_BYTES: int = 4 * 1024 * 1024 * 1024 # Whole batch request (all files and archives)
+    # Expansion limits per ZIP archive (a small archive can hold millions of entries or
+    # decompress to terabytes): entries read, including skipped ones, and bytes extracted
+    BATCH_MAX_ARCHIVE_ENTRIES: int = 10000
+    BATCH_MAX_EXTRACTED_BYTES: int = 4 * 1024 * 1024 * 1024
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # --- Deduplication Settings ---
+    # Uploads are indexed by SHA-256 and document type: identical content of the same type
+    # reuses the existing doc_id, parsed text and analysis. Parsing/analysis of one document runs once even when requested concurrently.
+    DEDUPE_UPLOADS_ENABLED: bool = True
+    SINGLE_FLIGHT_WAIT_SECONDS: float = 300.0 # Max wait on another worker's analysis (and its lock's staleness age)
+    SINGLE_FLIGHT_POLL_SECONDS: float = 0.5
+
+    # --- Document Parsing Settings ---
+    PARSER_MAX_CHARS: int = 500_000 # Stop extracting once this much text is collected (0 = no limit)
+    PARSER_PARALLEL_MIN_PAGES: int = 40 # PDFs with at least this many pages are split across a process pool
+    PARSER_PAGES_PER_TASK: int = 16 # Pages extracted per pool task
+    # Page-extraction processes per worker process (0 = CPU count). Needs a threads or solo
+    # Celery pool: prefork children are daemonic, can't start the pool and parse sequentially.
+    PARSER_MAX_WORKERS: int = 0
 
     # --- Storage Settings ---
     # Ensure this path exists or is handled correctly by the app/docker setup
     STORAGE_PATH: str = "/app/data"
+    # "filesystem" (one file per item under STORAGE_PATH) or "sqlite" (one WAL-mode database,
+    # indexed lookups). Move existing data with scripts/migrate_storage.py.
+    STORAGE_BACKEND: str = "filesystem"
+    STORAGE_SQLITE_PATH: str = "" # Empty = STORAGE_PATH/storage.sqlite3
+    STORAGE_SQLITE_BUSY_TIMEOUT_SECONDS: float = 10.0 # How long a writer waits for another process's transaction
+    # Every write goes to a temp file renamed into place (never a truncated item after a crash).
+    # STORAGE_FSYNC adds durability against power loss: "none", "always" (fsync per write) or
+    # "group" (one committer thread fsyncs batches of concurrent writes; SQLite: synchronous=NORMAL)
+    STORAGE_FSYNC: str = "group"
+    STORAGE_GROUP_COMMIT_MAX_WAIT_MS: float = 0.0 # Extra wait for more writers before a batch is synced
+    STORAGE_GROUP_COMMIT_MAX_BATCH: int = 256 # Writes per batch at most
+    STORAGE_IO_THREADS: int = 8 # Threads serving StorageService's async API in the API process
+    # Parsed documents and analysis results are cached per process (LRU, revalidated by last write time)
+    STORAGE_CACHE_ENABLED: bool = True
+    STORAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Encoding of new writes: "json" (compact) or "msgpack" (binary; falls back to json without
+    # msgpack). Compression: "none", "gzip" or "zstd" (falls back to gzip without zstandard).
+    # Reads detect the format, so these can be changed at any time: existing items stay
+    # readable and are re-encoded when next written. See scripts/bench_storage_codecs.py.
+    STORAGE_ENCODING: str = "msgpack"
+    STORAGE_COMPRESSION: str = "zstd"
+    STORAGE_COMPRESSION_LEVEL: int = 3
+    STORAGE_COMPRESSION_MIN_BYTES: int = 512 # Smaller values are stored uncompressed
 
 
 # Create a settings instance to be imported elsewhere
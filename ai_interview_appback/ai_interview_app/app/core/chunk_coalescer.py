@@ -0,0 +1,129 @@
+# app/core/chunk_coalescer.py - Per-session coalescing/debouncing of incremental chunks
+
+from typing import Dict, Any, Optional, Tuple, List
+
+class ChunkCoalescer:
+    """
+    Decides when an incremental chunk should actually trigger a draft LLM job.
+
+    - At most one draft job is in flight per session.
+    - Chunks that arrive while a job is in flight (or inside the debounce window) are
+      collapsed into the latest buffer; only that buffer is sent once the session is free.
+    - A buffer is only sent if it adds at least `min_new_words` words since the last one sent.
+
+    Pure bookkeeping (no I/O, no timers): the InterviewManager feeds it timestamps and
+    dispatches whatever buffer it hands back.
+    """
+    def __init__(self, debounce_seconds: float, min_new_words: int, inflight_timeout_seconds: float):
+        self.debounce_seconds = debounce_seconds
+        self.min_new_words = min_new_words
+        self.inflight_timeout_seconds = inflight_timeout_seconds
+
+        self.pending_buffer: Optional[str] = None # Latest buffer not yet dispatched
+        self.in_flight_since: Optional[float] = None # Dispatch time of the outstanding draft job
+        self.last_dispatch_at: Optional[float] = None
+        self.last_dispatched_words = 0
+        self.flush_timer = None # asyncio TimerHandle owned by the manager
+        self._pending_chunks = 0 # Chunks folded into pending_buffer
+        # Handles of dispatched drafts the manager can cancel when the turn ends
+        # (Celery task ids, or (asyncio task, CancelToken) pairs in inline mode), oldest first
+        self.outstanding_drafts: List[Any] = []
+
+        # Per-session counters
+        self.chunks_received = 0
+        self.chunks_merged = 0 # Collapsed into a later dispatched buffer
+        self.chunks_dropped = 0 # Never dispatched (turn ended while still pending)
+        self.drafts_dispatched = 0
+        self.drafts_cancelled = 0 # Preempted by a final utterance
+        self._reported_merged = 0
+        self._reported_dropped = 0
+
+    def offer(self, buffer: str, now: float) -> Optional[str]:
+        """Registers the buffer after a new chunk. Returns the buffer to dispatch now, if any."""
+        self.chunks_received += 1
+        self.pending_buffer = buffer
+        self._pending_chunks += 1
+        return self.poll(now)
+
+    def poll(self, now: float) -> Optional[str]:
+        """Returns the pending buffer if every threshold allows dispatching it now."""
+        if self.pending_buffer is None:
+            return None
+        if self.in_flight_since is not None and now - self.in_flight_since < self.inflight_timeout_seconds:
+            return None # Wait for the outstanding job (or its timeout)
+        if self.last_dispatch_at is not None and now - self.last_dispatch_at < self.debounce_seconds:
+            return None
+        word_count = len(self.pending_buffer.split())
+        if word_count - self.last_dispatched_words < self.min_new_words:
+            return None
+
+        buffer = self.pending_buffer
+        self.chunks_merged += self._pending_chunks - 1
+        self.pending_buffer = None
+        self._pending_chunks = 0
+        self.in_flight_since = now
+        self.last_dispatch_at = now
+        self.last_dispatched_words = word_count
+        self.drafts_dispatched += 1
+        return buffer
+
+    def seconds_until_ready(self, now: float) -> Optional[float]:
+        """
+        How long until poll() could succeed on time alone, or None if a timer would not help
+        (nothing pending, or not enough new words - a later chunk will poll again).
+        """
+        if self.pending_buffer is None:
+            return None
+        if len(self.pending_buffer.split()) - self.last_dispatched_words < self.min_new_words:
+            return None
+        wait = 0.0
+        if self.in_flight_since is not None:
+            wait = max(wait, self.in_flight_since + self.inflight_timeout_seconds - now)
+        if self.last_dispatch_at is not None:
+            wait = max(wait, self.last_dispatch_at + self.debounce_seconds - now)
+        return wait
+
+    def complete(self, now: float) -> Optional[str]:
+        """Marks the in-flight job as done. Returns a pending buffer to dispatch next, if any."""
+        self.in_flight_since = None
+        if self.outstanding_drafts:
+            self.outstanding_drafts.pop(0) # Drafts of a session finish in dispatch order, bar timeouts
+        return self.poll(now)
+
+    def end_turn(self):
+        """Called on is_final: pending chunks are dropped and the next turn starts fresh."""
+        self.chunks_dropped += self._pending_chunks
+        self.pending_buffer = None
+        self._pending_chunks = 0
+        # The outstanding draft belongs to the finished turn; don't let it hold back the next one
+        self.in_flight_since = None
+        self.last_dispatch_at = None
+        self.last_dispatched_words = 0
+        self.cancel_timer()
+
+    def take_outstanding_drafts(self) -> List[Any]:
+        """Returns and forgets the handles of the drafts still outstanding (called on is_final)."""
+        drafts, self.outstanding_drafts = self.outstanding_drafts, []
+        return drafts
+
+    def cancel_timer(self):
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+
+    def take_unreported_counts(self) -> Tuple[int, int]:
+        """(merged, dropped) since the previous call, for feeding process-wide metrics."""
+        merged = self.chunks_merged - self._reported_merged
+        dropped = self.chunks_dropped - self._reported_dropped
+        self._reported_merged = self.chunks_merged
+        self._reported_dropped = self.chunks_dropped
+        return merged, dropped
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks_received": self.chunks_received,
+            "chunks_merged": self.chunks_merged,
+            "chunks_dropped": self.chunks_dropped,
+            "drafts_dispatched": self.drafts_dispatched,
+            "drafts_cancelled": self.drafts_cancelled,
+        }
@@ -0,0 +1,40 @@
+# app/core/connection_registry.py - Process-local registry of live interview WebSockets
+
+from typing import Dict, Optional
+from fastapi import WebSocket
+
+# WebSocket objects belong to the API process that accepted them and can't be put in a
+# shared state store, so each process keeps its own interview_id -> WebSocket map.
+local_connections: Dict[str, WebSocket] = {}
+
+
+def register_connection(interview_id: str, websocket: WebSocket) -> Optional[WebSocket]:
+    """Associates a WebSocket with an interview. Returns the previous one, if any."""
+    previous = local_connections.get(interview_id)
+    local_connections[interview_id] = websocket
+    return previous
+
+
+def unregister_connection(interview_id: str, websocket: Optional[WebSocket] = None):
+    """Removes the association (only if it still points at `websocket`, when given)."""
+    if websocket is None or local_connections.get(interview_id) is websocket:
+        local_connections.pop(interview_id, None)
+
+
+def get_connection(interview_id: str) -> Optional[WebSocket]:
+    return local_connections.get(interview_id)
+
+
+async def send_to_connection(interview_id: str, message: str) -> bool:
+    """Sends a text frame to the interview's local WebSocket. Returns False if not delivered."""
+    websocket = local_connections.get(interview_id)
+    if websocket is None:
+        return False
+    try:
+        await websocket.send_text(message)
+        return True
+    except Exception as e:
+        print(f"Error sending message via websocket for interview {interview_id}: {e}")
+        # Handle disconnection? The websocket endpoint should also catch this.
+        unregister_connection(interview_id, websocket) # Clear the reference if sending fails
+        return False
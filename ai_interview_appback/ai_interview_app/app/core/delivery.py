@@ -0,0 +1,185 @@
+# app/core/delivery.py - Cross-process delivery of ServerMessages to interview WebSockets
+
+import json
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from app.config.settings import Settings, settings as app_settings
+from app.utils import metrics
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:
+    redis = None
+    aioredis = None
+    print("Warning: redis not installed. Redis delivery channel disabled.")
+
+# Celery workers (or anything else without the socket) publish envelopes keyed by
+# interview_id; a subscriber in every API process hands them to its local sockets.
+# Envelope format:
+#   {"interview_id": str, "message": Optional[str] (ServerMessage JSON),
+#    "event": Optional[str], "published_at": float (time.time())}
+CHANNEL_PREFIX = "interview_delivery:"
+
+# Events for the API process that owns the session (no client message attached)
+DRAFT_COMPLETED = "draft_completed" # A draft/speculative job finished; frees the coalescer slot
+
+DeliveryHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def make_envelope(interview_id: str, message: Optional[str] = None, event: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "interview_id": interview_id,
+        "message": message,
+        "event": event,
+        "published_at": time.time() # Wall clock, so latency can be measured across processes
+    }
+
+
+class DeliveryChannel(ABC):
+    """
+    Publishes envelopes from any process and runs the subscriber loop in API processes.
+    Envelopes are handed to the handler one at a time, in publish order.
+    """
+    def __init__(self):
+        self._listener: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    def publish(self, interview_id: str, message: Optional[str] = None, event: Optional[str] = None) -> None:
+        """Publishes a message and/or event for an interview. Never blocks on the client."""
+
+    @abstractmethod
+    async def _listen(self, handler: DeliveryHandler) -> None:
+        """Subscriber loop; runs until cancelled."""
+
+    async def start(self, handler: DeliveryHandler):
+        """Starts the subscriber loop on the running event loop (API lifespan)."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(handler))
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    @staticmethod
+    async def _handle(handler: DeliveryHandler, envelope: Dict[str, Any]):
+        try:
+            await handler(envelope)
+        except Exception as e:
+            # One bad envelope/socket must not stop delivery for every other interview
+            print(f"Error delivering message for interview {envelope.get('interview_id')}: {e}")
+
+
+class LocalDeliveryChannel(DeliveryChannel):
+    """
+    In-process stand-in for pub/sub: publishers (possibly on other threads) put envelopes
+    on an asyncio queue drained by the API event loop. Only reaches publishers that run in
+    the API process itself (solo/inline execution, tests).
+    """
+    def __init__(self):
+        super().__init__()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+
+    def publish(self, interview_id: str, message: Optional[str] = None, event: Optional[str] = None) -> None:
+        if self._loop is None or self._loop.is_closed():
+            print(f"Warning: No delivery subscriber in this process; dropping message for {interview_id}.")
+            metrics.increment("delivery_dropped")
+            return
+        metrics.increment("delivery_published")
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, make_envelope(interview_id, message, event))
+
+    async def start(self, handler: DeliveryHandler):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        await super().start(handler)
+
+    async def stop(self):
+        await super().stop()
+        self._loop = None
+
+    async def _listen(self, handler: DeliveryHandler) -> None:
+        while True:
+            envelope = await self._queue.get()
+            await self._handle(handler, envelope)
+
+
+class RedisDeliveryChannel(DeliveryChannel):
+    """
+    Redis pub/sub delivery: one channel per interview (`interview_delivery:<id>`).
+    Every API process pattern-subscribes to all of them and drops envelopes for
+    interviews whose socket it does not hold. Pub/sub is fire-and-forget: if no API
+    process holds the socket the message is lost, like a send on a closed socket.
+    """
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        if redis is None:
+            raise RuntimeError("redis package is not installed; cannot use the Redis delivery channel.")
+        self.redis_url = redis_url
+        self._redis = redis.Redis.from_url(redis_url) # Publishing side (sync, used by Celery tasks)
+
+    def publish(self, interview_id: str, message: Optional[str] = None, event: Optional[str] = None) -> None:
+        envelope = make_envelope(interview_id, message, event)
+        try:
+            receivers = self._redis.publish(f"{CHANNEL_PREFIX}{interview_id}", json.dumps(envelope))
+        except redis.RedisError as e:
+            print(f"Error publishing message for interview {interview_id}: {e}")
+            metrics.increment("delivery_dropped")
+            return
+        metrics.increment("delivery_published")
+        if receivers == 0:
+            metrics.increment("delivery_no_subscriber")
+
+    async def _listen(self, handler: DeliveryHandler) -> None:
+        while True:
+            client = aioredis.Redis.from_url(self.redis_url)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                print("Delivery subscriber listening on Redis pub/sub.")
+                async for item in pubsub.listen():
+                    if item.get("type") != "pmessage":
+                        continue
+                    await self._handle(handler, json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Delivery subscriber error: {e}. Reconnecting in {self.RECONNECT_DELAY_SECONDS}s.")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+            finally:
+                for resource in (pubsub, client):
+                    try:
+                        # aclose() on redis-py >= 5, close() on 4.x
+                        await (getattr(resource, "aclose", None) or resource.close)()
+                    except Exception:
+                        pass
+
+
+def create_delivery_channel(settings: Settings = app_settings) -> DeliveryChannel:
+    """Builds the delivery channel selected by DELIVERY_BACKEND ("local" or "redis")."""
+    backend = settings.DELIVERY_BACKEND.lower()
+    if backend == "redis":
+        return RedisDeliveryChannel(settings.DELIVERY_REDIS_URL)
+    if backend == "local":
+        return LocalDeliveryChannel()
+    raise ValueError(f"Unknown DELIVERY_BACKEND '{settings.DELIVERY_BACKEND}'.")
+
+
+_delivery_channel: Optional[DeliveryChannel] = None
+
+def get_delivery_channel() -> DeliveryChannel:
+    """Process-wide delivery channel, created on first use."""
+    global _delivery_channel
+    if _delivery_channel is None:
+        _delivery_channel = create_delivery_channel()
+    return _delivery_channel
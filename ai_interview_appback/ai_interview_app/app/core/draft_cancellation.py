@@ -0,0 +1,63 @@
+# app/core/draft_cancellation.py - Cancellation tokens for draft LLM calls preempted by a final utterance
+
+import time
+import threading
+from typing import Callable, Optional
+
+from app.utils import metrics
+
+# Every draft (or speculative) job carries the session's journal seq at dispatch time
+# (`draft_seq`). A final utterance records its own seq in InterviewState.last_final_seq, so
+# a draft is obsolete once `draft_seq <= last_final_seq`. On a final the owning API process
+# cancels its outstanding drafts (inline: cancel the asyncio task; Celery: revoke the queued
+# task), and a draft that is already running notices through its CancelToken and closes its
+# LLM stream. Results that still arrive late are dropped by the manager on the same seq check.
+
+
+class CancelToken:
+    """
+    Cooperative cancellation for one draft LLM call.
+    LLMService checks `cancelled` between stream deltas and closes the HTTP stream once it is
+    set; it also records how far the call got so the saved tokens can be estimated.
+    `is_stale` is an optional check of shared state, polled at most every
+    `check_interval_seconds` (how a Celery worker learns about a final received elsewhere).
+    """
+    def __init__(self, is_stale: Optional[Callable[[], bool]] = None, check_interval_seconds: float = 0.1):
+        self._event = threading.Event()
+        self._is_stale = is_stale
+        self.check_interval_seconds = check_interval_seconds
+        self._last_check = 0.0
+        # Filled in by LLMService
+        self.started = False # The LLM request was issued
+        self.max_tokens = 0
+        self.tokens_received = 0 # Stream deltas received (about one token each)
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._is_stale is None:
+            return False
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval_seconds:
+            return False
+        self._last_check = now
+        if self._is_stale():
+            self._event.set()
+            return True
+        return False
+
+
+def record_cancelled_draft(interview_id: str, token: Optional[CancelToken]):
+    """Counts a preempted draft: skipped before its LLM call, or aborted with the tokens it didn't generate."""
+    if token is None or not token.started:
+        metrics.increment("draft_calls_skipped")
+        print(f"Draft for {interview_id} cancelled before its LLM call.")
+        return
+    saved = max(0, token.max_tokens - token.tokens_received) # Upper bound: the draft might have stopped earlier
+    metrics.increment("draft_calls_aborted")
+    metrics.increment("draft_tokens_saved", saved)
+    print(f"Draft for {interview_id} aborted after {token.tokens_received} tokens (~{saved} tokens saved).")
@@ -25,6 +25,13 @@ class DocumentProcessingError(AIInterviewAppException):
         self.detail = detail
         super().__init__(f"Document processing failed for '{document_path}': {detail}")
 
+class UploadTooLarge(AIInterviewAppException):
+    """Raised when an uploaded file exceeds the configured maximum size."""
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        super().__init__(f"Upload '{filename}' exceeds the maximum size of {max_bytes} bytes.")
+
 class LLMServiceError(AIInterviewAppException):
     """Raised when there's an error interacting with the LLM service."""
     def __init__(self, message: str, original_exception: Exception = None):
@@ -32,6 +39,12 @@ class LLMServiceError(AIInterviewAppException):
         self.original_exception = original_exception
         super().__init__(f"LLM service error: {message}")
 
+class DraftCancelled(AIInterviewAppException):
+    """Raised inside a draft LLM call whose cancellation token fired (a final utterance preempted it)."""
+    def __init__(self, interview_id: str = ""):
+        self.interview_id = interview_id
+        super().__init__(f"Draft for interview '{interview_id}' was cancelled.")
+
 class StorageError(AIInterviewAppException):
     """Raised when there's an error interacting with the storage service."""
     def __init__(self, message: str, original_exception: Exception = None):
@@ -39,5 +52,12 @@ class StorageError(AIInterviewAppException):
         self.original_exception = original_exception
         super().__init__(f"Storage error: {message}")
 
+class StateStoreError(AIInterviewAppException):
+    """Raised when the interview state store cannot read or update a session."""
+    def __init__(self, message: str, original_exception: Exception = None):
+        self.message = message
+        self.original_exception = original_exception
+        super().__init__(f"State store error: {message}")
+
 
 # Add other specific exceptions as needed, e.g., for analysis failures, etc.
\ No newline at end of file
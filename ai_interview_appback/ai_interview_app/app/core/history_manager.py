@@ -0,0 +1,120 @@
+# app/core/history_manager.py - Token-budgeted conversation history with rolling summarization
+
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.core.interview_state import InterviewState, ConversationTurn
+from app.prompts import history_prompts
+
+# Optional: exact token counts for OpenAI models (falls back to an estimate)
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+    print("Warning: tiktoken not installed. Using approximate token counts for history budgeting.")
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+def load_token_encoding():
+    """
+    The tiktoken encoding, or None to estimate. tiktoken downloads the encoding on first use
+    (unless it is in TIKTOKEN_CACHE_DIR, as in the Docker image); if that fails, the failure is
+    remembered: retrying would stall every count on the network and still fail. Loaded at
+    API/worker startup so no request pays for the download.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed or tiktoken is None:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                _encoding_failed = True
+                print(f"Warning: could not load the tiktoken encoding ({e}). Using approximate token counts.")
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Counts tokens in text with tiktoken if available, else estimates (~4 chars per token)."""
+    if not text:
+        return 0
+    encoding = load_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def turn_to_messages(turn: ConversationTurn) -> List[Dict[str, str]]:
+    """Converts a stored turn into chat messages."""
+    return [
+        {"role": "user", "content": turn.user},
+        {"role": "assistant", "content": turn.assistant},
+    ]
+
+
+class ConversationHistoryManager:
+    """
+    Builds the conversation context sent to the LLM so prompt size stays flat
+    however long the interview runs:
+
+    - every turn stores its token count when it is committed;
+    - the last `verbatim_turns` turns are sent as-is (within `max_prompt_tokens`);
+    - older turns are folded into a rolling summary kept on the state, refreshed in
+      the background by the mini model (never on the hot path).
+    """
+    def __init__(self, verbatim_turns: int, max_prompt_tokens: int, summary_batch_turns: int):
+        self.verbatim_turns = verbatim_turns
+        self.max_prompt_tokens = max_prompt_tokens
+        self.summary_batch_turns = summary_batch_turns
+
+    def record_turn(self, state: InterviewState, user_text: str, assistant_text: str):
+        """Appends a committed turn to the history together with its token count."""
+        tokens = count_tokens(user_text) + count_tokens(assistant_text)
+        state.conversation_history.append(ConversationTurn(user_text, assistant_text, tokens))
+
+    def build_context(self, state: InterviewState) -> List[Dict[str, str]]:
+        """
+        Returns the history part of the prompt: the summary (if any) followed by the most
+        recent turns, newest-first selection bounded by turn count and token budget.
+        """
+        history = state.conversation_history
+        summary_message = []
+        budget = self.max_prompt_tokens
+        if state.history_summary:
+            content = history_prompts.get_summary_context_message().format(summary=state.history_summary)
+            summary_message = [{"role": "system", "content": content}]
+            budget -= count_tokens(content)
+
+        selected: List[ConversationTurn] = []
+        # Walk back from the newest turn. Turns already folded into the summary are only
+        # included while inside the verbatim window; turns the summary does not cover yet
+        # (a refresh may be running) are kept as long as the token budget allows.
+        for index in range(len(history) - 1, -1, -1):
+            turn = history[index]
+            in_window = len(selected) < self.verbatim_turns
+            if not in_window and index < state.summarized_turns:
+                break
+            tokens = turn.tokens or count_tokens(turn.user) + count_tokens(turn.assistant)
+            if tokens > budget and selected:
+                break
+            selected.append(turn)
+            budget -= tokens
+
+        messages = list(summary_message)
+        for turn in reversed(selected):
+            messages.extend(turn_to_messages(turn))
+        return messages
+
+    def turns_to_summarize(self, state: InterviewState) -> Optional[Tuple[List[ConversationTurn], int]]:
+        """
+        Returns (turns, new_summarized_count) when enough turns have left the verbatim
+        window to be worth a summary refresh, else None.
+        """
+        if state.summary_in_progress:
+            return None
+        fold_until = len(state.conversation_history) - self.verbatim_turns
+        if fold_until - state.summarized_turns < self.summary_batch_turns:
+            return None
+        return state.conversation_history[state.summarized_turns:fold_until], fold_until
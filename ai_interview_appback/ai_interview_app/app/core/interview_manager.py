@@ -1,24 +1,47 @@
 # app/core/interview_manager.py - Core logic for managing interview sessions
 
 import uuid
+import time
 import asyncio
-from typing import Dict, Any, Optional
-from fastapi import WebSocket # Need WebSocket type hint if passed
+from typing import Dict, Any, Optional, Iterable, AsyncIterable, Tuple
+from fastapi import WebSocket, status # Need WebSocket type hint if passed
 
 from app.core.interview_state import InterviewState # Assuming InterviewState exists
 from app.core.exceptions import InterviewNotFound, InvalidInterviewState # Assuming exceptions exist
+from app.core.state_store import InterviewStateStore, get_state_store
+from app.core.connection_registry import register_connection, unregister_connection, get_connection, send_to_connection
+from app.core.delivery import DeliveryChannel, get_delivery_channel, DRAFT_COMPLETED
+from app.core.journal import JournalWriter, get_journal_writer, recover_interview_state, make_snapshot
+from app.core.session_lifecycle import get_session_lifecycle_manager
+from app.core.live_executor import InlineTaskExecutor, get_inline_executor, CELERY, INLINE
+from app.core import journal
+from app.core.chunk_coalescer import ChunkCoalescer
+from app.core.draft_cancellation import CancelToken, record_cancelled_draft
+from app.core.history_manager import ConversationHistoryManager
 from app.services.llm_service import LLMService # Import needed services
 from app.services.mini_llm_service import MiniLLMService
 from app.services.storage_service import StorageService
 from app.config.settings import Settings # Manager might need settings
+from app.models.pydantic_models import ServerMessage # Outgoing WebSocket message format
+from app.utils import metrics
+from app.utils.helpers import normalize_utterance, bounded_edit_distance
 # Import Celery tasks the manager will trigger
-from app.tasks.interview_tasks import process_chunk_task, process_final_response_task, trigger_mini_llm_surprise_task
+from app.tasks.interview_tasks import process_chunk_task, process_final_response_task, trigger_mini_llm_surprise_task, summarize_history_task
+from app.tasks.analysis_tasks import run_post_interview_analysis
+from app.tasks.celery import celery_app # Revoking queued drafts
 # Assuming tasks are imported and callable via .delay()
+# Same handlers as asyncio coroutines, for LIVE_EXECUTION_MODE="inline"
+from app.tasks import inline_tasks
 
-# In-memory store for active interview states (for simplicity).
-# In a real production app, this might be a database or a dedicated state service
-# that handles persistence and concurrent access.
-active_interview_states: Dict[str, InterviewState] = {}
+# Active interview states live in the state store (app/core/state_store.py): in memory for a
+# single process, or in Redis so every API worker and Celery worker sees the same sessions.
+# WebSocket connections are process-local and tracked in app/core/connection_registry.py;
+# messages produced elsewhere (Celery tasks) reach them through the delivery channel
+# (app/core/delivery.py), whose subscriber in each API process calls handle_delivery.
+
+# Per-session chunk coalescers. These only hold dispatch timing, so they stay in the API
+# process that owns the session's WebSocket.
+chunk_coalescers: Dict[str, ChunkCoalescer] = {}
 
 class InterviewManager:
     """
@@ -30,15 +53,35 @@ class InterviewManager:
         llm_service: LLMService,
         mini_llm_service: MiniLLMService,
         storage_service: StorageService,
-        settings: Settings
+        settings: Settings,
+        state_store: Optional[InterviewStateStore] = None,
+        delivery_channel: Optional[DeliveryChannel] = None,
+        journal_writer: Optional[JournalWriter] = None,
+        inline_executor: Optional[InlineTaskExecutor] = None
     ):
         self.llm_service = llm_service
         self.mini_llm_service = mini_llm_service
         self.storage_service = storage_service
         self.settings = settings
-        # Note: Accessing active_interview_states directly here assumes
-        # this manager instance is effectively a singleton or operates
-        # on a globally accessible state registry.
+        # All reads/writes of InterviewState go through the store; writes via store.update
+        # so concurrent API/worker updates to the same session can't overwrite each other.
+        self.store = state_store or get_state_store()
+        # Outgoing messages from task-side methods are published here, never written to a socket directly
+        self.delivery = delivery_channel or get_delivery_channel()
+        # Write-ahead journal for crash recovery (entries are batched on a background thread)
+        self.journal = journal_writer or (get_journal_writer(settings) if settings.JOURNAL_ENABLED else None)
+        # Where chunk/final/surprise/summary handlers run: Celery workers, or asyncio tasks in
+        # this process (no broker hop; needs the local state store/delivery channel or Redis ones)
+        mode = settings.LIVE_EXECUTION_MODE.lower()
+        if mode not in (CELERY, INLINE):
+            raise ValueError(f"Unknown LIVE_EXECUTION_MODE '{settings.LIVE_EXECUTION_MODE}'.")
+        self.inline_executor = (inline_executor or get_inline_executor(settings)) if mode == INLINE else None
+        # Builds the token-budgeted history (summary + recent turns) sent with every LLM call
+        self.history_manager = ConversationHistoryManager(
+            verbatim_turns=settings.HISTORY_VERBATIM_TURNS,
+            max_prompt_tokens=settings.HISTORY_MAX_PROMPT_TOKENS,
+            summary_batch_turns=settings.HISTORY_SUMMARY_BATCH_TURNS
+        )
 
     async def start_interview(self, job_description_id: str, resume_id: str) -> str:
         """
@@ -49,29 +92,28 @@ class InterviewManager:
         interview_id = str(uuid.uuid4())
         print(f"Starting new interview with ID: {interview_id}")
 
-        # TODO: Load JD and Resume analysis results using storage_service
-        # jd_data = await self.storage_service.load_analysis(job_description_id)
-        # resume_data = await self.storage_service.load_analysis(resume_id)
-
-        # TODO: Perform pre-interview analysis or trigger task
-        # This analysis determines the initial questions and interview plan
-        # interview_plan = await self.run_pre_interview_analysis(jd_data, resume_data)
-        # For now, let's use placeholders
-        interview_plan = {"initial_questions": ["Tell me about yourself.", "Walk me through your resume."], "topics": ["Experience", "Skills"]}
+        # The plan (topics, initial questions, first question) is precomputed by the document
+        # pipeline once both documents are analyzed (build_interview_plan in llm_tasks.py)
+        interview_plan = await self.storage_service.aload_interview_plan(job_description_id, resume_id) if self.storage_service else None
+        if interview_plan is None:
+            # Documents uploaded one by one (no pair pipeline), or the plan isn't built yet
+            print(f"No precomputed interview plan for JD:{job_description_id}, Resume:{resume_id}. Using the default plan.")
+            interview_plan = {"initial_questions": ["Tell me about yourself.", "Walk me through your resume."], "topics": ["Experience", "Skills"]}
 
         initial_state = InterviewState(
             id=interview_id,
             job_description_id=job_description_id,
             resume_id=resume_id,
             interview_plan=interview_plan,
-            transcript="", # Start with empty transcript
-            conversation_history=[] # LLM conversation history format
+            conversation_history=[], # LLM conversation history format (transcript starts empty)
+            last_activity_at=time.time() # Idle clock starts now, not at the first connection
             # ... other state fields
         )
 
-        # Store the initial state (e.g., in memory, database, or cache)
-        # For this example, use the simple in-memory dict
-        active_interview_states[interview_id] = initial_state
+        # Store the initial state in the configured state store (memory or Redis)
+        await self._run_store(self.store.create, initial_state)
+        if self.journal:
+            self.journal.snapshot(initial_state) # Base snapshot the journal is replayed onto
         print(f"Interview state created for {interview_id}")
 
         # Potentially trigger the first question generation task here
@@ -85,164 +127,691 @@ class InterviewManager:
         Loads or retrieves an active interview state and associates a WebSocket connection.
         Sends the initial state/first question to the client.
         """
-        state = active_interview_states.get(interview_id)
+        state, _ = await self._aupdate_session(interview_id, self._touch)
         if not state:
-            # Attempt to load from persistent storage if not in memory?
-            # For now, just raise error if not in active states
             raise InterviewNotFound(f"Interview session {interview_id} not found.")
 
-        if state.websocket is not None:
+        previous_websocket = register_connection(interview_id, websocket) # Store the active websocket
+        if previous_websocket is not None and previous_websocket is not websocket:
              print(f"Warning: Existing WebSocket found for {interview_id}. Closing previous connection.")
              # TODO: Handle existing connection - either reject new one or close old one gracefully
+             # Note: only connections held by this process are seen here.
              try:
-                 await state.websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Another connection opened.")
+                 await previous_websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Another connection opened.")
              except Exception as e:
                  print(f"Error closing previous websocket for {interview_id}: {e}")
 
-
-        state.websocket = websocket # Store the active websocket
         print(f"WebSocket associated with interview_id: {interview_id}")
 
         # Send initial data to the client (e.g., first question, state info)
-        # TODO: Get the initial question based on the interview_plan
-        initial_question = state.interview_plan["initial_questions"][0] if state.interview_plan["initial_questions"] else "Hello, please tell me about yourself."
+        # A precomputed plan carries a tailored first question; otherwise use the first initial question
+        initial_question = state.interview_plan.get("first_question") or (
+            state.interview_plan["initial_questions"][0] if state.interview_plan.get("initial_questions") else "Hello, please tell me about yourself."
+        )
 
-        await state.send_message(
-            ServerMessage(type="llm_response", payload=initial_question).model_dump_json()
+        await send_to_connection(
+            interview_id, ServerMessage(type="llm_response", payload=initial_question).model_dump_json()
         )
 
         # Send the current state as well? Useful for client sync on reconnect.
-        # await state.send_message(
+        # await send_to_connection(interview_id, 
         #      ServerMessage(type="interview_state", payload=state.model_dump_json()).model_dump_json()
         # )
 
 
-    async def deactivate_interview_session(self, interview_id: str):
+    async def deactivate_interview_session(self, interview_id: str, websocket: Optional[WebSocket] = None):
         """Removes WebSocket association and potentially marks state as inactive."""
-        state = active_interview_states.get(interview_id)
-        if state:
-            state.websocket = None # Remove websocket reference
-            # Decide if the state should be kept in memory or moved/persisted
-            # For simplicity, keep it for now. In production, maybe move to 'completed'/'inactive' storage.
-            print(f"WebSocket un-associated from interview_id: {interview_id}")
+        # Passing the websocket avoids dropping a newer connection that replaced this one
+        unregister_connection(interview_id, websocket) # Remove websocket reference
+        # The state itself stays in the store (and expires via its TTL if never resumed).
+        # In production, maybe move to 'completed'/'inactive' storage.
+        print(f"WebSocket un-associated from interview_id: {interview_id}")
 
     async def handle_user_input(self, interview_id: str, input_type: str, content: str, is_final: bool, timestamp: float):
         """
         Processes incoming user input (transcription chunks).
         Determines when to send tasks to Celery for LLM processing.
         """
-        state = active_interview_states.get(interview_id)
-        if not state:
-            raise InterviewNotFound(f"Interview session {interview_id} not found or inactive.")
-
-        # Append the new chunk to the state's transcript and chunk buffer
-        state.add_chunk(content, is_final, timestamp)
-        print(f"Added chunk to {interview_id}. is_final: {is_final}. Current buffer: '{state.current_chunk_buffer}'")
-
         if is_final:
-            print(f"Final input received for {interview_id}. Triggering final processing.")
-            # User has finished speaking (pause detected).
-            # Send the accumulated buffer to a Celery task for final LLM processing.
-            # The task will generate the definitive response based on the full utterance.
-            process_final_response_task.delay(
-                interview_id=interview_id,
-                full_utterance=state.current_chunk_buffer,
-                conversation_history=state.conversation_history # Send history for context
+            # Append the final chunk, take the full utterance and the pending speculation and
+            # clear both, as one atomic update of the session
+            state, taken = await self._aupdate_session(
+                interview_id, lambda s: self._take_final_utterance(s, content, timestamp)
             )
-            # Clear the chunk buffer as the full utterance has been sent
-            state.clear_chunk_buffer()
+            if not state:
+                raise InterviewNotFound(f"Interview session {interview_id} not found or inactive.")
+            full_utterance, speculation, seq = taken
+            self._journal(interview_id, seq, journal.FINAL, {"text": content, "timestamp": timestamp})
+            print(f"Final input received for {interview_id}: '{full_utterance}'. Triggering final processing.")
+            # Drafts for the unfinished utterance are obsolete: stop paying for them and free
+            # their LLM/worker capacity for the final
+            self._cancel_outstanding_drafts(interview_id)
+
+            # Speculative mode: if a candidate answer was already generated for (nearly) this
+            # exact utterance, commit it right away instead of starting a new LLM call.
+            speculative_response = self._match_speculation(speculation, full_utterance)
+            if speculative_response is not None:
+                self._end_coalescer_turn(interview_id)
+                print(f"Speculative hit for {interview_id}. Committing precomputed response.")
+                await self.afinalize_llm_response(
+                    interview_id,
+                    speculative_response,
+                    {"user": full_utterance, "assistant": speculative_response}
+                )
+                return
+
+            # User has finished speaking (pause detected).
+            # Send the accumulated buffer for final LLM processing (Celery task or inline).
+            # The handler will generate the definitive response based on the full utterance.
+            self._dispatch_final(state, full_utterance)
+
+            # Pending chunks of this turn are no longer worth a draft
+            self._end_coalescer_turn(interview_id)
 
             # Potentially trigger a mini-LLM surprise task here?
             # Maybe based on randomness or specific context after a pause.
-            # trigger_mini_llm_surprise_task.delay(interview_id=interview_id, context="after_user_pause")
+            # self._dispatch_surprise(interview_id, context="after_user_pause")
 
         else:
+            # Append the new chunk to the state's chunk buffer
+            def _add_chunk(s: InterviewState) -> int:
+                s.add_chunk(content, is_final, timestamp)
+                self._touch(s)
+                return s.next_journal_seq()
+
+            state, seq = await self._aupdate_session(interview_id, _add_chunk)
+            if not state:
+                raise InterviewNotFound(f"Interview session {interview_id} not found or inactive.")
+            # Only a queue put: the journal is written by a background thread
+            self._journal(interview_id, seq, journal.CHUNK, {"text": content, "timestamp": timestamp})
+            print(f"Added chunk to {interview_id}: '{content}'. Buffer now {len(state.chunk_segments)} chunks.")
+
             # User is still speaking. Process the chunk incrementally.
-            # Trigger a Celery task to process the incremental chunk.
-            # This task *might* trigger a background LLM call that generates
-            # a *draft* response, which updates the state.
-            # The front-end polls or is pushed the *latest draft* stored in the state.
-            # Or, the LLM task could potentially push partial results back if using streaming.
-            # The prompt for this task tells the LLM the input is incomplete.
-            process_chunk_task.delay(
-                interview_id=interview_id,
-                chunk=content,
-                current_buffer=state.current_chunk_buffer, # Send current buffer for context
-                conversation_history=state.conversation_history
-            )
+            # The coalescer decides whether this chunk triggers a draft job now, or is merged
+            # into the latest buffer and sent once the in-flight job finishes / debounce expires.
+            coalescer = self._get_coalescer(interview_id)
+            buffer = coalescer.offer(state.current_chunk_buffer, time.monotonic())
+            if buffer is not None:
+                self._dispatch_chunk_task(state, buffer)
+            else:
+                self._schedule_coalescer_flush(interview_id)
 
             # --- Logic for sending back latest draft / handling "live" response ---
             # This part is tricky in a strict request/response model.
             # With WebSockets, the manager or a background process/task needs
             # to monitor the state for `latest_llm_draft` updates and push them.
             # A dedicated task monitoring state changes or the `process_chunk_task`
-            # itself could send messages back via the stored websocket reference.
+            # itself could send messages back via the registered websocket connection.
             # For now, the `handle_user_input` function just triggers the processing task.
             # The mechanism for sending responses back is handled elsewhere (e.g., in tasks or a state watcher).
 
-    # Add methods to be called by Celery tasks upon completion
-    async def update_state_with_llm_draft(self, interview_id: str, latest_draft: str):
+    def _update_session(self, interview_id: str, mutator):
+        """
+        store.update that first rehydrates a session missing from the store (spilled by the
+        session lifecycle manager, or lost in a restart) from its snapshot + journal.
+        """
+        state, result = self.store.update(interview_id, mutator)
+        if state is None and self._rehydrate(interview_id):
+            state, result = self.store.update(interview_id, mutator)
+        return state, result
+
+    async def _aupdate_session(self, interview_id: str, mutator):
+        """_update_session for event-loop callers: store round trips and the snapshot/journal read run off the loop."""
+        state, result = await self._run_store(self.store.update, interview_id, mutator)
+        if state is None and await self._arehydrate(interview_id):
+            state, result = await self._run_store(self.store.update, interview_id, mutator)
+        return state, result
+
+    async def _run_store(self, func, *args):
+        """
+        Calls a state store method from the event loop. The in-memory store only takes a lock,
+        so it is called directly; a shared store (Redis WATCH/MULTI round trips, retried under
+        contention) runs on the storage I/O pool so other sessions' chunks aren't held up.
+        """
+        if self.store.is_process_local:
+            return func(*args)
+        if self.storage_service is None:
+            return await asyncio.to_thread(func, *args)
+        return await self.storage_service.run_io(func, *args)
+
+    def _rehydrate(self, interview_id: str) -> bool:
+        """Puts a persisted (not ended) session back into the store. Returns False if there is none."""
+        if self.storage_service is None:
+            return False
+        return self._restore(recover_interview_state(interview_id, self.storage_service, self.history_manager))
+
+    async def _arehydrate(self, interview_id: str) -> bool:
+        if self.storage_service is None:
+            return False
+        return await self.storage_service.run_io(self._rehydrate, interview_id) # Read + store.create_if_absent, off the loop
+
+    def _restore(self, state: Optional[InterviewState]) -> bool:
+        if state is None:
+            return False
+        # Concurrent inputs/results for a spilled session can all rehydrate it: only the first
+        # copy is stored, and every caller retries its update against that one (a plain create
+        # would replace a copy another caller already changed)
+        if self.store.create_if_absent(state):
+            metrics.increment("sessions_rehydrated")
+        return True
+
+    @staticmethod
+    def _touch(state: InterviewState):
+        """Marks candidate activity (input or connection); idle eviction keys off this."""
+        state.last_activity_at = time.time()
+
+    def release_local_resources(self, interview_id: str):
+        """Drops per-process helpers of a session spilled out of memory (rebuilt on next use)."""
+        coalescer = chunk_coalescers.pop(interview_id, None)
+        if coalescer:
+            coalescer.cancel_timer()
+
+    def _get_coalescer(self, interview_id: str) -> ChunkCoalescer:
+        coalescer = chunk_coalescers.get(interview_id)
+        if coalescer is None:
+            coalescer = ChunkCoalescer(
+                debounce_seconds=self.settings.CHUNK_DEBOUNCE_SECONDS,
+                min_new_words=self.settings.CHUNK_MIN_NEW_WORDS,
+                inflight_timeout_seconds=self.settings.CHUNK_DRAFT_INFLIGHT_TIMEOUT_SECONDS
+            )
+            chunk_coalescers[interview_id] = coalescer
+        return coalescer
+
+    def _dispatch_chunk_task(self, state: InterviewState, buffer: str):
+        """Sends one (coalesced) buffer to the draft/speculative handler (Celery task or inline)."""
+        # This task *might* trigger a background LLM call that generates
+        # a *draft* response, which updates the state.
+        # The prompt for this task tells the LLM the input is incomplete.
+        draft_seq = state.journal_seq # Results are dropped once a final with a higher seq arrived
+        coalescer = chunk_coalescers.get(state.id)
+        track = self.settings.DRAFT_CANCELLATION_ENABLED and coalescer is not None
+        if self.inline_executor:
+            history = self.history_manager.build_context(state)
+            cancel_token = CancelToken() if track else None
+            task = self.inline_executor.submit(
+                "process_chunk", state.id,
+                lambda: inline_tasks.process_chunk(self, state.id, buffer, history, draft_seq, cancel_token),
+                expires_seconds=self.settings.CELERY_DRAFT_TASK_EXPIRES_SECONDS, # Stale drafts are skipped
+                on_expired=lambda: self.release_draft_slot(state.id)
+            )
+            if track:
+                coalescer.outstanding_drafts.append((task, cancel_token))
+            return
+        result = process_chunk_task.delay(
+            interview_id=state.id,
+            chunk=buffer[-200:], # Only used for logging; the buffer carries the content
+            current_buffer=buffer, # Send current buffer for context
+            conversation_history=self.history_manager.build_context(state),
+            draft_seq=draft_seq
+        )
+        if track:
+            coalescer.outstanding_drafts.append(result.id)
+
+    def _cancel_outstanding_drafts(self, interview_id: str):
+        """
+        Preempts the session's drafts when its turn ends. Inline drafts are cancelled outright
+        (aborting the HTTP request); queued Celery drafts are revoked, and running ones stop at
+        their next cancellation check (see is_draft_stale).
+        """
+        coalescer = chunk_coalescers.get(interview_id)
+        if coalescer is None:
+            return
+        drafts = coalescer.take_outstanding_drafts()
+        if self.inline_executor:
+            cancelled = 0
+            for task, cancel_token in drafts:
+                if task.done():
+                    continue
+                cancel_token.cancel()
+                task.cancel()
+                record_cancelled_draft(interview_id, cancel_token)
+                cancelled += 1
+            coalescer.drafts_cancelled += cancelled
+            return
+        if drafts:
+            # Workers discard revoked tasks when they reach them (counted on the worker side)
+            celery_app.control.revoke(drafts)
+            coalescer.drafts_cancelled += len(drafts)
+
+    def is_draft_stale(self, interview_id: str, draft_seq: int) -> bool:
+        """True once a final utterance newer than the draft was received (one field read)."""
+        if not draft_seq:
+            return False # Dispatched without a seq; nothing to compare against
+        last_final_seq = self.store.get_field(interview_id, "last_final_seq")
+        return last_final_seq is not None and draft_seq <= last_final_seq
+
+    @staticmethod
+    def _is_current_draft(state: InterviewState, draft_seq: int) -> bool:
+        """State-side check for a draft result: not preempted by a final, not older than the one applied."""
+        if not draft_seq:
+            return True
+        return draft_seq > state.last_final_seq and draft_seq >= state.latest_draft_seq
+
+    def _dispatch_final(self, state: InterviewState, full_utterance: str):
+        """Sends the full utterance to the final-response handler (Celery task or inline)."""
+        history = self.history_manager.build_context(state) # Summary + recent turns
+        if self.inline_executor:
+            self.inline_executor.submit(
+                "process_final_response", state.id,
+                lambda: inline_tasks.process_final_response(self, state.id, full_utterance, history)
+            )
+            return
+        process_final_response_task.delay(
+            interview_id=state.id,
+            full_utterance=full_utterance,
+            conversation_history=history
+        )
+
+    def _dispatch_surprise(self, interview_id: str, context: str, conversation_snippet: str = ""):
+        """Asks the mini-LLM for a filler (Celery task or inline)."""
+        if self.inline_executor:
+            self.inline_executor.submit(
+                "trigger_mini_llm_surprise", interview_id,
+                lambda: inline_tasks.trigger_mini_llm_surprise(self, interview_id, context, conversation_snippet),
+                expires_seconds=self.settings.CELERY_DRAFT_TASK_EXPIRES_SECONDS # A late filler is worse than none
+            )
+            return
+        trigger_mini_llm_surprise_task.delay(interview_id=interview_id, context=context, conversation_snippet=conversation_snippet)
+
+    def _dispatch_summary(self, interview_id: str, pending_summary: Dict[str, Any]):
+        """Starts a rolling history summary refresh (Celery task or inline)."""
+        if self.inline_executor:
+            self.inline_executor.submit(
+                "summarize_history", interview_id,
+                lambda: inline_tasks.summarize_history(self, interview_id, **pending_summary)
+            )
+            return
+        summarize_history_task.delay(interview_id=interview_id, **pending_summary)
+
+    def release_draft_slot(self, interview_id: str):
+        """Reports a draft job that produced nothing (failed/expired) so the coalescer can move on."""
+        self.delivery.publish(interview_id, event=DRAFT_COMPLETED)
+
+    def _schedule_coalescer_flush(self, interview_id: str):
+        """Arms a timer so a held-back buffer is sent once the debounce/in-flight window passes."""
+        coalescer = chunk_coalescers.get(interview_id)
+        if coalescer is None or coalescer.flush_timer is not None:
+            return
+        delay = coalescer.seconds_until_ready(time.monotonic())
+        if delay is None:
+            return # Waiting on more words (next chunk) or on the in-flight job's completion
+        loop = asyncio.get_running_loop()
+        coalescer.flush_timer = loop.call_later(
+            delay, lambda: asyncio.ensure_future(self._flush_coalescer(interview_id))
+        )
+
+    async def _flush_coalescer(self, interview_id: str):
+        coalescer = chunk_coalescers.get(interview_id)
+        if coalescer is None:
+            return
+        coalescer.flush_timer = None
+        buffer = coalescer.poll(time.monotonic())
+        if buffer is not None:
+            state = await self._run_store(self.store.get, interview_id) # Fresh copy for the history context
+            if state is None:
+                return
+            self._dispatch_chunk_task(state, buffer)
+        else:
+            self._schedule_coalescer_flush(interview_id)
+
+    async def _on_draft_job_completed(self, interview_id: str):
+        """Frees the session's draft slot and sends the latest held-back buffer, if any."""
+        coalescer = chunk_coalescers.get(interview_id)
+        if coalescer is None:
+            return # Session not owned by this process
+        buffer = coalescer.complete(time.monotonic())
+        if buffer is not None:
+            coalescer.cancel_timer()
+            state = await self._run_store(self.store.get, interview_id)
+            if state is None:
+                return
+            self._dispatch_chunk_task(state, buffer)
+        else:
+            try:
+                self._schedule_coalescer_flush(interview_id)
+            except RuntimeError:
+                pass # No running loop; the next chunk will poll the coalescer again
+
+    def _end_coalescer_turn(self, interview_id: str):
+        """Drops pending chunks at the end of a turn and reports the session's coalescing stats."""
+        coalescer = chunk_coalescers.get(interview_id)
+        if coalescer is None:
+            return
+        coalescer.end_turn()
+        merged, dropped = coalescer.take_unreported_counts()
+        metrics.increment("chunks_merged", merged)
+        metrics.increment("chunks_dropped", dropped)
+        print(f"Chunk coalescing for {interview_id}: {coalescer.stats()}")
+
+    def get_coalescing_stats(self, interview_id: str) -> Dict[str, Any]:
+        """Per-session counts of received, merged, dropped and dispatched chunks."""
+        coalescer = chunk_coalescers.get(interview_id)
+        return coalescer.stats() if coalescer else {}
+
+    def _take_final_utterance(self, state: InterviewState, content: str, timestamp: float) -> Tuple[str, Tuple[str, str, float], int]:
+        """
+        State mutator for the final chunk of a turn: appends it, returns the full utterance,
+        the pending speculation and the journal seq, and clears both from the state.
+        """
+        state.add_chunk(content, True, timestamp)
+        self._touch(state)
+        full_utterance = state.current_chunk_buffer
+        # Clear the chunk buffer as the full utterance is now being handled
+        state.clear_chunk_buffer()
+        speculation = (state.speculative_utterance, state.speculative_response, state.speculative_generation_seconds)
+        state.clear_speculation() # Used once per turn, hit or miss
+        seq = state.next_journal_seq()
+        state.last_final_seq = seq # Drafts dispatched before this point are now stale
+        return full_utterance, speculation, seq
+
+    def _match_speculation(self, speculation: Tuple[str, str, float], full_utterance: str) -> Optional[str]:
+        """
+        Returns the speculative response if it was generated for an utterance within
+        SPECULATIVE_MAX_EDIT_DISTANCE of the final one, else None.
+        Hit/miss and saved latency are recorded.
+        """
+        if not self.settings.SPECULATIVE_RESPONSES_ENABLED:
+            return None
+
+        speculated_on, response, saved_seconds = speculation
+        distance = None
+        if response:
+            distance = bounded_edit_distance(
+                normalize_utterance(speculated_on),
+                normalize_utterance(full_utterance),
+                self.settings.SPECULATIVE_MAX_EDIT_DISTANCE
+            )
+        if distance is None:
+            # Nothing speculated yet, or the candidate kept talking past the speculated buffer
+            metrics.increment("speculative_miss")
+            return None
+
+        metrics.increment("speculative_hit")
+        # The final LLM call we skip would have taken about as long as the speculative one did
+        metrics.record_latency("speculative_saved", saved_seconds)
+        metrics.increment("speculative_saved_seconds_total", saved_seconds)
+        return response
+
+    async def handle_delivery(self, envelope: Dict[str, Any]):
+        """
+        Delivery channel subscriber callback (API process): writes published messages to the
+        interview's socket if this process holds it, and applies events for sessions it owns.
+        """
+        interview_id = envelope["interview_id"]
+        if envelope.get("event") == DRAFT_COMPLETED:
+            await self._on_draft_job_completed(interview_id) # No-op unless this process owns the coalescer
+        message = envelope.get("message")
+        if message is not None and await send_to_connection(interview_id, message):
+            # Task completion (publish) -> socket write
+            metrics.record_latency("delivery", time.time() - envelope["published_at"])
+
+    def _journal(self, interview_id: str, seq: Optional[int], kind: str, data: Dict[str, Any]):
+        """Queues a journal entry for a change committed with journal seq `seq`."""
+        if self.journal and seq:
+            self.journal.record(interview_id, seq, kind, data)
+
+    def _publish(self, interview_id: str, message_type: str, payload: Any):
+        """Publishes a ServerMessage for the interview's socket, wherever it is connected."""
+        self.delivery.publish(interview_id, message=ServerMessage(type=message_type, payload=payload).model_dump_json())
+
+    # Methods called by Celery tasks upon completion. They are synchronous: they update the
+    # state store and publish outgoing messages, so tasks need no event loop or socket.
+    # The a* variants do the same for inline handlers, with store calls off the event loop.
+    def store_speculative_response(self, interview_id: str, utterance: str, response: str, generation_seconds: float, draft_seq: int = 0):
+        """Called by process_chunk_task in speculative mode to stash a candidate final response."""
+        state, current = self.store.update(interview_id, self._speculation_mutator(utterance, response, generation_seconds, draft_seq))
+        self._after_speculation(interview_id, state, current, draft_seq)
+
+    async def astore_speculative_response(self, interview_id: str, utterance: str, response: str, generation_seconds: float, draft_seq: int = 0):
+        state, current = await self._run_store(
+            self.store.update, interview_id, self._speculation_mutator(utterance, response, generation_seconds, draft_seq)
+        )
+        self._after_speculation(interview_id, state, current, draft_seq)
+
+    def _speculation_mutator(self, utterance: str, response: str, generation_seconds: float, draft_seq: int):
+        def _store(state: InterviewState) -> bool:
+            if not self._is_current_draft(state, draft_seq):
+                return False # Preempted by a final (or a newer speculation landed first)
+            if not state.current_chunk_buffer:
+                # The turn already ended: the final path has run without this result
+                return True
+            if len(utterance) < len(state.speculative_utterance):
+                # A speculation for a longer (newer) buffer already landed; keep that one
+                return True
+            state.speculative_utterance = utterance
+            state.speculative_response = response
+            state.speculative_generation_seconds = generation_seconds
+            state.latest_draft_seq = max(state.latest_draft_seq, draft_seq)
+            return True
+        return _store
+
+    def _after_speculation(self, interview_id: str, state: Optional[InterviewState], current: Optional[bool], draft_seq: int):
+        if state and not current:
+            self._drop_stale_draft(interview_id, draft_seq)
+            return
+        # Let the API process owning the session dispatch its next held-back buffer
+        self.delivery.publish(interview_id, event=DRAFT_COMPLETED)
+
+    def update_state_with_llm_draft(self, interview_id: str, latest_draft: str, draft_seq: int = 0):
         """Called by process_chunk_task to update the latest draft."""
-        state = active_interview_states.get(interview_id)
-        if state and state.websocket:
+        state, current = self.store.update(interview_id, self._draft_mutator(latest_draft, draft_seq))
+        self._after_draft(interview_id, state, current, latest_draft, draft_seq)
+
+    async def aupdate_state_with_llm_draft(self, interview_id: str, latest_draft: str, draft_seq: int = 0):
+        state, current = await self._run_store(self.store.update, interview_id, self._draft_mutator(latest_draft, draft_seq))
+        self._after_draft(interview_id, state, current, latest_draft, draft_seq)
+
+    def _draft_mutator(self, latest_draft: str, draft_seq: int):
+        def _apply(state: InterviewState) -> bool:
+            if not self._is_current_draft(state, draft_seq):
+                return False
             state.latest_llm_draft = latest_draft
-            # Send the latest draft to the client immediately
-            try:
-                await state.send_message(
-                   ServerMessage(type="llm_response_draft", payload=latest_draft).model_dump_json()
-                )
-            except Exception as e:
-                 print(f"Error sending LLM draft to websocket {interview_id}: {e}")
-                 # Handle potential dead websocket? Mark state inactive?
+            state.latest_draft_seq = max(state.latest_draft_seq, draft_seq)
+            return True
+        return _apply
+
+    def _after_draft(self, interview_id: str, state: Optional[InterviewState], current: Optional[bool], latest_draft: str, draft_seq: int):
+        if state and not current:
+            self._drop_stale_draft(interview_id, draft_seq)
+        elif state:
+            # Send the latest draft to the client immediately; the same envelope frees the draft slot
+            self.delivery.publish(
+                interview_id,
+                message=ServerMessage(type="llm_response_draft", payload=latest_draft).model_dump_json(),
+                event=DRAFT_COMPLETED
+            )
+        else:
+            self.delivery.publish(interview_id, event=DRAFT_COMPLETED)
 
-    async def finalize_llm_response(self, interview_id: str, final_response: str, conversation_entry: Dict[str, Any]):
+    def _drop_stale_draft(self, interview_id: str, draft_seq: int):
+        # No DRAFT_COMPLETED either: the final already reset the coalescer, and a late event
+        # would free the slot of a draft from the next turn
+        metrics.increment("drafts_dropped_stale")
+        print(f"Dropped stale draft (seq {draft_seq}) for {interview_id}.")
+
+    def finalize_llm_response(self, interview_id: str, final_response: str, conversation_entry: Dict[str, Any]):
         """Called by process_final_response_task to finalize the LLM response."""
-        state = active_interview_states.get(interview_id)
-        if state and state.websocket:
-            state.conversation_history.append(conversation_entry) # Add user input + LLM response
+        # The turn is committed whether or not the client is still connected (or still resident)
+        state, committed = self._update_session(interview_id, self._turn_mutator(final_response, conversation_entry))
+        self._after_turn(interview_id, state, committed, final_response, conversation_entry)
+
+    async def afinalize_llm_response(self, interview_id: str, final_response: str, conversation_entry: Dict[str, Any]):
+        state, committed = await self._aupdate_session(interview_id, self._turn_mutator(final_response, conversation_entry))
+        self._after_turn(interview_id, state, committed, final_response, conversation_entry)
+
+    def _turn_mutator(self, final_response: str, conversation_entry: Dict[str, Any]):
+        def _commit(state: InterviewState):
+            self.history_manager.record_turn(state, conversation_entry["user"], conversation_entry["assistant"]) # Add user input + LLM response
             state.latest_llm_draft = "" # Clear draft once final response is sent
-            state.transcript += f"User: {conversation_entry['user']}\nAI: {final_response}\n" # Add to full transcript
+            state.append_transcript(conversation_entry["user"], final_response) # Add to full transcript
+            return self._claim_history_summary(state), state.next_journal_seq()
+        return _commit
 
-            # Send the final response to the client
-            try:
-                 await state.send_message(
-                    ServerMessage(type="llm_response", payload=final_response).model_dump_json()
-                 )
-            except Exception as e:
-                 print(f"Error sending final LLM response to websocket {interview_id}: {e}")
-                 # Handle potential dead websocket?
-
-    async def send_mini_llm_surprise(self, interview_id: str, surprise_text: str):
+    def _after_turn(self, interview_id: str, state: Optional[InterviewState], committed, final_response: str, conversation_entry: Dict[str, Any]):
+        if not state:
+            return
+        pending_summary, seq = committed
+        self._journal(interview_id, seq, journal.RESPONSE, {"user": conversation_entry["user"], "assistant": final_response})
+        if pending_summary:
+            self._dispatch_summary(interview_id, pending_summary) # Background, off the response path
+
+        # Send the final response to the client
+        self._publish(interview_id, "llm_response", final_response)
+
+    def stream_final_response(self, interview_id: str, full_utterance: str, deltas: Iterable[str]) -> str:
+        """
+        Called by process_final_response_task in streaming mode.
+        Forwards each LLM delta to the client as an `llm_response_delta` frame and, once the
+        stream has finished, commits the joined response via finalize_llm_response
+        (which also sends the closing `llm_response` frame).
+        Nothing is committed to conversation_history/transcript if the stream fails midway;
+        the client gets a closing `llm_response_error` frame instead, so it can drop the deltas.
+        """
+        started_at = time.perf_counter()
+        parts = []
+        try:
+            for delta in deltas: # The LLM request is only issued when iteration starts
+                self._forward_delta(interview_id, delta, parts, started_at)
+        except BaseException:
+            self._abort_stream(interview_id, parts)
+            raise
+        final_response = self._finish_stream(interview_id, parts, started_at)
+        self.finalize_llm_response(interview_id, final_response, {"user": full_utterance, "assistant": final_response})
+        return final_response
+
+    async def astream_final_response(self, interview_id: str, full_utterance: str, deltas: AsyncIterable[str]) -> str:
+        """Async variant of stream_final_response (inline execution mode)."""
+        started_at = time.perf_counter()
+        parts = []
+        try:
+            async for delta in deltas:
+                self._forward_delta(interview_id, delta, parts, started_at)
+        except BaseException: # Cancellation included: the client must not wait for a closing frame
+            self._abort_stream(interview_id, parts)
+            raise
+        final_response = self._finish_stream(interview_id, parts, started_at)
+        await self.afinalize_llm_response(interview_id, final_response, {"user": full_utterance, "assistant": final_response})
+        return final_response
+
+    def _forward_delta(self, interview_id: str, delta: str, parts: list, started_at: float):
+        if not parts:
+            # Time-to-first-token is what the candidate perceives as latency
+            metrics.record_latency("llm_final_ttft", time.perf_counter() - started_at)
+        parts.append(delta)
+        self._publish(interview_id, "llm_response_delta", delta)
+
+    def _abort_stream(self, interview_id: str, parts: list):
+        metrics.increment("llm_streams_aborted")
+        print(f"Stream of the final response for {interview_id} failed after {len(parts)} deltas.")
+        try:
+            self._publish(interview_id, "llm_response_error", "The response was interrupted. Please repeat your answer.")
+        except Exception as e:
+            print(f"Could not publish the stream error for {interview_id}: {e}") # Keep the original error
+
+    def _finish_stream(self, interview_id: str, parts: list, started_at: float) -> str:
+        metrics.record_latency("llm_final_total", time.perf_counter() - started_at)
+        final_response = "".join(parts).strip()
+        print(f"Streamed final response for {interview_id} in {len(parts)} deltas.")
+        return final_response
+
+    def _claim_history_summary(self, state: InterviewState) -> Optional[Dict[str, Any]]:
+        """
+        State mutator part of the summary refresh: once enough turns left the verbatim window,
+        marks a refresh as in progress and returns the summarize_history_task arguments.
+        """
+        pending = self.history_manager.turns_to_summarize(state)
+        if pending is None:
+            return None
+        turns, summarized_turns = pending
+        state.summary_in_progress = True
+        return {
+            "previous_summary": state.history_summary,
+            "turns": [turn._asdict() for turn in turns], # Task arguments are JSON: send readable dicts
+            "summarized_turns": summarized_turns
+        }
+
+    def update_history_summary(self, interview_id: str, summary: str, summarized_turns: int):
+        """Called by summarize_history_task with the refreshed rolling summary."""
+        _, seq = self._update_session(interview_id, self._summary_mutator(summary, summarized_turns))
+        self._after_summary(interview_id, seq, summary, summarized_turns)
+
+    async def aupdate_history_summary(self, interview_id: str, summary: str, summarized_turns: int):
+        _, seq = await self._aupdate_session(interview_id, self._summary_mutator(summary, summarized_turns))
+        self._after_summary(interview_id, seq, summary, summarized_turns)
+
+    @staticmethod
+    def _summary_mutator(summary: str, summarized_turns: int):
+        def _apply(state: InterviewState) -> Optional[int]:
+            state.summary_in_progress = False
+            if summary and summarized_turns > state.summarized_turns:
+                state.history_summary = summary
+                state.summarized_turns = summarized_turns
+                return state.next_journal_seq()
+            return None
+        return _apply
+
+    def _after_summary(self, interview_id: str, seq: Optional[int], summary: str, summarized_turns: int):
+        if seq:
+            self._journal(interview_id, seq, journal.SUMMARY, {"summary": summary, "summarized_turns": summarized_turns})
+            print(f"History summary for {interview_id} now covers {summarized_turns} turns.")
+
+    def send_mini_llm_surprise(self, interview_id: str, surprise_text: str):
          """Called by trigger_mini_llm_surprise_task to send a filler."""
-         state = active_interview_states.get(interview_id)
-         if state and state.websocket:
-             try:
-                 await state.send_message(
-                     ServerMessage(type="mini_llm_filler", payload=surprise_text).model_dump_json()
-                 )
-             except Exception as e:
-                 print(f"Error sending mini-LLM surprise to websocket {interview_id}: {e}")
-                 # Handle potential dead websocket?
+         self._publish(interview_id, "mini_llm_filler", surprise_text)
 
 
-    # TODO: Implement methods for ending interview, running post-analysis, etc.
     async def end_interview(self, interview_id: str):
         """Marks interview as complete and triggers post-interview analysis."""
-        state = active_interview_states.pop(interview_id, None) # Remove from active states
+        marked = True
+        if self.storage_service is not None:
+            # Before the session is dropped, and synchronously: the final snapshot may be written
+            # later (journal thread), and a task result still in flight must not rehydrate the
+            # session from an older snapshot in the meantime
+            marked = await self.storage_service.amark_interview_ended(interview_id)
+        state = await self._run_store(self.store.delete, interview_id) # Remove from active states
+        if not marked:
+            state = None # Already ended (a copy still resident is dropped all the same)
+        elif state is None and self.storage_service is not None:
+            # Spilled out of memory while idle: end it from its persisted copy
+            state = await self.storage_service.run_io(
+                recover_interview_state, interview_id, self.storage_service, self.history_manager, False
+            )
+            lifecycle_manager = get_session_lifecycle_manager()
+            if state and lifecycle_manager:
+                lifecycle_manager.forget(interview_id)
+        self._cancel_outstanding_drafts(interview_id)
+        coalescer = chunk_coalescers.pop(interview_id, None)
+        if coalescer:
+            coalescer.cancel_timer()
+            print(f"Chunk coalescing for {interview_id} (final): {coalescer.stats()}")
         if state:
             print(f"Interview {interview_id} ended. Triggering post-analysis.")
-            # TODO: Trigger post-interview analysis task
-            # analysis_tasks.run_post_interview_analysis.delay(interview_id=interview_id, transcript=state.transcript, ...)
-            if state.websocket:
+            websocket = get_connection(interview_id)
+            if websocket:
                  try:
-                     await state.send_message(ServerMessage(type="interview_end", payload="Interview completed.").model_dump_json())
-                     await state.websocket.close() # Close the websocket connection
+                     await send_to_connection(interview_id, ServerMessage(type="interview_end", payload="Interview completed.").model_dump_json())
+                     await websocket.close() # Close the websocket connection
                  except Exception as e:
                       print(f"Error sending end message or closing websocket for {interview_id}: {e}")
+                 unregister_connection(interview_id, websocket)
+
+            # Save the final state/transcript: with the journal on, queued behind the interview's
+            # last entries (the journal it supersedes is then removed); otherwise written here
+            if self.journal:
+                self.journal.snapshot(state, ended=True)
+            elif self.storage_service is not None:
+                await self.storage_service.asave_interview_snapshot(interview_id, make_snapshot(state, ended=True))
 
-            # TODO: Save final state/transcript to persistent storage
-            # await self.storage_service.save_interview_state(interview_id, state.to_dict()) # Assuming a state serialization method
+            # Evaluation runs on the analysis queue (Celery in every LIVE_EXECUTION_MODE)
+            run_post_interview_analysis.delay(
+                interview_id=interview_id,
+                jd_doc_id=state.job_description_id,
+                resume_doc_id=state.resume_id,
+                transcript=state.transcript
+            )
         else:
+            if marked and self.storage_service is not None:
+                await self.storage_service.aunmark_interview_ended(interview_id) # Nothing to end
             print(f"Attempted to end non-existent interview {interview_id}")
             raise InterviewNotFound(f"Interview session {interview_id} not found.")
 
@@ -250,7 +819,7 @@ class InterviewManager:
     # TODO: Method for triggering code analysis if needed during interview
     # async def request_code_analysis(self, interview_id: str, code_snippet: str, context: str):
     #     """Triggers a code analysis task for a given snippet."""
-    #     state = active_interview_states.get(interview_id)
+    #     state = self.store.get(interview_id)
     #     if state:
     #          analysis_tasks.analyze_code.delay(
     #              interview_id=interview_id,
@@ -1,70 +1,123 @@
 # app/core/interview_state.py - Defines the state object for an interview session
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field, ConfigDict # Using Pydantic for state structure and potential serialization
-from fastapi import WebSocket
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple
+from pydantic import BaseModel, Field, PrivateAttr # Using Pydantic for state structure and potential serialization
+
+
+class ConversationTurn(NamedTuple):
+    """
+    One committed user/assistant exchange. A NamedTuple has no per-instance __dict__
+    (like __slots__) and serializes as a compact JSON array: ["user", "assistant", tokens].
+    """
+    user: str
+    assistant: str
+    tokens: int = 0 # Token count of user + assistant, used for history budgeting
+
 
 # Using Pydantic for data structure definition, though this is an internal state representation
 class InterviewState(BaseModel):
     """
     Represents the mutable state of a single interview session.
-    Stored in memory or a persistent store for active interviews.
+    Kept in the interview state store (in memory or Redis) while the interview is active.
     """
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-
     id: str = Field(..., description="Unique identifier for the interview session.")
     job_description_id: str
     resume_id: str
     interview_plan: Dict[str, Any] = Field({}, description="Structured plan/topics derived from pre-analysis.")
 
     # --- Conversation State ---
-    transcript: str = Field("", description="Full accumulated transcript of the interview.")
-    conversation_history: List[Dict[str, Any]] = Field([], description="History of turns for LLM context.")
-    # Example format: [{'role': 'user', 'content': '...'}, {'role': 'assistant', 'content': '...'}]
+    # The transcript and the chunk buffer are kept as append-only segment lists: appending is
+    # O(1) and nothing is copied until the text is read (see the `transcript` and
+    # `current_chunk_buffer` properties, which join lazily and cache the result).
+    transcript_segments: List[str] = Field([], description="Transcript of the interview, one segment per turn.")
+    conversation_history: List[ConversationTurn] = Field([], description="History of turns for LLM context.")
+    # Converted to chat messages by ConversationHistoryManager when building the LLM context.
+    history_summary: str = Field("", description="Rolling summary of turns older than the verbatim window.")
+    summarized_turns: int = Field(0, description="Number of leading conversation_history turns covered by history_summary.")
+    summary_in_progress: bool = Field(False, description="True while a background summary refresh is running.")
+    journal_seq: int = Field(0, description="Sequence number of the last journaled change (see app/core/journal.py).")
+    last_activity_at: float = Field(0.0, description="time.time() of the last candidate input or connection (idle eviction).")
 
     # --- Real-time Processing State ---
     # Buffer for accumulating transcription chunks while user is speaking
-    current_chunk_buffer: str = Field("", description="Buffer for transcription chunks between pauses.")
+    chunk_segments: List[str] = Field([], description="Transcription chunks received since the last pause.")
     # Store the latest draft generated by the incremental LLM task
     latest_llm_draft: str = Field("", description="Latest non-final response draft from incremental processing.")
+    # Drafts carry the journal seq at dispatch (draft_seq); see app/core/draft_cancellation.py
+    latest_draft_seq: int = Field(0, description="draft_seq of the draft or speculation last applied.")
+    last_final_seq: int = Field(0, description="Journal seq of the last final utterance; drafts at or below it are stale.")
+
+    # --- Speculative Response State ---
+    # A candidate final answer generated from the in-progress buffer (speculative mode)
+    speculative_utterance: str = Field("", description="Chunk buffer the speculative response was generated for.")
+    speculative_response: str = Field("", description="Candidate final response for speculative_utterance.")
+    speculative_generation_seconds: float = Field(0.0, description="LLM time spent producing speculative_response.")
 
     # --- Connection State ---
-    # Store the active WebSocket connection object if in memory
-    # Note: WebSocket object is NOT serializable, so this is only for in-memory state.
-    # If using a distributed state store (Redis, DB), the connection mapping
-    # needs to be managed separately (e.g., in the Manager or a dedicated service).
-    websocket: Optional[WebSocket] = Field(None, exclude=True) # Exclude from serialization
+    # The WebSocket connection is NOT part of the state: states live in a shared store
+    # (see app/core/state_store.py) while sockets belong to the API process that accepted
+    # them, so they are tracked in app/core/connection_registry.py.
 
     # --- Analysis State ---
     # Placeholder for tracking analysis progress or results
     # analysis_status: str = "pending"
     # analysis_results: Optional[Dict[str, Any]] = None
 
+    # Rendered text per segment field: field name -> (segment count when rendered, text)
+    _rendered: Dict[str, Tuple[int, str]] = PrivateAttr(default_factory=dict)
+
+    def _render(self, field: str) -> str:
+        """Joins a segment list, reusing the cached text while no segment was added."""
+        segments = getattr(self, field)
+        # Read the private attribute from pydantic's storage directly: going through
+        # BaseModel.__getattr__ costs more than the join it saves for short buffers
+        rendered = self.__pydantic_private__["_rendered"]
+        cached = rendered.get(field)
+        if cached is None or cached[0] != len(segments):
+            cached = (len(segments), "".join(segments))
+            rendered[field] = cached
+        return cached[1]
+
+    @property
+    def transcript(self) -> str:
+        """Full accumulated transcript of the interview."""
+        return self._render("transcript_segments")
+
+    @property
+    def current_chunk_buffer(self) -> str:
+        """Transcription chunks received since the last pause, joined."""
+        return self._render("chunk_segments")
+
     # --- Methods to update state ---
     def add_chunk(self, chunk_text: str, is_final: bool, timestamp: float):
         """Appends a new transcription chunk to the buffer."""
         # Simple concatenation. More advanced handling might be needed (e.g., punctuation, re-segmentation)
         # For incremental chunks, just add to buffer.
         # If is_final is True, the buffer holds the full utterance, which is then processed.
-        self.current_chunk_buffer += chunk_text + (" " if not is_final else "") # Add space between chunks if not final
+        self.chunk_segments.append(chunk_text + (" " if not is_final else "")) # Add space between chunks if not final
 
         # Note: The transcript is updated with full turns after a final response is received.
 
     def clear_chunk_buffer(self):
         """Resets the transcription chunk buffer."""
-        self.current_chunk_buffer = ""
-
-    # Method to send message via associated websocket (only works if websocket is stored)
-    async def send_message(self, message: str):
-        """Sends a message through the active WebSocket connection if available."""
-        if self.websocket:
-            try:
-                await self.websocket.send_text(message)
-            except Exception as e:
-                 print(f"Error sending message via websocket for interview {self.id}: {e}")
-                 # Handle disconnection? The websocket endpoint should also catch this.
-                 self.websocket = None # Clear the reference if sending fails
-
-    # Helper method to get state as dict (excluding non-serializable parts)
+        self.chunk_segments = []
+        self.__pydantic_private__["_rendered"].pop("chunk_segments", None)
+
+    def next_journal_seq(self) -> int:
+        """Allocates the journal sequence number for a change made in the same state update."""
+        self.journal_seq += 1
+        return self.journal_seq
+
+    def append_transcript(self, user_text: str, assistant_text: str):
+        """Adds a committed turn to the full transcript."""
+        self.transcript_segments.append(f"User: {user_text}\nAI: {assistant_text}\n")
+
+    def clear_speculation(self):
+        """Discards the speculative response (used once per turn, hit or miss)."""
+        self.speculative_utterance = ""
+        self.speculative_response = ""
+        self.speculative_generation_seconds = 0.0
+
+    # Helper method to get state as dict
     def to_dict(self):
-         return self.model_dump(exclude={"websocket"})
\ No newline at end of file
+         return self.model_dump()
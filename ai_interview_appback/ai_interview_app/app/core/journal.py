@@ -0,0 +1,238 @@
+# app/core/journal.py - Write-ahead journal and snapshots for interview crash recovery
+
+import time
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Optional, List, Callable
+
+from app.core.interview_state import InterviewState
+from app.core.history_manager import ConversationHistoryManager
+from app.services.storage_service import StorageService
+from app.config.settings import Settings, settings as app_settings
+from app.utils import metrics
+
+# Journal entry kinds. Each entry is {"seq", "kind", "data", "ts"}; seq comes from
+# InterviewState.journal_seq, which is bumped inside the same atomic store update as the
+# change it describes, so entries from every process share one ordering per interview.
+CHUNK = "chunk"       # data: {"text", "timestamp"} - a non-final transcription chunk
+FINAL = "final"       # data: {"text", "timestamp"} - the final chunk; closes the utterance
+RESPONSE = "response" # data: {"user", "assistant"} - a committed turn
+SUMMARY = "summary"   # data: {"summary", "summarized_turns"} - a rolling history summary refresh
+
+
+def apply_journal_entry(state: InterviewState, entry: Dict[str, Any], history_manager: ConversationHistoryManager):
+    """Re-applies one journal entry to a state being recovered."""
+    kind, data = entry["kind"], entry["data"]
+    if kind == CHUNK:
+        state.add_chunk(data["text"], False, data["timestamp"])
+    elif kind == FINAL:
+        state.add_chunk(data["text"], True, data["timestamp"])
+        state.clear_chunk_buffer() # The utterance was handed to the LLM; it comes back as a RESPONSE
+        state.last_final_seq = max(state.last_final_seq, entry["seq"]) # Drafts dispatched before it stay stale
+    elif kind == RESPONSE:
+        history_manager.record_turn(state, data["user"], data["assistant"])
+        state.append_transcript(data["user"], data["assistant"])
+        state.latest_llm_draft = ""
+    elif kind == SUMMARY:
+        if data["summarized_turns"] > state.summarized_turns:
+            state.history_summary = data["summary"]
+            state.summarized_turns = data["summarized_turns"]
+    else:
+        print(f"Unknown journal entry kind '{kind}' for {state.id}; skipping.")
+    state.journal_seq = max(state.journal_seq, entry["seq"])
+
+
+def make_snapshot(state: InterviewState, ended: bool = False) -> Dict[str, Any]:
+    """Compact snapshot document: the state plus the journal position it covers."""
+    return {
+        "last_seq": state.journal_seq,
+        "ended": ended,
+        "saved_at": time.time(),
+        "state": state.model_dump(mode="json")
+    }
+
+
+class JournalWriter:
+    """
+    Batches journal entries on a background thread so that callers (the WebSocket receive
+    path included) only pay for a queue put. Entries are flushed every
+    JOURNAL_FLUSH_INTERVAL_SECONDS or JOURNAL_MAX_BATCH_ENTRIES, whichever comes first,
+    with one append per interview per batch. Every JOURNAL_SNAPSHOT_EVERY_ENTRIES entries
+    of an interview, a snapshot of its current state is written so recovery only has to
+    replay the journal tail.
+    """
+    def __init__(
+        self,
+        storage_service: StorageService,
+        take_snapshot: Callable[[str], Optional[Dict[str, Any]]],
+        flush_interval_seconds: float,
+        max_batch_entries: int,
+        snapshot_every_entries: int
+    ):
+        self.storage_service = storage_service
+        self.take_snapshot = take_snapshot # Periodic snapshots: make_snapshot of the live state, or None
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_batch_entries = max_batch_entries
+        self.snapshot_every_entries = snapshot_every_entries
+        self._queue: "queue.Queue" = queue.Queue()
+        self._entries_since_snapshot: Dict[str, int] = defaultdict(int)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started lazily so prefork Celery children get their own thread after fork
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="interview-journal", daemon=True)
+                    self._thread.start()
+
+    # --- Producer side (any thread, never blocks) ---
+    def record(self, interview_id: str, seq: int, kind: str, data: Dict[str, Any]):
+        """Queues one journal entry."""
+        self._ensure_started()
+        self._queue.put(("entry", interview_id, {"seq": seq, "kind": kind, "data": data, "ts": time.time()}))
+
+    def snapshot(self, state: InterviewState, ended: bool = False):
+        """Queues a snapshot of `state`. An ended snapshot also removes the journal it covers."""
+        self._ensure_started()
+        self._queue.put(("snapshot", state.id, make_snapshot(state, ended)))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Blocks until everything queued so far has been written (shutdown, tests)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", None, done))
+        done.wait(timeout)
+
+    # --- Writer thread ---
+    def _run(self):
+        while True:
+            items = [self._queue.get()] # Block until there is work
+            deadline = time.monotonic() + self.flush_interval_seconds
+            # Gather a batch: keep draining until the interval passes or the batch is full
+            while len(items) < self.max_batch_entries and items[-1][0] == "entry":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(items)
+
+    def _write_batch(self, items: List[tuple]):
+        started_at = time.perf_counter()
+        entries_by_interview: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        written = 0
+        for kind, interview_id, payload in items:
+            if kind == "entry":
+                entries_by_interview[interview_id].append(payload)
+                continue
+            # Snapshots and flush markers are ordered after the entries queued before them
+            written += self._append(entries_by_interview)
+            entries_by_interview = defaultdict(list)
+            if kind == "snapshot":
+                self._save_snapshot(interview_id, payload)
+            elif kind == "flush":
+                payload.set()
+        written += self._append(entries_by_interview)
+        if written:
+            metrics.increment("journal_entries_written", written)
+            metrics.record_latency("journal_batch_write", time.perf_counter() - started_at)
+
+        # Periodic snapshots for interviews that accumulated enough journal entries
+        for interview_id, count in list(self._entries_since_snapshot.items()):
+            if count >= self.snapshot_every_entries:
+                try:
+                    snapshot = self.take_snapshot(interview_id)
+                except Exception as e:
+                    print(f"Journal: could not load state for snapshot of {interview_id}: {e}")
+                    snapshot = None
+                if snapshot is None:
+                    self._entries_since_snapshot.pop(interview_id, None) # Ended or owned elsewhere
+                else:
+                    self._save_snapshot(interview_id, snapshot)
+
+    def _append(self, entries_by_interview: Dict[str, List[Dict[str, Any]]]) -> int:
+        written = 0
+        for interview_id, entries in entries_by_interview.items():
+            try:
+                self.storage_service.append_journal_entries(interview_id, entries)
+                written += len(entries)
+                self._entries_since_snapshot[interview_id] += len(entries)
+            except Exception as e:
+                # Losing journal entries only weakens recovery; never take the writer down
+                print(f"Journal: failed to write {len(entries)} entries for {interview_id}: {e}")
+                metrics.increment("journal_write_errors")
+        return written
+
+    def _save_snapshot(self, interview_id: str, snapshot: Dict[str, Any]):
+        try:
+            saved = self.storage_service.save_interview_snapshot(interview_id, snapshot)
+            self._entries_since_snapshot.pop(interview_id, None)
+            if saved is None:
+                return # Ended meanwhile: its final snapshot is kept
+            metrics.increment("journal_snapshots_written")
+            if snapshot["ended"]:
+                self.storage_service.delete_journal(interview_id) # Fully covered by the final snapshot
+        except Exception as e:
+            print(f"Journal: failed to save snapshot for {interview_id}: {e}")
+            metrics.increment("journal_write_errors")
+
+
+def recover_interview_state(
+    interview_id: str,
+    storage_service: StorageService,
+    history_manager: ConversationHistoryManager,
+    check_ended_marker: bool = True
+) -> Optional[InterviewState]:
+    """
+    Rebuilds an interview state from its latest snapshot plus the journal entries written
+    after it. Returns None if the interview is unknown or already ended. end_interview marks
+    the end before its final snapshot is written; `check_ended_marker=False` is for it alone.
+    """
+    if check_ended_marker and storage_service.is_interview_ended(interview_id):
+        return None
+    snapshot = storage_service.load_interview_snapshot(interview_id)
+    if snapshot is None or snapshot.get("ended"):
+        return None
+    state = InterviewState.model_validate(snapshot["state"])
+    entries = storage_service.load_journal_entries(interview_id, after_seq=snapshot["last_seq"])
+    for entry in entries:
+        apply_journal_entry(state, entry, history_manager)
+    # Flags for work that died with the old process would block future refreshes
+    state.summary_in_progress = False
+    state.clear_speculation()
+    print(f"Recovered interview {interview_id} from snapshot (seq {snapshot['last_seq']}) + {len(entries)} journal entries.")
+    return state
+
+
+def take_store_snapshot(interview_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Snapshot of a session in the state store, or None if it isn't there. The in-memory store
+    hands out the live object, which the event loop keeps appending to: taken inside a no-op
+    update, the seq and the lists come from one consistent view (no entry above last_seq
+    ends up in the snapshot and is replayed twice).
+    """
+    from app.core.state_store import get_state_store
+    _, snapshot = get_state_store().update(interview_id, make_snapshot)
+    return snapshot
+
+
+_journal_writer: Optional[JournalWriter] = None
+
+def get_journal_writer(settings: Settings = app_settings) -> JournalWriter:
+    """Process-wide journal writer, created on first use."""
+    global _journal_writer
+    if _journal_writer is None:
+        _journal_writer = JournalWriter(
+            storage_service=StorageService(base_path=settings.STORAGE_PATH),
+            take_snapshot=take_store_snapshot,
+            flush_interval_seconds=settings.JOURNAL_FLUSH_INTERVAL_SECONDS,
+            max_batch_entries=settings.JOURNAL_MAX_BATCH_ENTRIES,
+            snapshot_every_entries=settings.JOURNAL_SNAPSHOT_EVERY_ENTRIES
+        )
+    return _journal_writer
@@ -0,0 +1,116 @@
+# app/core/live_executor.py - In-process executor for live interview handlers (inline mode)
+
+import time
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable, Set
+
+from app.config.settings import Settings, settings as app_settings
+from app.utils import metrics
+
+# Execution modes for the live interview path (Settings.LIVE_EXECUTION_MODE)
+CELERY = "celery" # chunk/final/surprise/summary handlers run as Celery tasks (separate workers)
+INLINE = "inline" # they run as asyncio tasks in the API process holding the WebSocket
+
+
+def check_live_execution_backends(settings: Settings = app_settings):
+    """
+    Refuses to start with LIVE_EXECUTION_MODE="celery" on process-local backends: the workers
+    run in other processes, so they would work on stale copies of the sessions and publish
+    drafts and responses on a channel no API process listens to.
+    Raises ValueError (API startup / worker startup).
+    """
+    if settings.LIVE_EXECUTION_MODE.lower() != CELERY:
+        return
+    if settings.STATE_STORE_BACKEND.lower() == "memory":
+        raise ValueError(
+            'LIVE_EXECUTION_MODE="celery" needs STATE_STORE_BACKEND="redis": Celery workers cannot '
+            'see sessions held in the API process\'s memory. Use LIVE_EXECUTION_MODE="inline" for a single process.'
+        )
+    if settings.DELIVERY_BACKEND.lower() == "local":
+        raise ValueError(
+            'LIVE_EXECUTION_MODE="celery" needs DELIVERY_BACKEND="redis": results published by Celery '
+            'workers on the local channel never reach the API process. Use LIVE_EXECUTION_MODE="inline" for a single process.'
+        )
+
+
+class InlineTaskExecutor:
+    """
+    Runs live-interview handlers (app/tasks/inline_tasks.py) as asyncio tasks in the API
+    process, skipping the broker round trip, worker pickup and JSON re-serialization of the
+    conversation history. At most `max_concurrent` handlers run at once; the rest wait for a
+    slot, and handlers that waited longer than their `expires_seconds` are dropped (the inline
+    counterpart of Celery's `expires` for stale drafts).
+    Document ingestion and analysis stay on Celery.
+    """
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent) # Binds to the running loop on first use
+        self._tasks: Set[asyncio.Task] = set() # Strong references until done
+        self._running = 0
+
+    def submit(
+        self,
+        name: str,
+        interview_id: str,
+        handler: Callable[[], Awaitable[Any]],
+        expires_seconds: Optional[float] = None,
+        on_expired: Optional[Callable[[], None]] = None
+    ) -> asyncio.Task:
+        """Schedules `handler()` on the running event loop. Never blocks the caller."""
+        submitted_at = time.perf_counter()
+        task = asyncio.get_running_loop().create_task(
+            self._run(name, interview_id, handler, submitted_at, expires_seconds, on_expired),
+            name=f"{name}:{interview_id}"
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        metrics.increment("inline_tasks_submitted")
+        return task
+
+    async def _run(self, name, interview_id, handler, submitted_at, expires_seconds, on_expired):
+        async with self._semaphore:
+            waited = time.perf_counter() - submitted_at
+            metrics.record_latency("inline_queue_wait", waited)
+            if expires_seconds is not None and waited > expires_seconds:
+                print(f"Inline {name} for {interview_id} expired after waiting {waited:.2f}s; skipping.")
+                metrics.increment("inline_tasks_expired")
+                if on_expired:
+                    on_expired()
+                return
+            self._running += 1
+            try:
+                await handler()
+            except Exception as e:
+                # Same contract as a failed Celery task: log it, never take the loop down
+                print(f"Inline {name} for {interview_id} failed: {e}")
+                metrics.increment("inline_tasks_failed")
+            finally:
+                self._running -= 1
+
+    async def shutdown(self, timeout: float = 10.0):
+        """Waits up to `timeout` seconds for in-flight handlers, then cancels the rest."""
+        if not self._tasks:
+            return
+        pending = list(self._tasks)
+        _, still_pending = await asyncio.wait(pending, timeout=timeout)
+        for task in still_pending:
+            task.cancel()
+        if still_pending:
+            print(f"Cancelled {len(still_pending)} inline handlers at shutdown.")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self._running,
+            "queued": len(self._tasks) - self._running,
+        }
+
+
+_inline_executor: Optional[InlineTaskExecutor] = None
+
+def get_inline_executor(settings: Settings = app_settings) -> InlineTaskExecutor:
+    """Process-wide inline executor (the concurrency bound covers every session in the process)."""
+    global _inline_executor
+    if _inline_executor is None:
+        _inline_executor = InlineTaskExecutor(max_concurrent=settings.INLINE_MAX_CONCURRENT_TASKS)
+    return _inline_executor
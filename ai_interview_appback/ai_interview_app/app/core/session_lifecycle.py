@@ -0,0 +1,182 @@
+# app/core/session_lifecycle.py - Idle eviction and memory cap for active interview sessions
+
+import time
+import asyncio
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+from app.core.interview_state import InterviewState
+from app.core.state_store import InterviewStateStore
+from app.core.journal import make_snapshot
+from app.services.storage_service import StorageService
+from app.config.settings import Settings
+from app.utils import metrics
+
+# Rough per-object overheads (CPython, 64-bit) for the memory estimate below
+_STR_OVERHEAD = 49
+_TURN_OVERHEAD = 64 + 8 # ConversationTurn tuple + its list slot
+
+
+def estimate_state_bytes(state: InterviewState) -> int:
+    """
+    Cheap estimate of a state's resident size: text lengths plus per-object overhead.
+    Not exact (no deep sizeof), but proportional to what actually grows: transcript and history.
+    """
+    size = 2048 # Model instance, scalar fields, interview plan
+    size += sum(len(segment) + _STR_OVERHEAD for segment in state.transcript_segments)
+    size += sum(len(segment) + _STR_OVERHEAD for segment in state.chunk_segments)
+    size += sum(len(turn.user) + len(turn.assistant) + 2 * _STR_OVERHEAD + _TURN_OVERHEAD for turn in state.conversation_history)
+    size += len(state.history_summary) + len(state.latest_llm_draft) + len(state.speculative_response)
+    return size
+
+
+class SessionLifecycleManager:
+    """
+    Background sweeper for sessions held in this process's memory:
+
+    - sessions without candidate activity for SESSION_IDLE_TTL_SECONDS are spilled;
+    - while the estimated size of resident sessions exceeds SESSION_MEMORY_BUDGET_BYTES,
+      the least recently active ones are spilled.
+
+    Spilling writes a snapshot through StorageService and then removes the session from the
+    store (only if it did not change meanwhile). The InterviewManager rehydrates spilled
+    sessions from snapshot + journal the next time they are used, so a reconnecting
+    candidate doesn't notice. Shared stores (Redis) expire idle sessions by TTL and bound
+    their own memory, so there the sweeper only reports counts.
+    """
+    def __init__(
+        self,
+        store: InterviewStateStore,
+        storage_service: StorageService,
+        settings: Settings,
+        on_spilled: Optional[Callable[[str], None]] = None
+    ):
+        self.store = store
+        self.storage_service = storage_service
+        self.idle_ttl_seconds = settings.SESSION_IDLE_TTL_SECONDS
+        self.memory_budget_bytes = settings.SESSION_MEMORY_BUDGET_BYTES
+        self.sweep_interval_seconds = settings.SESSION_SWEEP_INTERVAL_SECONDS
+        self.on_spilled = on_spilled # e.g. drop the session's per-process coalescer
+        self.spilled_ids = set() # Spilled by this process and not resident since
+        self._resident_bytes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and self.store.is_process_local:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Session sweep failed: {e}")
+
+    async def sweep(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Spills idle sessions, then LRU sessions until under the memory budget."""
+        now = now or time.time()
+        sessions: List[Tuple[float, int, InterviewState]] = []
+        for interview_id in self.store.list_ids():
+            state = self.store.get(interview_id)
+            if state is not None:
+                sessions.append((state.last_activity_at, estimate_state_bytes(state), state))
+
+        idle_spilled = 0
+        resident: List[Tuple[float, int, InterviewState]] = []
+        for entry in sessions:
+            last_activity_at, _, state = entry
+            if now - last_activity_at >= self.idle_ttl_seconds and await self.spill(state, "idle"):
+                idle_spilled += 1
+            else:
+                resident.append(entry)
+
+        memory_spilled = 0
+        total_bytes = sum(size for _, size, _ in resident)
+        if total_bytes > self.memory_budget_bytes:
+            resident.sort(key=lambda entry: entry[0]) # Least recently active first
+            for last_activity_at, size, state in list(resident):
+                if total_bytes <= self.memory_budget_bytes:
+                    break
+                if await self.spill(state, "memory"):
+                    total_bytes -= size
+                    memory_spilled += 1
+        self._resident_bytes = total_bytes
+
+        self.spilled_ids.difference_update(self.store.list_ids()) # Rehydrated since
+        if idle_spilled or memory_spilled:
+            print(f"Session sweep: spilled {idle_spilled} idle and {memory_spilled} LRU sessions; "
+                  f"~{total_bytes} bytes resident.")
+        return {"idle_spilled": idle_spilled, "memory_spilled": memory_spilled}
+
+    async def spill(self, state: InterviewState, reason: str) -> bool:
+        """Persists a session and drops it from memory. Returns False if it changed meanwhile."""
+        interview_id = state.id
+        # The store hands out the live object, which keeps changing while the snapshot is
+        # written: serialize it and note its position in one atomic step (a no-op update)
+        _, taken = self.store.update(
+            interview_id, lambda current: (make_snapshot(current), current.journal_seq, current.last_activity_at)
+        )
+        if taken is None:
+            return False # Ended meanwhile
+        snapshot, seq, activity = taken
+        try:
+            saved = await self.storage_service.asave_interview_snapshot(interview_id, snapshot)
+        except Exception as e:
+            print(f"Could not spill session {interview_id}: {e}")
+            return False
+        if saved is None:
+            return False # Ended meanwhile: end_interview drops it (the final snapshot is not replaced)
+        # Only drop it if nothing was committed after the snapshot was taken (a chunk or final
+        # during the write would otherwise be lost); it is clearly not idle then, and the next
+        # sweep will reconsider it
+        removed = self.store.delete_if(
+            interview_id,
+            lambda current: current.journal_seq == seq and current.last_activity_at == activity
+        )
+        if removed is None:
+            return False
+        self.spilled_ids.add(interview_id)
+        metrics.increment(f"sessions_spilled_{reason}")
+        if self.on_spilled:
+            self.on_spilled(interview_id)
+        return True
+
+    def forget(self, interview_id: str):
+        """Stops counting a spilled session (it ended without being rehydrated)."""
+        self.spilled_ids.discard(interview_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts of resident and spilled sessions (for the stats endpoint)."""
+        resident_ids = self.store.list_ids()
+        self.spilled_ids.difference_update(resident_ids)
+        return {
+            "resident_sessions": len(resident_ids),
+            "spilled_sessions": len(self.spilled_ids),
+            "resident_bytes_estimate": self._resident_bytes, # As of the last sweep
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "spilled_idle_total": int(metrics.get_counter("sessions_spilled_idle")),
+            "spilled_memory_total": int(metrics.get_counter("sessions_spilled_memory")),
+            "rehydrated_total": int(metrics.get_counter("sessions_rehydrated")),
+            "sweeper_active": self._task is not None,
+        }
+
+
+_lifecycle_manager: Optional[SessionLifecycleManager] = None
+
+def set_session_lifecycle_manager(manager: Optional[SessionLifecycleManager]):
+    global _lifecycle_manager
+    _lifecycle_manager = manager
+
+def get_session_lifecycle_manager() -> Optional[SessionLifecycleManager]:
+    """The lifecycle manager started by the API lifespan (None outside the API process)."""
+    return _lifecycle_manager
@@ -0,0 +1,361 @@
+# app/core/state_store.py - Pluggable storage for live InterviewState objects
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Callable, List, Tuple, TypeVar
+
+from app.core.interview_state import InterviewState
+from app.core.exceptions import StateStoreError
+from app.config.settings import Settings, settings as app_settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+    print("Warning: redis not installed. Redis state store disabled.")
+
+T = TypeVar("T")
+
+# A mutator receives the current state, changes it in place and may return a value
+# (e.g. data the caller needs after the commit). It can be re-run on conflicts, so it
+# must not have side effects outside the state object.
+StateMutator = Callable[[InterviewState], T]
+
+
+class InterviewStateStore(ABC):
+    """
+    Interface for where live interview sessions are kept.
+    All writes go through `update`, so every backend can make them atomic per session.
+    """
+    # True when sessions live in this process's memory (subject to SessionLifecycleManager's
+    # memory budget); shared backends bound their own memory and expire sessions by TTL.
+    is_process_local: bool = False
+
+    @abstractmethod
+    def create(self, state: InterviewState) -> None:
+        """Stores a brand-new session."""
+
+    @abstractmethod
+    def create_if_absent(self, state: InterviewState) -> bool:
+        """Stores the session unless one with its id exists. Returns False if it already existed."""
+
+    @abstractmethod
+    def get(self, interview_id: str) -> Optional[InterviewState]:
+        """Returns the session, or None if it does not exist (or expired)."""
+
+    @abstractmethod
+    def update(self, interview_id: str, mutator: StateMutator) -> Tuple[Optional[InterviewState], Optional[T]]:
+        """
+        Applies `mutator` atomically to the session.
+        Returns (updated_state, mutator_result), or (None, None) if the session does not exist.
+        """
+
+    @abstractmethod
+    def delete(self, interview_id: str) -> Optional[InterviewState]:
+        """Removes the session and returns its last state (None if it did not exist)."""
+
+    @abstractmethod
+    def delete_if(self, interview_id: str, predicate: Callable[[InterviewState], bool]) -> Optional[InterviewState]:
+        """Atomically removes the session only if `predicate(state)` holds; returns it if removed."""
+
+    @abstractmethod
+    def list_ids(self) -> List[str]:
+        """Ids of all sessions currently held by the store."""
+
+    def get_field(self, interview_id: str, field: str):
+        """Reads one scalar field of the session (None if it does not exist); cheaper than get() on shared backends."""
+        state = self.get(interview_id)
+        return getattr(state, field) if state else None
+
+    def add_chunk(self, interview_id: str, chunk_text: str, is_final: bool, timestamp: float) -> Optional[InterviewState]:
+        """Appends a transcription chunk to the session's buffer."""
+        state, _ = self.update(interview_id, lambda s: s.add_chunk(chunk_text, is_final, timestamp))
+        return state
+
+
+class InMemoryStateStore(InterviewStateStore):
+    """
+    Keeps sessions in a process-local dict (the original behaviour).
+    Only valid with a single API process and workers that share it (solo/inline).
+    """
+    is_process_local = True
+
+    def __init__(self):
+        self._states: Dict[str, InterviewState] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock() # Tasks may run in threads (solo/gevent workers, inline mode)
+
+    def create(self, state: InterviewState) -> None:
+        with self._lock:
+            self._states[state.id] = state
+            self._versions[state.id] = 1
+
+    def create_if_absent(self, state: InterviewState) -> bool:
+        with self._lock:
+            if self._states.setdefault(state.id, state) is not state:
+                return False
+            self._versions[state.id] = 1
+            return True
+
+    def get(self, interview_id: str) -> Optional[InterviewState]:
+        return self._states.get(interview_id)
+
+    def update(self, interview_id: str, mutator: StateMutator) -> Tuple[Optional[InterviewState], Optional[T]]:
+        with self._lock:
+            state = self._states.get(interview_id)
+            if state is None:
+                return None, None
+            result = mutator(state)
+            self._versions[interview_id] += 1
+            return state, result
+
+    def delete(self, interview_id: str) -> Optional[InterviewState]:
+        with self._lock:
+            self._versions.pop(interview_id, None)
+            return self._states.pop(interview_id, None)
+
+    def delete_if(self, interview_id: str, predicate: Callable[[InterviewState], bool]) -> Optional[InterviewState]:
+        with self._lock:
+            state = self._states.get(interview_id)
+            if state is None or not predicate(state):
+                return None
+            self._versions.pop(interview_id, None)
+            return self._states.pop(interview_id)
+
+    def list_ids(self) -> List[str]:
+        return list(self._states.keys())
+
+
+class RedisStateStore(InterviewStateStore):
+    """
+    Keeps sessions in Redis so every API process and Celery worker sees the same state.
+
+    Layout: one hash per session, `interview_state:<id>`, with one JSON-encoded field per
+    scalar InterviewState attribute plus a `_version` counter. The append-only lists
+    (LIST_FIELDS) live in Redis lists, `interview_state_list:<id>:<field>`, one JSON item per
+    element, so a new turn or chunk is a single RPUSH instead of rewriting the whole list.
+
+    Updates are optimistic: the keys are WATCHed, the mutator runs on a decoded copy, and only
+    what changed is written back (changed hash fields, new list tails) in a MULTI/EXEC together
+    with a version bump. A concurrent writer makes EXEC fail and the update is retried.
+    Every write refreshes the TTL, so abandoned sessions expire.
+    """
+    KEY_PREFIX = "interview_state:"
+    LIST_KEY_PREFIX = "interview_state_list:"
+    VERSION_FIELD = "_version"
+    LIST_FIELDS = ("conversation_history", "transcript_segments", "chunk_segments")
+
+    def __init__(self, redis_url: str, ttl_seconds: int, max_retries: int = 10):
+        if redis is None:
+            raise StateStoreError("redis package is not installed; cannot use the Redis state store.")
+        self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_retries = max_retries
+
+    def _key(self, interview_id: str) -> str:
+        return f"{self.KEY_PREFIX}{interview_id}"
+
+    def _list_key(self, interview_id: str, field: str) -> str:
+        return f"{self.LIST_KEY_PREFIX}{interview_id}:{field}"
+
+    def _all_keys(self, interview_id: str) -> List[str]:
+        return [self._key(interview_id)] + [self._list_key(interview_id, field) for field in self.LIST_FIELDS]
+
+    @classmethod
+    def _encode_fields(cls, state: InterviewState) -> Dict[str, str]:
+        data = state.model_dump(mode="json", exclude=set(cls.LIST_FIELDS))
+        return {name: json.dumps(value) for name, value in data.items()}
+
+    @staticmethod
+    def _encode_items(items: List) -> List[str]:
+        return [json.dumps(item) for item in items] # NamedTuple turns encode as JSON arrays
+
+    @classmethod
+    def _decode(cls, raw: Dict[str, str], lists: Dict[str, List[str]]) -> InterviewState:
+        data = {name: json.loads(value) for name, value in raw.items() if name != cls.VERSION_FIELD}
+        for field, items in lists.items():
+            data[field] = [json.loads(item) for item in items]
+        return InterviewState.model_validate(data)
+
+    def _read(self, client, interview_id: str) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        """Reads the hash and all list fields (client is a plain connection or a WATCHing pipeline)."""
+        raw = client.hgetall(self._key(interview_id))
+        lists = {field: client.lrange(self._list_key(interview_id, field), 0, -1) for field in self.LIST_FIELDS}
+        return raw, lists
+
+    def _queue_writes(self, pipe, interview_id: str, state: InterviewState, raw: Dict[str, str], lists: Dict[str, List[str]]) -> bool:
+        """Queues the writes that bring Redis from (raw, lists) to `state`. Returns True if anything changed."""
+        key = self._key(interview_id)
+        changed = False
+        changes = {
+            name: value for name, value in self._encode_fields(state).items()
+            if raw.get(name) != value
+        }
+        if changes:
+            pipe.hset(key, mapping=changes)
+            changed = True
+        for field in self.LIST_FIELDS:
+            list_key = self._list_key(interview_id, field)
+            old_items = lists.get(field, [])
+            new_values = getattr(state, field)
+            # Mutators only append to or clear these lists, so checking the last known item is
+            # enough to tell an append (push the tail) from a rewrite, without re-encoding it all
+            appended = len(new_values) >= len(old_items) and (
+                not old_items or json.dumps(new_values[len(old_items) - 1]) == old_items[-1]
+            )
+            if appended:
+                tail = self._encode_items(new_values[len(old_items):])
+            else:
+                pipe.delete(list_key) # Cleared or rewritten (e.g. chunk buffer at the end of a turn)
+                tail = self._encode_items(new_values)
+                changed = changed or bool(old_items)
+            if tail:
+                pipe.rpush(list_key, *tail)
+                changed = True
+            pipe.expire(list_key, self.ttl_seconds)
+        pipe.expire(key, self.ttl_seconds) # Sliding TTL: active sessions never expire
+        return changed
+
+    def create(self, state: InterviewState) -> None:
+        try:
+            with self._redis.pipeline() as pipe: # MULTI/EXEC
+                self._queue_create(pipe, state)
+                pipe.execute()
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to create state for {state.id}: {e}", original_exception=e)
+
+    def _queue_create(self, pipe, state: InterviewState):
+        pipe.delete(*self._all_keys(state.id))
+        pipe.hset(self._key(state.id), mapping={self.VERSION_FIELD: 1})
+        self._queue_writes(pipe, state.id, state, {}, {})
+
+    def create_if_absent(self, state: InterviewState) -> bool:
+        key = self._key(state.id)
+        try:
+            with self._redis.pipeline() as pipe:
+                for _ in range(self.max_retries):
+                    try:
+                        pipe.watch(key)
+                        if pipe.exists(key):
+                            pipe.unwatch()
+                            return False
+                        pipe.multi()
+                        self._queue_create(pipe, state)
+                        pipe.execute()
+                        return True
+                    except redis.WatchError:
+                        continue # Created (or touched) meanwhile; check again
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to create state for {state.id}: {e}", original_exception=e)
+        raise StateStoreError(f"Gave up creating state for {state.id} after {self.max_retries} conflicting writes.")
+
+    def get(self, interview_id: str) -> Optional[InterviewState]:
+        try:
+            with self._redis.pipeline() as pipe:
+                pipe.hgetall(self._key(interview_id))
+                for field in self.LIST_FIELDS:
+                    pipe.lrange(self._list_key(interview_id, field), 0, -1)
+                raw, *list_values = pipe.execute()
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to load state for {interview_id}: {e}", original_exception=e)
+        return self._decode(raw, dict(zip(self.LIST_FIELDS, list_values))) if raw else None
+
+    def get_field(self, interview_id: str, field: str):
+        try:
+            raw = self._redis.hget(self._key(interview_id), field) # One HGET, no list reads
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to load {field} for {interview_id}: {e}", original_exception=e)
+        return json.loads(raw) if raw is not None else None
+
+    def update(self, interview_id: str, mutator: StateMutator) -> Tuple[Optional[InterviewState], Optional[T]]:
+        keys = self._all_keys(interview_id)
+        try:
+            with self._redis.pipeline() as pipe:
+                for _ in range(self.max_retries):
+                    try:
+                        pipe.watch(*keys)
+                        raw, lists = self._read(pipe, interview_id) # Immediate mode while WATCHing
+                        if not raw:
+                            pipe.unwatch()
+                            return None, None
+                        state = self._decode(raw, lists)
+                        result = mutator(state)
+                        pipe.multi()
+                        # Write back only what the mutator changed
+                        if self._queue_writes(pipe, interview_id, state, raw, lists):
+                            pipe.hincrby(keys[0], self.VERSION_FIELD, 1)
+                        pipe.execute()
+                        return state, result
+                    except redis.WatchError:
+                        continue # Another writer won the race; reload and re-apply
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to update state for {interview_id}: {e}", original_exception=e)
+        raise StateStoreError(f"Gave up updating state for {interview_id} after {self.max_retries} conflicting writes.")
+
+    def delete(self, interview_id: str) -> Optional[InterviewState]:
+        try:
+            with self._redis.pipeline() as pipe:
+                pipe.hgetall(self._key(interview_id))
+                for field in self.LIST_FIELDS:
+                    pipe.lrange(self._list_key(interview_id, field), 0, -1)
+                pipe.delete(*self._all_keys(interview_id))
+                raw, *list_values, _ = pipe.execute()
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to delete state for {interview_id}: {e}", original_exception=e)
+        return self._decode(raw, dict(zip(self.LIST_FIELDS, list_values))) if raw else None
+
+    def delete_if(self, interview_id: str, predicate: Callable[[InterviewState], bool]) -> Optional[InterviewState]:
+        keys = self._all_keys(interview_id)
+        try:
+            with self._redis.pipeline() as pipe:
+                for _ in range(self.max_retries):
+                    try:
+                        pipe.watch(*keys)
+                        raw, lists = self._read(pipe, interview_id)
+                        if not raw:
+                            pipe.unwatch()
+                            return None
+                        state = self._decode(raw, lists)
+                        if not predicate(state):
+                            pipe.unwatch()
+                            return None
+                        pipe.multi()
+                        pipe.delete(*keys)
+                        pipe.execute()
+                        return state
+                    except redis.WatchError:
+                        continue
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to delete state for {interview_id}: {e}", original_exception=e)
+        raise StateStoreError(f"Gave up deleting state for {interview_id} after {self.max_retries} conflicting writes.")
+
+    def list_ids(self) -> List[str]:
+        try:
+            return [key[len(self.KEY_PREFIX):] for key in self._redis.scan_iter(match=f"{self.KEY_PREFIX}*", count=500)]
+        except redis.RedisError as e:
+            raise StateStoreError(f"Failed to list interview states: {e}", original_exception=e)
+
+
+def create_state_store(settings: Settings = app_settings) -> InterviewStateStore:
+    """Builds the state store selected by STATE_STORE_BACKEND ("memory" or "redis")."""
+    backend = settings.STATE_STORE_BACKEND.lower()
+    if backend == "redis":
+        return RedisStateStore(
+            redis_url=settings.STATE_REDIS_URL,
+            ttl_seconds=settings.STATE_TTL_SECONDS,
+            max_retries=settings.STATE_UPDATE_MAX_RETRIES
+        )
+    if backend == "memory":
+        return InMemoryStateStore()
+    raise StateStoreError(f"Unknown STATE_STORE_BACKEND '{settings.STATE_STORE_BACKEND}'.")
+
+
+_state_store: Optional[InterviewStateStore] = None
+
+def get_state_store() -> InterviewStateStore:
+    """Process-wide state store instance, created on first use."""
+    global _state_store
+    if _state_store is None:
+        _state_store = create_state_store()
+    return _state_store
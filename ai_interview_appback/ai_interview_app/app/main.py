@@ -1,11 +1,23 @@
 # app/main.py - Entry point for the FastAPI application
 
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from app.config.settings import settings
 from app.api.v1.endpoints import documents, interview
 from app.tasks.celery import celery_app # Import the Celery app instance
+from app.services import llm_client_pool # Process-wide shared OpenAI clients
+from app.services.storage_service import shutdown_io_executor
+from app.services.upload_writer import UploadSizeLimitMiddleware, upload_body_limit
+from app.core.delivery import get_delivery_channel
+from app.core.history_manager import load_token_encoding
+from app.core.journal import get_journal_writer
+from app.core.state_store import get_state_store
+from app.core.session_lifecycle import SessionLifecycleManager, set_session_lifecycle_manager
+from app.core.live_executor import get_inline_executor, check_live_execution_backends, INLINE
+from app.api.v1 import dependencies
+from app.utils import metrics
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -14,17 +26,62 @@ async def lifespan(app: FastAPI):
     Connects to Celery broker on startup (optional, Celery tasks will handle connections)
     """
     print("Application startup...")
+    check_live_execution_backends(settings) # Misconfigured backends would silently never answer
     # Optional: Basic check or initialization related to services if needed
     # e.g., check storage path exists, connect to database (if not handled by ORM)
 
     # Note: Celery connections are typically managed by Celery itself within tasks/workers,
     # but you could add checks here if required.
 
+    # Create the shared LLM clients once for this process (keep-alive pool + concurrency cap).
+    # Only the async client is needed here; the API process never makes sync LLM calls.
+    llm_client_pool.init_llm_clients(settings, use_sync=False, use_async=True)
+
+    # Token counts use the tiktoken encoding, downloaded on first use unless cached: load it
+    # now, off the event loop, rather than inside the first committed turn
+    await asyncio.to_thread(load_token_encoding)
+
+    # Subscribe to the delivery channel: messages published by Celery tasks (drafts, deltas,
+    # final responses, fillers) are written to the sockets connected to this process.
+    delivery_manager = dependencies.get_interview_manager(
+        llm_service=dependencies.get_llm_service(settings),
+        mini_llm_service=dependencies.get_mini_llm_service(settings),
+        storage_service=dependencies.get_storage_service(settings),
+        settings=settings
+    )
+    delivery_channel = get_delivery_channel()
+    await delivery_channel.start(delivery_manager.handle_delivery)
+
+    # Idle eviction / memory cap for sessions held in this process (spilled sessions are
+    # rehydrated by the manager on their next use)
+    lifecycle_manager = SessionLifecycleManager(
+        store=get_state_store(),
+        storage_service=dependencies.get_storage_service(settings),
+        settings=settings,
+        on_spilled=delivery_manager.release_local_resources
+    )
+    await lifecycle_manager.start()
+    set_session_lifecycle_manager(lifecycle_manager)
+
+    # Temp files left behind by writes interrupted by a crash (in the background: it scans
+    # every storage directory)
+    storage_service = dependencies.get_storage_service(settings)
+    temp_cleanup = asyncio.create_task(storage_service.run_io(storage_service.remove_stale_temp_files))
+
     yield # Application runs
 
     print("Application shutdown...")
     # Clean up resources if necessary
     # e.g., close database connections (if not handled automatically)
+    await lifecycle_manager.stop()
+    await temp_cleanup
+    if settings.LIVE_EXECUTION_MODE.lower() == INLINE:
+        await get_inline_executor().shutdown(timeout=10.0) # Let in-flight responses finish and publish
+    await delivery_channel.stop()
+    if settings.JOURNAL_ENABLED:
+        get_journal_writer().flush(timeout=5.0) # Don't lose the last batch of journal entries
+    await llm_client_pool.close_llm_clients()
+    shutdown_io_executor() # After the journal flush and session spills that use it
 
 app = FastAPI(
     title="AI Interview Application",
@@ -33,6 +90,9 @@ app = FastAPI(
     lifespan=lifespan # Register the lifespan context manager
 )
 
+# Upload bodies are bounded while they are received, not after Starlette has spooled them
+app.add_middleware(UploadSizeLimitMiddleware, limit_for_path=lambda path: upload_body_limit(path, settings))
+
 # Include routers for API endpoints
 app.include_router(documents.router, prefix="/api/v1", tags=["documents"])
 app.include_router(interview.router, prefix="/api/v1", tags=["interview"])
@@ -42,6 +102,11 @@ async def read_root():
     """Root endpoint for basic health check."""
     return {"message": "AI Interview App is running"}
 
+@app.get("/metrics")
+async def read_metrics():
+    """Process-local counters and latency summaries (e.g. llm_final_ttft, delivery)."""
+    return metrics.snapshot()
+
 # Basic health check for Celery broker connection status (optional)
 # This would typically check if the broker is reachable, not if tasks are running
 # from celery.utils.nodenames import default_nodename
@@ -38,9 +38,9 @@ class StartInterviewResponse(BaseModel):
 # Redefine here as the central source of truth for models
 class ServerMessage(BaseModel):
     """Represents a message sent from the server to the user."""
-    type: str = Field(..., description="Type of message, e.g., 'llm_response', 'mini_llm_filler', 'interview_state', 'error', 'end', 'llm_response_draft'.")
+    type: str = Field(..., description="Type of message, e.g., 'llm_response', 'mini_llm_filler', 'interview_state', 'error', 'end', 'llm_response_draft', 'llm_response_delta', 'llm_response_error'.")
     payload: str = Field(..., description="The text content (LLM response, filler, error message, etc.).")
-    # Could add more fields like 'partial' for streaming, 'timestamp', etc.
+    # Streaming sends 'llm_response_delta' frames (one fragment each) followed by a closing 'llm_response' with the full text, or 'llm_response_error' if the stream failed.
 
 # Optional: Model for analysis results if exposed via API
 # class AnalysisResultResponse(BaseModel):
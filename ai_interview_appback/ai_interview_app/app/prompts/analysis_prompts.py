@@ -0,0 +1,28 @@
+# app/prompts/analysis_prompts.py - Prompts for post-interview analysis
+
+def get_post_interview_analysis_prompt() -> str:
+    """
+    Prompt for PostInterviewAnalyzer - evaluates the full transcript against the
+    JD and Resume summaries from pre-interview analysis.
+    """
+    return """
+Evaluate the candidate's performance in the following job interview.
+
+Job Description Summary:
+{job_description_summary}
+
+Resume Summary:
+{resume_summary}
+
+Interview Transcript:
+{interview_transcript}
+
+Assess the candidate against the role requirements. Include:
+- "overall_score": 1 to 10
+- "strengths": list of observed strengths, each backed by something the candidate said
+- "weaknesses": list of gaps or concerns
+- "requirement_coverage": for each key requirement of the role, whether the interview showed evidence for it
+- "recommendation": one of "strong_hire", "hire", "no_hire", "strong_no_hire", with a one-sentence justification
+
+Provide the output as a JSON object formatted within ```json ... ```.
+"""
@@ -1,5 +1,7 @@
 # app/prompts/code_analysis_prompts.py - Prompts and function definitions for code analysis
 
+from typing import Dict, Any
+
 # Example function definition for OpenAI function calling
 # This structure is specific to OpenAI's API
 def get_code_analysis_function_definition() -> Dict[str, Any]:
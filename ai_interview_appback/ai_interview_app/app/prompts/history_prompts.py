@@ -0,0 +1,29 @@
+# app/prompts/history_prompts.py - Prompts for the rolling conversation-history summary
+
+def get_history_summary_system_prompt() -> str:
+    """
+    Returns the system prompt for the mini-LLM when it condenses older interview turns.
+    """
+    return """
+You maintain a running summary of a job interview for the interviewer AI. The summary replaces the older part of the conversation in the interviewer's context, so it must preserve everything needed to continue the interview: topics already covered, questions already asked, the candidate's key claims (companies, roles, technologies, numbers), strengths, gaps, and any open follow-ups. Be factual and concise. Do not invent details.
+"""
+
+def get_history_summary_prompt() -> str:
+    """
+    Returns the prompt template for folding new turns into the existing summary.
+    """
+    return """
+Current summary of the earlier interview (may be empty):
+{previous_summary}
+
+Additional turns to fold into the summary, oldest first:
+{turns}
+
+Write the updated summary as short bullet points. Keep it under {max_words} words.
+"""
+
+def get_summary_context_message() -> str:
+    """
+    Returns the template used to present the summary to the main LLM as context.
+    """
+    return "Summary of the earlier part of this interview (older turns are not repeated below):\n{summary}"
@@ -46,19 +46,61 @@ Your response should:
 Generate ONLY your response text. Do not preface it with "AI:" or similar. Ensure it sounds like a natural, albeit structured, interview question or statement.
 """
 
+def get_pre_interview_analysis_prompt() -> str:
+    """Prompt for PreInterviewAnalyzer - asks LLM to extract structured info from JD/Resume."""
+    return """
+Analyze the following {document_type} document content.
+Extract key information relevant to a job interview process.
+For a Job Description, extract required skills, desired skills, qualifications, responsibilities, company industry, location, role level.
+For a Resume, extract work experience summary (company, title, dates, key achievements), education, skills (technical, soft), relevant projects.
+Always include a "summary" field: two or three sentences describing the document.
+
+Provide the output as a JSON object formatted within ```json ... ```.
+
+Document Content:
+{document_content}
+"""
+
+def get_section_analysis_prompt() -> str:
+    """
+    Prompt for one section of a long JD/Resume (PreInterviewAnalyzer's chunked mode).
+    The per-section results are merged field by field, so the field names are fixed here.
+    """
+    return """
+Analyze the following excerpt of a {document_type} document (part {part} of {parts}).
+The other parts are analyzed separately and the results are merged, so extract only what appears in this excerpt and do not guess about the rest of the document.
+For a Job Description, use the fields: required_skills, desired_skills, qualifications, responsibilities (lists), company_industry, location, role_level (strings).
+For a Resume, use the fields: work_experience (list of objects with company, title, dates, key_achievements), education (list), technical_skills, soft_skills, projects (lists).
+Leave out fields this excerpt says nothing about. Always include a "summary" field: one sentence describing this excerpt.
+
+Provide the output as a JSON object formatted within ```json ... ```.
+
+Document Excerpt:
+{document_content}
+"""
+
+def get_interview_plan_prompt() -> str:
+    """
+    Prompt for joining the JD and Resume analyses into the interview plan
+    (built once both documents of a pair are analyzed, before the interview starts).
+    """
+    return """
+You are preparing a job interview. Below are the structured analyses of the Job Description and of the candidate's Resume.
+
+Job Description Analysis:
+{jd_analysis}
+
+Resume Analysis:
+{resume_analysis}
+
+Build the interview plan:
+- "topics": 4 to 8 topics to cover, ordered by importance for the role (where the JD requirements and the candidate's experience meet, or where there are gaps).
+- "initial_questions": 2 or 3 opening questions tailored to this candidate and role.
+- "focus_areas": skills or claims from the resume worth probing in depth.
+
+Provide the output as a JSON object formatted within ```json ... ```.
+"""
+
 # You could add prompts for evaluating answers, generating follow-up questions based on specific topics, etc.
 # def get_follow_up_prompt(): ...
-# def get_answer_evaluation_prompt(): ...
-# def get_pre_interview_analysis_prompt():
-#     """Prompt for PreInterviewAnalyzer - asks LLM to extract structured info from JD/Resume."""
-#     return """
-# Analyze the following {document_type} document content.
-# Extract key information relevant to a job interview process.
-# For a Job Description, extract required skills, desired skills, qualifications, responsibilities, company industry, location, role level.
-# For a Resume, extract work experience summary (company, title, dates, key achievements), education, skills (technical, soft), relevant projects.
-#
-# Provide the output as a JSON object formatted within ```json ... ```.
-#
-# Document Content:
-# {document_content}
-# """
\ No newline at end of file
+# def get_answer_evaluation_prompt(): ...
\ No newline at end of file
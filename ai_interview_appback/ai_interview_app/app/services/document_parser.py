@@ -2,7 +2,12 @@
 
 import os
 import sys
-from typing import Dict, Any
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+from app.config.settings import Settings, settings as app_settings
 from app.core.exceptions import DocumentProcessingError # Import custom exception
 
 # Import parsing libraries (make sure they are in requirements.txt)
@@ -18,36 +23,69 @@ except ImportError:
     Document = None
     print("Warning: python-docx not installed. DOCX parsing disabled.")
 
+class _TextAssembler:
+    """Collects text parts in a list (joined once at the end) and stops at a character budget."""
+    def __init__(self, max_chars: int = 0):
+        self.max_chars = max_chars # 0 = no limit
+        self.parts: List[str] = []
+        self.length = 0
+
+    @property
+    def full(self) -> bool:
+        return bool(self.max_chars) and self.length >= self.max_chars
+
+    def add(self, part: str) -> bool:
+        """Adds one part (trimmed to what is left of the budget). Returns False once the budget is used up."""
+        if self.max_chars:
+            part = part[:self.max_chars - self.length]
+        self.parts.append(part)
+        self.length += len(part)
+        return not self.full
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
 class DocumentParser:
     """
     Handles parsing text content from various document types (PDF, DOCX).
+    Large PDFs are extracted in page ranges across a process pool; extraction stops
+    once PARSER_MAX_CHARS characters have been collected.
     """
+    def __init__(self, settings: Settings = app_settings):
+        self.max_chars = settings.PARSER_MAX_CHARS
+        self.parallel_min_pages = settings.PARSER_PARALLEL_MIN_PAGES
+        self.pages_per_task = max(1, settings.PARSER_PAGES_PER_TASK)
+        self.max_workers = settings.PARSER_MAX_WORKERS or os.cpu_count() or 1
 
-    def parse_document(self, file_path: str) -> str:
+    def parse_document(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """
         Parses the text content from a given file path based on its extension.
+        `max_chars` overrides PARSER_MAX_CHARS (0 = no limit).
         """
         if not os.path.exists(file_path):
             raise DocumentProcessingError(file_path, detail="File not found.")
+        if max_chars is None:
+            max_chars = self.max_chars
 
         _, file_extension = os.path.splitext(file_path)
         file_extension = file_extension.lower()
 
         text_content = ""
         if file_extension == ".pdf":
-            text_content = self._parse_pdf(file_path)
+            text_content = self._parse_pdf(file_path, max_chars)
         elif file_extension == ".docx":
-            text_content = self._parse_docx(file_path)
+            text_content = self._parse_docx(file_path, max_chars)
         elif file_extension == ".txt":
              with open(file_path, 'r', encoding='utf-8') as f:
-                 text_content = f.read()
+                 text_content = f.read(max_chars or -1)
         else:
             # For unsupported types, try basic text read or raise error
             # raise DocumentProcessingError(file_path, detail=f"Unsupported file type: {file_extension}")
              print(f"Warning: Unsupported file type '{file_extension}'. Attempting basic text read.")
              try:
                  with open(file_path, 'r', encoding='utf-8') as f:
-                     text_content = f.read()
+                     text_content = f.read(max_chars or -1)
              except Exception as e:
                   raise DocumentProcessingError(file_path, detail=f"Unsupported file type or basic read failed: {file_extension}, {e}")
 
@@ -59,30 +97,131 @@ class DocumentParser:
 
         return text_content.strip()
 
-    def _parse_pdf(self, file_path: str) -> str:
+    def _parse_pdf(self, file_path: str, max_chars: int = 0) -> str:
         """Parses text from a PDF file using PyMuPDF."""
         if not fitz:
             raise DocumentProcessingError(file_path, detail="PyMuPDF not installed to parse PDF.")
         try:
-            doc = fitz.open(file_path)
-            text = ""
-            for page_num in range(doc.page_count):
-                page = doc.load_page(page_num)
-                text += page.get_text()
-            doc.close()
-            return text
+            with fitz.open(file_path) as doc:
+                page_count = doc.page_count
+                if page_count < self.parallel_min_pages or self.max_workers < 2:
+                    return self._parse_pdf_pages(doc, max_chars)
+            return self._parse_pdf_parallel(file_path, page_count, max_chars)
+        except DocumentProcessingError:
+            raise
         except Exception as e:
             raise DocumentProcessingError(file_path, detail=f"Failed to parse PDF: {e}")
 
-    def _parse_docx(self, file_path: str) -> str:
+    def _parse_pdf_pages(self, doc, max_chars: int) -> str:
+        """Sequential extraction, stopping at the character budget."""
+        assembler = _TextAssembler(max_chars)
+        for page_num in range(doc.page_count):
+            if not assembler.add(doc.load_page(page_num).get_text()):
+                break
+        return assembler.text()
+
+    def _parse_pdf_parallel(self, file_path: str, page_count: int, max_chars: int) -> str:
+        """
+        Extracts page ranges in the process pool and assembles them in page order.
+        Only a few ranges are in flight at a time, so once the budget is reached the
+        pages after it are never extracted.
+        """
+        ranges = deque((start, min(start + self.pages_per_task, page_count))
+                       for start in range(0, page_count, self.pages_per_task))
+        pool = _get_page_pool(self.max_workers)
+        if pool is not None:
+            try:
+                return self._extract_in_pool(pool, file_path, ranges, max_chars)
+            except _PagePoolUnavailable:
+                pass # Disabled for this process; this document is parsed from the start below
+        with fitz.open(file_path) as doc:
+            return self._parse_pdf_pages(doc, max_chars)
+
+    def _extract_in_pool(self, pool: ProcessPoolExecutor, file_path: str, ranges: deque, max_chars: int) -> str:
+        assembler = _TextAssembler(max_chars)
+        in_flight = deque()
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < self.max_workers * 2:
+                    start, stop = ranges.popleft()
+                    in_flight.append(_submit_page_range(pool, file_path, start, stop))
+                for page_text in in_flight.popleft().result():
+                    if not assembler.add(page_text):
+                        return assembler.text()
+            return assembler.text()
+        finally:
+            for future in in_flight:
+                future.cancel() # Budget reached (or a range failed): drop ranges not started yet
+
+    def _parse_docx(self, file_path: str, max_chars: int = 0) -> str:
         """Parses text from a DOCX file using python-docx."""
         if not Document:
             raise DocumentProcessingError(file_path, detail="python-docx not installed to parse DOCX.")
         try:
             doc = Document(file_path)
-            text = ""
+            assembler = _TextAssembler(max_chars)
             for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+                if not assembler.add(paragraph.text + "\n"):
+                    break
+            return assembler.text()
         except Exception as e:
-            raise DocumentProcessingError(file_path, detail=f"Failed to parse DOCX: {e}")
\ No newline at end of file
+            raise DocumentProcessingError(file_path, detail=f"Failed to parse DOCX: {e}")
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Runs in a pool process: text of pages [start, stop) of one PDF."""
+    with fitz.open(file_path) as doc:
+        return [doc.load_page(page_num).get_text() for page_num in range(start, stop)]
+
+
+class _PagePoolUnavailable(Exception):
+    """The page pool could not start its processes; extraction falls back to sequential."""
+
+
+# One page-extraction pool per process, created on first use and reused for every document.
+# "spawn" children start clean: forking a Celery worker with live client threads is unsafe.
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_failed = False
+_page_pool_lock = threading.Lock()
+
+def _get_page_pool(max_workers: int) -> Optional[ProcessPoolExecutor]:
+    """Returns the shared pool, or None when this process can't start one (extraction stays sequential)."""
+    global _page_pool
+    if _page_pool is None and not _page_pool_failed:
+        with _page_pool_lock:
+            if _page_pool is None and not _page_pool_failed:
+                if multiprocessing.current_process().daemon:
+                    # Prefork Celery children are daemonic and may not have children of their own
+                    _disable_page_pool("daemonic processes are not allowed to have children")
+                    return None
+                try:
+                    _page_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+                except Exception as e:
+                    _disable_page_pool(e)
+    return _page_pool
+
+def _submit_page_range(pool: ProcessPoolExecutor, file_path: str, start: int, stop: int):
+    # Pool processes are only spawned here, on submit, so this is where starting them fails
+    try:
+        return pool.submit(_extract_page_range, file_path, start, stop)
+    except Exception as e:
+        with _page_pool_lock:
+            _disable_page_pool(e)
+        raise _PagePoolUnavailable(str(e)) from e
+
+def _disable_page_pool(reason):
+    """Parses sequentially from now on in this process (caller holds _page_pool_lock)."""
+    global _page_pool, _page_pool_failed
+    _page_pool_failed = True
+    if _page_pool is not None:
+        _page_pool.shutdown(wait=False, cancel_futures=True)
+        _page_pool = None
+    print(f"Warning: PDF page pool unavailable, parsing sequentially: {reason}")
+
+def shutdown_page_pool():
+    """Stops the page-extraction pool (worker process shutdown)."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False, cancel_futures=True)
+            _page_pool = None
\ No newline at end of file
@@ -0,0 +1,107 @@
+# app/services/llm_client_pool.py - Process-wide shared OpenAI clients
+
+import asyncio
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from typing import Optional
+
+from app.config.settings import Settings, settings as app_settings
+
+# One client of each kind per process. Every LLMService / MiniLLMService instance
+# borrows these instead of building its own, so TLS setup and the connection pool
+# are shared across requests, WebSocket connections and Celery tasks.
+#
+# - The async client is for the FastAPI process (it is bound to the event loop that
+#   first uses it, so it must not be shared across asyncio.run() calls).
+# - The sync client is for Celery workers, whose tasks are synchronous.
+_sync_client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+_async_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _connection_limits(settings: Settings) -> httpx.Limits:
+    """Keep-alive/connection limits applied to both shared clients."""
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def init_llm_clients(settings: Settings = app_settings, use_sync: bool = True, use_async: bool = True):
+    """
+    Creates the shared clients for this process.
+    Called from the FastAPI lifespan and from the Celery worker_process_init signal
+    (i.e. after fork, so prefork children never share sockets with the parent).
+    """
+    global _sync_client, _async_client, _async_semaphore
+    if use_sync and _sync_client is None:
+        _sync_client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            http_client=DefaultHttpxClient(limits=_connection_limits(settings)),
+        )
+    if use_async and _async_client is None:
+        _async_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            http_client=DefaultAsyncHttpxClient(limits=_connection_limits(settings)),
+        )
+        # Caps in-flight async LLM calls so a burst of sessions queues here
+        # instead of piling up on the HTTP pool.
+        _async_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT_REQUESTS)
+    print(f"LLM client pool initialized (sync={_sync_client is not None}, async={_async_client is not None})")
+
+
+def get_sync_client(api_key: Optional[str] = None) -> OpenAI:
+    """Returns the shared sync client, creating it lazily if the process never initialized it."""
+    if _sync_client is None:
+        init_llm_clients(_settings_for(api_key), use_sync=True, use_async=False)
+    return _sync_client
+
+
+def get_async_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """Returns the shared async client, creating it lazily if the process never initialized it."""
+    if _async_client is None:
+        init_llm_clients(_settings_for(api_key), use_sync=False, use_async=True)
+    return _async_client
+
+
+def get_async_semaphore() -> asyncio.Semaphore:
+    """Semaphore limiting concurrent async LLM calls in this process."""
+    if _async_semaphore is None:
+        get_async_client()
+    return _async_semaphore
+
+
+def open_sync_connection(model_name: str, timeout: float):
+    """
+    Makes one cheap request (model metadata, no tokens) on the shared sync client so its pool
+    holds a live keep-alive connection: the first task then skips DNS/TCP/TLS setup.
+    """
+    get_sync_client().with_options(timeout=timeout, max_retries=0).models.retrieve(model_name)
+
+
+def _settings_for(api_key: Optional[str]) -> Settings:
+    """Settings to build a client with, honouring an explicitly passed API key."""
+    if api_key is None or api_key == app_settings.OPENAI_API_KEY:
+        return app_settings
+    return app_settings.model_copy(update={"OPENAI_API_KEY": api_key})
+
+
+async def close_llm_clients():
+    """Closes the shared clients (FastAPI shutdown / worker process shutdown)."""
+    global _sync_client, _async_client, _async_semaphore
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        _async_semaphore = None
+    close_sync_client()
+
+
+def close_sync_client():
+    """Closes only the sync client (usable outside an event loop, e.g. in Celery signals)."""
+    global _sync_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
@@ -1,9 +1,11 @@
 # app/services/llm_service.py - Service for interacting with the main LLM (e.g., OpenAI)
 
 import openai
-from openai import OpenAI
-from typing import List, Dict, Any, Optional
-from app.core.exceptions import LLMServiceError # Import custom exception
+from openai import OpenAI, AsyncOpenAI
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
+from app.core.exceptions import LLMServiceError, DraftCancelled # Import custom exception
+from app.core.draft_cancellation import CancelToken
+from app.services import llm_client_pool # Process-wide shared clients
 
 # Assuming prompt templates are stored in prompts/
 from app.prompts import system_prompts, interview_prompts, chunk_prompts
@@ -13,9 +15,12 @@ class LLMService:
     Handles communication and interaction with the main LLM model.
     Manages conversation context and generates responses.
     """
-    def __init__(self, api_key: str, model_name: str):
-        # Initialize the OpenAI client
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model_name: str, client: Optional[OpenAI] = None, async_client: Optional[AsyncOpenAI] = None):
+        # Borrow the process-wide clients (see llm_client_pool) unless explicit ones are injected,
+        # so building a service per request/task no longer opens new connections.
+        self.client = client or llm_client_pool.get_sync_client(api_key)
+        self._async_client = async_client
+        self._api_key = api_key
         self.model_name = model_name
 
         # Get initial system prompt from prompts module
@@ -25,6 +30,21 @@ class LLMService:
         self.initial_question_prompt_template = interview_prompts.get_initial_question_prompt()
         # Add other prompt templates as needed
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Shared async client, resolved lazily so sync-only processes (Celery workers) never create one."""
+        if self._async_client is None:
+            self._async_client = llm_client_pool.get_async_client(self._api_key)
+        return self._async_client
+
+    @staticmethod
+    def _extract_content(response) -> str:
+        """Returns the text of the first choice of a non-streaming completion."""
+        if response.choices and response.choices[0].message.content:
+            return response.choices[0].message.content
+        print("LLM returned no content.")
+        return "I'm sorry, I couldn't generate a response at this moment."
+
     def _call_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 500) -> str:
         """Helper method to make the API call to the LLM."""
         try:
@@ -41,13 +61,8 @@ class LLMService:
                 max_tokens=max_tokens,
                 # stream=True # Can enable streaming if needed for partial responses
             )
-            # If streaming, process chunks. If not, get the single response.
             # For non-streaming, get the content from the first choice
-            if response.choices and response.choices[0].message.content:
-                 return response.choices[0].message.content
-            else:
-                 print("LLM returned no content.")
-                 return "I'm sorry, I couldn't generate a response at this moment."
+            return self._extract_content(response)
 
         except openai.APIError as e:
             print(f"OpenAI API Error: {e}")
@@ -56,8 +71,112 @@ class LLMService:
             print(f"An unexpected error occurred during LLM call: {e}")
             raise LLMServiceError(f"Unexpected LLM error: {e}", original_exception=e)
 
+    def _stream_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 500, cancel_token: Optional[CancelToken] = None) -> Iterator[str]:
+        """
+        Helper method to make a streaming API call. Yields content deltas as they arrive.
+        With a cancel_token, the stream (and its HTTP request) is closed as soon as the token
+        fires and DraftCancelled is raised.
+        """
+        try:
+            print(f"Streaming LLM call with {len(messages)} messages...")
+            if cancel_token:
+                cancel_token.started, cancel_token.max_tokens = True, max_tokens
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            for chunk in stream:
+                if cancel_token and cancel_token.cancelled:
+                    stream.close() # Drops the connection: the API stops generating for us
+                    raise DraftCancelled()
+                # Each chunk carries a small content delta (or nothing, e.g. the role header / finish chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if cancel_token:
+                        cancel_token.tokens_received += 1
+                    yield chunk.choices[0].delta.content
+
+        except DraftCancelled:
+            raise
+        except openai.APIError as e:
+            print(f"OpenAI API Error (streaming): {e}")
+            raise LLMServiceError(f"LLM API Error: {e}", original_exception=e)
+        except Exception as e:
+            print(f"An unexpected error occurred during streaming LLM call: {e}")
+            raise LLMServiceError(f"Unexpected LLM error: {e}", original_exception=e)
+
+    async def _acall_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 500) -> str:
+        """Async counterpart of _call_llm; does not block the event loop while waiting on the API."""
+        try:
+            print(f"Calling LLM (async) with {len(messages)} messages...")
+            # The semaphore bounds concurrent LLM calls for the whole process
+            async with llm_client_pool.get_async_semaphore():
+                response = await self.async_client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            return self._extract_content(response)
+
+        except openai.APIError as e:
+            print(f"OpenAI API Error: {e}")
+            raise LLMServiceError(f"LLM API Error: {e}", original_exception=e)
+        except Exception as e:
+            print(f"An unexpected error occurred during async LLM call: {e}")
+            raise LLMServiceError(f"Unexpected LLM error: {e}", original_exception=e)
+
+    async def _astream_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 500, cancel_token: Optional[CancelToken] = None) -> AsyncIterator[str]:
+        """
+        Async counterpart of _stream_llm. Yields content deltas as they arrive.
+        Cancelling the surrounding asyncio task also aborts the request.
+        """
+        try:
+            print(f"Streaming LLM call (async) with {len(messages)} messages...")
+            # Hold the concurrency slot for the whole stream, since the connection stays busy
+            async with llm_client_pool.get_async_semaphore():
+                if cancel_token:
+                    cancel_token.started, cancel_token.max_tokens = True, max_tokens
+                stream = await self.async_client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if cancel_token and cancel_token.cancelled:
+                        await stream.close()
+                        raise DraftCancelled()
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if cancel_token:
+                            cancel_token.tokens_received += 1
+                        yield chunk.choices[0].delta.content
+
+        except DraftCancelled:
+            raise
+        except openai.APIError as e:
+            print(f"OpenAI API Error (streaming): {e}")
+            raise LLMServiceError(f"LLM API Error: {e}", original_exception=e)
+        except Exception as e:
+            print(f"An unexpected error occurred during async streaming LLM call: {e}")
+            raise LLMServiceError(f"Unexpected LLM error: {e}", original_exception=e)
+
     def generate_initial_question(self, interview_plan: Dict[str, Any], jd_analysis: Dict[str, Any], resume_analysis: Dict[str, Any]) -> str:
         """Generates the first interview question based on analysis."""
+        messages = self._build_initial_question_messages(interview_plan, jd_analysis, resume_analysis)
+        # Keep max_tokens relatively low for initial concise question
+        return self._call_llm(messages, temperature=0.8, max_tokens=150)
+
+    async def agenerate_initial_question(self, interview_plan: Dict[str, Any], jd_analysis: Dict[str, Any], resume_analysis: Dict[str, Any]) -> str:
+        """Async variant of generate_initial_question."""
+        messages = self._build_initial_question_messages(interview_plan, jd_analysis, resume_analysis)
+        return await self._acall_llm(messages, temperature=0.8, max_tokens=150)
+
+    def _build_initial_question_messages(self, interview_plan: Dict[str, Any], jd_analysis: Dict[str, Any], resume_analysis: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Builds the message list for the first interview question."""
         # Construct the prompt using the templates and analysis data
         prompt_content = self.initial_question_prompt_template.format(
             jd_summary=jd_analysis.get("summary", ""), # Assuming analysis provides summaries
@@ -65,23 +184,50 @@ class LLMService:
             key_topics=interview_plan.get("topics", []),
             initial_questions=interview_plan.get("initial_questions", [])
         )
-        messages = [
+        return [
             {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": prompt_content}
         ]
-        # Keep max_tokens relatively low for initial concise question
-        return self._call_llm(messages, temperature=0.8, max_tokens=150)
 
 
-    def process_incremental_chunk(self, conversation_history: List[Dict[str, str]], current_buffer: str) -> str:
+    def _call_llm_cancellable(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, cancel_token: Optional[CancelToken]) -> str:
+        """_call_llm, streamed under the hood when a cancel_token is given so it can be aborted midway."""
+        if cancel_token is None:
+            return self._call_llm(messages, temperature=temperature, max_tokens=max_tokens)
+        return "".join(self._stream_llm(messages, temperature=temperature, max_tokens=max_tokens, cancel_token=cancel_token))
+
+    async def _acall_llm_cancellable(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, cancel_token: Optional[CancelToken]) -> str:
+        """Async variant of _call_llm_cancellable."""
+        if cancel_token is None:
+            return await self._acall_llm(messages, temperature=temperature, max_tokens=max_tokens)
+        parts = [delta async for delta in self._astream_llm(messages, temperature=temperature, max_tokens=max_tokens, cancel_token=cancel_token)]
+        return "".join(parts)
+
+    def process_incremental_chunk(self, conversation_history: List[Dict[str, str]], current_buffer: str, cancel_token: Optional[CancelToken] = None) -> str:
         """
         Processes an incoming transcription chunk while the user is still speaking.
         Generates a preliminary, non-final response draft or internal thought process.
+        Raises DraftCancelled if cancel_token fires before the draft is complete.
         """
+        messages = self._build_chunk_messages(conversation_history, current_buffer)
+
+        # Call LLM with a lower temperature maybe? And potentially lower max_tokens
+        # The output here is the "latest draft".
+        draft = self._call_llm_cancellable(messages, 0.5, 50, cancel_token) # Drafts should be short
+        return draft.strip() # Return the generated draft (could be empty string if LLM follows instruction)
+
+    async def aprocess_incremental_chunk(self, conversation_history: List[Dict[str, str]], current_buffer: str, cancel_token: Optional[CancelToken] = None) -> str:
+        """Async variant of process_incremental_chunk."""
+        messages = self._build_chunk_messages(conversation_history, current_buffer)
+        draft = await self._acall_llm_cancellable(messages, 0.5, 50, cancel_token)
+        return draft.strip()
+
+    def _build_chunk_messages(self, conversation_history: List[Dict[str, str]], current_buffer: str) -> List[Dict[str, str]]:
+        """Builds the message list for a partial (still speaking) utterance."""
         # Construct messages for the LLM.
         # Include the system prompt, historical conversation, and the current buffer.
         # Use a special prompt indicating the input is incomplete.
-        messages = [
+        return [
             {"role": "system", "content": self.system_prompt},
             *conversation_history, # Include previous turns
             {"role": "user", "content": self.chunk_processing_prompt_template.format(current_buffer=current_buffer)}
@@ -91,25 +237,13 @@ class LLMService:
             # understanding or prepares for response, marked clearly as draft."
         ]
 
-        # Call LLM with a lower temperature maybe? And potentially lower max_tokens
-        # The output here is the "latest draft".
-        draft = self._call_llm(messages, temperature=0.5, max_tokens=50) # Drafts should be short
-        return draft.strip() # Return the generated draft (could be empty string if LLM follows instruction)
-
 
     def process_final_utterance(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> str:
         """
         Processes the full user utterance after a pause is detected.
         Generates the final, definitive response.
         """
-        # Construct messages including the full utterance.
-        # Use a prompt that signals this is the final input and expects a full response.
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            *conversation_history, # Include previous turns
-            {"role": "user", "content": full_utterance} # Send the full user utterance as the latest user message
-            # After this, the LLM's response will be added to conversation_history
-        ]
+        messages = self._build_final_messages(conversation_history, full_utterance)
 
         # Call LLM. Expect a complete response.
         # Use a higher max_tokens than for drafts.
@@ -119,6 +253,51 @@ class LLMService:
         # For example, ensure it starts with a question, or includes specific phrasing.
         return final_response.strip()
 
+    def stream_final_utterance(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> Iterator[str]:
+        """
+        Streaming variant of process_final_utterance.
+        Yields response deltas as the LLM produces them; the caller joins them into the final response.
+        """
+        messages = self._build_final_messages(conversation_history, full_utterance)
+        # Same sampling settings as the non-streaming path so both modes behave alike
+        return self._stream_llm(messages, temperature=0.7, max_tokens=300)
+
+    async def aprocess_final_utterance(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> str:
+        """Async variant of process_final_utterance."""
+        messages = self._build_final_messages(conversation_history, full_utterance)
+        final_response = await self._acall_llm(messages, temperature=0.7, max_tokens=300)
+        return final_response.strip()
+
+    def astream_final_utterance(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> AsyncIterator[str]:
+        """Async variant of stream_final_utterance (use with `async for`)."""
+        messages = self._build_final_messages(conversation_history, full_utterance)
+        return self._astream_llm(messages, temperature=0.7, max_tokens=300)
+
+    def generate_speculative_response(self, conversation_history: List[Dict[str, str]], current_buffer: str, cancel_token: Optional[CancelToken] = None) -> str:
+        """
+        Generates a candidate *final* response for an utterance that is still in progress.
+        Uses the same prompt as process_final_utterance so that, if the user ends up saying
+        (almost) exactly this, the response can be committed without another LLM call.
+        """
+        messages = self._build_final_messages(conversation_history, current_buffer)
+        return self._call_llm_cancellable(messages, 0.7, 300, cancel_token).strip()
+
+    async def agenerate_speculative_response(self, conversation_history: List[Dict[str, str]], current_buffer: str, cancel_token: Optional[CancelToken] = None) -> str:
+        """Async variant of generate_speculative_response."""
+        messages = self._build_final_messages(conversation_history, current_buffer)
+        return (await self._acall_llm_cancellable(messages, 0.7, 300, cancel_token)).strip()
+
+    def _build_final_messages(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> List[Dict[str, str]]:
+        """Builds the message list for a final (complete) user utterance."""
+        # Construct messages including the full utterance.
+        # Use a prompt that signals this is the final input and expects a full response.
+        return [
+            {"role": "system", "content": self.system_prompt},
+            *conversation_history, # Include previous turns
+            {"role": "user", "content": full_utterance} # Send the full user utterance as the latest user message
+            # After this, the LLM's response will be added to conversation_history
+        ]
+
     # Potentially add methods for function calling/agents if the LLM supports it directly
     # def analyze_code_with_agent(self, code_snippet: str, context: str, job_description_details: Dict[str, Any]):
     #     """Uses LLM agent/function calling to analyze code."""
@@ -1,22 +1,33 @@
 # app/services/mini_llm_service.py - Service for the mini-LLM (fillers, surprises)
 
 import openai
-from openai import OpenAI
-from typing import List, Dict, Any
+from openai import OpenAI, AsyncOpenAI
+from typing import List, Dict, Any, Optional
 from app.core.exceptions import LLMServiceError # Re-use LLM service error
+from app.services import llm_client_pool # Process-wide shared clients
 from app.prompts import surprise_prompts # Assuming surprise prompts exist
+from app.prompts import history_prompts
 
 class MiniLLMService:
     """
     Handles communication with a smaller LLM for generating
     short fillers, acknowledgements, or surprises during the interview.
     """
-    def __init__(self, api_key: str, model_name: str):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model_name: str, client: Optional[OpenAI] = None, async_client: Optional[AsyncOpenAI] = None):
+        # Shares the process-wide clients with LLMService (same API host, same connection pool)
+        self.client = client or llm_client_pool.get_sync_client(api_key)
+        self._async_client = async_client
+        self._api_key = api_key
         self.model_name = model_name
         # Get the system prompt specific to the mini-LLM's role
         self.system_prompt = surprise_prompts.get_mini_llm_system_prompt()
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Shared async client, resolved lazily so sync-only processes never create one."""
+        if self._async_client is None:
+            self._async_client = llm_client_pool.get_async_client(self._api_key)
+        return self._async_client
 
     def generate_surprise(self, context: str, conversation_snippet: str) -> str:
         """
@@ -24,19 +35,9 @@ class MiniLLMService:
         Context could be "after_chunk", "after_pause", "random_interval", etc.
         Conversation snippet provides recent turn context.
         """
-        # Choose a specific prompt based on context
-        prompt_template = surprise_prompts.get_surprise_prompt(context)
-        if not prompt_template:
-             print(f"Warning: No surprise prompt template found for context: {context}")
-             return "" # Return empty string if no suitable prompt
-
-        # Construct the user message with relevant context information
-        user_message = prompt_template.format(conversation_snippet=conversation_snippet)
-
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_message}
-        ]
+        messages = self._build_surprise_messages(context, conversation_snippet)
+        if messages is None:
+            return "" # Return empty string if no suitable prompt
 
         try:
             print(f"Calling Mini-LLM for surprise (context: {context})...")
@@ -59,4 +60,112 @@ class MiniLLMService:
             return "" # Don't necessarily crash for a filler error
         except Exception as e:
             print(f"An unexpected error occurred during Mini-LLM call: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    async def agenerate_surprise(self, context: str, conversation_snippet: str) -> str:
+        """Async variant of generate_surprise; does not block the event loop."""
+        messages = self._build_surprise_messages(context, conversation_snippet)
+        if messages is None:
+            return ""
+
+        try:
+            print(f"Calling Mini-LLM (async) for surprise (context: {context})...")
+            async with llm_client_pool.get_async_semaphore():
+                response = await self.async_client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=0.9,
+                    max_tokens=30
+                )
+            if response.choices and response.choices[0].message.content:
+                return response.choices[0].message.content.strip()
+            print("Mini-LLM returned no content.")
+            return ""
+
+        except openai.APIError as e:
+            print(f"OpenAI API Error (Mini-LLM): {e}")
+            return ""
+        except Exception as e:
+            print(f"An unexpected error occurred during async Mini-LLM call: {e}")
+            return ""
+
+    def summarize_history(self, previous_summary: str, turns: List[Dict[str, Any]], max_words: int = 250) -> str:
+        """
+        Folds older interview turns into the rolling history summary.
+        Runs in the background (Celery, or inline as an asyncio task), never on the live response path.
+        Returns an empty string on failure so the caller keeps the previous summary.
+        """
+        messages = self._build_summary_messages(previous_summary, turns, max_words)
+
+        try:
+            print(f"Calling Mini-LLM to summarize {len(turns)} turns...")
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=0.2, # Summaries should be faithful, not creative
+                max_tokens=max_words * 2
+            )
+            if response.choices and response.choices[0].message.content:
+                return response.choices[0].message.content.strip()
+            print("Mini-LLM returned no summary content.")
+            return ""
+
+        except openai.APIError as e:
+            print(f"OpenAI API Error (Mini-LLM summary): {e}")
+            return ""
+        except Exception as e:
+            print(f"An unexpected error occurred during Mini-LLM summary call: {e}")
+            return ""
+
+    async def asummarize_history(self, previous_summary: str, turns: List[Dict[str, Any]], max_words: int = 250) -> str:
+        """Async variant of summarize_history (inline execution mode)."""
+        messages = self._build_summary_messages(previous_summary, turns, max_words)
+
+        try:
+            print(f"Calling Mini-LLM (async) to summarize {len(turns)} turns...")
+            async with llm_client_pool.get_async_semaphore():
+                response = await self.async_client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=max_words * 2
+                )
+            if response.choices and response.choices[0].message.content:
+                return response.choices[0].message.content.strip()
+            print("Mini-LLM returned no summary content.")
+            return ""
+
+        except openai.APIError as e:
+            print(f"OpenAI API Error (Mini-LLM summary): {e}")
+            return ""
+        except Exception as e:
+            print(f"An unexpected error occurred during async Mini-LLM summary call: {e}")
+            return ""
+
+    def _build_summary_messages(self, previous_summary: str, turns: List[Dict[str, Any]], max_words: int) -> List[Dict[str, str]]:
+        """Builds the messages for a rolling history summary refresh."""
+        turns_text = "\n".join(f"Candidate: {turn['user']}\nInterviewer: {turn['assistant']}" for turn in turns)
+        return [
+            {"role": "system", "content": history_prompts.get_history_summary_system_prompt()},
+            {"role": "user", "content": history_prompts.get_history_summary_prompt().format(
+                previous_summary=previous_summary or "(none)",
+                turns=turns_text,
+                max_words=max_words
+            )}
+        ]
+
+    def _build_surprise_messages(self, context: str, conversation_snippet: str) -> Optional[List[Dict[str, str]]]:
+        """Builds the messages for a filler/surprise, or None if no prompt fits the context."""
+        # Choose a specific prompt based on context
+        prompt_template = surprise_prompts.get_surprise_prompt(context)
+        if not prompt_template:
+             print(f"Warning: No surprise prompt template found for context: {context}")
+             return None
+
+        # Construct the user message with relevant context information
+        user_message = prompt_template.format(conversation_snippet=conversation_snippet)
+
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_message}
+        ]
\ No newline at end of file
@@ -0,0 +1,149 @@
+# app/services/service_container.py - One shared set of services per worker process (warm start)
+
+import os
+import time
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from app.config.settings import Settings, settings as app_settings
+from app.utils import metrics
+
+
+class ServiceContainer:
+    """
+    Builds the services used by the Celery task base classes (InterviewProcessingTask,
+    AnalysisTask, LLMTask, DocumentProcessingTask) once per process, so they all share them.
+
+    Without it every base class built its own copies on first use, so the first task of each
+    kind in a fresh worker paid for client construction, prompt loading, the fitz/docx
+    imports and StorageService directory creation. warm_up() does all of that when the worker
+    process starts (see app/tasks/celery.py). Anything not warmed is still built on first access.
+    """
+    def __init__(self, settings: Settings = app_settings):
+        self.settings = settings
+        self._services: Dict[str, Any] = {}
+        self._lock = threading.RLock() # Threads pool: the first tasks may ask concurrently
+        self.ready = False
+        self.warmup_ms: Dict[str, float] = {}
+        self.warmup_errors: Dict[str, str] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = factory()
+                    self._services[name] = service
+        return service
+
+    # Imports are inside the factories: the analysis modules pull in optional parsers and
+    # prompt modules that a realtime-only worker never needs to load.
+    @property
+    def llm_service(self):
+        from app.services.llm_service import LLMService
+        return self._get("llm_service", lambda: LLMService(api_key=self.settings.OPENAI_API_KEY, model_name=self.settings.MAIN_LLM_MODEL))
+
+    @property
+    def mini_llm_service(self):
+        from app.services.mini_llm_service import MiniLLMService
+        return self._get("mini_llm_service", lambda: MiniLLMService(api_key=self.settings.OPENAI_API_KEY, model_name=self.settings.MINI_LLM_MODEL))
+
+    @property
+    def storage_service(self):
+        from app.services.storage_service import StorageService
+        return self._get("storage_service", lambda: StorageService(base_path=self.settings.STORAGE_PATH))
+
+    @property
+    def document_parser(self):
+        from app.services.document_parser import DocumentParser # Imports fitz / python-docx
+        return self._get("document_parser", DocumentParser)
+
+    @property
+    def pre_analyzer(self):
+        from app.analysis.pre_interview_analyzer import PreInterviewAnalyzer
+        return self._get("pre_analyzer", lambda: PreInterviewAnalyzer(llm_service=self.llm_service, storage_service=self.storage_service, settings=self.settings))
+
+    @property
+    def post_analyzer(self):
+        from app.analysis.post_interview_analyzer import PostInterviewAnalyzer
+        return self._get("post_analyzer", lambda: PostInterviewAnalyzer(llm_service=self.llm_service, storage_service=self.storage_service))
+
+    @property
+    def code_analyzer(self):
+        from app.analysis.code_analyzer import CodeAnalyzer
+        return self._get("code_analyzer", lambda: CodeAnalyzer(llm_service=self.llm_service))
+
+    @property
+    def interview_manager(self):
+        """Manager used by the interview tasks to write results back (state store, delivery, journal)."""
+        from app.core.interview_manager import InterviewManager
+        return self._get("interview_manager", lambda: InterviewManager(
+            llm_service=self.llm_service,
+            mini_llm_service=self.mini_llm_service,
+            storage_service=self.storage_service,
+            settings=self.settings
+        ))
+
+    def warm_up(self, open_llm_connection: bool = True) -> Dict[str, Any]:
+        """
+        Builds every service and loads what they load lazily (prompts, parsers, the tokenizer).
+        A failing step is logged and left to lazy creation; it never stops the worker.
+        """
+        from app.core.history_manager import load_token_encoding
+        from app.services import llm_client_pool
+
+        steps = [
+            ("llm_service", lambda: self.llm_service),
+            ("mini_llm_service", lambda: self.mini_llm_service),
+            ("storage_service", lambda: self.storage_service),
+            ("document_parser", lambda: self.document_parser),
+            ("pre_analyzer", lambda: self.pre_analyzer),
+            ("post_analyzer", lambda: self.post_analyzer),
+            ("code_analyzer", lambda: self.code_analyzer),
+            ("interview_manager", lambda: self.interview_manager), # State store, delivery channel, journal writer
+            ("tokenizer", load_token_encoding), # Downloads the tiktoken encoding if it isn't cached
+        ]
+        if open_llm_connection:
+            steps.append(("llm_connection", lambda: llm_client_pool.open_sync_connection(
+                self.settings.MAIN_LLM_MODEL, timeout=self.settings.WORKER_WARMUP_TIMEOUT_SECONDS
+            )))
+
+        started_at = time.perf_counter()
+        for name, step in steps:
+            step_started_at = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.warmup_errors[name] = str(e)
+                print(f"Warning: worker warm-up step '{name}' failed: {e}")
+            self.warmup_ms[name] = round((time.perf_counter() - step_started_at) * 1000, 2)
+        total_seconds = time.perf_counter() - started_at
+
+        self.ready = True
+        metrics.record_latency("worker_warmup", total_seconds)
+        print(f"Worker process {os.getpid()} ready in {total_seconds * 1000:.0f} ms "
+              f"({len(self.warmup_errors)} of {len(steps)} warm-up steps failed).")
+        return self.readiness()
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "ready": self.ready,
+            "services": sorted(self._services),
+            "warmup_ms": dict(self.warmup_ms),
+            "warmup_errors": dict(self.warmup_errors),
+        }
+
+
+_service_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+def get_service_container() -> ServiceContainer:
+    """Process-wide service container, created on first use."""
+    global _service_container
+    if _service_container is None:
+        with _container_lock:
+            if _service_container is None:
+                _service_container = ServiceContainer()
+    return _service_container
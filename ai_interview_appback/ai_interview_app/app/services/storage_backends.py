@@ -0,0 +1,564 @@
+# app/services/storage_backends.py - Where StorageService keeps its bytes: one file per item, or SQLite
+
+import os
+import time
+import sqlite3
+import functools
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.storage_codecs import decode_json
+from app.services.storage_durability import (
+    FSYNC_MODES, GroupCommitter, get_group_committer, remove_quietly, sync_dir, sync_fd, write_temp_file
+)
+
+# StorageService serializes everything and addresses items as (kind, item_id), where kind is the
+# data type ("documents", "analysis_results", "interview_states", "batches/<id>", ...). Interview
+# journals (the live transcript of every interview, written in batches) have their own calls.
+
+JOURNAL_KIND = "interview_journals"
+
+# Metadata that can be queried without reading every item (columns in SQLite)
+INDEXED_FIELDS = {
+    "analysis_results": ("document_type",),
+    "interview_states": ("job_description_id", "resume_id", "ended"),
+}
+
+
+def index_fields(kind: str, data: bytes) -> Dict[str, Any]:
+    """Extracts the queryable metadata of a serialized item (see INDEXED_FIELDS)."""
+    if kind not in INDEXED_FIELDS:
+        return {}
+    try:
+        obj = decode_json(data)
+    except ValueError:
+        return {}
+    if kind == "analysis_results":
+        return {"document_type": (obj.get("__metadata__") or {}).get("document_type")}
+    state = obj.get("state") or {}
+    return {"job_description_id": state.get("job_description_id"), "resume_id": state.get("resume_id"), "ended": int(bool(obj.get("ended")))}
+
+
+def _normalize(value: Any) -> Any:
+    return int(value) if isinstance(value, bool) else value
+
+
+class StorageBackend(ABC):
+    """Byte storage behind StorageService."""
+    name = "abstract"
+
+    @abstractmethod
+    def put(self, kind: str, item_id: str, data: bytes, meta: Optional[Dict[str, Any]] = None) -> str:
+        """Writes (or replaces) an item. `meta` holds its INDEXED_FIELDS (derived from `data` if None). Returns its location."""
+
+    @abstractmethod
+    def put_many(self, kind: str, items: List[Tuple[str, bytes, Optional[Dict[str, Any]]]]) -> int:
+        """Writes several items of one kind at once (one transaction where supported). Returns the count."""
+
+    @abstractmethod
+    def create(self, kind: str, item_id: str, data: bytes) -> bool:
+        """Writes an item only if it doesn't exist yet, atomically across processes. Returns whether it did."""
+
+    @abstractmethod
+    def get(self, kind: str, item_id: str) -> Optional[bytes]:
+        """Reads an item, or None if it doesn't exist."""
+
+    @abstractmethod
+    def get_all(self, kind: str) -> Dict[str, bytes]:
+        """Reads every item of a kind."""
+
+    @abstractmethod
+    def version(self, kind: str, item_id: str) -> Optional[Tuple[int, int]]:
+        """(last write time in ns, size) of an item, or None if it doesn't exist. Changes on every write."""
+
+    @abstractmethod
+    def delete(self, kind: str, item_id: str) -> bool:
+        """Removes an item. Returns False if it didn't exist."""
+
+    @abstractmethod
+    def list_ids(self, kind: str) -> List[str]:
+        """IDs of every item of a kind."""
+
+    @abstractmethod
+    def list_kinds(self) -> List[str]:
+        """Every kind holding at least one item (journals excluded)."""
+
+    @abstractmethod
+    def query(self, kind: str, created_after: Optional[float] = None, **equals) -> List[str]:
+        """IDs of items of `kind` created after a timestamp and/or with the given INDEXED_FIELDS values."""
+
+    @abstractmethod
+    def location(self, kind: str, item_id: str) -> str:
+        """Human-readable address of an item (file path or database row), for logs and task results."""
+
+    @abstractmethod
+    def append_journal(self, interview_id: str, entries: List[Tuple[int, str, bytes]]):
+        """Appends (seq, entry kind, serialized entry) rows to an interview's journal, in one write."""
+
+    @abstractmethod
+    def load_journal(self, interview_id: str, after_seq: int = 0) -> List[bytes]:
+        """Serialized journal entries of an interview (a backend may return entries <= after_seq too)."""
+
+    @abstractmethod
+    def delete_journal(self, interview_id: str):
+        """Removes an interview's journal."""
+
+    @abstractmethod
+    def list_journals(self) -> List[str]:
+        """IDs of interviews that have a journal."""
+
+    def remove_stale_temp_files(self, max_age_seconds: float) -> int:
+        """Removes leftovers of writes interrupted by a crash. Returns how many were found."""
+        return 0
+
+    def close(self):
+        """Releases connections/handles held by this process."""
+
+
+class FileSystemBackend(StorageBackend):
+    """
+    One file per item under base_path/<kind>/<item_id><ext>, journals as JSON lines. Simple and
+    inspectable, but listing and querying mean scanning (and for metadata, reading) directories.
+
+    Items are written to a temp file and renamed into place, so a reader (or a restart after a
+    crash) sees either the old or the new version, never a truncated one. `fsync_mode` decides
+    whether writes are also flushed to disk before returning (see storage_durability).
+    """
+    name = "filesystem"
+    _EXTENSIONS = {"documents": ".txt", "locks": ".lock"}
+    _NOT_ITEMS = {"uploads", JOURNAL_KIND} # Raw uploads and journals live under base_path too
+    _EPHEMERAL_KINDS = {"locks"} # Meaningless after a restart: never fsynced
+
+    def __init__(self, base_path: str, fsync_mode: str = "none", committer: Optional[GroupCommitter] = None):
+        if fsync_mode not in FSYNC_MODES:
+            raise ValueError(f"Unknown STORAGE_FSYNC '{fsync_mode}'; expected one of {FSYNC_MODES}.")
+        self.base_path = base_path
+        self.fsync_mode = fsync_mode
+        self.committer = committer if committer is not None or fsync_mode != "group" else get_group_committer()
+        os.makedirs(self.base_path, exist_ok=True)
+        self._known_dirs = set() # Directories created by this process: no makedirs per write
+
+    def _ext(self, kind: str) -> str:
+        return self._EXTENSIONS.get(kind, ".json")
+
+    def _path(self, kind: str, item_id: str, ext: Optional[str] = None) -> str:
+        return os.path.join(self.base_path, kind, f"{item_id}{ext if ext is not None else self._ext(kind)}")
+
+    def _path_for_write(self, kind: str, item_id: str, ext: Optional[str] = None) -> str:
+        dir_path = os.path.join(self.base_path, kind)
+        if dir_path not in self._known_dirs:
+            os.makedirs(dir_path, exist_ok=True)
+            self._known_dirs.add(dir_path)
+        return self._path(kind, item_id, ext)
+
+    def location(self, kind: str, item_id: str) -> str:
+        return self._path(kind, item_id)
+
+    def _fsync_mode(self, kind: str) -> str:
+        return "none" if kind in self._EPHEMERAL_KINDS else self.fsync_mode
+
+    def _publish_all(self, kind: str, writes: List[Tuple[str, Callable[[], Any]]]) -> List[Any]:
+        """
+        Makes temp files visible by running their publish step (rename or link), with the
+        durability of the fsync mode: the data is on disk before the rename, and the directory
+        after it. A batch shares one directory sync.
+        """
+        mode = self._fsync_mode(kind)
+        dir_path = os.path.join(self.base_path, kind)
+        if mode == "group":
+            requests = [self.committer.submit(tmp_path, publish, dir_path) for tmp_path, publish in writes]
+            for request in requests:
+                request.done.wait() # All of them, before the caller cleans up temp files
+            return [self.committer.wait(request) for request in requests]
+        results = [publish() for _, publish in writes] # "always": temp files were synced when written
+        if mode == "always":
+            sync_dir(dir_path)
+        return results
+
+    def put(self, kind: str, item_id: str, data: bytes, meta: Optional[Dict[str, Any]] = None) -> str:
+        self.put_many(kind, [(item_id, data, meta)])
+        return self._path(kind, item_id)
+
+    def put_many(self, kind: str, items: List[Tuple[str, bytes, Optional[Dict[str, Any]]]]) -> int:
+        sync_now = self._fsync_mode(kind) == "always"
+        writes = []
+        try:
+            for item_id, data, meta in items:
+                file_path = self._path_for_write(kind, item_id)
+                tmp_path = write_temp_file(file_path, data, sync=sync_now)
+                # os.replace is atomic: readers see the old or the new file, never a partial one
+                writes.append((tmp_path, functools.partial(os.replace, tmp_path, file_path)))
+            self._publish_all(kind, writes)
+        finally:
+            for tmp_path, _ in writes:
+                remove_quietly(tmp_path) # Only left over if publishing failed
+        return len(items)
+
+    def create(self, kind: str, item_id: str, data: bytes) -> bool:
+        file_path = self._path_for_write(kind, item_id)
+        tmp_path = write_temp_file(file_path, data, sync=self._fsync_mode(kind) == "always")
+
+        def link() -> bool:
+            # link() fails if the target exists, so concurrent creators agree on one winner
+            # and nobody ever reads a half-written item
+            try:
+                os.link(tmp_path, file_path)
+                return True
+            except FileExistsError:
+                return False
+        try:
+            return self._publish_all(kind, [(tmp_path, link)])[0]
+        finally:
+            remove_quietly(tmp_path)
+
+    def get(self, kind: str, item_id: str) -> Optional[bytes]:
+        try:
+            with open(self._path(kind, item_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_all(self, kind: str) -> Dict[str, bytes]:
+        items = {}
+        for item_id in self.list_ids(kind):
+            data = self.get(kind, item_id)
+            if data is not None:
+                items[item_id] = data
+        return items
+
+    def version(self, kind: str, item_id: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._path(kind, item_id))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def delete(self, kind: str, item_id: str) -> bool:
+        try:
+            os.remove(self._path(kind, item_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _scan(self, kind: str) -> Iterable[os.DirEntry]:
+        ext = self._ext(kind)
+        try:
+            with os.scandir(os.path.join(self.base_path, kind)) as entries:
+                for entry in entries:
+                    if entry.name.endswith(ext) and entry.is_file():
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    def list_ids(self, kind: str) -> List[str]:
+        ext_length = len(self._ext(kind))
+        return [entry.name[:-ext_length] for entry in self._scan(kind)]
+
+    def list_kinds(self) -> List[str]:
+        kinds = []
+        for dir_path, dir_names, file_names in os.walk(self.base_path):
+            kind = os.path.relpath(dir_path, self.base_path)
+            if kind.split(os.sep)[0] in self._NOT_ITEMS:
+                dir_names[:] = []
+                continue
+            if kind != "." and any(name.endswith(self._ext(kind)) for name in file_names):
+                kinds.append(kind.replace(os.sep, "/"))
+        return sorted(kinds)
+
+    def query(self, kind: str, created_after: Optional[float] = None, **equals) -> List[str]:
+        # No index: every file is stat'ed, and read when filtering on metadata. Files have no
+        # creation time, so `created_after` compares the last modification.
+        ext_length = len(self._ext(kind))
+        wanted = {key: _normalize(value) for key, value in equals.items()}
+        matches = []
+        for entry in self._scan(kind):
+            if created_after is not None and entry.stat().st_mtime <= created_after:
+                continue
+            if wanted:
+                with open(entry.path, "rb") as f:
+                    fields = index_fields(kind, f.read())
+                if any(fields.get(key) != value for key, value in wanted.items()):
+                    continue
+            matches.append(entry.name[:-ext_length])
+        return matches
+
+    def remove_stale_temp_files(self, max_age_seconds: float) -> int:
+        # Only old ones: a recent temp file may belong to a write in progress in another process
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for dir_path, _, file_names in os.walk(self.base_path):
+            for name in file_names:
+                if not name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dir_path, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def append_journal(self, interview_id: str, entries: List[Tuple[int, str, bytes]]):
+        file_path = self._path_for_write(JOURNAL_KIND, interview_id, ".jsonl")
+        data = b"".join(entry + b"\n" for _, _, entry in entries)
+        created = not os.path.exists(file_path)
+        # A single O_APPEND write: concurrent writers (API process and Celery workers) never
+        # interleave partial lines. A torn last line (crash mid-write) is skipped on load.
+        fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            if self.fsync_mode == "always":
+                sync_fd(fd)
+        finally:
+            os.close(fd)
+        dir_path = os.path.dirname(file_path) if created else None # New entry: the directory too
+        if self.fsync_mode == "group":
+            self.committer.commit(file_path, None, dir_path)
+        elif self.fsync_mode == "always" and dir_path:
+            sync_dir(dir_path)
+
+    def load_journal(self, interview_id: str, after_seq: int = 0) -> List[bytes]:
+        try:
+            with open(self._path(JOURNAL_KIND, interview_id, ".jsonl"), "rb") as f:
+                return [line for line in f.read().split(b"\n") if line]
+        except FileNotFoundError:
+            return []
+
+    def delete_journal(self, interview_id: str):
+        try:
+            os.remove(self._path(JOURNAL_KIND, interview_id, ".jsonl"))
+        except FileNotFoundError:
+            pass
+
+    def list_journals(self) -> List[str]:
+        try:
+            return [name[:-len(".jsonl")] for name in os.listdir(os.path.join(self.base_path, JOURNAL_KIND)) if name.endswith(".jsonl")]
+        except FileNotFoundError:
+            return []
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY, data BLOB NOT NULL, created_at REAL NOT NULL, updated_ns INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id TEXT PRIMARY KEY, document_type TEXT, data BLOB NOT NULL, created_at REAL NOT NULL, updated_ns INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS analyses_created_at ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS analyses_type_created_at ON analyses (document_type, created_at);
+
+CREATE TABLE IF NOT EXISTS interview_states (
+    id TEXT PRIMARY KEY, job_description_id TEXT, resume_id TEXT, ended INTEGER NOT NULL DEFAULT 0,
+    data BLOB NOT NULL, created_at REAL NOT NULL, updated_ns INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS interview_states_jd ON interview_states (job_description_id, created_at);
+CREATE INDEX IF NOT EXISTS interview_states_resume ON interview_states (resume_id);
+CREATE INDEX IF NOT EXISTS interview_states_created_at ON interview_states (created_at);
+
+CREATE TABLE IF NOT EXISTS transcripts (
+    interview_id TEXT NOT NULL, seq INTEGER NOT NULL, kind TEXT NOT NULL, data BLOB NOT NULL,
+    PRIMARY KEY (interview_id, seq)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    kind TEXT NOT NULL, id TEXT NOT NULL, data BLOB NOT NULL, created_at REAL NOT NULL, updated_ns INTEGER NOT NULL,
+    PRIMARY KEY (kind, id));
+CREATE INDEX IF NOT EXISTS items_kind_created_at ON items (kind, created_at);
+"""
+
+# Kinds with their own indexed table; every other kind shares `items`
+_SQLITE_TABLES = {"documents": "documents", "analysis_results": "analyses", "interview_states": "interview_states"}
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Everything in one SQLite database in WAL mode (readers never block the writer; API process
+    and Celery workers share the file). Documents, analyses, interview states and transcripts
+    have their own tables with indexes on the fields StorageService queries.
+    """
+    name = "sqlite"
+
+    # STORAGE_FSYNC -> PRAGMA synchronous. In WAL mode, NORMAL already syncs once per
+    # checkpoint rather than per commit: SQLite's own group commit. A power loss can drop the
+    # latest commits but never corrupts the database. "none" maps to NORMAL as well: OFF skips
+    # the checkpoint syncs too, and a power loss could then corrupt the whole file.
+    _SYNCHRONOUS = {"none": "NORMAL", "group": "NORMAL", "always": "FULL"}
+
+    def __init__(self, db_path: str, busy_timeout_seconds: float = 10.0, fsync_mode: str = "group"):
+        if fsync_mode not in FSYNC_MODES:
+            raise ValueError(f"Unknown STORAGE_FSYNC '{fsync_mode}'; expected one of {FSYNC_MODES}.")
+        self.db_path = db_path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self.fsync_mode = fsync_mode
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local() # One connection per thread (and per process, see _conn)
+        with self._conn() as conn:
+            conn.executescript(_SQLITE_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A forked Celery child inherits the parent's thread-local: never reuse its connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_seconds, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self._SYNCHRONOUS[self.fsync_mode]}") # Never corrupt; see _SYNCHRONOUS
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _target(kind: str) -> Tuple[str, str, Tuple[str, ...]]:
+        """(table, WHERE clause for one item, key values before item_id)."""
+        table = _SQLITE_TABLES.get(kind)
+        if table:
+            return table, "id = ?", ()
+        return "items", "kind = ? AND id = ?", (kind,)
+
+    def location(self, kind: str, item_id: str) -> str:
+        return f"{self.db_path}#{kind}/{item_id}"
+
+    def _upsert_sql(self, kind: str) -> Tuple[str, Tuple[str, ...]]:
+        table, _, key_values = self._target(kind)
+        columns = INDEXED_FIELDS.get(kind, ()) if table != "items" else ()
+        key_columns = ("kind", "id") if table == "items" else ("id",)
+        all_columns = key_columns + columns + ("data", "created_at", "updated_ns")
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns + ("data", "updated_ns"))
+        sql = (f"INSERT INTO {table} ({', '.join(all_columns)}) VALUES ({', '.join('?' * len(all_columns))}) "
+               f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}") # Keeps the original created_at
+        return sql, columns
+
+    def _row(self, kind: str, item_id: str, data: bytes, meta: Optional[Dict[str, Any]], columns: Tuple[str, ...]) -> tuple:
+        if columns and meta is None:
+            meta = index_fields(kind, data)
+        values = tuple(_normalize((meta or {}).get(column)) for column in columns)
+        if kind == "interview_states":
+            values = values[:-1] + (values[-1] or 0,) # ended is NOT NULL
+        key_values = self._target(kind)[2]
+        return key_values + (item_id,) + values + (sqlite3.Binary(data), time.time(), time.time_ns())
+
+    def put(self, kind: str, item_id: str, data: bytes, meta: Optional[Dict[str, Any]] = None) -> str:
+        sql, columns = self._upsert_sql(kind)
+        self._conn().execute(sql, self._row(kind, item_id, data, meta, columns))
+        return self.location(kind, item_id)
+
+    def put_many(self, kind: str, items: List[Tuple[str, bytes, Optional[Dict[str, Any]]]]) -> int:
+        if not items:
+            return 0
+        sql, columns = self._upsert_sql(kind)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, (self._row(kind, item_id, data, meta, columns) for item_id, data, meta in items))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(items)
+
+    def create(self, kind: str, item_id: str, data: bytes) -> bool:
+        sql, columns = self._upsert_sql(kind)
+        sql = sql.split(" ON CONFLICT")[0].replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+        cursor = self._conn().execute(sql, self._row(kind, item_id, data, None, columns))
+        return cursor.rowcount == 1
+
+    def get(self, kind: str, item_id: str) -> Optional[bytes]:
+        table, where, key_values = self._target(kind)
+        row = self._conn().execute(f"SELECT data FROM {table} WHERE {where}", key_values + (item_id,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def get_all(self, kind: str) -> Dict[str, bytes]:
+        table, _, key_values = self._target(kind)
+        where = "WHERE kind = ?" if table == "items" else ""
+        return {item_id: bytes(data) for item_id, data in self._conn().execute(f"SELECT id, data FROM {table} {where}", key_values)}
+
+    def version(self, kind: str, item_id: str) -> Optional[Tuple[int, int]]:
+        table, where, key_values = self._target(kind)
+        row = self._conn().execute(f"SELECT updated_ns, length(data) FROM {table} WHERE {where}", key_values + (item_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def delete(self, kind: str, item_id: str) -> bool:
+        table, where, key_values = self._target(kind)
+        return self._conn().execute(f"DELETE FROM {table} WHERE {where}", key_values + (item_id,)).rowcount > 0
+
+    def list_ids(self, kind: str) -> List[str]:
+        table, _, key_values = self._target(kind)
+        where = "WHERE kind = ?" if table == "items" else ""
+        return [row[0] for row in self._conn().execute(f"SELECT id FROM {table} {where}", key_values)]
+
+    def list_kinds(self) -> List[str]:
+        conn = self._conn()
+        kinds = [kind for kind, table in _SQLITE_TABLES.items() if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()]
+        kinds += [row[0] for row in conn.execute("SELECT DISTINCT kind FROM items")]
+        return sorted(kinds)
+
+    def query(self, kind: str, created_after: Optional[float] = None, **equals) -> List[str]:
+        table, _, key_values = self._target(kind)
+        allowed = INDEXED_FIELDS.get(kind, ()) if table != "items" else ()
+        unknown = set(equals) - set(allowed)
+        if unknown:
+            raise ValueError(f"Cannot query {kind} by {sorted(unknown)}; indexed fields: {list(allowed)}")
+        clauses, params = (["kind = ?"], list(key_values)) if table == "items" else ([], [])
+        for column, value in equals.items():
+            clauses.append(f"{column} = ?")
+            params.append(_normalize(value))
+        if created_after is not None:
+            clauses.append("created_at > ?")
+            params.append(created_after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [row[0] for row in self._conn().execute(f"SELECT id FROM {table} {where} ORDER BY created_at", params)]
+
+    def append_journal(self, interview_id: str, entries: List[Tuple[int, str, bytes]]):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO transcripts (interview_id, seq, kind, data) VALUES (?, ?, ?, ?)",
+                ((interview_id, seq, entry_kind, sqlite3.Binary(data)) for seq, entry_kind, data in entries)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load_journal(self, interview_id: str, after_seq: int = 0) -> List[bytes]:
+        rows = self._conn().execute(
+            "SELECT data FROM transcripts WHERE interview_id = ? AND seq > ? ORDER BY seq", (interview_id, after_seq)
+        )
+        return [bytes(row[0]) for row in rows]
+
+    def delete_journal(self, interview_id: str):
+        self._conn().execute("DELETE FROM transcripts WHERE interview_id = ?", (interview_id,))
+
+    def list_journals(self) -> List[str]:
+        return [row[0] for row in self._conn().execute("SELECT DISTINCT interview_id FROM transcripts")]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+
+_backends: Dict[Tuple[str, str], StorageBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_storage_backend(base_path: str, backend_name: Optional[str] = None) -> StorageBackend:
+    """
+    The backend for a storage location, shared by every StorageService of the process that uses
+    it (StorageService is created per request). Defaults to STORAGE_BACKEND.
+    """
+    from app.config.settings import settings
+    backend_name = (backend_name or settings.STORAGE_BACKEND).lower()
+    key = (backend_name, os.path.abspath(base_path))
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if backend_name == FileSystemBackend.name:
+                backend = FileSystemBackend(base_path, fsync_mode=settings.STORAGE_FSYNC)
+            elif backend_name == SQLiteBackend.name:
+                db_path = settings.STORAGE_SQLITE_PATH or os.path.join(base_path, "storage.sqlite3")
+                backend = SQLiteBackend(db_path, busy_timeout_seconds=settings.STORAGE_SQLITE_BUSY_TIMEOUT_SECONDS,
+                                        fsync_mode=settings.STORAGE_FSYNC)
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND '{backend_name}'.")
+            _backends[key] = backend
+    return backend
@@ -0,0 +1,99 @@
+# app/services/storage_cache.py - Process-wide LRU cache of parsed storage items
+
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.utils import metrics
+
+
+class StorageCache:
+    """
+    Size-bounded LRU of values loaded from storage (parsed document text, analysis JSON),
+    keyed by backend location and validated against the item's version (last write time and
+    size) on every read. An item rewritten by any process (e.g. a Celery worker re-running an
+    analysis) is therefore reloaded on its next read; StorageService also invalidates entries
+    it writes itself.
+
+    Dicts/lists are kept pickled and unpickled per hit, so callers get their own copy (much
+    cheaper than re-reading and re-parsing the JSON) and can't corrupt the cached value.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Any, int]]" = OrderedDict() # key -> (version, payload, cost)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, version: Tuple[int, int], loader: Callable[[], Any]) -> Any:
+        """Returns the cached value of `key` if it is still at `version`, else `loader()` (and caches it)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                payload = entry[1]
+            else:
+                payload = None
+        if payload is not None:
+            metrics.increment("storage_cache_hits")
+            return pickle.loads(payload) if isinstance(payload, bytes) else payload
+
+        metrics.increment("storage_cache_misses")
+        value = loader()
+        if value is None:
+            return None # Deleted since its version was read
+        # Strings are immutable and shared as they are; anything else is stored pickled
+        payload = value if isinstance(value, str) else pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        cost = len(payload)
+        if cost > self.max_bytes:
+            return value # Bigger than the whole cache: not worth evicting everything for
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (version, payload, cost)
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_cost) = self._entries.popitem(last=False)
+                self._bytes -= evicted_cost
+                metrics.increment("storage_cache_evictions")
+        return value
+
+    def invalidate(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, cached_bytes = len(self._entries), self._bytes
+        return {
+            "entries": entries,
+            "bytes": cached_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": int(metrics.get_counter("storage_cache_hits")),
+            "misses": int(metrics.get_counter("storage_cache_misses")),
+            "evictions": int(metrics.get_counter("storage_cache_evictions")),
+        }
+
+
+_storage_cache: Optional[StorageCache] = None
+_storage_cache_lock = threading.Lock()
+
+def get_storage_cache() -> Optional[StorageCache]:
+    """The cache shared by every StorageService in this process (None when disabled)."""
+    global _storage_cache
+    from app.config.settings import settings
+    if not settings.STORAGE_CACHE_ENABLED:
+        return None
+    if _storage_cache is None:
+        with _storage_cache_lock:
+            if _storage_cache is None:
+                _storage_cache = StorageCache(max_bytes=settings.STORAGE_CACHE_MAX_BYTES)
+    return _storage_cache
@@ -0,0 +1,137 @@
+# app/services/storage_codecs.py - How StorageService turns values into bytes (encoding + compression)
+
+import gzip
+import json
+import threading
+from typing import Any, Optional
+
+# Optional: binary encoding (smaller and faster to load than JSON)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+    print("Warning: msgpack not installed. STORAGE_ENCODING=msgpack falls back to compact JSON.")
+
+# Optional: zstd compression (gzip is always available)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+    print("Warning: zstandard not installed. STORAGE_COMPRESSION=zstd falls back to gzip.")
+
+# Readers never need the settings a value was written with: every format is recognized by its
+# first bytes. None of these prefixes can start JSON or UTF-8 text, so files written before
+# codecs existed (pretty-printed JSON, plain text) are read as they always were.
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd" # zstd frame
+GZIP_MAGIC = b"\x1f\x8b" # gzip member
+MSGPACK_MAGIC = b"\xc1M" # 0xc1 is never used by msgpack itself, nor valid UTF-8
+
+# zstd contexts are costly to set up relative to a few-KB value, and not thread-safe: one per thread
+_zstd_local = threading.local()
+
+def _zstd_compressor(level: int):
+    compressors = _zstd_local.__dict__.setdefault("compressors", {})
+    if level not in compressors:
+        compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressors[level]
+
+def _zstd_decompressor():
+    if not hasattr(_zstd_local, "decompressor"):
+        _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_local.decompressor
+
+
+class StorageCodec:
+    """
+    Encodes stored values: JSON-compatible objects as compact JSON or msgpack, text as UTF-8,
+    then compresses payloads of at least `min_compress_bytes` with gzip or zstd. Small values
+    stay uncompressed: the frame overhead would outweigh the gain.
+    """
+    def __init__(self, encoding: str = "json", compression: str = "none", level: int = 3, min_compress_bytes: int = 512):
+        self.encoding = encoding.lower()
+        self.compression = compression.lower()
+        if self.encoding not in ("json", "msgpack"):
+            raise ValueError(f"Unknown STORAGE_ENCODING '{encoding}'.")
+        if self.compression not in ("none", "gzip", "zstd"):
+            raise ValueError(f"Unknown STORAGE_COMPRESSION '{compression}'.")
+        if self.encoding == "msgpack" and msgpack is None:
+            self.encoding = "json"
+        if self.compression == "zstd" and zstandard is None:
+            self.compression = "gzip"
+        self.level = level
+        self.min_compress_bytes = min_compress_bytes
+
+    def encode_json(self, value: Any) -> bytes:
+        """Serializes a JSON-compatible value (analysis, plan, snapshot, ...)."""
+        if self.encoding == "msgpack":
+            data = MSGPACK_MAGIC + msgpack.packb(value, use_bin_type=True)
+        else:
+            data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return self._compress(data)
+
+    def encode_text(self, text: str) -> bytes:
+        """Serializes text (parsed document content)."""
+        return self._compress(text.encode("utf-8"))
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "none" or len(data) < self.min_compress_bytes:
+            return data
+        if self.compression == "zstd":
+            return _zstd_compressor(self.level).compress(data) # Records the content size in the frame
+        # mtime=0: identical values encode to identical bytes
+        return gzip.compress(data, compresslevel=min(max(self.level, 1), 9), mtime=0)
+
+
+def _decompress(data: bytes) -> bytes:
+    """Strips the compression of a stored value. Truncated or corrupt frames raise ValueError."""
+    try:
+        if data[:4] == ZSTD_MAGIC:
+            if zstandard is None:
+                raise ValueError("Value is zstd-compressed but zstandard is not installed.")
+            try:
+                return _zstd_decompressor().decompress(data)
+            except zstandard.ZstdError:
+                # Frames written by other tools may not record their content size: stream them
+                stream = zstandard.ZstdDecompressor().decompressobj()
+                output = stream.decompress(data)
+                if not stream.eof:
+                    raise ValueError("Truncated zstd frame.")
+                return output
+        if data[:2] == GZIP_MAGIC:
+            return gzip.decompress(data)
+    except ValueError:
+        raise
+    except Exception as e: # zstandard.ZstdError, gzip.BadGzipFile, EOFError
+        raise ValueError(f"Corrupt compressed value: {e}") from e
+    return data
+
+
+def decode_json(data: bytes) -> Any:
+    """Deserializes a value written by any codec configuration (or by older versions: plain JSON)."""
+    data = _decompress(data)
+    if data[:2] == MSGPACK_MAGIC:
+        if msgpack is None:
+            raise ValueError("Value is msgpack-encoded but msgpack is not installed.")
+        return msgpack.unpackb(data[2:], raw=False, strict_map_key=False)
+    return json.loads(data) # Raises ValueError (JSONDecodeError / UnicodeDecodeError) on bad data
+
+
+def decode_text(data: bytes) -> str:
+    """Deserializes text written by any codec configuration."""
+    return _decompress(data).decode("utf-8")
+
+
+_storage_codec: Optional[StorageCodec] = None
+
+def get_storage_codec() -> StorageCodec:
+    """The codec configured by the STORAGE_ENCODING / STORAGE_COMPRESSION settings."""
+    global _storage_codec
+    if _storage_codec is None:
+        from app.config.settings import settings
+        _storage_codec = StorageCodec(
+            encoding=settings.STORAGE_ENCODING,
+            compression=settings.STORAGE_COMPRESSION,
+            level=settings.STORAGE_COMPRESSION_LEVEL,
+            min_compress_bytes=settings.STORAGE_COMPRESSION_MIN_BYTES,
+        )
+    return _storage_codec
@@ -2,98 +2,449 @@
 
 import os
 import json
-from typing import Dict, Any, Optional
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from app.core.exceptions import StorageError # Import custom exception
+from app.services.storage_backends import StorageBackend, get_storage_backend
+from app.services.storage_cache import StorageCache, get_storage_cache
+from app.services.storage_codecs import StorageCodec, decode_json, decode_text, get_storage_codec
+
+# Disk I/O of the async API below runs on its own pool, not the event loop's default executor,
+# so slow storage can't starve other to_thread users (and vice versa). One pool per process.
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_lock = threading.Lock()
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        with _io_executor_lock:
+            if _io_executor is None:
+                from app.config.settings import settings
+                _io_executor = ThreadPoolExecutor(max_workers=settings.STORAGE_IO_THREADS, thread_name_prefix="storage-io")
+    return _io_executor
+
+def shutdown_io_executor():
+    """Stops the storage I/O pool (FastAPI shutdown)."""
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is not None:
+            _io_executor.shutdown(wait=True)
+            _io_executor = None
 
 class StorageService:
     """
     Handles persistent storage and retrieval of application data,
     such as parsed documents, analysis results, and interview states.
-    Currently implemented with local file storage.
-    Could be extended for database or cloud storage.
+    Serializes items and hands the bytes to a StorageBackend (one file per item, or
+    SQLite; see STORAGE_BACKEND).
+
+    Methods are blocking (Celery tasks call them directly). Code running on the event loop
+    uses the `a`-prefixed coroutines instead, which run the same methods on the storage I/O pool.
     """
-    def __init__(self, base_path: str):
+    def __init__(self, base_path: str, backend: Optional[StorageBackend] = None, cache: Optional[StorageCache] = None,
+                 codec: Optional[StorageCodec] = None):
         self.base_path = base_path
-        # Ensure the base directory exists
-        os.makedirs(self.base_path, exist_ok=True)
-        print(f"StorageService initialized with base path: {self.base_path}")
+        # Backends are shared per process: a StorageService is created per request
+        self.backend = backend if backend is not None else get_storage_backend(base_path)
+        # Parsed documents/analyses are cached per process (shared by every StorageService)
+        self.cache = cache if cache is not None else get_storage_cache()
+        # Encoding/compression of new writes; reads detect the format of each item
+        self.codec = codec if codec is not None else get_storage_codec()
+        print(f"StorageService initialized with {self.backend.name} backend at: {self.base_path}")
+
+
+    async def run_io(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs a blocking storage call on the storage I/O pool and awaits its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_io_executor(), functools.partial(func, *args, **kwargs))
+
+    # --- Async API (event-loop callers: API endpoints, InterviewManager, session lifecycle) ---
+    async def asave_document_content(self, doc_id: str, content: str) -> str:
+        return await self.run_io(self.save_document_content, doc_id, content)
+
+    async def aload_document_content(self, doc_id: str) -> str:
+        return await self.run_io(self.load_document_content, doc_id)
+
+    async def asave_analysis_result(self, analysis_id: str, result: Dict[str, Any]) -> str:
+        return await self.run_io(self.save_analysis_result, analysis_id, result)
+
+    async def aload_analysis_result(self, analysis_id: str) -> Dict[str, Any]:
+        return await self.run_io(self.load_analysis_result, analysis_id)
+
+    async def aload_cached_analysis(self, doc_id: str, document_type: str) -> Optional[Dict[str, Any]]:
+        return await self.run_io(self.load_cached_analysis, doc_id, document_type)
 
+    async def aclaim_content_digest(self, sha256: str, document_type: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.run_io(self.claim_content_digest, sha256, document_type, entry)
 
-    def _get_file_path(self, data_type: str, item_id: str, extension: str = ".json") -> str:
-        """Helper to get the full path for a stored item."""
-        # Example path structure: base_path/data_type/item_id.extension
-        dir_path = os.path.join(self.base_path, data_type)
-        os.makedirs(dir_path, exist_ok=True) # Ensure type directory exists
-        file_name = f"{item_id}{extension}"
-        return os.path.join(dir_path, file_name)
+    async def aload_interview_plan(self, job_description_id: str, resume_id: str) -> Optional[Dict[str, Any]]:
+        return await self.run_io(self.load_interview_plan, job_description_id, resume_id)
+
+    async def asave_interview_snapshot(self, interview_id: str, snapshot: Dict[str, Any]) -> Optional[str]:
+        return await self.run_io(self.save_interview_snapshot, interview_id, snapshot)
+
+    async def amark_interview_ended(self, interview_id: str) -> bool:
+        return await self.run_io(self.mark_interview_ended, interview_id)
+
+    async def aunmark_interview_ended(self, interview_id: str):
+        return await self.run_io(self.unmark_interview_ended, interview_id)
+
+    async def aload_interview_snapshot(self, interview_id: str) -> Optional[Dict[str, Any]]:
+        return await self.run_io(self.load_interview_snapshot, interview_id)
+
+    async def aload_journal_entries(self, interview_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        return await self.run_io(self.load_journal_entries, interview_id, after_seq)
+
+    def _cached_read(self, kind: str, item_id: str, decode: Callable[[bytes], Any]) -> Optional[Any]:
+        """Reads and decodes an item through the process cache. None if it doesn't exist."""
+        if self.cache is None:
+            data = self.backend.get(kind, item_id)
+            return decode(data) if data is not None else None
+        version = self.backend.version(kind, item_id)
+        if version is None:
+            self.cache.invalidate(self.backend.location(kind, item_id))
+            return None
+        def load():
+            data = self.backend.get(kind, item_id)
+            return decode(data) if data is not None else None
+        return self.cache.get_or_load(self.backend.location(kind, item_id), version, load)
+
+    def _invalidate(self, kind: str, item_id: str):
+        if self.cache is not None:
+            self.cache.invalidate(self.backend.location(kind, item_id))
+
+    def _read_json(self, kind: str, item_id: str) -> Optional[Any]:
+        data = self.backend.get(kind, item_id)
+        return decode_json(data) if data is not None else None
 
     def save_document_content(self, doc_id: str, content: str) -> str:
         """Saves parsed document text content."""
-        file_path = self._get_file_path("documents", doc_id, ".txt")
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            print(f"Saved document content to {file_path}")
-            return file_path
+            location = self.backend.put("documents", doc_id, self.codec.encode_text(content))
+            self._invalidate("documents", doc_id)
+            print(f"Saved document content to {location}")
+            return location
         except Exception as e:
             raise StorageError(f"Failed to save document content for ID {doc_id}: {e}", original_exception=e)
 
     def load_document_content(self, doc_id: str) -> str:
         """Loads parsed document text content."""
-        file_path = self._get_file_path("documents", doc_id, ".txt")
-        if not os.path.exists(file_path):
-            raise StorageError(f"Document content for ID {doc_id} not found.", original_exception=FileNotFoundError(file_path))
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            return content
+            content = self._cached_read("documents", doc_id, decode_text)
         except Exception as e:
             raise StorageError(f"Failed to load document content for ID {doc_id}: {e}", original_exception=e)
+        if content is None:
+            raise StorageError(f"Document content for ID {doc_id} not found.", original_exception=FileNotFoundError(self.backend.location("documents", doc_id)))
+        return content
 
 
     def save_analysis_result(self, analysis_id: str, result: Dict[str, Any]) -> str:
         """Saves the result of a document analysis."""
         # analysis_id could be the doc_id or a separate analysis ID
-        file_path = self._get_file_path("analysis_results", analysis_id, ".json")
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=4)
-            print(f"Saved analysis result to {file_path}")
-            return file_path
+            location = self.backend.put("analysis_results", analysis_id, self.codec.encode_json(result),
+                                        {"document_type": result.get("__metadata__", {}).get("document_type")})
+            self._invalidate("analysis_results", analysis_id)
+            print(f"Saved analysis result to {location}")
+            return location
         except Exception as e:
             raise StorageError(f"Failed to save analysis result for ID {analysis_id}: {e}", original_exception=e)
 
     def load_analysis_result(self, analysis_id: str) -> Dict[str, Any]:
         """Loads a document analysis result."""
-        file_path = self._get_file_path("analysis_results", analysis_id, ".json")
-        if not os.path.exists(file_path):
-            raise StorageError(f"Analysis result for ID {analysis_id} not found.", original_exception=FileNotFoundError(file_path))
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                result = json.load(f)
-            return result
+            result = self._cached_read("analysis_results", analysis_id, decode_json)
         except Exception as e:
             raise StorageError(f"Failed to load analysis result for ID {analysis_id}: {e}", original_exception=e)
+        if result is None:
+            raise StorageError(f"Analysis result for ID {analysis_id} not found.", original_exception=FileNotFoundError(self.backend.location("analysis_results", analysis_id)))
+        return result
+
+    def list_analyses(self, document_type: Optional[str] = None, created_after: Optional[float] = None) -> List[str]:
+        """IDs of stored analyses, optionally of one document type and/or created after a timestamp."""
+        filters = {"document_type": document_type} if document_type else {}
+        try:
+            return self.backend.query("analysis_results", created_after=created_after, **filters)
+        except Exception as e:
+            raise StorageError(f"Failed to list analyses: {e}", original_exception=e)
+
+    def document_content_location(self, doc_id: str) -> Optional[str]:
+        """Location of a document's parsed text content, or None if it isn't parsed (yet)."""
+        if self.backend.version("documents", doc_id) is None:
+            return None
+        return self.backend.location("documents", doc_id)
+
+    def load_cached_analysis(self, doc_id: str, document_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored analysis of a document if it is a complete result for `document_type`,
+        else None. Results whose LLM output could not be parsed are not reused.
+        """
+        if self.backend.version("analysis_results", doc_id) is None:
+            return None
+        result = self.load_analysis_result(doc_id)
+        if result.get("__metadata__", {}).get("document_type") != document_type or "raw_output" in result:
+            return None
+        return result
+
+    # --- Content-addressed index (identical uploads of one document type share one doc_id) ---
+    @staticmethod
+    def _content_index_key(sha256: str, document_type: str) -> str:
+        # Per document type: analyses are stored per doc_id, and the same file uploaded as a
+        # JD and as a resume needs one analysis of each kind
+        return f"{document_type}_{sha256}"
+
+    def claim_content_digest(self, sha256: str, document_type: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Registers `entry` ({"doc_id", "file_path", ...}) as the document of `document_type` for a
+        file digest, unless that pair is already registered, in which case the existing entry is
+        returned. The first upload of some content wins; later identical uploads of the same
+        type reuse its doc_id.
+        """
+        key = self._content_index_key(sha256, document_type)
+        entry = {**entry, "sha256": sha256, "document_type": document_type, "created_at": time.time()}
+        data = self.codec.encode_json(entry)
+        try:
+            # Exclusive create, so concurrent identical uploads agree on one winner
+            if self.backend.create("content_index", key, data):
+                return entry
+            existing = self.load_content_entry(sha256, document_type)
+            if existing is not None and (os.path.exists(existing.get("file_path", "")) or self.document_content_location(existing["doc_id"])):
+                return existing
+            # The registered upload is gone and was never parsed: this upload takes its place
+            self.backend.put("content_index", key, data)
+            return entry
+        except Exception as e:
+            raise StorageError(f"Failed to register content digest {sha256} ({document_type}): {e}", original_exception=e)
+
+    def load_content_entry(self, sha256: str, document_type: str) -> Optional[Dict[str, Any]]:
+        """Loads the index entry for a file digest and document type, or None if that content was never uploaded as that type."""
+        try:
+            return self._read_json("content_index", self._content_index_key(sha256, document_type))
+        except Exception as e:
+            raise StorageError(f"Failed to load content index entry {sha256} ({document_type}): {e}", original_exception=e)
+
+    # --- Single-flight (one worker computes, concurrent callers wait for its result) ---
+    def try_acquire_lock(self, name: str, stale_after_seconds: float) -> bool:
+        """Creates the lock `name` exclusively. A lock older than `stale_after_seconds` is taken over."""
+        for _ in range(2):
+            if self.backend.create("locks", name, f"{os.getpid()} {time.time()}".encode("utf-8")):
+                return True
+            version = self.backend.version("locks", name)
+            if version is None:
+                continue # Released meanwhile; retry once
+            if time.time_ns() - version[0] < stale_after_seconds * 1e9:
+                return False
+            self.backend.delete("locks", name) # Holder died without releasing; retry once
+        return False
+
+    def release_lock(self, name: str):
+        self.backend.delete("locks", name)
+
+    def single_flight(self, key: str, load_cached: Callable[[], Any], compute: Callable[[], Any],
+                      wait_seconds: float, poll_seconds: float = 0.5) -> Tuple[Any, bool]:
+        """
+        Returns `load_cached()` if it has a value; otherwise runs `compute()` in exactly one caller
+        across processes while the others poll `load_cached()` for its result. `compute` must store
+        its result before returning. Returns (result, computed_here).
+        """
+        cached = load_cached()
+        if cached is not None:
+            return cached, False
+        deadline = time.monotonic() + 2 * wait_seconds # Long enough to take over a stale lock
+        waited = False
+        while True:
+            if self.try_acquire_lock(key, stale_after_seconds=wait_seconds):
+                try:
+                    cached = load_cached() # The previous holder may have finished just now
+                    if cached is not None:
+                        return cached, False
+                    return compute(), True
+                finally:
+                    self.release_lock(key)
+            if not waited:
+                print(f"Waiting for in-flight '{key}' computed by another worker.")
+                waited = True
+            time.sleep(poll_seconds)
+            cached = load_cached()
+            if cached is not None:
+                return cached, False
+            if time.monotonic() > deadline:
+                raise StorageError(f"Timed out waiting for in-flight '{key}'.")
+
+    # --- Batch ingestion (manifest written once, one status item per batch item) ---
+    def save_batch_manifest(self, batch_id: str, manifest: Dict[str, Any]) -> str:
+        """Saves the list of documents of an ingestion batch."""
+        try:
+            return self.backend.put("batches", batch_id, self.codec.encode_json(manifest))
+        except Exception as e:
+            raise StorageError(f"Failed to save batch manifest for ID {batch_id}: {e}", original_exception=e)
+
+    def load_batch_manifest(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Loads a batch manifest, or None if there is no such batch."""
+        try:
+            return self._read_json("batches", batch_id)
+        except Exception as e:
+            raise StorageError(f"Failed to load batch manifest for ID {batch_id}: {e}", original_exception=e)
+
+    def save_batch_item_status(self, batch_id: str, index: int, status: Dict[str, Any]):
+        """Records the outcome of one batch item. Each item is stored separately, so workers never contend."""
+        try:
+            self.backend.put(f"batches/{batch_id}", str(index), self.codec.encode_json(status))
+        except Exception as e:
+            raise StorageError(f"Failed to save status of item {index} in batch {batch_id}: {e}", original_exception=e)
+
+    def load_batch_item_statuses(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Loads the statuses recorded so far for a batch (finished items only)."""
+        statuses = []
+        for data in self.backend.get_all(f"batches/{batch_id}").values():
+            try:
+                statuses.append(decode_json(data))
+            except ValueError:
+                continue # Being written right now; counted on the next poll
+        return statuses
+
+    # --- Interview plans (joined JD + Resume analysis, built before the interview) ---
+    @staticmethod
+    def _interview_plan_id(job_description_id: str, resume_id: str) -> str:
+        return f"{job_description_id}__{resume_id}"
+
+    def save_interview_plan(self, job_description_id: str, resume_id: str, plan: Dict[str, Any]) -> str:
+        """Saves the interview plan precomputed for a JD/Resume pair."""
+        try:
+            location = self.backend.put("interview_plans", self._interview_plan_id(job_description_id, resume_id), self.codec.encode_json(plan))
+            print(f"Saved interview plan to {location}")
+            return location
+        except Exception as e:
+            raise StorageError(f"Failed to save interview plan for {job_description_id}/{resume_id}: {e}", original_exception=e)
+
+    def load_interview_plan(self, job_description_id: str, resume_id: str) -> Optional[Dict[str, Any]]:
+        """Loads the precomputed interview plan for a JD/Resume pair, or None if it isn't built (yet)."""
+        try:
+            return self._read_json("interview_plans", self._interview_plan_id(job_description_id, resume_id))
+        except Exception as e:
+            raise StorageError(f"Failed to load interview plan for {job_description_id}/{resume_id}: {e}", original_exception=e)
+
+    # --- Interview state persistence (snapshots + append-only journal) ---
+    def save_interview_snapshot(self, interview_id: str, snapshot: Dict[str, Any]) -> Optional[str]:
+        """
+        Saves a compact snapshot of an interview state (overwrites the previous one). A snapshot
+        of a running interview is not saved once the interview has ended (returns None): a spill
+        or periodic snapshot taken just before the end must not replace the final one.
+        """
+        state = snapshot.get("state") or {}
+        if not snapshot.get("ended") and self.is_interview_ended(interview_id):
+            return None
+        try:
+            return self.backend.put(
+                "interview_states", interview_id,
+                self.codec.encode_json(snapshot), # Holds the whole transcript: benefits most from compression
+                {"job_description_id": state.get("job_description_id"), "resume_id": state.get("resume_id"), "ended": bool(snapshot.get("ended"))}
+            )
+        except Exception as e:
+            raise StorageError(f"Failed to save interview snapshot for ID {interview_id}: {e}", original_exception=e)
+
+    def mark_interview_ended(self, interview_id: str) -> bool:
+        """
+        Records that an interview has ended (a small marker, written before its session is
+        dropped). From then on it is never recovered, even from an older snapshot. Returns
+        False if it was already marked.
+        """
+        try:
+            return self.backend.create("ended_interviews", interview_id, str(time.time()).encode("utf-8"))
+        except Exception as e:
+            raise StorageError(f"Failed to mark interview {interview_id} as ended: {e}", original_exception=e)
+
+    def unmark_interview_ended(self, interview_id: str):
+        """Removes the marker written by mark_interview_ended (the interview turned out not to exist)."""
+        try:
+            self.backend.delete("ended_interviews", interview_id)
+        except Exception as e:
+            raise StorageError(f"Failed to unmark interview {interview_id}: {e}", original_exception=e)
+
+    def is_interview_ended(self, interview_id: str) -> bool:
+        try:
+            return self.backend.version("ended_interviews", interview_id) is not None
+        except Exception as e:
+            raise StorageError(f"Failed to check whether interview {interview_id} ended: {e}", original_exception=e)
+
+    def load_interview_snapshot(self, interview_id: str) -> Optional[Dict[str, Any]]:
+        """Loads the latest snapshot of an interview state, or None if there is none."""
+        try:
+            return self._read_json("interview_states", interview_id)
+        except Exception as e:
+            raise StorageError(f"Failed to load interview snapshot for ID {interview_id}: {e}", original_exception=e)
+
+    def list_interviews(self, job_description_id: Optional[str] = None, resume_id: Optional[str] = None,
+                        active_only: bool = False, created_after: Optional[float] = None) -> List[str]:
+        """IDs of interviews with a stored snapshot, filtered by JD, resume and/or still running."""
+        filters: Dict[str, Any] = {}
+        if job_description_id:
+            filters["job_description_id"] = job_description_id
+        if resume_id:
+            filters["resume_id"] = resume_id
+        if active_only:
+            filters["ended"] = False
+        try:
+            return self.backend.query("interview_states", created_after=created_after, **filters)
+        except Exception as e:
+            raise StorageError(f"Failed to list interviews: {e}", original_exception=e)
+
+    def append_journal_entries(self, interview_id: str, entries: List[Dict[str, Any]]):
+        """
+        Appends entries to the interview's journal in one write (one file append or one
+        transaction, depending on the backend), so concurrent writers (API process and Celery
+        workers) never interleave partial entries.
+        """
+        if not entries:
+            return
+        # Always compact JSON, one entry per line: entries are far below the compression
+        # threshold, and the journal file is line-framed. The transcript they add up to is
+        # stored encoded in the interview's snapshot.
+        rows = [(entry["seq"], entry.get("kind", ""), json.dumps(entry, separators=(",", ":")).encode("utf-8")) for entry in entries]
+        try:
+            self.backend.append_journal(interview_id, rows)
+        except Exception as e:
+            raise StorageError(f"Failed to append journal entries for ID {interview_id}: {e}", original_exception=e)
+
+    def load_journal_entries(self, interview_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """Loads the journal entries with seq > after_seq, ordered by seq."""
+        try:
+            lines = self.backend.load_journal(interview_id, after_seq)
+        except Exception as e:
+            raise StorageError(f"Failed to load journal for ID {interview_id}: {e}", original_exception=e)
+        entries = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A crash can leave a torn last line; everything before it is intact
+                print(f"Skipping corrupt journal line for {interview_id}.")
+                continue
+            if entry.get("seq", 0) > after_seq:
+                entries.append(entry)
+        # Several processes append to the same journal, so write order is not seq order
+        entries.sort(key=lambda entry: entry["seq"])
+        return entries
+
+    def remove_stale_temp_files(self, max_age_seconds: float = 3600) -> int:
+        """Removes temp files of writes interrupted by a crash (API startup)."""
+        try:
+            removed = self.backend.remove_stale_temp_files(max_age_seconds)
+        except Exception as e:
+            print(f"Failed to remove stale temp files: {e}")
+            return 0
+        if removed:
+            print(f"Removed {removed} stale temp files from {self.base_path}.")
+        return removed
+
+    def delete_journal(self, interview_id: str):
+        """Removes an interview's journal (once a final snapshot covers it)."""
+        try:
+            self.backend.delete_journal(interview_id)
+        except Exception as e:
+            raise StorageError(f"Failed to delete journal for ID {interview_id}: {e}", original_exception=e)
 
-    # Methods for saving/loading interview state or full transcripts if needed for persistence
-    # async def save_interview_state(self, interview_id: str, state_data: Dict[str, Any]):
-    #     """Saves the current interview state (excluding non-serializable parts)."""
-    #     file_path = self._get_file_path("interview_states", interview_id, ".json")
-    #     try:
-    #         with open(file_path, "w", encoding="utf-8") as f:
-    #             json.dump(state_data, f, indent=4)
-    #         print(f"Saved interview state for {interview_id}")
-    #     except Exception as e:
-    #         raise StorageError(f"Failed to save interview state for ID {interview_id}: {e}", original_exception=e)
-
-    # async def load_interview_state(self, interview_id: str) -> Optional[Dict[str, Any]]:
-    #      """Loads an interview state."""
-    #      file_path = self._get_file_path("interview_states", interview_id, ".json")
-    #      if not os.path.exists(file_path):
-    #          return None # State not found
-    #      try:
-    #          with open(file_path, "r", encoding="utf-8") as f:
-    #              state_data = json.load(f)
-    #          return state_data
-    #      except Exception as e:
-    #          raise StorageError(f"Failed to load interview state for ID {interview_id}: {e}", original_exception=e)
\ No newline at end of file
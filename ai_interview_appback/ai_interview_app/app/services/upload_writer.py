@@ -0,0 +1,169 @@
+# app/services/upload_writer.py - Streams uploaded files to disk in bounded chunks
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+from app.core.exceptions import UploadTooLarge
+
+
+@dataclass
+class SavedUpload:
+    """Where an upload ended up, plus what was computed while writing it."""
+    path: str
+    size_bytes: int
+    sha256: str
+
+
+# Room for multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Bounds the request body of the upload endpoints before it is read. Starlette parses the
+    whole multipart body into spooled temp files before the endpoint runs, so a size check in
+    the endpoint only fires once a multi-GB upload already sits on the temp disk. Here a
+    Content-Length over the limit is answered with 413 without reading the body, and a body
+    without one (chunked) is cut off with 413 as soon as it grows past the limit.
+    """
+    def __init__(self, app, limit_for_path: Callable[[str], Optional[int]]):
+        self.app = app
+        self.limit_for_path = limit_for_path # Body limit for a request path; None: not limited here
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limit_for_path(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                return # Whatever the app answers to the aborted body (a 400 parse error) is replaced below
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        response = JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                content={"detail": f"Request body exceeds the maximum size of {limit} bytes."})
+        await response({"type": "http"}, None, send)
+
+
+def upload_body_limit(path: str, settings) -> Optional[int]:
+    """Request body limit of an upload endpoint (None for every other path)."""
+    if not path.startswith("/api/v1/documents/upload/"):
+        return None
+    if path.endswith("/batch"):
+        return settings.BATCH_MAX_REQUEST_BYTES
+    files = 2 if path.endswith("/pair") else 1
+    return files * (settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
+
+
+async def stream_upload_to_disk(file: UploadFile, dest_path: str, max_bytes: int, chunk_bytes: int = 1024 * 1024) -> SavedUpload:
+    """
+    Copies `file` to `dest_path` one chunk at a time and hashes it in the same pass.
+
+    Starlette has already received the part into a spooled temp file by now (its request as
+    a whole is bounded by UploadSizeLimitMiddleware); `max_bytes` is the per-file limit.
+    Only one chunk is held in memory, whatever the file size. The blocking write and
+    the hash update run in a worker thread, so other requests and WebSocket traffic on
+    the event loop keep moving during large uploads. Bytes go to `<dest_path>.part`
+    first, which is renamed only once the whole file fits under `max_bytes`. A rejected
+    or failed upload leaves nothing behind.
+    """
+    # The part size as received, when Starlette recorded it: skips copying an oversized file
+    declared_size: Optional[int] = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise UploadTooLarge(file.filename or "", max_bytes)
+
+    part_path = dest_path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(open, part_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(chunk_bytes)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes: # The recorded size can be missing
+                raise UploadTooLarge(file.filename or "", max_bytes)
+            await asyncio.to_thread(_hash_and_write, out, digest, chunk)
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(os.replace, part_path, dest_path)
+    except BaseException:
+        # Also covers client disconnects (CancelledError): never keep a partial file
+        out.close()
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    return SavedUpload(path=dest_path, size_bytes=size, sha256=digest.hexdigest())
+
+
+def _hash_and_write(out, digest, chunk: bytes):
+    digest.update(chunk) # hashlib releases the GIL for large buffers
+    out.write(chunk)
+
+
+def copy_stream_to_disk(src: BinaryIO, dest_path: str, max_bytes: int, chunk_bytes: int = 1024 * 1024, name: str = "") -> SavedUpload:
+    """
+    Blocking counterpart of stream_upload_to_disk for file objects already on this side
+    (e.g. ZIP members), run from a worker thread. The size limit is enforced on the bytes
+    actually read: a ZIP header can declare any size.
+    """
+    part_path = dest_path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(part_path, "wb") as out:
+            while True:
+                chunk = src.read(chunk_bytes)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(name, max_bytes)
+                _hash_and_write(out, digest, chunk)
+        os.replace(part_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    return SavedUpload(path=dest_path, size_bytes=size, sha256=digest.hexdigest())
@@ -8,9 +8,11 @@ from app.analysis.post_interview_analyzer import PostInterviewAnalyzer
 from app.analysis.code_analyzer import CodeAnalyzer
 from app.services.storage_service import StorageService # Import storage
 from app.services.llm_service import LLMService # Import LLM service for analyzers
+from app.services.service_container import get_service_container # Per-process services, warmed at worker start
 from app.config.settings import settings # Import settings
 from app.core.exceptions import DocumentProcessingError, StorageError, LLMServiceError # Import exceptions
-from typing import Dict, Any
+from app.utils import metrics
+from typing import Dict, Any, Tuple
 # Base task for tasks requiring analysis services or storage/LLM
 class AnalysisTask(Task):
     """Base task for analysis tasks."""
@@ -20,44 +22,57 @@ class AnalysisTask(Task):
     _post_analyzer = None
     _code_analyzer = None
 
+    # Services and analyzers are shared with every other task base class through the
+    # process-wide container (built at worker process init); class attributes override them.
     @property
-    def storage_service(self):
-        if self._storage_service is None:
-            self._storage_service = StorageService(base_path=settings.STORAGE_PATH)
-        return self._storage_service
+    def storage_service(self) -> StorageService:
+        return self._storage_service or get_service_container().storage_service
 
     @property
-    def llm_service(self):
-        if self._llm_service is None:
-            self._llm_service = LLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MAIN_LLM_MODEL)
-        return self._llm_service
+    def llm_service(self) -> LLMService:
+        return self._llm_service or get_service_container().llm_service
 
     @property
-    def pre_analyzer(self):
-        if self._pre_analyzer is None:
-            # PreInterviewAnalyzer needs LLM and Storage services
-            self._pre_analyzer = PreInterviewAnalyzer(
-                llm_service=self.llm_service,
-                storage_service=self.storage_service
-            )
-        return self._pre_analyzer
+    def pre_analyzer(self) -> PreInterviewAnalyzer:
+        # PreInterviewAnalyzer needs LLM and Storage services
+        return self._pre_analyzer or get_service_container().pre_analyzer
 
     @property
-    def post_analyzer(self):
-        if self._post_analyzer is None:
-            # PostInterviewAnalyzer needs LLM and Storage services
-            self._post_analyzer = PostInterviewAnalyzer(
-                 llm_service=self.llm_service,
-                 storage_service=self.storage_service
-            )
-        return self._post_analyzer
+    def post_analyzer(self) -> PostInterviewAnalyzer:
+        # PostInterviewAnalyzer needs LLM and Storage services
+        return self._post_analyzer or get_service_container().post_analyzer
 
     @property
-    def code_analyzer(self):
-         if self._code_analyzer is None:
-             # CodeAnalyzer needs LLM service (for agents/function calling)
-             self._code_analyzer = CodeAnalyzer(llm_service=self.llm_service)
-         return self._code_analyzer
+    def code_analyzer(self) -> CodeAnalyzer:
+        # CodeAnalyzer needs LLM service (for agents/function calling)
+        return self._code_analyzer or get_service_container().code_analyzer
+
+
+def analyze_and_store(storage_service: StorageService, pre_analyzer: PreInterviewAnalyzer, doc_id: str, document_type: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Runs and saves the pre-interview analysis of a document. Returns (result, analyzed_here).
+    Identical uploads share a doc_id: a stored analysis is reused, and concurrent requests
+    for the same document wait for one LLM call instead of each making one.
+    """
+    def analyze_and_save():
+        # Use the pre-interview analyzer
+        result = pre_analyzer.analyze(doc_id=doc_id, document_type=document_type)
+        # Save the analysis result
+        storage_service.save_analysis_result(doc_id, result) # Use doc_id as analysis_id
+        return result
+
+    if not settings.DEDUPE_UPLOADS_ENABLED:
+        return analyze_and_save(), True
+    analysis_result, analyzed = storage_service.single_flight(
+        f"analysis_{doc_id}_{document_type}",
+        lambda: storage_service.load_cached_analysis(doc_id, document_type),
+        analyze_and_save,
+        wait_seconds=settings.SINGLE_FLIGHT_WAIT_SECONDS, poll_seconds=settings.SINGLE_FLIGHT_POLL_SECONDS
+    )
+    if not analyzed:
+        metrics.increment("analysis_reused")
+        print(f"Reusing stored pre-interview analysis for {document_type} ID: {doc_id}")
+    return analysis_result, analyzed
 
 
 # Task for running pre-interview analysis
@@ -69,11 +84,7 @@ def run_pre_interview_analysis(self: AnalysisTask, doc_id: str, document_type: s
     """
     print(f"Task: Running pre-interview analysis for {document_type} ID: {doc_id}")
     try:
-        # Use the pre-interview analyzer
-        analysis_result = self.pre_analyzer.analyze(doc_id=doc_id, document_type=document_type)
-
-        # Save the analysis result
-        self.storage_service.save_analysis_result(doc_id, analysis_result) # Use doc_id as analysis_id
+        analysis_result, _ = analyze_and_store(self.storage_service, self.pre_analyzer, doc_id, document_type)
 
         print(f"Task: Pre-interview analysis completed and saved for {document_type} ID: {doc_id}")
 
@@ -1,6 +1,8 @@
 # app/tasks/celery.py - Celery application instance setup
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
+from celery.worker.control import inspect_command
 from app.config.celery_config import celery_config # Import Celery configuration
 
 # Create the Celery application instance
@@ -11,6 +13,7 @@ celery_app = Celery("ai_interview_app.tasks", broker="redis://localhost:6379/0",
         "app.tasks.document_tasks",
         "app.tasks.interview_tasks",
         "app.tasks.analysis_tasks",
+        "app.tasks.llm_tasks",
     ],)
 
 # Load configuration from the dictionary
@@ -21,6 +24,72 @@ celery_app.conf.update(celery_config)
 celery_app.autodiscover_tasks(["app.tasks"])
 
 
+# Refuse to start a worker that could not share sessions with the API process (once per worker,
+# before any pool process is created)
+@worker_init.connect
+def check_worker_backends(**kwargs):
+    from app.config.settings import settings
+    from app.core.live_executor import check_live_execution_backends
+    check_live_execution_backends(settings)
+
+
+# Create the shared LLM client once per worker process. This runs after fork, so prefork
+# children each get their own connection pool instead of inheriting the parent's sockets.
+@worker_process_init.connect
+def init_worker_llm_clients(**kwargs):
+    from app.config.settings import settings
+    from app.services import llm_client_pool
+    # Tasks are synchronous, so only the sync client is needed in workers
+    llm_client_pool.init_llm_clients(settings, use_sync=True, use_async=False)
+    warm_worker_process()
+
+# Thread pools run tasks in the main worker process, which gets no worker_process_init.
+# Prefork parents only supervise their children, so they are not warmed.
+@worker_ready.connect
+def warm_thread_pool_worker(sender=None, **kwargs):
+    pool = getattr(sender, "pool", None)
+    if pool is None or type(pool).__module__.endswith(("prefork", "solo")):
+        return # Warmed (or not needed) via worker_process_init
+    warm_worker_process()
+
+
+def warm_worker_process():
+    """Builds this process's shared services up front so the first task runs at steady-state latency."""
+    from app.config.settings import settings
+    from app.services.service_container import get_service_container
+    if not settings.WORKER_WARMUP_ENABLED:
+        return
+    container = get_service_container()
+    if not container.ready:
+        container.warm_up(open_llm_connection=settings.WORKER_WARMUP_OPEN_LLM_CONNECTION)
+
+
+# `celery -A app.tasks.celery inspect service_readiness` - warm-up state of the process that
+# answers control commands (the worker itself for threads/solo pools; prefork children log theirs)
+@inspect_command()
+def service_readiness(state):
+    from app.services.service_container import get_service_container
+    return get_service_container().readiness()
+
+@worker_process_shutdown.connect
+def close_worker_llm_clients(**kwargs):
+    from app.config.settings import settings
+    from app.services import llm_client_pool
+    llm_client_pool.close_sync_client()
+    from app.services.document_parser import shutdown_page_pool
+    shutdown_page_pool()
+    if settings.JOURNAL_ENABLED:
+        # Write out journal entries (committed responses, summaries) still batched in this worker
+        from app.core.journal import get_journal_writer
+        get_journal_writer().flush(timeout=5.0)
+
+# Thread and solo pools run tasks in the main worker process, which gets no
+# worker_process_shutdown (in a prefork parent there is nothing to close)
+@worker_shutdown.connect
+def close_main_worker_process(**kwargs):
+    close_worker_llm_clients()
+
+
 # Optional: Example task (can be removed once actual tasks are defined)
 @celery_app.task
 def add(x, y):
@@ -1,14 +1,19 @@
 # app/tasks/document_tasks.py - Celery tasks for document processing
 
 import uuid # For generating analysis IDs
-from celery import Task
+import time
+from celery import Task, chain, chord
+from celery.result import AsyncResult
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from app.tasks.celery import celery_app # Import the Celery app instance
 from app.services.document_parser import DocumentParser # Import parser service
 from app.services.storage_service import StorageService # Import storage service
 from app.analysis.pre_interview_analyzer import PreInterviewAnalyzer # Import analyzer
 from app.core.exceptions import DocumentProcessingError, StorageError # Import exceptions
+from app.config.settings import settings
+from app.utils import metrics
+from app.services.service_container import get_service_container # Per-process services, warmed at worker start
 
 # Dependencies - Injected into tasks (or instantiated within)
 # For tasks, it's often simpler to instantiate dependencies inside the task
@@ -21,58 +26,72 @@ class DocumentProcessingTask(Task):
     _storage = None
     _analyzer = None
 
+    # All three come from the process-wide container (built at worker process init), so the
+    # parser imports, StorageService directories and LLM client are shared with the other tasks.
     @property
-    def parser(self):
-        if self._parser is None:
-            # Instantiate DocumentParser (no dependencies needed for it)
-            self._parser = DocumentParser()
-        return self._parser
+    def parser(self) -> DocumentParser:
+        return self._parser or get_service_container().document_parser
 
     @property
-    def storage(self):
-        if self._storage is None:
-            # Instantiate StorageService - needs base_path from settings
-            from app.config.settings import settings # Import settings here to avoid circular dependency on app start
-            self._storage = StorageService(base_path=settings.STORAGE_PATH)
-        return self._storage
+    def storage(self) -> StorageService:
+        return self._storage or get_service_container().storage_service
 
     @property
-    def analyzer(self):
-        if self._analyzer is None:
-            # Instantiate PreInterviewAnalyzer - might need LLM service or other deps
-            # For now, let's assume it needs StorageService to load document content
-            # and LLMService for analysis using LLM.
-            from app.config.settings import settings
-            from app.services.llm_service import LLMService # Import LLMService here
-            llm_service = LLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MAIN_LLM_MODEL)
-            self._analyzer = PreInterviewAnalyzer(llm_service=llm_service, storage_service=self.storage) # Pass storage service
-        return self._analyzer
+    def analyzer(self) -> PreInterviewAnalyzer:
+        # PreInterviewAnalyzer needs StorageService to load document content and LLMService for analysis
+        return self._analyzer or get_service_container().pre_analyzer
 
 
-# Define the task using the Celery app decorator
-@celery_app.task(bind=True, base=DocumentProcessingTask, name="app.tasks.document_tasks.process_document")
-def process_document(self: DocumentProcessingTask, file_path: str, document_type: str) -> Dict[str, Any]:
+def doc_id_for(file_path: str) -> str:
+    """Document ID of an upload: the unique filename generated by the upload endpoint, without extension."""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def _parse_and_store(task: DocumentProcessingTask, file_path: str) -> Dict[str, Any]:
     """
-    Celery task to parse a document (JD or Resume), store its content,
-    and trigger pre-interview analysis.
+    Parses an uploaded document and saves its text content. Returns the doc_id and saved path.
+    Identical uploads share a doc_id (see the upload endpoints), so a document that is already
+    parsed is not parsed again, and concurrent requests for it parse it once.
     """
-    print(f"Starting document processing task for {file_path} ({document_type})")
+    # The unique filename generated in the API endpoint is the ID for storage
+    doc_id = doc_id_for(file_path)
 
-    try:
+    def parse_and_save():
         # 1. Parse the document content
         print(f"Parsing document: {file_path}")
-        text_content = self.parser.parse_document(file_path)
+        text_content = task.parser.parse_document(file_path)
         print(f"Parsed {len(text_content)} characters.")
 
-        # Generate a unique ID for this document processing/analysis cycle
-        # We could reuse the file's temporary unique ID, or generate a new one.
-        # Let's assume the unique filename generated in the API endpoint is the ID for storage.
-        doc_id = os.path.splitext(os.path.basename(file_path))[0] # Extract ID from unique filename
-
         # 2. Save the parsed content
         print(f"Saving parsed content for ID: {doc_id}")
-        saved_path = self.storage.save_document_content(doc_id, text_content)
+        saved_path = task.storage.save_document_content(doc_id, text_content)
         print(f"Content saved to {saved_path}")
+        return saved_path
+
+    if not settings.DEDUPE_UPLOADS_ENABLED:
+        return {"doc_id": doc_id, "saved_path": parse_and_save()}
+    saved_path, parsed = task.storage.single_flight(
+        f"parse_{doc_id}", lambda: task.storage.document_content_location(doc_id), parse_and_save,
+        wait_seconds=settings.SINGLE_FLIGHT_WAIT_SECONDS, poll_seconds=settings.SINGLE_FLIGHT_POLL_SECONDS
+    )
+    if not parsed:
+        metrics.increment("document_parse_reused")
+        print(f"Document {doc_id} already parsed; reusing {saved_path}")
+    return {"doc_id": doc_id, "saved_path": saved_path}
+
+
+# Define the task using the Celery app decorator
+@celery_app.task(bind=True, base=DocumentProcessingTask, name="app.tasks.document_tasks.process_document")
+def process_document(self: DocumentProcessingTask, file_path: str, document_type: str) -> Dict[str, Any]:
+    """
+    Celery task to parse a document (JD or Resume), store its content,
+    and trigger pre-interview analysis.
+    """
+    print(f"Starting document processing task for {file_path} ({document_type})")
+
+    try:
+        stored = _parse_and_store(self, file_path)
+        doc_id, saved_path = stored["doc_id"], stored["saved_path"]
 
         # 3. Trigger pre-interview analysis task
         # The analyzer needs the document type and ID to load the content.
@@ -102,6 +121,135 @@ def process_document(self: DocumentProcessingTask, file_path: str, document_type
         raise # Re-raise the exception
 
 
+# Parse-only step of the pipeline below (analysis is chained after it instead of being
+# fired from inside the task, so the chord can wait for it)
+@celery_app.task(bind=True, base=DocumentProcessingTask, name="app.tasks.document_tasks.parse_document")
+def parse_document(self: DocumentProcessingTask, file_path: str, document_type: str) -> Dict[str, Any]:
+    """Celery task to parse a document (JD or Resume) and store its content."""
+    print(f"Starting document parsing task for {file_path} ({document_type})")
+    try:
+        return {"status": "completed", "document_type": document_type, **_parse_and_store(self, file_path)}
+    except (DocumentProcessingError, StorageError) as e:
+        print(f"Document parsing failed for {file_path}: {e}")
+        self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
+        raise
+    except Exception as e:
+        print(f"An unexpected error occurred during document parsing for {file_path}: {e}")
+        self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
+        raise
+
+
+# --- JD + Resume pipeline ---
+# Each document is parsed then analyzed (a chain); the two chains are the header of a chord
+# whose callback joins both analyses into the interview plan and first question. The callback
+# runs as soon as the second document finishes, so /interview/start only loads the stored plan.
+def document_analysis_chain(file_path: str, document_type: str):
+    """parse_document -> run_pre_interview_analysis for one uploaded document."""
+    from app.tasks.analysis_tasks import run_pre_interview_analysis # Avoid circular imports at definition time
+    return chain(
+        parse_document.si(file_path, document_type),
+        run_pre_interview_analysis.si(doc_id=doc_id_for(file_path), document_type=document_type)
+    )
+
+
+def start_interview_plan_pipeline(jd_file_path: str, resume_file_path: str) -> AsyncResult:
+    """Starts the pair pipeline. Returns the result of the chord callback (build_interview_plan)."""
+    from app.tasks.llm_tasks import build_interview_plan
+    header = [
+        document_analysis_chain(jd_file_path, "job_description"),
+        document_analysis_chain(resume_file_path, "resume"),
+    ]
+    callback = build_interview_plan.s(job_description_id=doc_id_for(jd_file_path), resume_id=doc_id_for(resume_file_path))
+    return chord(header)(callback)
+
+
+# --- Batch ingestion ---
+# A batch is a manifest of saved uploads processed in `lanes` parallel lanes: lane k handles
+# items k, k + lanes, k + 2*lanes, ... one at a time, each task queueing the next item of its
+# lane when it finishes. At most `lanes` documents of a batch are in flight, whatever its
+# size, and every broker message stays small. Items are parsed and analyzed in the same task
+# so the cap also bounds the batch's LLM calls.
+@celery_app.task(bind=True, base=DocumentProcessingTask, name="app.tasks.document_tasks.ingest_batch_document")
+def ingest_batch_document(self: DocumentProcessingTask, batch_id: str, index: int, lanes: int) -> Dict[str, Any]:
+    """Celery task to parse and analyze one item of a batch, then continue with the next item of its lane."""
+    from app.tasks.analysis_tasks import analyze_and_store # Avoid circular imports at definition time
+    manifest = self.storage.load_batch_manifest(batch_id)
+    if manifest is None:
+        print(f"Batch {batch_id} not found; dropping item {index}.")
+        return {"status": "failed", "index": index, "error": "Batch not found."}
+    item = manifest["items"][index]
+    status = {"index": index, "doc_id": doc_id_for(item["file_path"]), "filename": item["filename"], "started_at": time.time()}
+    try:
+        _parse_and_store(self, item["file_path"])
+        _, analyzed = analyze_and_store(self.storage, self.analyzer, status["doc_id"], manifest["document_type"])
+        status["status"] = "completed" if analyzed else "reused"
+    except Exception as e:
+        # One bad file must not stop its lane: record it and move on
+        print(f"Batch {batch_id}: item {index} ({item['filename']}) failed: {e}")
+        status.update(status="failed", error=str(e))
+    status["finished_at"] = time.time()
+    metrics.increment(f"batch_documents_{status['status']}")
+    metrics.record_latency("batch_document", status["finished_at"] - status["started_at"])
+
+    self.storage.save_batch_item_status(batch_id, index, status)
+    if index + lanes < len(manifest["items"]):
+        ingest_batch_document.delay(batch_id, index + lanes, lanes)
+    return status
+
+
+def start_batch_ingestion(storage: StorageService, items: List[Dict[str, Any]], document_type: str, max_concurrency: int) -> Dict[str, Any]:
+    """
+    Saves the manifest of a batch of already-stored uploads ({"file_path", "filename"}) and
+    starts its lanes. Returns the manifest (with its batch_id).
+    """
+    lanes = max(1, min(max_concurrency, len(items)))
+    manifest = {
+        "batch_id": uuid.uuid4().hex,
+        "document_type": document_type,
+        "created_at": time.time(),
+        "lanes": lanes,
+        "items": items,
+    }
+    storage.save_batch_manifest(manifest["batch_id"], manifest)
+    for lane in range(lanes if items else 0):
+        ingest_batch_document.delay(manifest["batch_id"], lane, lanes)
+    return manifest
+
+
+def batch_progress(storage: StorageService, batch_id: str) -> Dict[str, Any]:
+    """Aggregate progress and ingestion throughput of a batch, or {} if there is no such batch."""
+    manifest = storage.load_batch_manifest(batch_id)
+    if manifest is None:
+        return {}
+    statuses = storage.load_batch_item_statuses(batch_id)
+    total = len(manifest["items"])
+    counts = {"completed": 0, "reused": 0, "failed": 0}
+    for status in statuses:
+        counts[status["status"]] = counts.get(status["status"], 0) + 1
+    done = len(statuses)
+
+    # Throughput over the batch's lifetime so far: documents finished per second of wall time
+    last_finished_at = max((status["finished_at"] for status in statuses), default=manifest["created_at"])
+    elapsed = (time.time() if done < total else last_finished_at) - manifest["created_at"]
+    docs_per_second = done / elapsed if elapsed > 0 else 0.0
+    return {
+        "batch_id": batch_id,
+        "document_type": manifest["document_type"],
+        "state": "completed" if done >= total else "processing",
+        "total": total,
+        "done": done,
+        "pending": total - done,
+        **counts,
+        "progress": round(done / total, 4) if total else 1.0,
+        "elapsed_seconds": round(elapsed, 2),
+        "docs_per_second": round(docs_per_second, 3),
+        "eta_seconds": round((total - done) / docs_per_second, 1) if docs_per_second and done < total else None,
+        "lanes": manifest["lanes"],
+        "failures": [{"index": s["index"], "filename": s["filename"], "error": s.get("error")} for s in statuses if s["status"] == "failed"],
+        "doc_ids": [doc_id_for(item["file_path"]) for item in manifest["items"]],
+    }
+
+
 # You might add other document related tasks here, e.g.,
 # - Task to clean up temporary uploaded files after processing
 # @celery_app.task
@@ -0,0 +1,103 @@
+# app/tasks/inline_tasks.py - Live interview handlers run in the API process (inline execution mode)
+
+import time
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+from app.config.settings import settings
+from app.core.exceptions import LLMServiceError, DraftCancelled
+from app.core.draft_cancellation import CancelToken
+from app.utils import metrics
+
+if TYPE_CHECKING:
+    from app.core.interview_manager import InterviewManager
+
+# Async counterparts of the Celery tasks in interview_tasks.py, used when
+# LIVE_EXECUTION_MODE="inline". The InterviewManager schedules them on the InlineTaskExecutor
+# (app/core/live_executor.py) with the conversation history as live Python objects, and they
+# use the async LLM client so the event loop is never blocked on the API.
+# They report results through the async variants of the manager methods the Celery tasks use.
+
+
+async def process_chunk(
+    manager: "InterviewManager",
+    interview_id: str,
+    current_buffer: str,
+    conversation_history: List[Dict[str, str]],
+    draft_seq: int = 0,
+    cancel_token: Optional[CancelToken] = None
+):
+    """
+    Inline counterpart of process_chunk_task: a draft (or speculative final) for the buffer so far.
+    A final utterance cancels this task (and its LLM request) through the manager; the
+    accounting is done there.
+    """
+    try:
+        if settings.SPECULATIVE_RESPONSES_ENABLED:
+            started_at = time.perf_counter()
+            speculative_response = await manager.llm_service.agenerate_speculative_response(
+                conversation_history=conversation_history,
+                current_buffer=current_buffer,
+                cancel_token=cancel_token
+            )
+            generation_seconds = time.perf_counter() - started_at
+            print(f"Inline: Generated speculative response for {interview_id} in {generation_seconds:.2f}s")
+            await manager.astore_speculative_response(interview_id, current_buffer, speculative_response, generation_seconds, draft_seq)
+            return
+
+        latest_draft = await manager.llm_service.aprocess_incremental_chunk(
+            conversation_history=conversation_history,
+            current_buffer=current_buffer,
+            cancel_token=cancel_token
+        )
+        print(f"Inline: Generated draft for {interview_id}: '{latest_draft}'")
+        await manager.aupdate_state_with_llm_draft(interview_id, latest_draft, draft_seq)
+    except DraftCancelled:
+        pass # Preempted by a final utterance (already counted by the manager)
+    except LLMServiceError as e:
+        print(f"Inline: Error processing chunk for {interview_id}: {e}")
+        manager.release_draft_slot(interview_id) # Don't leave the coalescer waiting on a failed draft
+    except Exception:
+        manager.release_draft_slot(interview_id)
+        raise # Logged and counted by the executor
+
+
+async def process_final_response(manager: "InterviewManager", interview_id: str, full_utterance: str, conversation_history: List[Dict[str, str]]):
+    """Inline counterpart of process_final_response_task."""
+    if settings.LLM_STREAMING_ENABLED:
+        deltas = manager.llm_service.astream_final_utterance(
+            conversation_history=conversation_history,
+            full_utterance=full_utterance
+        )
+        final_response = await manager.astream_final_response(interview_id, full_utterance, deltas)
+        print(f"Inline: Streamed final response for {interview_id}: '{final_response}'")
+        return
+
+    started_at = time.perf_counter()
+    final_response = await manager.llm_service.aprocess_final_utterance(
+        conversation_history=conversation_history,
+        full_utterance=full_utterance
+    )
+    metrics.record_latency("llm_final_ttft", time.perf_counter() - started_at)
+    metrics.record_latency("llm_final_total", time.perf_counter() - started_at)
+    print(f"Inline: Generated final response for {interview_id}: '{final_response}'")
+    await manager.afinalize_llm_response(interview_id, final_response, {"user": full_utterance, "assistant": final_response})
+
+
+async def trigger_mini_llm_surprise(manager: "InterviewManager", interview_id: str, context: str, conversation_snippet: str = ""):
+    """Inline counterpart of trigger_mini_llm_surprise_task."""
+    surprise_text = await manager.mini_llm_service.agenerate_surprise(context, conversation_snippet)
+    if surprise_text:
+        manager.send_mini_llm_surprise(interview_id, surprise_text)
+    else:
+        print(f"Inline: Mini-LLM generated no surprise text for {interview_id}, context: {context}")
+
+
+async def summarize_history(manager: "InterviewManager", interview_id: str, previous_summary: str, turns: list, summarized_turns: int):
+    """Inline counterpart of summarize_history_task."""
+    try:
+        summary = await manager.mini_llm_service.asummarize_history(previous_summary, turns, max_words=settings.HISTORY_SUMMARY_MAX_WORDS)
+    except Exception as e:
+        print(f"Inline: Unexpected error summarizing history for {interview_id}: {e}")
+        summary = ""
+    # An empty summary releases the in-progress flag; a later turn retries
+    await manager.aupdate_history_summary(interview_id, summary, summarized_turns)
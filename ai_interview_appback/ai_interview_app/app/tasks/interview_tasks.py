@@ -2,14 +2,17 @@
 
 import time
 from celery import Task, chord, group # Import Celery primitives for potential chaining/grouping
-import asyncio# Import asyncio for async task handling
+from celery.signals import task_revoked
 from app.tasks.celery import celery_app # Import the Celery app instance
 from app.services.llm_service import LLMService # Import LLM service
 from app.services.mini_llm_service import MiniLLMService # Import Mini-LLM service
 from app.services.storage_service import StorageService # Storage for state persistence/loading
+from app.services.service_container import get_service_container # Per-process services, warmed at worker start
 
-from app.core.exceptions import LLMServiceError, StorageError, InterviewNotFound # Import exceptions
+from app.core.exceptions import LLMServiceError, StorageError, InterviewNotFound, DraftCancelled # Import exceptions
+from app.core.draft_cancellation import CancelToken, record_cancelled_draft
 from app.config.settings import settings # Import settings
+from app.utils import metrics
 
 # Base task for tasks requiring services and access to manager/state
 class InterviewProcessingTask(Task):
@@ -21,120 +24,120 @@ class InterviewProcessingTask(Task):
 
     # Note: Accessing the singleton InterviewManager from tasks requires care.
     # A simple approach is to re-instantiate services and call Manager methods
-    # via a new Manager instance that knows how to access shared state (e.g., active_interview_states).
+    # via a new Manager instance that knows how to access shared state (the interview state store,
+    # app/core/state_store.py - use STATE_STORE_BACKEND=redis with prefork workers).
     # Or, the Manager itself could be a singleton loaded here.
     # For simplicity now, let's instantiate services and interact with the shared state/manager methods.
 
+    # Services come from the process-wide container (built at worker process init); a value
+    # assigned to the class attribute (e.g. a fake in a benchmark) takes precedence.
     @property
-    def llm_service(self):
-        if self._llm_service is None:
-             # Pass settings here to avoid circular import issues at top level
-             self._llm_service = LLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MAIN_LLM_MODEL)
-        return self._llm_service
+    def llm_service(self) -> LLMService:
+        return self._llm_service or get_service_container().llm_service
 
     @property
-    def mini_llm_service(self):
-        if self._mini_llm_service is None:
-            self._mini_llm_service = MiniLLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MINI_LLM_MODEL)
-        return self._mini_llm_service
+    def mini_llm_service(self) -> MiniLLMService:
+        return self._mini_llm_service or get_service_container().mini_llm_service
 
     @property
-    def storage_service(self):
-        if self._storage_service is None:
-            self._storage_service = StorageService(base_path=settings.STORAGE_PATH)
-        return self._storage_service
+    def storage_service(self) -> StorageService:
+        return self._storage_service or get_service_container().storage_service
 
     @property
     def manager(self):
-        # Instantiate manager within the task. It should access the shared state dict.
-        # This might need a more sophisticated state management if not using a global dict.
-        from app.core.interview_manager import InterviewManager # Access manager's state/methods
-        if self._manager is None:
-             # Instantiate Manager with necessary services
-             # Need a way for the manager instance in the task to find/update
-             # the *correct* state object in the shared dictionary.
-             # The manager methods called below (e.g., update_state_with_llm_draft)
-             # already handle this by looking up the state by interview_id.
-             self._manager = InterviewManager(
-                 llm_service=self.llm_service,
-                 mini_llm_service=self.mini_llm_service,
-                 storage_service=self.storage_service,
-                 settings=settings
-             )
-        return self._manager
+        # One manager per worker process, shared by all interview tasks.
+        # The manager methods called below (e.g., update_state_with_llm_draft) look up the
+        # state by interview_id in the shared state store, so no per-task state is needed.
+        # LLM calls in the tasks go through self.llm_service, not the manager's services.
+        return self._manager or get_service_container().interview_manager
 
 
 # Task for processing incremental chunks
 @celery_app.task(bind=True, base=InterviewProcessingTask)
-def process_chunk_task(self: InterviewProcessingTask, interview_id: str, chunk: str, current_buffer: str, conversation_history: list):
+def process_chunk_task(self: InterviewProcessingTask, interview_id: str, chunk: str, current_buffer: str, conversation_history: list, draft_seq: int = 0):
     """
     Celery task to process an incremental user speech chunk.
     Calls LLMService to potentially generate a draft response.
+    `draft_seq` is the session's journal seq at dispatch; once a final utterance with a higher
+    seq arrives the draft is skipped, or its LLM stream aborted if it is already running.
     """
     print(f"Task: Processing chunk for interview {interview_id}. Chunk: '{chunk}'")
+    cancel_token = None
     try:
+        if settings.DRAFT_CANCELLATION_ENABLED and draft_seq:
+            if self.manager.is_draft_stale(interview_id, draft_seq):
+                # The final overtook us in the queue (revoke not seen yet)
+                record_cancelled_draft(interview_id, None)
+                return
+            cancel_token = CancelToken(
+                is_stale=lambda: self.manager.is_draft_stale(interview_id, draft_seq),
+                check_interval_seconds=settings.DRAFT_CANCEL_CHECK_INTERVAL_SECONDS
+            )
+
+        if settings.SPECULATIVE_RESPONSES_ENABLED:
+            # Speculative mode: produce a full candidate answer for the buffer so far.
+            # If the final utterance matches, the manager commits it without a new LLM call.
+            started_at = time.perf_counter()
+            speculative_response = self.llm_service.generate_speculative_response(
+                 conversation_history=conversation_history,
+                 current_buffer=current_buffer,
+                 cancel_token=cancel_token
+            )
+            generation_seconds = time.perf_counter() - started_at
+            print(f"Task: Generated speculative response for {interview_id} in {generation_seconds:.2f}s")
+            self.manager.store_speculative_response(interview_id, current_buffer, speculative_response, generation_seconds, draft_seq)
+            return
+
         # Use LLM service to process the chunk in incremental mode
         # This calls the method that uses the "user is still speaking" prompt
         # The LLM generates a *draft* or internal thought process.
         latest_draft = self.llm_service.process_incremental_chunk(
              conversation_history=conversation_history, # Pass context
-             current_buffer=current_buffer # Pass the full buffer accumulated so far
+             current_buffer=current_buffer, # Pass the full buffer accumulated so far
+             cancel_token=cancel_token # Aborts the stream if a final utterance arrives meanwhile
         )
         print(f"Task: Generated draft for {interview_id}: '{latest_draft}'")
 
-        # Update the interview state with the latest draft
-        # The manager method also sends the draft via the websocket if active
-        # Note: This call is synchronous from the task's perspective.
-        # If update_state_with_llm_draft involves await, Celery worker needs async support (gevent, eventlet).
-        # Assuming simple in-memory state update and WebSocket send for now.
-        # If running a prefork worker, direct state modification is problematic.
-        # Accessing `active_interview_states` directly from a prefork worker is unsafe.
-        # A safer approach would be to send a message back to the main application process
-        # or a dedicated state-management process/queue.
-        # For simplicity with `solo` worker or gevent/eventlet, direct state access is shown,
-        # but be aware of limitations with prefork. A dedicated state service (Redis, DB)
-        # is the most robust for distributed workers.
-
-        # Assuming the manager instance inside the task can safely interact with state
-        # (e.g., via shared memory in gevent/solo, or accessing a persistent store)
-        # Let's use the manager's method to handle the state update and WebSocket push.
-        # This call needs to be awaited if the manager method is async, which requires async Celery worker.
-        # If not using async workers, manager methods updating state/sending WS must be sync or use another mechanism.
-        # Let's assume an async worker and async manager methods for WebSockets.
-        # If sync worker, need to refactor state update/WS communication mechanism.
-        # Assuming async capabilities for now.
-
-        # Need to import asyncio to await manager calls
-        # from app.core.interview_manager import active_interview_states # Direct access is simpler for example
-        # state = active_interview_states.get(interview_id)
-        # if state:
-        #     # Assuming state object methods are awaited
-        #     await state.update_latest_llm_draft(latest_draft) # State method to update and send WS
-
-        # Or call manager method:
-        asyncio.run(self.manager.update_state_with_llm_draft(interview_id, latest_draft))
-        # Note: asyncio.run() in a task can be problematic. Best is to use async celery worker.
-        # If sync worker, state updates/WS sends must be handled via non-async means (e.g., another queue, pub/sub).
-        # Let's assume async worker capabilities for async/await within tasks.
+        # Update the interview state with the latest draft.
+        # The manager method is synchronous: it writes through the interview state store
+        # (shared across processes with the Redis backend) and publishes the draft on the
+        # delivery channel, whose subscriber in the API process holding the websocket sends it.
+        # No event loop or websocket is needed in the worker, so any pool type (prefork/solo) works.
+        self.manager.update_state_with_llm_draft(interview_id, latest_draft, draft_seq)
 
         # Potentially trigger mini-LLM surprise task here based on interval or logic
         # trigger_mini_llm_surprise_task.delay(interview_id=interview_id, context="after_chunk")
 
+    except DraftCancelled:
+        record_cancelled_draft(interview_id, cancel_token) # Not a failure: the final preempted it
     except InterviewNotFound:
         print(f"Task failed: Interview session {interview_id} not found for chunk processing.")
         # Task might not need to update Celery state for this, as it's an interview state issue.
         # It could log or signal back to the main app somehow if needed.
     except (LLMServiceError, StorageError) as e:
         print(f"Task failed: Error processing chunk for {interview_id}: {e}")
+        release_failed_draft(self, interview_id)
         self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
         raise # Re-raise exception
 
     except Exception as e:
         print(f"Task failed: Unexpected error processing chunk for {interview_id}: {e}")
+        release_failed_draft(self, interview_id)
         self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
         raise
 
 
+def release_failed_draft(task: InterviewProcessingTask, interview_id: str):
+    """
+    A failed draft produced nothing: free its coalescer slot now (as release_expired_draft does)
+    instead of leaving the session's drafts blocked until CHUNK_DRAFT_INFLIGHT_TIMEOUT_SECONDS.
+    """
+    try:
+        task.manager.release_draft_slot(interview_id)
+    except Exception as e:
+        print(f"Task: Could not release the draft slot for {interview_id}: {e}") # Keep the original error
+
+
 # Task for processing the final utterance after user pause
 @celery_app.task(bind=True, base=InterviewProcessingTask)
 def process_final_response_task(self: InterviewProcessingTask, interview_id: str, full_utterance: str, conversation_history: list):
@@ -144,11 +147,26 @@ def process_final_response_task(self: InterviewProcessingTask, interview_id: str
     """
     print(f"Task: Processing final utterance for interview {interview_id}.")
     try:
+        if settings.LLM_STREAMING_ENABLED:
+            # Streaming mode: deltas are pushed to the client as they arrive and the
+            # manager commits history/transcript only once the stream has finished.
+            deltas = self.llm_service.stream_final_utterance(
+                 conversation_history=conversation_history,
+                 full_utterance=full_utterance
+            )
+            final_response = self.manager.stream_final_response(interview_id, full_utterance, deltas)
+            print(f"Task: Streamed final response for {interview_id}: '{final_response}'")
+            return
+
         # Use LLM service to generate the final response
+        started_at = time.perf_counter()
         final_response = self.llm_service.process_final_utterance(
              conversation_history=conversation_history,
              full_utterance=full_utterance
         )
+        # Without streaming the first token reaches the client together with the last one
+        metrics.record_latency("llm_final_ttft", time.perf_counter() - started_at)
+        metrics.record_latency("llm_final_total", time.perf_counter() - started_at)
         print(f"Task: Generated final response for {interview_id}: '{final_response}'")
 
         # Prepare conversation entry to add to history
@@ -159,9 +177,8 @@ def process_final_response_task(self: InterviewProcessingTask, interview_id: str
         }
 
         # Update the interview state with the final response and conversation history
-        # The manager method also sends the final response via the websocket
-        # Assuming async worker
-        asyncio.run(self.manager.finalize_llm_response(interview_id, final_response, new_history_entry))
+        # The manager method also publishes the final response for the client's websocket
+        self.manager.finalize_llm_response(interview_id, final_response, new_history_entry)
 
 
     except InterviewNotFound:
@@ -190,9 +207,8 @@ def trigger_mini_llm_surprise_task(self: InterviewProcessingTask, interview_id:
 
         if surprise_text:
             print(f"Task: Generated mini-LLM surprise for {interview_id}: '{surprise_text}'")
-            # Send the surprise text via the websocket
-            # Assuming async worker
-            asyncio.run(self.manager.send_mini_llm_surprise(interview_id, surprise_text))
+            # Publish the surprise text for the client's websocket
+            self.manager.send_mini_llm_surprise(interview_id, surprise_text)
         else:
             print(f"Task: Mini-LLM generated no surprise text for {interview_id}, context: {context}")
 
@@ -206,6 +222,44 @@ def trigger_mini_llm_surprise_task(self: InterviewProcessingTask, interview_id:
         # Don't necessarily set task state to failure for a filler error
 
 
+# Task for refreshing the rolling conversation-history summary
+@celery_app.task(bind=True, base=InterviewProcessingTask)
+def summarize_history_task(self: InterviewProcessingTask, interview_id: str, previous_summary: str, turns: list, summarized_turns: int):
+    """
+    Celery task to fold older turns into the interview's rolling summary with the mini-LLM.
+    Keeps the summary work off the live response path.
+    """
+    print(f"Task: Summarizing {len(turns)} turns for interview {interview_id}")
+    try:
+        summary = self.mini_llm_service.summarize_history(previous_summary, turns, max_words=settings.HISTORY_SUMMARY_MAX_WORDS)
+        # An empty summary means the call failed; the manager keeps the previous one and retries later
+        self.manager.update_history_summary(interview_id, summary, summarized_turns)
+    except InterviewNotFound:
+        print(f"Task failed: Interview session {interview_id} not found for history summary.")
+    except Exception as e:
+        print(f"Task failed: Unexpected error summarizing history for {interview_id}: {e}")
+        # Release the in-progress flag so a later turn can retry
+        self.manager.update_history_summary(interview_id, "", summarized_turns)
+
+
+# Draft tasks expire (CELERY_DRAFT_TASK_EXPIRES_SECONDS) when they sit in the queue too long.
+# The API-side coalescer still counts an expired draft as in flight, so release its slot the
+# same way a completed draft does instead of waiting for CHUNK_DRAFT_INFLIGHT_TIMEOUT_SECONDS.
+# Drafts revoked by a final utterance only need counting: the final already reset the coalescer.
+@task_revoked.connect
+def release_expired_draft(sender=None, request=None, expired=False, **kwargs):
+    if request is None or getattr(request, "name", None) != process_chunk_task.name:
+        return
+    interview_id = (request.kwargs or {}).get("interview_id")
+    if interview_id and not expired:
+        record_cancelled_draft(interview_id, None)
+    elif interview_id:
+        from app.core.delivery import get_delivery_channel, DRAFT_COMPLETED
+        metrics.increment("draft_tasks_expired")
+        print(f"Task: Draft for interview {interview_id} expired in the queue; releasing its slot.")
+        get_delivery_channel().publish(interview_id, event=DRAFT_COMPLETED)
+
+
 # Optional: Task to periodically monitor interview state (e.g., for timeouts, pushing latest drafts)
 # This would typically be scheduled by Celery Beat.
 # @celery_app.task(bind=True, base=InterviewProcessingTask)
@@ -1,11 +1,13 @@
 # app/tasks/llm_tasks.py - Celery tasks for general LLM interactions
 
 from celery import Task
+from typing import Dict, Any, List
 
 from app.tasks.celery import celery_app # Import the Celery app instance
 from app.services.llm_service import LLMService # Import LLM service
 # Import StorageService if tasks need to load/save data
 from app.services.storage_service import StorageService
+from app.services.service_container import get_service_container # Per-process services, warmed at worker start
 from app.config.settings import settings # Import settings to instantiate services
 from app.core.exceptions import LLMServiceError, StorageError # Import exceptions
 
@@ -16,61 +18,57 @@ class LLMTask(Task):
     _storage_service = None
 
     @property
-    def llm_service(self):
-        if self._llm_service is None:
-            self._llm_service = LLMService(api_key=settings.OPENAI_API_KEY, model_name=settings.MAIN_LLM_MODEL)
-        return self._llm_service
+    def llm_service(self) -> LLMService:
+        return self._llm_service or get_service_container().llm_service
 
     @property
-    def storage_service(self):
-        if self._storage_service is None:
-            self._storage_service = StorageService(base_path=settings.STORAGE_PATH)
-        return self._storage_service
+    def storage_service(self) -> StorageService:
+        return self._storage_service or get_service_container().storage_service
+
+    @property
+    def pre_analyzer(self):
+        # Builds the interview plan from the JD and Resume analyses
+        return get_service_container().pre_analyzer
 
 # Note: Tasks related to the live interview chunk processing are in interview_tasks.py
 # This file is for other LLM tasks, e.g., initial question generation, post-analysis summarization etc.
 
-# Example task: Generate the initial set of interview questions based on analysis
-# This might be triggered by the process_document task or start_interview API endpoint.
+# Join step of the JD + Resume pipeline (app/tasks/document_tasks.py): the callback of the
+# chord over both documents' parse -> analyze chains. It runs once the second document of the
+# pair is analyzed, builds the interview plan and first question, and stores them so
+# InterviewManager.start_interview only has to load the result.
 @celery_app.task(bind=True, base=LLMTask)
-def generate_initial_interview_plan(self: LLMTask, jd_doc_id: str, resume_doc_id: str) -> Dict[str, Any]:
+def build_interview_plan(self: LLMTask, analysis_results: List[Dict[str, Any]], job_description_id: str, resume_id: str) -> Dict[str, Any]:
     """
-    Task to generate the detailed interview plan (topics, initial questions)
-    after JD and Resume analysis is complete.
+    Task to generate the interview plan (topics, initial questions, first question)
+    from the JD and Resume analyses.
     """
-    print(f"Task: Generating initial interview plan for JD:{jd_doc_id}, Resume:{resume_doc_id}")
+    print(f"Task: Building interview plan for JD:{job_description_id}, Resume:{resume_id}")
     try:
-        # Load analysis results
-        jd_analysis = self.storage_service.load_analysis_result(jd_doc_id)
-        resume_analysis = self.storage_service.load_analysis_result(resume_doc_id)
-
-        # Use LLM to synthesize an interview plan
-        # This requires a specific prompt in interview_prompts
-        # Let's assume the PreInterviewAnalyzer handles the LLM call directly,
-        # and this task just orchestrates loading/saving.
-        # Or, the LLMService could have a specific method for this.
-        # Let's refine: The analysis tasks actually *produce* the plan and save it.
-        # So, this task might be redundant if analysis_tasks handles plan generation.
+        # The chord passes the header results (run_pre_interview_analysis return values)
+        analyses = {result["doc_id"]: result["analysis_result"] for result in analysis_results}
+        jd_analysis = analyses.get(job_description_id) or self.storage_service.load_analysis_result(job_description_id)
+        resume_analysis = analyses.get(resume_id) or self.storage_service.load_analysis_result(resume_id)
 
-        # Alternative context: If the manager needs to *regenerate* a plan or
-        # generate follow-up questions based on the *plan*, this is the place.
-        # For now, let's assume the initial plan is part of the pre-analysis result.
+        plan = self.pre_analyzer.build_interview_plan(jd_analysis, resume_analysis)
+        plan["__metadata__"] = {"job_description_id": job_description_id, "resume_id": resume_id}
+        self.storage_service.save_interview_plan(job_description_id, resume_id, plan)
 
-        # Returning a placeholder or confirming analysis result contains the plan
+        print(f"Task: Interview plan ready for JD:{job_description_id}, Resume:{resume_id}")
         return {
-            "status": "initial_plan_generation_task_placeholder",
-            "jd_analysis_id": jd_doc_id, # Assuming analysis ID is doc ID
-            "resume_analysis_id": resume_doc_id
-            # The actual plan would be loaded from storage after analysis tasks complete
+            "status": "completed",
+            "job_description_id": job_description_id,
+            "resume_id": resume_id,
+            "first_question": plan["first_question"]
         }
 
     except (StorageError, LLMServiceError) as e:
-        print(f"Task failed: Error generating initial interview plan: {e}")
+        print(f"Task failed: Error building interview plan: {e}")
         self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
         raise
 
     except Exception as e:
-        print(f"Task failed: Unexpected error generating initial interview plan: {e}")
+        print(f"Task failed: Unexpected error building interview plan: {e}")
         self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
         raise
 
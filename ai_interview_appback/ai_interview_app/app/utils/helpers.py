@@ -1,7 +1,9 @@
 # app/utils/helpers.py - General utility functions
 
+import re
 import time
 import datetime
+from typing import Optional
 
 def generate_timestamp() -> float:
     """Generates a current timestamp (seconds since epoch)."""
@@ -12,6 +14,38 @@ def format_timestamp(timestamp: float, format_string: str = "%Y-%m-%d %H:%M:%S")
     dt_object = datetime.datetime.fromtimestamp(timestamp)
     return dt_object.strftime(format_string)
 
+def normalize_utterance(text: str) -> str:
+    """Lowercases and collapses whitespace so transcripts of the same speech compare equal."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between a and b, or None if it exceeds max_distance.
+    Only a band of width 2*max_distance+1 around the diagonal is computed, so the
+    cost is O(len * max_distance) instead of O(len_a * len_b).
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if a == b:
+        return 0
+    out_of_band = max_distance + 1
+    previous = [j if j <= max_distance else out_of_band for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [out_of_band] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        row_min = current[0]
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, out_of_band)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return None # Every path already exceeds the bound
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= max_distance else None
+
 # Add other helper functions as needed, e.g., for string manipulation, data validation helpers, etc.
 
 # def clean_text(text: str) -> str:
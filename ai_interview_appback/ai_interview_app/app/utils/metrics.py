@@ -0,0 +1,60 @@
+# app/utils/metrics.py - Lightweight in-process metrics (counters and latency samples)
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any, Deque
+
+# Keep a bounded window of samples per latency metric so memory stays flat
+# no matter how long the process runs.
+MAX_LATENCY_SAMPLES = 1000
+
+# Process-local registries. Every API process and Celery worker keeps its own numbers.
+# They are exposed through the /metrics endpoint (API) or can be logged (workers).
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=MAX_LATENCY_SAMPLES))
+
+
+def increment(name: str, amount: float = 1) -> None:
+    """Increments a named counter."""
+    with _lock:
+        _counters[name] += amount
+
+
+def get_counter(name: str) -> float:
+    """Returns the current value of a counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def record_latency(name: str, seconds: float) -> None:
+    """Records a latency sample (in seconds) for a named metric."""
+    with _lock:
+        _latencies[name].append(seconds)
+
+
+def latency_summary(name: str) -> Dict[str, Any]:
+    """Returns count/avg/p50/p95/max (in milliseconds) for a latency metric."""
+    with _lock:
+        samples = sorted(_latencies.get(name, ()))
+    if not samples:
+        return {"count": 0}
+    count = len(samples)
+    return {
+        "count": count,
+        "avg_ms": round(sum(samples) / count * 1000, 2),
+        "p50_ms": round(samples[int(count * 0.50)] * 1000, 2),
+        "p95_ms": round(samples[min(count - 1, int(count * 0.95))] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def snapshot() -> Dict[str, Any]:
+    """Returns all counters and latency summaries for this process."""
+    with _lock:
+        counters = dict(_counters)
+        latency_names = list(_latencies.keys())
+    return {
+        "counters": counters,
+        "latencies": {name: latency_summary(name) for name in latency_names},
+    }
@@ -0,0 +1,86 @@
+# scripts/bench_delivery_latency.py - Measures task-completion -> socket-write delivery latency
+#
+# Usage (from the ai_interview_app directory):
+#   python -m scripts.bench_delivery_latency                       # local in-process channel
+#   python -m scripts.bench_delivery_latency --redis redis://localhost:6379/2
+#
+# A publisher thread plays the Celery worker and publishes ServerMessages while the event loop
+# runs the delivery subscriber that writes them to a fake WebSocket through the
+# InterviewManager.handle_delivery path. The target is single-digit milliseconds at p95.
+
+import argparse
+import asyncio
+import threading
+import time
+
+from app.config.settings import settings
+from app.core.delivery import LocalDeliveryChannel, RedisDeliveryChannel
+from app.core.connection_registry import register_connection, unregister_connection
+from app.core.interview_manager import InterviewManager
+from app.core.state_store import InMemoryStateStore
+from app.utils import metrics
+
+
+class FakeWebSocket:
+    """Stands in for a connected client; counts received frames."""
+    def __init__(self):
+        self.received = 0
+
+    async def send_text(self, message: str):
+        self.received += 1
+
+
+async def run(channel, messages: int, sessions: int, interval: float):
+    manager = InterviewManager(
+        llm_service=None, mini_llm_service=None, storage_service=None, settings=settings,
+        state_store=InMemoryStateStore(), delivery_channel=channel
+    )
+    sockets = {f"bench-{i}": FakeWebSocket() for i in range(sessions)}
+    for interview_id, websocket in sockets.items():
+        register_connection(interview_id, websocket)
+
+    await channel.start(manager.handle_delivery)
+    await asyncio.sleep(0.5) # Let the subscriber connect
+
+    def publisher():
+        for n in range(messages):
+            interview_id = f"bench-{n % sessions}"
+            manager._publish(interview_id, "llm_response_delta", f"token {n} ")
+            if interval:
+                time.sleep(interval)
+
+    started_at = time.perf_counter()
+    thread = threading.Thread(target=publisher)
+    thread.start()
+    while sum(ws.received for ws in sockets.values()) < messages:
+        await asyncio.sleep(0.01)
+        if time.perf_counter() - started_at > 60:
+            print("Timed out waiting for deliveries.")
+            break
+    thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    await channel.stop()
+    for interview_id, websocket in sockets.items():
+        unregister_connection(interview_id, websocket)
+
+    delivered = sum(ws.received for ws in sockets.values())
+    print(f"Channel: {type(channel).__name__}")
+    print(f"Delivered {delivered}/{messages} messages to {sessions} sockets in {elapsed:.2f}s")
+    print(f"Delivery latency: {metrics.latency_summary('delivery')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure delivery channel latency.")
+    parser.add_argument("--redis", help="Redis URL; benchmarks the pub/sub channel instead of the local one")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.0005, help="Seconds between publishes (LLM token pacing)")
+    args = parser.parse_args()
+
+    channel = RedisDeliveryChannel(args.redis) if args.redis else LocalDeliveryChannel()
+    asyncio.run(run(channel, args.messages, args.sessions, args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# scripts/bench_document_parser.py - DocumentParser throughput on a generated PDF/DOCX corpus
+#
+# Usage (from the ai_interview_app directory; needs PyMuPDF and python-docx):
+#   python -m scripts.bench_document_parser [--pages 20 200 800] [--paragraphs 2000 20000] [--repeat 3] [--workers 4]
+#
+# Generates text-heavy PDFs and DOCX files in a temp directory and parses each one with:
+#   - legacy:     the previous implementation (page by page, `text +=`)
+#   - sequential: list-based assembly, no process pool, no character budget
+#   - parallel:   page ranges across the process pool (PDFs >= PARSER_PARALLEL_MIN_PAGES)
+#   - budget:     parallel + the PARSER_MAX_CHARS early exit
+# The parallel speedup depends on the cores available to this process (see "cpus" in the header).
+
+import os
+import tempfile
+os.environ.setdefault("OPENAI_API_KEY", "bench") # Settings require it; no LLM call is made
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import fitz
+from docx import Document
+
+from app.config.settings import settings
+from app.services.document_parser import DocumentParser, shutdown_page_pool
+
+LINE = "Experience with distributed systems, Python, FastAPI, Celery and Redis in production. "
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 45):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        text = "\n".join(f"{page_num}:{i} {LINE}" for i in range(lines_per_page))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=7)
+    doc.save(path)
+    doc.close()
+
+
+def make_docx(path: str, paragraphs: int):
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"{i} {LINE}")
+    doc.save(path)
+
+
+def legacy_parse(file_path: str) -> str:
+    """The parser as it was before page-range extraction (for comparison)."""
+    if file_path.endswith(".pdf"):
+        doc = fitz.open(file_path)
+        text = ""
+        for page_num in range(doc.page_count):
+            text += doc.load_page(page_num).get_text()
+        doc.close()
+        return text.strip()
+    doc = Document(file_path)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text.strip()
+
+
+def time_ms(fn: Callable[[], str], repeat: int):
+    samples, chars = [], 0
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        chars = len(fn())
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(samples), chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 200, 800])
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=settings.PARSER_MAX_WORKERS or os.cpu_count() or 1)
+    parser.add_argument("--max-chars", type=int, default=settings.PARSER_MAX_CHARS)
+    args = parser.parse_args()
+
+    corpus_dir = tempfile.mkdtemp(prefix="bench_document_parser_")
+    corpus: List[str] = []
+    for pages in args.pages:
+        path = os.path.join(corpus_dir, f"doc_{pages}p.pdf")
+        make_pdf(path, pages)
+        corpus.append(path)
+    for paragraphs in args.paragraphs:
+        path = os.path.join(corpus_dir, f"doc_{paragraphs}para.docx")
+        make_docx(path, paragraphs)
+        corpus.append(path)
+
+    unbounded = settings.model_copy(update={"PARSER_MAX_CHARS": 0, "PARSER_MAX_WORKERS": args.workers})
+    sequential = DocumentParser(unbounded.model_copy(update={"PARSER_MAX_WORKERS": 1}))
+    parallel = DocumentParser(unbounded)
+    budgeted = DocumentParser(unbounded.model_copy(update={"PARSER_MAX_CHARS": args.max_chars}))
+    modes: Dict[str, Callable[[str], str]] = {
+        "legacy": legacy_parse,
+        "sequential": sequential.parse_document,
+        "parallel": parallel.parse_document,
+        "budget": budgeted.parse_document,
+    }
+
+    # Start the pool before timing: its spawn cost is paid once per worker process, not per document
+    parallel.parse_document(corpus[0])
+
+    print(f"cpus={os.cpu_count()} workers={args.workers} parallel_min_pages={settings.PARSER_PARALLEL_MIN_PAGES} "
+          f"pages_per_task={settings.PARSER_PAGES_PER_TASK} max_chars={args.max_chars} repeat={args.repeat}")
+    print(f"{'document':<22}" + "".join(f"{mode:>14}" for mode in modes) + f"{'speedup':>10}{'budget chars':>14}")
+    try:
+        for path in corpus:
+            results = {mode: time_ms(lambda: fn(path), args.repeat) for mode, fn in modes.items()}
+            best = min(results[mode][0] for mode in ("sequential", "parallel"))
+            print(f"{os.path.basename(path):<22}"
+                  + "".join(f"{results[mode][0]:>11.1f} ms" for mode in modes)
+                  + f"{results['legacy'][0] / best:>9.2f}x"
+                  + f"{results['budget'][1]:>14}")
+    finally:
+        shutdown_page_pool()
+
+
+if __name__ == "__main__": # Required: pool processes are spawned and re-import this module
+    main()
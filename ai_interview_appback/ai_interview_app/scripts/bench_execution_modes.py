@@ -0,0 +1,150 @@
+# scripts/bench_execution_modes.py - Per-turn overhead of the Celery vs inline live execution modes
+#
+# Usage (from the ai_interview_app directory; celery mode needs a reachable Redis broker):
+#   python -m scripts.bench_execution_modes [--broker redis://localhost:6379/3] [--turns 50]
+#
+# Plays final utterances through InterviewManager.handle_user_input and times each turn until
+# the `llm_response` frame reaches a fake WebSocket, with the LLM replaced by a fixed-latency
+# fake so only the execution path differs:
+#   - inline: the handler runs as an asyncio task in this process (LIVE_EXECUTION_MODE=inline)
+#   - celery: .delay() -> broker -> in-process realtime worker -> delivery channel
+# The difference between the two is the broker overhead per turn (enqueue, worker pickup,
+# JSON round trip of the conversation history). The in-memory state store and local delivery
+# channel are used in both modes so no other process is involved.
+
+import os
+import tempfile
+# In-process backends, no journal files: set before the settings are loaded
+os.environ["STATE_STORE_BACKEND"] = "memory"
+os.environ["DELIVERY_BACKEND"] = "local"
+os.environ["JOURNAL_ENABLED"] = "false"
+os.environ["STORAGE_PATH"] = tempfile.mkdtemp(prefix="bench_execution_modes_")
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Dict
+
+from celery.contrib.testing.worker import start_worker
+
+from app.config.settings import settings
+from app.config.celery_config import WORKER_QUEUES
+from app.core.connection_registry import register_connection, unregister_connection
+from app.core.delivery import get_delivery_channel
+from app.core.interview_manager import InterviewManager
+from app.core.state_store import get_state_store
+from app.tasks.celery import celery_app
+from app.tasks.interview_tasks import InterviewProcessingTask
+from app.utils import metrics
+
+ANSWER = "I would shard the table by tenant and move the hot tenants to their own cluster."
+QUESTION = "How would you rebalance tenants when one of them outgrows its shard?"
+
+
+class FakeLLMService:
+    """Fixed-latency stand-in for LLMService (sync for Celery workers, async for inline)."""
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def process_final_utterance(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> str:
+        time.sleep(self.latency_seconds)
+        return QUESTION
+
+    async def aprocess_final_utterance(self, conversation_history: List[Dict[str, str]], full_utterance: str) -> str:
+        await asyncio.sleep(self.latency_seconds)
+        return QUESTION
+
+
+class FakeMiniLLMService:
+    """Stand-in for MiniLLMService (history summaries are triggered as the conversation grows)."""
+    def summarize_history(self, previous_summary: str, turns: list, max_words: int = 250) -> str:
+        return "Candidate discussed sharding."
+
+    async def asummarize_history(self, previous_summary: str, turns: list, max_words: int = 250) -> str:
+        return "Candidate discussed sharding."
+
+
+class FakeWebSocket:
+    """Signals each final `llm_response` frame."""
+    def __init__(self):
+        self.responses = asyncio.Queue()
+
+    async def send_text(self, message: str):
+        if json.loads(message)["type"] == "llm_response":
+            self.responses.put_nowait(time.perf_counter())
+
+
+async def run_turns(mode: str, manager: InterviewManager, turns: int, history_turns: int):
+    interview_id = await manager.start_interview("bench-jd", "bench-cv")
+    # Pre-fill the conversation so the history sent with each turn has a realistic size
+    def _prefill(state):
+        for n in range(history_turns):
+            manager.history_manager.record_turn(state, f"{ANSWER} ({n})", QUESTION)
+            state.append_transcript(f"{ANSWER} ({n})", QUESTION)
+    manager.store.update(interview_id, _prefill)
+    websocket = FakeWebSocket()
+    register_connection(interview_id, websocket)
+
+    for n in range(turns):
+        started_at = time.perf_counter()
+        await manager.handle_user_input(interview_id, "final", f"{ANSWER} [{n}]", True, time.time())
+        delivered_at = await asyncio.wait_for(websocket.responses.get(), timeout=30)
+        metrics.record_latency(f"{mode}_turn", delivered_at - started_at)
+
+    unregister_connection(interview_id, websocket)
+    await manager.end_interview(interview_id)
+
+
+async def run(args):
+    fake_llm = FakeLLMService(args.llm_seconds)
+    fake_mini_llm = FakeMiniLLMService()
+    channel = get_delivery_channel()
+    store = get_state_store()
+    modes = {
+        "inline": settings.model_copy(update={"LIVE_EXECUTION_MODE": "inline", "LLM_STREAMING_ENABLED": False}),
+        "celery": settings.model_copy(update={"LIVE_EXECUTION_MODE": "celery", "LLM_STREAMING_ENABLED": False}),
+    }
+    # The worker-side manager (InterviewProcessingTask.manager) reads the module settings
+    settings.LLM_STREAMING_ENABLED = False
+    InterviewProcessingTask._llm_service = fake_llm
+    InterviewProcessingTask._mini_llm_service = fake_mini_llm
+
+    managers = {
+        mode: InterviewManager(llm_service=fake_llm, mini_llm_service=fake_mini_llm, storage_service=None,
+                               settings=mode_settings, state_store=store, delivery_channel=channel)
+        for mode, mode_settings in modes.items()
+    }
+    await channel.start(managers["inline"].handle_delivery)
+
+    await run_turns("inline", managers["inline"], args.turns, args.history_turns)
+
+    celery_app.conf.update(broker_url=args.broker, result_backend=None, task_ignore_result=True, task_track_started=False)
+    celery_app.control.purge()
+    worker = start_worker(celery_app, concurrency=4, pool="threads", perform_ping_check=False,
+                          queues=WORKER_QUEUES["realtime"], hostname="bench-realtime@localhost", shutdown_timeout=10.0)
+    with worker:
+        await run_turns("celery", managers["celery"], args.turns, args.history_turns)
+
+    await channel.stop()
+
+    print(f"{args.turns} turns, {args.history_turns} turns of history, fake LLM latency {args.llm_seconds * 1000:.0f} ms")
+    inline, celery = metrics.latency_summary("inline_turn"), metrics.latency_summary("celery_turn")
+    print(f"inline turn latency: {inline}")
+    print(f"celery turn latency: {celery}")
+    print(f"broker overhead per turn: avg {celery['avg_ms'] - inline['avg_ms']:.2f} ms, "
+          f"p95 {celery['p95_ms'] - inline['p95_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-turn latency of the celery and inline execution modes.")
+    parser.add_argument("--broker", default=settings.CELERY_BROKER_URL)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--history-turns", type=int, default=20, help="Turns already in the conversation")
+    parser.add_argument("--llm-seconds", type=float, default=0.05, help="Fake LLM latency per final")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# scripts/bench_queue_latency.py - Final-response queue wait while a bulk document ingestion runs
+#
+# Usage (from the ai_interview_app directory, needs a reachable Redis broker):
+#   python -m scripts.bench_queue_latency [--broker redis://localhost:6379/3] [--documents 200]
+#
+# Runs the same load twice against in-process Celery workers:
+#   - "shared": everything on one FIFO queue consumed by one worker (the old layout)
+#   - "routed": the queues/routes from app/config/celery_config.py, with a realtime worker
+#               (realtime_final, realtime_draft) and a batch worker (ingestion, analysis)
+# A burst of document-ingestion tasks is enqueued first, then final-response tasks arrive at
+# interview pace. Reported is each final's queue wait (enqueue -> task start).
+# Each mode runs in its own child process (--mode shared|routed runs just one).
+# The stand-in tasks are registered under the real task names so the real routing applies;
+# they sleep instead of parsing/calling the LLM (both workers share this process and its GIL).
+
+import argparse
+import subprocess
+import sys
+import time
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+
+from app.config.settings import settings
+from app.config.celery_config import celery_config, WORKER_QUEUES
+from app.utils import metrics
+
+
+def make_app(broker: str, mode: str, parse_seconds: float, llm_seconds: float) -> Celery:
+    app = Celery(f"bench_queue_latency_{mode}", broker=broker)
+    app.conf.update(celery_config)
+    app.conf.update(broker_url=broker, result_backend=None, task_ignore_result=True, task_track_started=False)
+    if mode == "shared":
+        app.conf.update(task_queues=None, task_routes={}, task_default_queue="bench_shared")
+
+    @app.task(name="app.tasks.document_tasks.process_document")
+    def process_document(sent_at: float):
+        metrics.record_latency(f"{mode}_queue_wait_ingestion", time.time() - sent_at)
+        time.sleep(parse_seconds)
+
+    @app.task(name="app.tasks.interview_tasks.process_final_response_task")
+    def process_final_response_task(sent_at: float):
+        metrics.record_latency(f"{mode}_queue_wait_final", time.time() - sent_at)
+        time.sleep(llm_seconds)
+        metrics.increment(f"{mode}_finals_done")
+
+    @app.task(name="celery.ping")
+    def ping():
+        return "pong"
+
+    return app
+
+
+def run(mode: str, args):
+    app = make_app(args.broker, mode, args.parse_seconds, args.llm_seconds)
+    app.control.purge()
+    document_task = app.tasks["app.tasks.document_tasks.process_document"]
+    final_task = app.tasks["app.tasks.interview_tasks.process_final_response_task"]
+
+    if mode == "shared":
+        layouts = [("shared", ["bench_shared"], args.realtime_concurrency + args.batch_concurrency)]
+    else:
+        layouts = [
+            ("realtime", WORKER_QUEUES["realtime"], args.realtime_concurrency),
+            ("batch", WORKER_QUEUES["batch"], args.batch_concurrency),
+        ]
+    workers = [
+        start_worker(app, concurrency=concurrency, pool="threads", perform_ping_check=False,
+                     queues=queues, hostname=f"bench-{name}@localhost", shutdown_timeout=10.0)
+        for name, queues, concurrency in layouts
+    ]
+    for worker in workers:
+        worker.__enter__()
+    try:
+        started_at = time.perf_counter()
+        for _ in range(args.documents): # The recruiter's bulk upload
+            document_task.delay(time.time())
+        for _ in range(args.finals): # Candidates finishing their answers meanwhile
+            final_task.delay(time.time())
+            time.sleep(args.final_interval)
+        while metrics.get_counter(f"{mode}_finals_done") < args.finals:
+            time.sleep(0.05)
+            if time.perf_counter() - started_at > args.timeout:
+                print("Timed out waiting for the final responses.")
+                break
+        print(f"{mode:7} final queue wait:     {metrics.latency_summary(f'{mode}_queue_wait_final')}")
+        print(f"{mode:7} ingestion queue wait: {metrics.latency_summary(f'{mode}_queue_wait_ingestion')}")
+    finally:
+        app.control.purge() # Don't wait for the rest of the ingestion backlog
+        for worker in reversed(workers):
+            try:
+                worker.__exit__(None, None, None)
+            except RuntimeError as e:
+                print(f"Worker shutdown: {e}") # Results are already printed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure final-response queue latency during bulk ingestion.")
+    parser.add_argument("--broker", default=settings.CELERY_BROKER_URL)
+    parser.add_argument("--documents", type=int, default=200, help="Ingestion tasks in the bulk upload")
+    parser.add_argument("--parse-seconds", type=float, default=0.25, help="Simulated parse time per document")
+    parser.add_argument("--finals", type=int, default=40)
+    parser.add_argument("--final-interval", type=float, default=0.1, help="Seconds between final-response tasks")
+    parser.add_argument("--llm-seconds", type=float, default=0.05, help="Simulated LLM time per final")
+    parser.add_argument("--realtime-concurrency", type=int, default=2)
+    parser.add_argument("--batch-concurrency", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--mode", choices=("shared", "routed", "both"), default="both")
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        run(args.mode, args)
+        return
+    print(f"{args.documents} documents x {args.parse_seconds}s, {args.finals} finals every {args.final_interval}s")
+    # One process per mode: each gets fresh workers and broker connections
+    for mode in ("shared", "routed"):
+        subprocess.run([sys.executable, "-m", "scripts.bench_queue_latency", *sys.argv[1:], "--mode", mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
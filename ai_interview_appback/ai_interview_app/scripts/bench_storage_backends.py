@@ -0,0 +1,140 @@
+# scripts/bench_storage_backends.py - Filesystem vs SQLite storage backend at scale
+#
+# Usage (from the ai_interview_app directory):
+#   python -m scripts.bench_storage_backends [--items 1000000] [--backends filesystem,sqlite]
+#                                            [--filesystem-items 100000] [--batch 1000] [--reads 2000]
+#                                            [--dir /tmp/bench_storage]
+#
+# Stores --items items split over documents, analyses and interview states (realistic small
+# payloads, one JD per 1000 interviews), then measures:
+#   - insert rate (put_many in --batch transactions; the filesystem backend writes file by file)
+#   - point reads: p50/p99 of random gets
+#   - "all interviews for a JD" and "resume analyses created in the last hour" queries
+#   - size on disk
+# One file per item makes 1M items slow to create and to delete, so the filesystem backend runs
+# with --filesystem-items (0 = same as --items); the query times scale linearly with the count.
+
+import os
+os.environ.setdefault("OPENAI_API_KEY", "bench") # Settings require it; no LLM call is made
+
+import argparse
+import json
+import random
+import shutil
+import time
+from typing import Dict, List
+
+from app.services.storage_backends import FileSystemBackend, SQLiteBackend, StorageBackend
+
+_JD_EVERY = 1000 # Interviews per job description
+
+
+def _document(n: int) -> bytes:
+    return (f"Candidate {n}\nExperience: {n % 15} years of Python, FastAPI and Redis.\n" * 4).encode("utf-8")
+
+
+def _analysis(n: int, created_at: float) -> bytes:
+    return json.dumps({
+        "technical_skills": ["python", "fastapi", "redis", f"skill_{n % 97}"],
+        "summary": f"Analysis {n}: backend engineer with {n % 15} years of experience.",
+        "__metadata__": {"document_type": "resume" if n % 2 else "job_description", "analyzed_at": created_at},
+    }).encode("utf-8")
+
+
+def _snapshot(n: int) -> bytes:
+    return json.dumps({
+        "last_seq": n % 50, "ended": n % 3 == 0, "saved_at": time.time(),
+        "state": {"interview_id": f"int_{n}", "job_description_id": f"jd_{n // _JD_EVERY}", "resume_id": f"res_{n}",
+                  "status": "active", "transcript_length": n % 40},
+    }, separators=(",", ":")).encode("utf-8")
+
+
+_KINDS = {"documents": _document, "analysis_results": None, "interview_states": _snapshot}
+
+
+def _disk_bytes(path: str) -> int:
+    if os.path.isfile(path):
+        return sum(os.path.getsize(p) for p in (path, path + "-wal", path + "-shm") if os.path.exists(p))
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for name in file_names:
+            total += os.stat(os.path.join(dir_path, name)).st_blocks * 512 # Allocated, not apparent size
+    return total
+
+
+def _ms(values: List[float], quantile: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * quantile))] * 1000
+
+
+def run(backend: StorageBackend, items: int, batch: int, reads: int) -> Dict[str, float]:
+    per_kind = items // len(_KINDS)
+    now = time.time()
+    started_at = time.perf_counter()
+    for kind in _KINDS:
+        for start in range(0, per_kind, batch):
+            rows = []
+            for n in range(start, min(per_kind, start + batch)):
+                data = _analysis(n, now) if kind == "analysis_results" else _KINDS[kind](n)
+                rows.append((f"{kind[:3]}_{n}", data, None))
+            backend.put_many(kind, rows)
+    insert_s = time.perf_counter() - started_at
+
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(reads):
+        kind = rng.choice(list(_KINDS))
+        item_id = f"{kind[:3]}_{rng.randrange(per_kind)}"
+        t0 = time.perf_counter()
+        assert backend.get(kind, item_id) is not None
+        latencies.append(time.perf_counter() - t0)
+
+    jd = f"jd_{(per_kind // _JD_EVERY) // 2}"
+    t0 = time.perf_counter()
+    jd_interviews = backend.query("interview_states", job_description_id=jd)
+    jd_query_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    recent = backend.query("analysis_results", created_after=time.time() - 3600, document_type="resume")
+    recent_query_s = time.perf_counter() - t0
+
+    return {
+        "items": per_kind * len(_KINDS), "insert_s": insert_s, "inserts_per_s": per_kind * len(_KINDS) / insert_s,
+        "read_p50_ms": _ms(latencies, 0.5), "read_p99_ms": _ms(latencies, 0.99),
+        "jd_query_ms": jd_query_s * 1000, "jd_matches": len(jd_interviews),
+        "recent_query_ms": recent_query_s * 1000, "recent_matches": len(recent),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filesystem vs SQLite storage backend at scale.")
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--filesystem-items", type=int, default=100_000)
+    parser.add_argument("--backends", default="filesystem,sqlite")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--dir", default="/tmp/bench_storage")
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'items':>10}{'insert/s':>11}{'read p50':>11}{'read p99':>11}{'JD query (hits)':>18}{'recent query (hits)':>20}{'disk':>10}")
+    for name in args.backends.split(","):
+        path = os.path.join(args.dir, name)
+        shutil.rmtree(path, ignore_errors=True)
+        if name == "filesystem":
+            backend, items, size_path = FileSystemBackend(path), args.filesystem_items or args.items, path
+        else:
+            os.makedirs(path)
+            size_path = os.path.join(path, "storage.sqlite3")
+            backend, items = SQLiteBackend(size_path), args.items
+        try:
+            r = run(backend, items, args.batch, args.reads)
+            jd_query = f"{r['jd_query_ms']:.1f}ms ({r['jd_matches']})"
+            recent_query = f"{r['recent_query_ms']:.0f}ms ({r['recent_matches']})"
+            print(f"{name:<12}{r['items']:>10}{r['inserts_per_s']:>11.0f}{r['read_p50_ms']:>9.3f}ms{r['read_p99_ms']:>9.3f}ms"
+                  f"{jd_query:>18}{recent_query:>20}{_disk_bytes(size_path) / 1e6:>8.0f}MB")
+        finally:
+            backend.close()
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
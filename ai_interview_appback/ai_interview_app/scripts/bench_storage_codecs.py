@@ -0,0 +1,179 @@
+# scripts/bench_storage_codecs.py - Stored size and load time of analyses and interview snapshots per codec
+#
+# Usage (from the ai_interview_app directory):
+#   python -m scripts.bench_storage_codecs [--storage-path /app/data] [--samples 200] [--loads 5] [--cold]
+#
+# With --storage-path, the analysis results, interview plans and interview snapshots found there
+# (filesystem backend layout) are used as they are: point it at a copy of production data for
+# real numbers. Without it, --samples analyses and snapshots are generated in the shape the LLM
+# prompts and InterviewState produce (resume/JD analyses, 20-40 turn interviews).
+#
+# For every codec, all values are encoded, written to one file each (so reads go through the
+# page cache like real loads) and loaded back --loads times through decode_json (best run
+# reported). --cold evicts the files from the page cache before every pass, so each load
+# reads the disk as it does for items nobody touched recently. The baseline is what
+# StorageService wrote before codecs: json.dumps(indent=4) for analyses and plans.
+
+import os
+os.environ.setdefault("OPENAI_API_KEY", "bench") # Settings require it; no LLM call is made
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.interview_state import ConversationTurn, InterviewState
+from app.core.journal import make_snapshot
+from app.services.storage_backends import FileSystemBackend
+from app.services.storage_codecs import StorageCodec, decode_json, msgpack, zstandard
+
+_WORDS = ("python fastapi redis celery docker kubernetes postgres kafka aws terraform designed built led migrated "
+          "reduced latency throughput team customers platform service pipeline reliability scaled improved "
+          "launched owned mentored engineers production incidents on-call architecture api realtime").split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _resume_analysis(rng: random.Random, n: int) -> Dict[str, Any]:
+    return {
+        "summary": " ".join(_sentence(rng, 18) for _ in range(3)),
+        "work_experience": [
+            {"company": f"Company {rng.randrange(500)}", "title": rng.choice(["Backend Engineer", "Senior Engineer", "Tech Lead"]),
+             "dates": f"{2010 + i} - {2012 + i}", "key_achievements": [_sentence(rng, 14) for _ in range(rng.randint(2, 5))]}
+            for i in range(rng.randint(2, 6))
+        ],
+        "education": [{"degree": "B.Tech Computer Science", "institution": f"University {rng.randrange(50)}", "year": 2010}],
+        "skills": {"technical": rng.sample(_WORDS, 12), "soft": ["communication", "ownership", "mentoring"]},
+        "relevant_projects": [{"name": f"Project {i}", "description": _sentence(rng, 25)} for i in range(rng.randint(1, 4))],
+        "__metadata__": {"doc_id": f"res_{n}", "document_type": "resume"},
+    }
+
+
+def _jd_analysis(rng: random.Random, n: int) -> Dict[str, Any]:
+    return {
+        "summary": " ".join(_sentence(rng, 18) for _ in range(2)),
+        "required_skills": rng.sample(_WORDS, 10), "desired_skills": rng.sample(_WORDS, 6),
+        "qualifications": [_sentence(rng, 10) for _ in range(4)],
+        "responsibilities": [_sentence(rng, 16) for _ in range(rng.randint(5, 10))],
+        "company_industry": "Software", "location": "Remote", "role_level": "Senior",
+        "__metadata__": {"doc_id": f"jd_{n}", "document_type": "job_description"},
+    }
+
+
+def _snapshot(rng: random.Random, n: int) -> Dict[str, Any]:
+    state = InterviewState(id=f"int_{n}", job_description_id=f"jd_{n}", resume_id=f"res_{n}",
+                           interview_plan={"focus_areas": rng.sample(_WORDS, 6), "opening_question": _sentence(rng, 15)})
+    for _ in range(rng.randint(20, 40)):
+        user, assistant = " ".join(_sentence(rng, 20) for _ in range(rng.randint(2, 6))), _sentence(rng, 22)
+        state.append_transcript(user, assistant)
+        state.conversation_history.append(ConversationTurn(user, assistant, (len(user) + len(assistant)) // 4))
+    state.history_summary = " ".join(_sentence(rng, 20) for _ in range(5))
+    return make_snapshot(state, ended=True)
+
+
+def load_samples(storage_path: str, samples: int) -> List[Tuple[str, Any]]:
+    """(kind, value) pairs: from an existing storage directory, or generated."""
+    if storage_path:
+        backend = FileSystemBackend(storage_path)
+        values = []
+        for kind in ("analysis_results", "interview_plans", "interview_states"):
+            for data in backend.get_all(kind).values():
+                values.append((kind, decode_json(data)))
+        return values
+    rng = random.Random(11)
+    values = []
+    for n in range(samples):
+        values.append(("analysis_results", _resume_analysis(rng, n) if n % 2 else _jd_analysis(rng, n)))
+        values.append(("interview_states", _snapshot(rng, n)))
+    return values
+
+
+def _baseline(kind: str, value: Any) -> bytes:
+    if kind == "interview_states":
+        return json.dumps(value, separators=(",", ":")).encode("utf-8") # Snapshots were already compact
+    return json.dumps(value, indent=4).encode("utf-8")
+
+
+def _evict(paths: List[str]):
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def measure(name: str, encode: Callable[[str, Any], bytes], values: List[Tuple[str, Any]], loads: int,
+            work_dir: str, cold: bool) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for kind in sorted({kind for kind, _ in values}):
+        of_kind = [value for k, value in values if k == kind]
+        t0 = time.perf_counter()
+        encoded = [encode(kind, value) for value in of_kind]
+        encode_s = time.perf_counter() - t0
+        paths = []
+        for i, data in enumerate(encoded):
+            path = os.path.join(work_dir, f"{name}_{kind}_{i}")
+            with open(path, "wb") as f:
+                f.write(data)
+                if cold:
+                    os.fsync(f.fileno()) # Dirty pages can't be evicted
+            paths.append(path)
+        best = float("inf")
+        for _ in range(loads):
+            if cold:
+                _evict(paths)
+            t0 = time.perf_counter()
+            for path in paths:
+                with open(path, "rb") as f:
+                    decode_json(f.read())
+            best = min(best, time.perf_counter() - t0)
+        results[kind] = {"count": len(of_kind), "bytes": sum(len(data) for data in encoded),
+                         "encode_ms": encode_s * 1000 / len(of_kind), "load_ms": best * 1000 / len(of_kind)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stored size and load time per storage codec.")
+    parser.add_argument("--storage-path", default="", help="Existing storage directory to take values from")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--loads", type=int, default=5)
+    parser.add_argument("--level", type=int, default=3)
+    parser.add_argument("--cold", action="store_true", help="Read from disk, not the page cache")
+    args = parser.parse_args()
+
+    values = load_samples(args.storage_path, args.samples)
+    if not values:
+        raise SystemExit(f"No analyses or snapshots found under {args.storage_path}.")
+
+    codecs: List[Tuple[str, Callable[[str, Any], bytes]]] = [("indent=4 json (old)", _baseline)]
+    configs = [("json", "none"), ("json", "gzip")]
+    if zstandard is not None:
+        configs.append(("json", "zstd"))
+    if msgpack is not None:
+        configs += [("msgpack", "none")] + ([("msgpack", "zstd")] if zstandard is not None else [("msgpack", "gzip")])
+    for encoding, compression in configs:
+        codec = StorageCodec(encoding=encoding, compression=compression, level=args.level)
+        codecs.append((f"{encoding}+{compression}", lambda kind, value, codec=codec: codec.encode_json(value)))
+
+    work_dir = tempfile.mkdtemp(prefix="bench_storage_codecs_")
+    try:
+        baseline = measure("baseline", _baseline, values, args.loads, work_dir, args.cold)
+        print(f"{'codec':<22}{'kind':<18}{'items':>6}{'avg size':>10}{'vs old':>8}{'encode':>10}{'load':>10}{'vs old':>8}")
+        for name, encode in codecs:
+            results = baseline if encode is _baseline else measure(name.replace("+", "_").replace(" ", "_"), encode, values, args.loads, work_dir, args.cold)
+            for kind, r in results.items():
+                base = baseline[kind]
+                print(f"{name:<22}{kind:<18}{r['count']:>6}{r['bytes'] / r['count'] / 1024:>8.1f}KB{r['bytes'] / base['bytes']:>7.0%}"
+                      f"{r['encode_ms']:>8.3f}ms{r['load_ms']:>8.3f}ms{r['load_ms'] / base['load_ms']:>7.0%}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
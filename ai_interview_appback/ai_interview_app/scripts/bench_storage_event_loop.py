@@ -0,0 +1,108 @@
+# scripts/bench_storage_event_loop.py - Event-loop stalls caused by StorageService reads, sync vs async API
+#
+# Usage (from the ai_interview_app directory):
+#   python -m scripts.bench_storage_event_loop [--readers 20] [--reads 10] [--disk-latency-ms 20] [--result-kb 200]
+#
+# `readers` coroutines each load `reads` analysis results (what start_interview / the document
+# endpoints do) while a heartbeat coroutine wakes every millisecond and records how late it was
+# woken. That lateness is the time every WebSocket on the worker would have been stuck.
+#   - sync:  storage.load_analysis_result(...) called on the event loop (the old behaviour)
+#   - async: await storage.aload_analysis_result(...) (storage I/O pool)
+# --disk-latency-ms adds a blocking sleep to every read to stand in for a slow or network disk;
+# --result-kb sets the size of the stored JSON, so parsing cost is real.
+
+import os
+import tempfile
+os.environ.setdefault("OPENAI_API_KEY", "bench") # Settings require it; no LLM call is made
+os.environ["STORAGE_PATH"] = tempfile.mkdtemp(prefix="bench_storage_event_loop_")
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from app.config.settings import settings
+from app.services.storage_service import StorageService, shutdown_io_executor
+
+
+class SlowDiskStorageService(StorageService):
+    """StorageService whose reads block for a fixed time first, like a slow disk would."""
+    def __init__(self, base_path: str, disk_latency_seconds: float):
+        super().__init__(base_path)
+        self.disk_latency_seconds = disk_latency_seconds
+
+    def load_analysis_result(self, analysis_id: str):
+        time.sleep(self.disk_latency_seconds)
+        return super().load_analysis_result(analysis_id)
+
+
+async def heartbeat(lateness: List[float], stop: asyncio.Event, interval: float = 0.001):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lateness.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_mode(storage: StorageService, mode: str, readers: int, reads: int, ids: List[str]) -> Dict[str, float]:
+    lateness: List[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lateness, stop))
+    await asyncio.sleep(0.05) # Baseline beats before the load starts
+
+    async def reader(n: int):
+        for i in range(reads):
+            analysis_id = ids[(n + i) % len(ids)]
+            if mode == "sync":
+                storage.load_analysis_result(analysis_id)
+                await asyncio.sleep(0) # A real handler awaits something between reads
+            else:
+                await storage.aload_analysis_result(analysis_id)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(reader(n) for n in range(readers)))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await beat
+
+    lateness_ms = sorted(value * 1000 for value in lateness)
+    return {
+        "elapsed_s": elapsed,
+        "reads_per_s": readers * reads / elapsed,
+        "max_stall_ms": lateness_ms[-1],
+        "p99_stall_ms": lateness_ms[int(len(lateness_ms) * 0.99) - 1],
+        "median_stall_ms": statistics.median(lateness_ms),
+        "stalled_over_10ms_s": sum(value for value in lateness_ms if value > 10) / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=10)
+    parser.add_argument("--disk-latency-ms", type=float, default=20.0)
+    parser.add_argument("--result-kb", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=20)
+    args = parser.parse_args()
+
+    storage = SlowDiskStorageService(settings.STORAGE_PATH, args.disk_latency_ms / 1000)
+    # An analysis result of roughly --result-kb of JSON
+    items = [{"skill": f"skill_{i}", "evidence": "x" * 80} for i in range(max(1, args.result_kb * 1024 // 110))]
+    ids = [f"doc_{n}" for n in range(args.documents)]
+    for analysis_id in ids:
+        storage.save_analysis_result(analysis_id, {"technical_skills": items, "summary": "bench"})
+
+    print(f"readers={args.readers} reads={args.reads} disk_latency={args.disk_latency_ms}ms "
+          f"result={args.result_kb}KB io_threads={settings.STORAGE_IO_THREADS}")
+    print(f"{'mode':<8}{'elapsed':>10}{'reads/s':>10}{'max stall':>12}{'p99 stall':>12}{'median':>10}{'stalled>10ms':>14}")
+    try:
+        for mode in ("sync", "async"):
+            r = asyncio.run(run_mode(storage, mode, args.readers, args.reads, ids))
+            print(f"{mode:<8}{r['elapsed_s']:>9.2f}s{r['reads_per_s']:>10.1f}{r['max_stall_ms']:>10.1f}ms"
+                  f"{r['p99_stall_ms']:>10.1f}ms{r['median_stall_ms']:>8.2f}ms{r['stalled_over_10ms_s']:>13.2f}s")
+    finally:
+        shutdown_io_executor()
+
+
+if __name__ == "__main__":
+    main()
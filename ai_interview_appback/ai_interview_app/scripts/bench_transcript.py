@@ -0,0 +1,111 @@
+# scripts/bench_transcript.py - Memory/latency of the transcript and chunk buffer over long sessions
+#
+# Usage (from the ai_interview_app directory):
+#   python -m scripts.bench_transcript [--turns 1000] [--chunks 12]
+#
+# Replays a session of N turns (each made of several chunks, a final chunk and a committed
+# turn) through:
+#   - "legacy":   the previous representation (str += for transcript/buffer, dict turns)
+#   - "segments": the current InterviewState (segment lists, cached joins, ConversationTurn)
+# and reports wall time, the slowest single turn, tracemalloc peak/retained memory and the
+# cost of dumping the state once per turn (what a persistent store pays).
+
+import argparse
+import time
+import tracemalloc
+from typing import List, Dict, Any
+
+from pydantic import BaseModel, Field
+
+from app.core.interview_state import InterviewState
+from app.core.history_manager import ConversationHistoryManager
+
+ANSWER = "I led the migration of our billing service to an event driven architecture and cut latency in half. "
+QUESTION = "That is interesting. How did you handle backwards compatibility with existing consumers during the rollout? "
+
+
+class LegacyInterviewState(BaseModel):
+    """The previous layout: strings grown with += and dict turns."""
+    id: str
+    transcript: str = ""
+    conversation_history: List[Dict[str, Any]] = Field([])
+    current_chunk_buffer: str = ""
+
+    def add_chunk(self, chunk_text: str, is_final: bool):
+        self.current_chunk_buffer += chunk_text + (" " if not is_final else "")
+
+    def clear_chunk_buffer(self):
+        self.current_chunk_buffer = ""
+
+
+def run_legacy(turns: int, chunks: int, dump: bool):
+    state = LegacyInterviewState(id="legacy")
+    words = ANSWER.split()
+    slowest = 0.0
+    for _ in range(turns):
+        started_at = time.perf_counter()
+        for i in range(chunks):
+            state.add_chunk(words[i % len(words)], False)
+            _ = state.current_chunk_buffer # Read per chunk (coalescer/draft context)
+        state.add_chunk("done.", True)
+        utterance = state.current_chunk_buffer
+        state.clear_chunk_buffer()
+        state.conversation_history.append({"user": utterance, "assistant": QUESTION, "tokens": 40})
+        state.transcript += f"User: {utterance}\nAI: {QUESTION}\n"
+        if dump:
+            state.model_dump_json()
+        slowest = max(slowest, time.perf_counter() - started_at)
+    return state, slowest
+
+
+def run_segments(turns: int, chunks: int, dump: bool):
+    state = InterviewState(id="segments", job_description_id="jd", resume_id="cv")
+    history = ConversationHistoryManager(verbatim_turns=6, max_prompt_tokens=3000, summary_batch_turns=4)
+    words = ANSWER.split()
+    slowest = 0.0
+    for _ in range(turns):
+        started_at = time.perf_counter()
+        for i in range(chunks):
+            state.add_chunk(words[i % len(words)], False, 0.0)
+            _ = state.current_chunk_buffer
+        state.add_chunk("done.", True, 0.0)
+        utterance = state.current_chunk_buffer
+        state.clear_chunk_buffer()
+        history.record_turn(state, utterance, QUESTION)
+        state.append_transcript(utterance, QUESTION)
+        if dump:
+            state.model_dump_json()
+        slowest = max(slowest, time.perf_counter() - started_at)
+    _ = state.transcript # Render once at the end (e.g. post-interview analysis)
+    return state, slowest
+
+
+def measure(name: str, runner, turns: int, chunks: int, dump: bool):
+    # Timing and memory come from separate runs: tracemalloc slows allocation-heavy code down
+    started_at = time.perf_counter()
+    state, slowest = runner(turns, chunks, dump)
+    elapsed = time.perf_counter() - started_at
+    tracemalloc.start()
+    kept_state = runner(turns, chunks, dump) # Keep it alive so "retained" is the session's footprint
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept_state
+    label = f"{name} ({'with' if dump else 'without'} per-turn dump)"
+    print(f"{label:38} total {elapsed * 1000:9.1f} ms | slowest turn {slowest * 1000:7.3f} ms | "
+          f"peak {peak / 1024:8.0f} KiB | retained {retained / 1024:8.0f} KiB | transcript {len(state.transcript)} chars")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript/chunk buffer representations.")
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=12, help="Incremental chunks per turn")
+    args = parser.parse_args()
+
+    print(f"{args.turns} turns x {args.chunks} chunks")
+    for dump in (False, True):
+        measure("legacy", run_legacy, args.turns, args.chunks, dump)
+        measure("segments", run_segments, args.turns, args.chunks, dump)
+
+
+if __name__ == "__main__":
+    main()
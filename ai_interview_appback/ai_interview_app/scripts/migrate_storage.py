@@ -0,0 +1,114 @@
+# scripts/migrate_storage.py - Copies stored data between storage backends (filesystem <-> SQLite)
+#
+# Usage (from the ai_interview_app directory):
+#   python -m scripts.migrate_storage --to sqlite [--storage-path /app/data] [--sqlite-path /app/data/storage.sqlite3]
+#                                     [--batch-size 1000] [--verify]
+#   python -m scripts.migrate_storage --to filesystem --sqlite-path old.sqlite3 --storage-path /app/data
+#
+# Every kind of item (documents, analyses, interview states and plans, content index, batches)
+# and every interview journal is copied in batches of --batch-size (one transaction each on
+# SQLite). Locks are not copied: they only mean something to running workers. Raw uploads stay
+# where they are; the content index keeps pointing at them. Existing items in the target are
+# overwritten, so an interrupted migration can simply be re-run.
+# Stop the API and workers first, then set STORAGE_BACKEND (and STORAGE_SQLITE_PATH) to the target.
+
+import os
+os.environ.setdefault("OPENAI_API_KEY", "migrate") # Settings require it; no LLM call is made
+
+import argparse
+import json
+import sys
+import time
+from typing import Iterator, List, Tuple
+
+from app.config.settings import settings
+from app.services.storage_backends import FileSystemBackend, SQLiteBackend, StorageBackend
+
+_SKIPPED_KINDS = {"locks"}
+
+
+def _batches(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def migrate(source: StorageBackend, target: StorageBackend, batch_size: int) -> Tuple[int, int]:
+    """Copies every item and journal from source to target. Returns (items, journal entries)."""
+    copied_items = copied_entries = 0
+    for kind in source.list_kinds():
+        if kind in _SKIPPED_KINDS:
+            continue
+        ids = source.list_ids(kind)
+        for chunk in _batches(ids, batch_size):
+            rows = []
+            for item_id in chunk:
+                data = source.get(kind, item_id)
+                if data is not None: # Deleted since it was listed
+                    rows.append((item_id, data, None)) # Index fields are derived from the data
+            copied_items += target.put_many(kind, rows)
+        print(f"  {kind}: {len(ids)} items")
+
+    journals = source.list_journals()
+    for interview_id in journals:
+        rows = []
+        for line in source.load_journal(interview_id):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f"  Skipping corrupt journal line for {interview_id}.")
+                continue
+            rows.append((entry["seq"], entry.get("kind", ""), line))
+        target.delete_journal(interview_id) # Re-runs must not append the same entries twice
+        if rows:
+            target.append_journal(interview_id, rows)
+        copied_entries += len(rows)
+    print(f"  interview journals: {len(journals)} journals, {copied_entries} entries")
+    return copied_items, copied_entries
+
+
+def verify(source: StorageBackend, target: StorageBackend) -> List[str]:
+    """Compares source and target item by item. Returns the mismatches found."""
+    problems = []
+    for kind in source.list_kinds():
+        if kind in _SKIPPED_KINDS:
+            continue
+        for item_id in source.list_ids(kind):
+            if source.get(kind, item_id) != target.get(kind, item_id):
+                problems.append(f"{kind}/{item_id}")
+    for interview_id in source.list_journals():
+        if sorted(source.load_journal(interview_id)) != sorted(target.load_journal(interview_id)):
+            problems.append(f"journal {interview_id}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copies stored data between storage backends.")
+    parser.add_argument("--to", choices=("sqlite", "filesystem"), required=True, help="Target backend")
+    parser.add_argument("--storage-path", default=settings.STORAGE_PATH, help="Storage directory (STORAGE_PATH)")
+    parser.add_argument("--sqlite-path", default=settings.STORAGE_SQLITE_PATH, help="Database file (default: <storage path>/storage.sqlite3)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--verify", action="store_true", help="Compare every item after copying")
+    args = parser.parse_args()
+
+    files = FileSystemBackend(args.storage_path, fsync_mode=settings.STORAGE_FSYNC)
+    database = SQLiteBackend(args.sqlite_path or os.path.join(args.storage_path, "storage.sqlite3"),
+                             busy_timeout_seconds=settings.STORAGE_SQLITE_BUSY_TIMEOUT_SECONDS,
+                             fsync_mode=settings.STORAGE_FSYNC)
+    source, target = (files, database) if args.to == "sqlite" else (database, files)
+
+    print(f"Migrating {source.name} -> {target.name} (storage path: {args.storage_path}, database: {database.db_path})")
+    started_at = time.perf_counter()
+    items, entries = migrate(source, target, args.batch_size)
+    print(f"Copied {items} items and {entries} journal entries in {time.perf_counter() - started_at:.1f}s")
+
+    if args.verify:
+        problems = verify(source, target)
+        if problems:
+            print(f"Verification failed for {len(problems)} items, e.g. {problems[:10]}")
+            sys.exit(1)
+        print("Verification passed.")
+    print(f"Now set STORAGE_BACKEND={target.name}" + (f" and STORAGE_SQLITE_PATH={database.db_path}" if target is database else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,14 +17,30 @@ if [ -f .env ]; then
     export $(grep -v '^#' .env | xargs)
 fi
 
-echo "Starting Celery worker..."
+# Worker role: "realtime" (live interview queues), "batch" (ingestion/analysis) or "all"
+# (every queue in one worker, for local development). Queues are defined in
+# app/config/celery_config.py.
+ROLE=${1:-all}
+
+echo "Starting Celery worker ($ROLE)..."
 # Run the Celery worker
 # -A specifies the Celery application instance (module:app)
 # worker specifies the worker command
 # -l info sets logging level to info
-# -P solo runs using the solo execution pool (good for dev, simple async tasks).
-#    For production, consider gevent or prefork. gevent is needed for async tasks like websockets.
+# -Q lists the queues to consume; with Redis they are drained in this order (realtime_final first)
+# -P selects the pool: threads for I/O bound LLM calls and for document ingestion (large PDFs
+#    are parsed in the parser's own process pool, which prefork children, being daemonic,
+#    can't start), solo for simple local development.
 # --uid nobody --gid nobody # Optional: run as a non-root user
 
-celery -A app.tasks.celery worker -l info -P solo
-# For async tasks (needed for WS push from tasks): celery -A app.tasks.celery worker -l info -P gevent -c 1000 # Example gevent pool with 1000 concurrency
\ No newline at end of file
+case "$ROLE" in
+    realtime)
+        celery -A app.tasks.celery worker -l info -n realtime@%h -Q realtime_final,realtime_draft -P threads -c 16 -O fair
+        ;;
+    batch)
+        celery -A app.tasks.celery worker -l info -n batch@%h -Q ingestion,analysis,default -P threads -c 2 -O fair
+        ;;
+    *)
+        celery -A app.tasks.celery worker -l info -Q realtime_final,realtime_draft,ingestion,analysis,default -P solo
+        ;;
+esac
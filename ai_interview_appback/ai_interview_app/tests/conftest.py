@@ -0,0 +1,23 @@
+# tests/conftest.py - Shared test setup
+#
+# Run from the ai_interview_app directory: python -m pytest -q
+
+import os
+
+# Settings require an API key at import time; no test talks to the LLM API
+os.environ.setdefault("OPENAI_API_KEY", "test")
+# Keep the shipped .env (Docker Compose layout: Redis backends, /app/data) out of the tests
+os.environ.setdefault("STATE_STORE_BACKEND", "memory")
+os.environ.setdefault("DELIVERY_BACKEND", "local")
+os.environ.setdefault("LIVE_EXECUTION_MODE", "inline")
+os.environ.setdefault("STORAGE_PATH", "/tmp/ai_interview_app_tests")
+
+import pytest
+
+from app.core import history_manager
+
+
+@pytest.fixture(autouse=True)
+def estimated_token_counts(monkeypatch):
+    """Count tokens with the ~4 chars/token estimate: budgets in tests don't depend on whether tiktoken and its encoding are available."""
+    monkeypatch.setattr(history_manager, "tiktoken", None)
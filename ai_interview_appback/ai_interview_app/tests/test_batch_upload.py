@@ -0,0 +1,67 @@
+# tests/test_batch_upload.py - ZIP expansion limits and failure cleanup of the batch upload endpoint
+
+import asyncio
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+
+from app.api.v1.endpoints import documents
+from app.api.v1.endpoints.documents import _extract_zip_members
+from app.config.settings import Settings
+
+
+def make_zip(tmp_path, members) -> str:
+    zip_path = os.path.join(str(tmp_path), "batch.zip")
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return zip_path
+
+
+def extract(tmp_path, zip_path, **overrides):
+    upload_dir = os.path.join(str(tmp_path), "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    settings = Settings(OPENAI_API_KEY="test", **overrides)
+    saved, rejected = _extract_zip_members(zip_path, upload_dir, "resume", settings, max_members=100)
+    return saved, rejected, sorted(os.listdir(upload_dir))
+
+
+def test_archive_stops_at_entry_limit_counting_skipped_entries(tmp_path):
+    zip_path = make_zip(tmp_path, [("notes.md", b"x"), ("a.txt", b"a"), ("b.txt", b"b"), ("c.txt", b"c")])
+    saved, rejected, files = extract(tmp_path, zip_path, BATCH_MAX_ARCHIVE_ENTRIES=3)
+    assert [name for name, _ in saved] == ["a.txt", "b.txt"]
+    assert [r["filename"] for r in rejected] == ["notes.md", "c.txt"]
+    assert "entries" in rejected[-1]["reason"]
+    assert len(files) == 2
+
+
+def test_archive_stops_extracting_once_total_bytes_are_spent(tmp_path):
+    zip_path = make_zip(tmp_path, [("a.txt", b"a" * 600), ("b.txt", b"b" * 600), ("c.txt", b"c" * 10)])
+    saved, rejected, files = extract(tmp_path, zip_path, BATCH_MAX_EXTRACTED_BYTES=1000, UPLOAD_CHUNK_BYTES=100)
+    assert [name for name, _ in saved] == ["a.txt"]
+    # b.txt overruns the budget; c.txt would fit but nothing more is expanded after that
+    assert [r["filename"] for r in rejected] == ["b.txt", "c.txt"]
+    assert all("expands to more than 1000 bytes" in r["reason"] for r in rejected)
+    assert len(files) == 1 # No partial file is left behind
+
+
+def test_failed_batch_request_removes_files_already_saved(tmp_path, monkeypatch):
+    calls = []
+
+    async def failing_on_second(file, path, max_bytes, chunk_bytes):
+        calls.append(path)
+        if len(calls) == 2:
+            raise OSError(28, "No space left on device")
+        return await real_stream(file, path, max_bytes, chunk_bytes)
+
+    real_stream = documents.stream_upload_to_disk
+    monkeypatch.setattr(documents, "stream_upload_to_disk", failing_on_second)
+    settings = Settings(OPENAI_API_KEY="test", STORAGE_PATH=str(tmp_path))
+    files = [UploadFile(io.BytesIO(b"first"), filename="a.txt"), UploadFile(io.BytesIO(b"second"), filename="b.txt")]
+
+    with pytest.raises(OSError):
+        asyncio.run(documents.upload_document_batch(files, settings, storage_service=None, document_type="resume"))
+    assert os.listdir(os.path.join(str(tmp_path), "uploads")) == []
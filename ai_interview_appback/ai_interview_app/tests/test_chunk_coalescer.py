@@ -0,0 +1,68 @@
+# tests/test_chunk_coalescer.py - Dispatch timing of ChunkCoalescer
+
+from app.core.chunk_coalescer import ChunkCoalescer
+
+
+def make_coalescer(debounce=0.75, min_new_words=4, inflight_timeout=10.0) -> ChunkCoalescer:
+    return ChunkCoalescer(debounce_seconds=debounce, min_new_words=min_new_words, inflight_timeout_seconds=inflight_timeout)
+
+
+def test_first_buffer_with_enough_words_is_dispatched_immediately():
+    coalescer = make_coalescer()
+    assert coalescer.offer("one two three", 0.0) is None # Below min_new_words
+    assert coalescer.offer("one two three four", 0.1) == "one two three four"
+    assert coalescer.drafts_dispatched == 1
+    assert coalescer.chunks_merged == 1 # The first chunk rode along with the second
+
+
+def test_chunks_during_inflight_job_are_collapsed_into_latest_buffer():
+    coalescer = make_coalescer(debounce=0.0)
+    assert coalescer.offer("a b c d", 0.0) == "a b c d"
+    assert coalescer.offer("a b c d e f g h", 0.2) is None # Job in flight
+    assert coalescer.offer("a b c d e f g h i j", 0.4) is None
+    assert coalescer.complete(0.5) == "a b c d e f g h i j" # Only the newest buffer is sent
+    assert coalescer.chunks_merged == 1
+    assert coalescer.drafts_dispatched == 2
+
+
+def test_debounce_window_holds_back_buffer_until_it_passes():
+    coalescer = make_coalescer(debounce=0.75)
+    assert coalescer.offer("a b c d", 0.0) == "a b c d"
+    assert coalescer.complete(0.1) is None # Free again, but inside the debounce window
+    coalescer.offer("a b c d e f g h", 0.2)
+    assert coalescer.seconds_until_ready(0.2) == 0.75 - 0.2
+    assert coalescer.poll(0.5) is None
+    assert coalescer.poll(0.75) == "a b c d e f g h"
+
+
+def test_inflight_timeout_frees_slot_of_a_job_that_never_reports():
+    coalescer = make_coalescer(debounce=0.0, inflight_timeout=10.0)
+    coalescer.offer("a b c d", 0.0)
+    coalescer.offer("a b c d e f g h", 1.0)
+    assert coalescer.seconds_until_ready(1.0) == 9.0
+    assert coalescer.poll(9.9) is None
+    assert coalescer.poll(10.0) == "a b c d e f g h"
+
+
+def test_seconds_until_ready_is_none_without_enough_new_words():
+    coalescer = make_coalescer()
+    assert coalescer.seconds_until_ready(0.0) is None # Nothing pending
+    coalescer.offer("a b c d", 0.0)
+    coalescer.offer("a b c d e", 0.1) # One new word only
+    assert coalescer.seconds_until_ready(0.1) is None
+
+
+def test_end_turn_drops_pending_chunks_and_resets_timing():
+    coalescer = make_coalescer()
+    coalescer.offer("a b c d", 0.0)
+    coalescer.offer("a b c d e f g h", 0.1)
+    coalescer.offer("a b c d e f g h i", 0.2)
+    coalescer.outstanding_drafts.append("task-1")
+    coalescer.end_turn()
+    assert coalescer.chunks_dropped == 2
+    assert coalescer.pending_buffer is None
+    assert coalescer.take_outstanding_drafts() == ["task-1"]
+    # The next turn starts fresh: no in-flight job, no debounce, word count from zero
+    assert coalescer.offer("w x y z", 0.3) == "w x y z"
+    assert coalescer.take_unreported_counts() == (0, 2)
+    assert coalescer.take_unreported_counts() == (0, 0)
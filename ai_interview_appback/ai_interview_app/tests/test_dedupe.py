@@ -0,0 +1,59 @@
+# tests/test_dedupe.py - Content-addressed upload deduplication
+
+import asyncio
+import hashlib
+import os
+
+from app.api.v1.endpoints.documents import _dedupe_upload
+from app.config.settings import Settings
+from app.services.storage_backends import FileSystemBackend
+from app.services.storage_service import StorageService
+from app.services.upload_writer import SavedUpload
+from app.tasks.document_tasks import doc_id_for
+
+
+def make_storage(tmp_path) -> StorageService:
+    return StorageService(base_path=str(tmp_path), backend=FileSystemBackend(str(tmp_path), fsync_mode="none"), cache=None)
+
+
+def write_upload(tmp_path, filename: str, data: bytes) -> SavedUpload:
+    path = os.path.join(str(tmp_path), filename)
+    with open(path, "wb") as f:
+        f.write(data)
+    return SavedUpload(path=path, size_bytes=len(data), sha256=hashlib.sha256(data).hexdigest())
+
+
+def dedupe(saved: SavedUpload, document_type: str, storage: StorageService):
+    return asyncio.run(_dedupe_upload(saved, document_type, storage, Settings(OPENAI_API_KEY="test")))
+
+
+def test_identical_upload_of_same_type_reuses_first_doc_id(tmp_path):
+    storage = make_storage(tmp_path)
+    first = write_upload(tmp_path, "resume_a.txt", b"Jane Doe, Python developer")
+    second = write_upload(tmp_path, "resume_b.txt", b"Jane Doe, Python developer")
+
+    assert dedupe(first, "resume", storage) == (first.path, False)
+    assert dedupe(second, "resume", storage) == (first.path, True)
+    assert not os.path.exists(second.path) # The duplicate copy is discarded
+
+
+def test_same_bytes_as_jd_and_resume_get_separate_doc_ids_and_analyses(tmp_path):
+    storage = make_storage(tmp_path)
+    as_jd = write_upload(tmp_path, "jd_a.txt", b"Python developer, 5 years")
+    as_resume = write_upload(tmp_path, "resume_a.txt", b"Python developer, 5 years")
+
+    jd_path, jd_duplicate = dedupe(as_jd, "job_description", storage)
+    resume_path, resume_duplicate = dedupe(as_resume, "resume", storage)
+    assert (jd_duplicate, resume_duplicate) == (False, False)
+    jd_id, resume_id = doc_id_for(jd_path), doc_id_for(resume_path)
+    assert jd_id != resume_id
+
+    # Each analysis is stored under its own doc_id, so neither overwrites the other
+    storage.save_analysis_result(jd_id, {"__metadata__": {"document_type": "job_description"}, "skills": ["python"]})
+    storage.save_analysis_result(resume_id, {"__metadata__": {"document_type": "resume"}, "skills": ["python"]})
+    assert storage.load_cached_analysis(jd_id, "job_description") is not None
+    assert storage.load_cached_analysis(resume_id, "resume") is not None
+
+    # Later uploads of either type still find their own entry
+    again = write_upload(tmp_path, "jd_b.txt", b"Python developer, 5 years")
+    assert dedupe(again, "job_description", storage) == (jd_path, True)
@@ -0,0 +1,56 @@
+# tests/test_document_chunker.py - Section splitting and merging of long-document analyses
+
+from app.analysis.document_chunker import merge_partial_analyses, split_document
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_small_sections_are_packed_together_in_order():
+    text = "EXPERIENCE\nLed payments team\nEDUCATION\nBSc Computer Science\nSKILLS\nPython Go"
+    assert split_document(text, 100, count_words) == [text]
+    chunks = split_document(text, 8, count_words)
+    assert chunks == ["EXPERIENCE\nLed payments team\nEDUCATION\nBSc Computer Science", "SKILLS\nPython Go"]
+
+
+def test_oversized_section_is_split_by_paragraphs_then_characters():
+    paragraphs = "Summary:\n" + "\n\n".join(["word " * 8] * 3)
+    chunks = split_document(paragraphs, 10, count_words)
+    assert len(chunks) == 3
+    assert all(count_words(chunk) <= 10 for chunk in chunks)
+
+    unbroken = "x" * 100 # No line breaks at all: hard split on the character budget
+    chunks = split_document(unbroken, 5, len)
+    assert "".join(chunks) == unbroken
+    assert all(len(chunk) <= 20 for chunk in chunks)
+
+
+def test_partials_are_merged_without_duplicates():
+    merged = merge_partial_analyses([
+        {"skills": ["Python", "SQL"], "summary": "Backend engineer.", "title": "", "contact": {"email": "a@b.c"}},
+        {"skills": ["SQL", "Go"], "summary": "Led a team.", "title": "Staff Engineer", "contact": {"phone": "123"}},
+    ])
+    assert merged == {
+        "skills": ["Python", "SQL", "Go"],
+        "title": "Staff Engineer",
+        "contact": {"email": "a@b.c", "phone": "123"},
+        "summary": "Backend engineer. Led a team.",
+    }
+
+
+def test_non_object_partials_count_as_unparseable():
+    merged = merge_partial_analyses([
+        {"skills": ["Python"]},
+        ["Python", "Go"], # The LLM answered with a bare list
+        "no structure",
+        {"raw_output": "oops", "warning": "Could not parse structured JSON."},
+    ])
+    assert merged == {"skills": ["Python"], "warning": "3 of 4 sections could not be parsed."}
+
+
+def test_nothing_parsed_returns_a_dict():
+    assert merge_partial_analyses([]) == {}
+    assert merge_partial_analyses([{"raw_output": "oops"}]) == {"raw_output": "oops"}
+    merged = merge_partial_analyses([["Python"]])
+    assert merged["raw_output"] == '["Python"]'
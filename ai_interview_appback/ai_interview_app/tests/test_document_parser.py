@@ -0,0 +1,60 @@
+# tests/test_document_parser.py - PDF extraction falls back to sequential when no page pool can run
+
+import types
+
+import pytest
+
+from app.config.settings import Settings
+from app.services import document_parser
+from app.services.document_parser import DocumentParser
+
+fitz = pytest.importorskip("fitz")
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = str(tmp_path / "long.pdf")
+    doc = fitz.open()
+    for n in range(8):
+        doc.new_page().insert_text((72, 72), f"page {n} text")
+    doc.save(path)
+    return path
+
+
+@pytest.fixture
+def fresh_page_pool(monkeypatch):
+    monkeypatch.setattr(document_parser, "_page_pool", None)
+    monkeypatch.setattr(document_parser, "_page_pool_failed", False)
+
+
+def parallel_parser() -> DocumentParser:
+    return DocumentParser(Settings(OPENAI_API_KEY="test", PARSER_PARALLEL_MIN_PAGES=4, PARSER_PAGES_PER_TASK=2, PARSER_MAX_WORKERS=2))
+
+
+def expected_text() -> str:
+    return "\n".join(f"page {n} text" for n in range(8))
+
+
+def test_daemonic_process_parses_sequentially(pdf_path, fresh_page_pool, monkeypatch):
+    # Prefork Celery children are daemonic: the pool could be built but never start processes
+    monkeypatch.setattr(document_parser.multiprocessing, "current_process", lambda: types.SimpleNamespace(daemon=True))
+    assert parallel_parser().parse_document(pdf_path) == expected_text()
+    assert document_parser._page_pool_failed is True
+
+
+def test_pool_failing_on_first_submit_falls_back_to_sequential(pdf_path, fresh_page_pool, monkeypatch):
+    class UnstartablePool:
+        def __init__(self, *args, **kwargs):
+            self.shut_down = False
+
+        def submit(self, *args, **kwargs):
+            raise AssertionError("daemonic processes are not allowed to have children")
+
+        def shutdown(self, **kwargs):
+            self.shut_down = True
+
+    monkeypatch.setattr(document_parser, "ProcessPoolExecutor", UnstartablePool)
+    parser = parallel_parser()
+    assert parser.parse_document(pdf_path) == expected_text()
+    assert document_parser._page_pool is None and document_parser._page_pool_failed is True
+    assert parser.parse_document(pdf_path) == expected_text() # Later documents skip the pool
@@ -0,0 +1,87 @@
+# tests/test_history_manager.py - Token budget and summary folding of ConversationHistoryManager
+
+from app.core import history_manager
+from app.core.history_manager import ConversationHistoryManager, count_tokens
+from app.core.interview_state import InterviewState
+
+
+def make_state(turns: int, words_per_turn: int = 10) -> InterviewState:
+    state = InterviewState(id="int_1", job_description_id="jd_1", resume_id="res_1")
+    manager = ConversationHistoryManager(verbatim_turns=100, max_prompt_tokens=10**6, summary_batch_turns=1)
+    for n in range(turns):
+        manager.record_turn(state, f"answer {n} " + "word " * words_per_turn, f"question {n}")
+    return state
+
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_record_turn_stores_token_count():
+    state = make_state(1)
+    turn = state.conversation_history[0]
+    assert turn.tokens == count_tokens(turn.user) + count_tokens(turn.assistant)
+
+
+def test_context_keeps_only_the_verbatim_window():
+    state = make_state(10)
+    manager = ConversationHistoryManager(verbatim_turns=3, max_prompt_tokens=10**6, summary_batch_turns=2)
+    messages = manager.build_context(state)
+    assert len(messages) == 2 * 10 # Nothing summarized yet: older turns stay while the budget allows
+    state.summarized_turns = 7
+    messages = manager.build_context(state)
+    assert len(messages) == 2 * 3
+    assert messages[0]["content"].startswith("answer 7 ")
+    assert messages[-1] == {"role": "assistant", "content": "question 9"}
+
+
+def test_context_respects_token_budget_but_keeps_newest_turn():
+    state = make_state(6, words_per_turn=40)
+    per_turn = state.conversation_history[0].tokens
+    manager = ConversationHistoryManager(verbatim_turns=6, max_prompt_tokens=per_turn * 2 + 1, summary_batch_turns=2)
+    assert len(manager.build_context(state)) == 2 * 2
+    tiny = ConversationHistoryManager(verbatim_turns=6, max_prompt_tokens=1, summary_batch_turns=2)
+    assert contents(tiny.build_context(state))[-1] == "question 5" # Never an empty history
+
+
+def test_summary_is_sent_first_and_replaces_folded_turns():
+    state = make_state(8)
+    state.history_summary = "Candidate worked on payments."
+    state.summarized_turns = 5
+    manager = ConversationHistoryManager(verbatim_turns=3, max_prompt_tokens=10**6, summary_batch_turns=2)
+    messages = manager.build_context(state)
+    assert messages[0]["role"] == "system"
+    assert "Candidate worked on payments." in messages[0]["content"]
+    assert len(messages) == 1 + 2 * 3
+
+
+def test_turns_to_summarize_waits_for_a_full_batch():
+    manager = ConversationHistoryManager(verbatim_turns=4, max_prompt_tokens=10**6, summary_batch_turns=3)
+    assert manager.turns_to_summarize(make_state(6)) is None # Only 2 turns left the window
+    state = make_state(7)
+    turns, summarized = manager.turns_to_summarize(state)
+    assert summarized == 3
+    assert [turn.assistant for turn in turns] == ["question 0", "question 1", "question 2"]
+
+    state.summarized_turns = 3
+    assert manager.turns_to_summarize(state) is None # Already folded
+    state.summarized_turns = 0
+    state.summary_in_progress = True
+    assert manager.turns_to_summarize(state) is None # A refresh is running
+
+
+def test_failed_encoding_download_falls_back_to_estimate_without_retrying(monkeypatch):
+    attempts = []
+
+    class OfflineTiktoken:
+        @staticmethod
+        def get_encoding(name):
+            attempts.append(name)
+            raise ConnectionError("no egress") # What tiktoken's download raises offline
+
+    monkeypatch.setattr(history_manager, "tiktoken", OfflineTiktoken)
+    monkeypatch.setattr(history_manager, "_encoding", None)
+    monkeypatch.setattr(history_manager, "_encoding_failed", False)
+    assert count_tokens("a" * 40) == 11
+    assert count_tokens("b" * 40) == 11
+    assert attempts == ["cl100k_base"]
@@ -0,0 +1,180 @@
+# tests/test_interview_manager.py - InterviewManager against in-process fakes (no LLM, broker or Redis)
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.config.settings import Settings
+from app.core import interview_manager
+from app.core.exceptions import InterviewNotFound
+from app.core.interview_manager import InterviewManager
+from app.core.interview_state import InterviewState
+from app.core.journal import make_snapshot
+from app.core.live_executor import InlineTaskExecutor
+from app.core.state_store import InMemoryStateStore
+from app.services.storage_service import StorageService
+
+
+class RecordingDelivery:
+    """Delivery channel stand-in: keeps what was published."""
+    def __init__(self):
+        self.published = []
+
+    def publish(self, interview_id, message=None, event=None):
+        self.published.append((interview_id, message, event))
+
+
+class SharedStore(InMemoryStateStore):
+    """In-memory store posing as a shared one (like Redis) that records the threads calling it."""
+    is_process_local = False
+
+    def __init__(self):
+        super().__init__()
+        self.calling_threads = []
+
+    def update(self, interview_id, mutator):
+        self.calling_threads.append(threading.get_ident())
+        return super().update(interview_id, mutator)
+
+
+def make_manager(tmp_path, store=None, **overrides) -> InterviewManager:
+    settings = Settings(OPENAI_API_KEY="test", LIVE_EXECUTION_MODE="inline", JOURNAL_ENABLED=False,
+                        STORAGE_PATH=str(tmp_path), STORAGE_FSYNC="none", STORAGE_CACHE_ENABLED=False, **overrides)
+    return InterviewManager(
+        llm_service=None,
+        mini_llm_service=None,
+        storage_service=StorageService(base_path=str(tmp_path), cache=None),
+        settings=settings,
+        state_store=store or InMemoryStateStore(),
+        delivery_channel=RecordingDelivery(),
+        inline_executor=InlineTaskExecutor(max_concurrent=4)
+    )
+
+
+def new_state(interview_id="int_1") -> InterviewState:
+    return InterviewState(id=interview_id, job_description_id="jd_1", resume_id="res_1")
+
+
+def test_shared_store_updates_run_off_the_event_loop(tmp_path):
+    store = SharedStore()
+    manager = make_manager(tmp_path, store=store, SPECULATIVE_RESPONSES_ENABLED=True, CHUNK_MIN_NEW_WORDS=100)
+    store.create(new_state())
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        await manager.handle_user_input("int_1", "text", "I led the payments team", False, 1.0)
+        await manager.astore_speculative_response("int_1", "I led the payments team ", "Tell me more.", 0.5)
+        # The final matches the speculation: committed on the speculative-hit path
+        await manager.handle_user_input("int_1", "text", ".", True, 2.0)
+        return loop_thread
+
+    loop_thread = asyncio.run(scenario())
+    assert len(store.calling_threads) == 4 # Chunk, speculation, final, committed turn
+    assert loop_thread not in store.calling_threads
+    state = store.get("int_1")
+    assert [turn.assistant for turn in state.conversation_history] == ["Tell me more."]
+
+
+def test_in_memory_store_updates_stay_on_the_loop(tmp_path):
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store)
+    store.create(new_state())
+
+    async def scenario():
+        await manager.handle_user_input("int_1", "text", "hello", False, 1.0)
+        return store.get("int_1").current_chunk_buffer
+
+    assert asyncio.run(scenario()) == "hello "
+
+
+def test_end_interview_persists_final_snapshot_without_journal(tmp_path, monkeypatch):
+    queued = []
+    monkeypatch.setattr(interview_manager.run_post_interview_analysis, "delay", lambda **kwargs: queued.append(kwargs))
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store) # JOURNAL_ENABLED=False
+    state = new_state()
+    state.append_transcript("I led the payments team", "Tell me more.")
+    store.create(state)
+
+    asyncio.run(manager.end_interview("int_1"))
+    snapshot = manager.storage_service.load_interview_snapshot("int_1")
+    assert snapshot["ended"] is True
+    assert snapshot["state"]["transcript_segments"] == ["User: I led the payments team\nAI: Tell me more.\n"]
+    assert store.get("int_1") is None
+    assert queued == [{"interview_id": "int_1", "jd_doc_id": "jd_1", "resume_doc_id": "res_1",
+                       "transcript": "User: I led the payments team\nAI: Tell me more.\n"}]
+
+
+def test_end_unknown_interview_without_storage_raises_not_found(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.storage_service = None
+    with pytest.raises(InterviewNotFound):
+        asyncio.run(manager.end_interview("missing"))
+
+
+class QueuedJournal:
+    """Journal writer whose background thread hasn't got to anything yet (Celery: another process)."""
+    def __init__(self):
+        self.queued = []
+
+    def record(self, interview_id, seq, kind, data):
+        self.queued.append(("entry", interview_id, seq))
+
+    def snapshot(self, state, ended=False):
+        self.queued.append(("snapshot", state.id, ended))
+
+
+def test_late_result_after_end_does_not_resurrect_interview(tmp_path, monkeypatch):
+    monkeypatch.setattr(interview_manager.run_post_interview_analysis, "delay", lambda **kwargs: None)
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store)
+    manager.journal = QueuedJournal()
+    storage = manager.storage_service
+    state = new_state()
+    store.create(state)
+    storage.save_interview_snapshot("int_1", make_snapshot(state)) # Base snapshot, not ended
+
+    asyncio.run(manager.end_interview("int_1"))
+    assert ("snapshot", "int_1", True) in manager.journal.queued # Final snapshot not written yet
+
+    # A final response still in flight arrives: it must not rebuild the session from the base snapshot
+    manager.finalize_llm_response("int_1", "Late answer.", {"user": "hi", "assistant": "Late answer."})
+    asyncio.run(manager.afinalize_llm_response("int_1", "Late answer.", {"user": "hi", "assistant": "Late answer."}))
+    assert store.get("int_1") is None
+
+    # Nor can a spill or periodic snapshot taken before the end replace the final snapshot
+    assert storage.save_interview_snapshot("int_1", make_snapshot(state)) is None
+    with pytest.raises(InterviewNotFound):
+        asyncio.run(manager.end_interview("int_1")) # Ending twice doesn't rerun the analysis
+
+
+def test_end_unknown_interview_leaves_no_marker(tmp_path):
+    manager = make_manager(tmp_path)
+    with pytest.raises(InterviewNotFound):
+        asyncio.run(manager.end_interview("missing"))
+    assert not manager.storage_service.is_interview_ended("missing")
+
+
+def test_failed_stream_sends_a_closing_error_frame(tmp_path):
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store)
+    store.create(new_state())
+
+    def deltas():
+        yield "Tell me "
+        raise ConnectionError("stream reset")
+
+    async def adeltas():
+        yield "Tell me "
+        raise ConnectionError("stream reset")
+
+    with pytest.raises(ConnectionError):
+        manager.stream_final_response("int_1", "hi", deltas())
+    with pytest.raises(ConnectionError):
+        asyncio.run(manager.astream_final_response("int_1", "hi", adeltas()))
+
+    frame_types = [json.loads(message)["type"] for _, message, _ in manager.delivery.published]
+    assert frame_types == ["llm_response_delta", "llm_response_error"] * 2
+    assert store.get("int_1").conversation_history == [] # Nothing committed
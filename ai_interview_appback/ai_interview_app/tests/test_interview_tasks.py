@@ -0,0 +1,43 @@
+# tests/test_interview_tasks.py - Celery interview tasks run in-process against fakes
+
+import pytest
+
+from app.config.settings import settings
+from app.core.exceptions import LLMServiceError
+from app.tasks.interview_tasks import process_chunk_task
+
+
+class FailingLLM:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def process_incremental_chunk(self, **kwargs):
+        raise self.error
+
+
+class RecordingManager:
+    def __init__(self):
+        self.released = []
+
+    def is_draft_stale(self, interview_id, draft_seq):
+        return False
+
+    def release_draft_slot(self, interview_id):
+        self.released.append(interview_id)
+
+
+@pytest.fixture
+def chunk_task(monkeypatch):
+    manager = RecordingManager()
+    monkeypatch.setattr(process_chunk_task, "_manager", manager)
+    monkeypatch.setattr(process_chunk_task, "update_state", lambda **kwargs: None) # No result backend here
+    monkeypatch.setattr(settings, "SPECULATIVE_RESPONSES_ENABLED", False)
+    return manager
+
+
+@pytest.mark.parametrize("error", [LLMServiceError("rate limited"), RuntimeError("bug")])
+def test_failed_draft_releases_its_coalescer_slot(chunk_task, monkeypatch, error):
+    monkeypatch.setattr(process_chunk_task, "_llm_service", FailingLLM(error))
+    with pytest.raises(type(error)):
+        process_chunk_task(interview_id="int_1", chunk="hello", current_buffer="hello", conversation_history=[], draft_seq=3)
+    assert chunk_task.released == ["int_1"]
@@ -0,0 +1,130 @@
+# tests/test_journal.py - Journal replay and interview recovery from snapshot + journal
+
+import threading
+
+from app.core import journal, state_store
+from app.core.history_manager import ConversationHistoryManager
+from app.core.interview_state import InterviewState
+from app.core.journal import JournalWriter, recover_interview_state, apply_journal_entry
+from app.core.state_store import InMemoryStateStore
+from app.services.storage_backends import FileSystemBackend
+from app.services.storage_service import StorageService
+
+
+def make_storage(tmp_path) -> StorageService:
+    return StorageService(base_path=str(tmp_path), backend=FileSystemBackend(str(tmp_path), fsync_mode="none"))
+
+
+def make_writer(storage: StorageService) -> JournalWriter:
+    return JournalWriter(storage, take_snapshot=lambda interview_id: None, flush_interval_seconds=0.01,
+                         max_batch_entries=100, snapshot_every_entries=1000)
+
+
+def history_manager() -> ConversationHistoryManager:
+    return ConversationHistoryManager(verbatim_turns=6, max_prompt_tokens=3000, summary_batch_turns=4)
+
+
+def new_state() -> InterviewState:
+    return InterviewState(id="int_1", job_description_id="jd_1", resume_id="res_1")
+
+
+def test_recovery_replays_journal_after_snapshot(tmp_path):
+    storage = make_storage(tmp_path)
+    writer = make_writer(storage)
+    writer.snapshot(new_state())
+    writer.record("int_1", 1, journal.CHUNK, {"text": "I built", "timestamp": 1.0})
+    writer.record("int_1", 2, journal.FINAL, {"text": "the platform", "timestamp": 2.0})
+    writer.record("int_1", 3, journal.RESPONSE, {"user": "I built the platform", "assistant": "Which parts?"})
+    writer.record("int_1", 4, journal.CHUNK, {"text": "The API", "timestamp": 3.0})
+    writer.record("int_1", 5, journal.SUMMARY, {"summary": "Built a platform.", "summarized_turns": 1})
+    writer.flush(timeout=5)
+
+    state = recover_interview_state("int_1", storage, history_manager())
+    assert state.journal_seq == 5
+    assert state.last_final_seq == 2 # Drafts dispatched before the final stay stale after recovery
+    assert [(turn.user, turn.assistant) for turn in state.conversation_history] == [("I built the platform", "Which parts?")]
+    assert state.transcript == "User: I built the platform\nAI: Which parts?\n"
+    assert state.current_chunk_buffer == "The API " # The unfinished utterance survives
+    assert state.history_summary == "Built a platform."
+    assert state.summarized_turns == 1
+
+
+def test_recovery_skips_entries_covered_by_the_snapshot(tmp_path):
+    storage = make_storage(tmp_path)
+    writer = make_writer(storage)
+    writer.record("int_1", 1, journal.FINAL, {"text": "hello", "timestamp": 1.0})
+    writer.record("int_1", 2, journal.RESPONSE, {"user": "hello", "assistant": "hi"})
+    covered = new_state()
+    apply_journal_entry(covered, {"seq": 1, "kind": journal.FINAL, "data": {"text": "hello", "timestamp": 1.0}}, history_manager())
+    apply_journal_entry(covered, {"seq": 2, "kind": journal.RESPONSE, "data": {"user": "hello", "assistant": "hi"}}, history_manager())
+    writer.snapshot(covered) # Written after both entries: covers seq <= 2
+    writer.record("int_1", 3, journal.CHUNK, {"text": "and", "timestamp": 2.0})
+    writer.flush(timeout=5)
+
+    state = recover_interview_state("int_1", storage, history_manager())
+    assert len(state.conversation_history) == 1 # Not applied twice
+    assert state.last_final_seq == 1
+    assert state.current_chunk_buffer == "and "
+
+
+def test_recovery_clears_flags_of_work_lost_with_the_process(tmp_path):
+    storage = make_storage(tmp_path)
+    state = new_state()
+    state.summary_in_progress = True
+    state.speculative_utterance, state.speculative_response = "I led", "Tell me more."
+    storage.save_interview_snapshot("int_1", journal.make_snapshot(state))
+
+    recovered = recover_interview_state("int_1", storage, history_manager())
+    assert recovered.summary_in_progress is False
+    assert recovered.speculative_response == ""
+
+
+def test_ended_interview_is_not_recovered_and_its_journal_is_removed(tmp_path):
+    storage = make_storage(tmp_path)
+    writer = make_writer(storage)
+    writer.record("int_1", 1, journal.CHUNK, {"text": "bye", "timestamp": 1.0})
+    writer.snapshot(new_state(), ended=True)
+    writer.flush(timeout=5)
+
+    assert recover_interview_state("int_1", storage, history_manager()) is None
+    assert storage.load_journal_entries("int_1") == []
+    assert storage.load_interview_snapshot("int_1")["ended"] is True
+
+
+def test_unknown_interview_is_not_recovered(tmp_path):
+    assert recover_interview_state("missing", make_storage(tmp_path), history_manager()) is None
+
+
+def test_periodic_snapshot_bounds_replay(tmp_path):
+    storage = make_storage(tmp_path)
+    live = new_state()
+    live.journal_seq = 3
+    writer = JournalWriter(storage, take_snapshot=lambda interview_id: journal.make_snapshot(live), flush_interval_seconds=0.01,
+                           max_batch_entries=100, snapshot_every_entries=3)
+    for seq in (1, 2, 3):
+        writer.record("int_1", seq, journal.CHUNK, {"text": f"c{seq}", "timestamp": float(seq)})
+    writer.flush(timeout=5)
+    writer.flush(timeout=5) # Periodic snapshots are taken at the end of the batch the first flush ended
+
+    assert storage.load_interview_snapshot("int_1")["last_seq"] == 3
+    assert recover_interview_state("int_1", storage, history_manager()).journal_seq == 3
+
+
+def test_store_snapshot_is_consistent_with_its_seq(monkeypatch):
+    store = InMemoryStateStore()
+    store.create(new_state())
+    monkeypatch.setattr(state_store, "get_state_store", lambda: store)
+
+    def speak():
+        for n in range(2000):
+            store.update("int_1", lambda s: (s.add_chunk(f"w{n}", False, float(n)), s.next_journal_seq()))
+
+    speaker = threading.Thread(target=speak)
+    speaker.start()
+    snapshots = []
+    while speaker.is_alive():
+        snapshots.append(journal.take_store_snapshot("int_1"))
+    speaker.join()
+    # Every chunk in a snapshot is covered by its last_seq, so none is replayed twice
+    assert all(len(snapshot["state"]["chunk_segments"]) == snapshot["last_seq"] for snapshot in snapshots)
+    assert journal.take_store_snapshot("missing") is None
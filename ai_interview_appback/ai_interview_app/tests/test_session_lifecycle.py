@@ -0,0 +1,106 @@
+# tests/test_session_lifecycle.py - Spilling idle/LRU sessions and rehydrating them on next use
+
+import asyncio
+
+from app.config.settings import Settings
+from app.core import interview_manager
+from app.core.interview_state import InterviewState
+from app.core.session_lifecycle import SessionLifecycleManager, estimate_state_bytes
+from app.core.state_store import InMemoryStateStore
+from tests.test_interview_manager import make_manager
+
+
+def make_lifecycle(store, storage, idle_ttl=60, budget=10**9) -> SessionLifecycleManager:
+    settings = Settings(OPENAI_API_KEY="test", SESSION_IDLE_TTL_SECONDS=idle_ttl, SESSION_MEMORY_BUDGET_BYTES=budget)
+    return SessionLifecycleManager(store=store, storage_service=storage, settings=settings)
+
+
+def add_session(store, interview_id: str, last_activity_at: float, turns: int = 0) -> InterviewState:
+    state = InterviewState(id=interview_id, job_description_id="jd_1", resume_id="res_1", last_activity_at=last_activity_at)
+    for n in range(turns):
+        state.append_transcript(f"answer {n} " * 50, f"question {n}")
+    store.create(state)
+    return state
+
+
+def test_idle_session_is_spilled_and_rehydrated_on_next_input(tmp_path):
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store, CHUNK_MIN_NEW_WORDS=100)
+    lifecycle = make_lifecycle(store, manager.storage_service, idle_ttl=60)
+    add_session(store, "idle", last_activity_at=1000.0, turns=2)
+    add_session(store, "active", last_activity_at=1050.0)
+
+    counts = asyncio.run(lifecycle.sweep(now=1070.0))
+    assert counts == {"idle_spilled": 1, "memory_spilled": 0}
+    assert store.list_ids() == ["active"]
+    assert lifecycle.stats()["spilled_sessions"] == 1
+
+    # The candidate comes back: the session is rebuilt from its snapshot transparently
+    asyncio.run(manager.handle_user_input("idle", "text", "I am back", False, 1100.0))
+    state = store.get("idle")
+    assert len(state.transcript_segments) == 2
+    assert state.current_chunk_buffer == "I am back "
+    assert lifecycle.stats()["spilled_sessions"] == 0
+
+
+def test_session_changed_during_snapshot_write_is_not_evicted(tmp_path):
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store)
+    storage = manager.storage_service
+    add_session(store, "int_1", last_activity_at=1000.0)
+    written = []
+
+    async def save_while_candidate_speaks(interview_id, snapshot):
+        # A chunk is committed while the snapshot is being written
+        store.update(interview_id, lambda s: (s.add_chunk("wait", False, 2000.0), s.next_journal_seq()))
+        written.append(snapshot)
+        await asyncio.sleep(0)
+
+    storage.asave_interview_snapshot = save_while_candidate_speaks
+    lifecycle = make_lifecycle(store, storage, idle_ttl=60)
+    assert asyncio.run(lifecycle.spill(store.get("int_1"), "idle")) is False
+    assert written[0]["last_seq"] == 0 # Taken before the chunk
+    assert store.get("int_1").current_chunk_buffer == "wait " # Still resident: the chunk isn't lost
+    assert lifecycle.stats()["spilled_sessions"] == 0
+
+
+def test_memory_budget_spills_least_recently_active_first(tmp_path):
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store)
+    for n, activity in enumerate([1030.0, 1010.0, 1020.0]):
+        add_session(store, f"int_{n}", last_activity_at=activity, turns=10)
+    size = estimate_state_bytes(store.get("int_0"))
+    lifecycle = make_lifecycle(store, manager.storage_service, idle_ttl=3600, budget=size * 2)
+
+    counts = asyncio.run(lifecycle.sweep(now=1040.0))
+    assert counts == {"idle_spilled": 0, "memory_spilled": 1}
+    assert sorted(store.list_ids()) == ["int_0", "int_2"] # int_1 was the least recently active
+    assert manager.storage_service.load_interview_snapshot("int_1") is not None
+
+
+def test_spilled_session_can_be_ended_and_not_rehydrated_afterwards(tmp_path, monkeypatch):
+    monkeypatch.setattr(interview_manager.run_post_interview_analysis, "delay", lambda **kwargs: None)
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store)
+    lifecycle = make_lifecycle(store, manager.storage_service, idle_ttl=60)
+    add_session(store, "idle", last_activity_at=1000.0, turns=1)
+    asyncio.run(lifecycle.sweep(now=1070.0))
+
+    asyncio.run(manager.end_interview("idle")) # Ended from its spilled snapshot
+    assert manager.storage_service.load_interview_snapshot("idle")["ended"] is True
+    manager.finalize_llm_response("idle", "Late answer.", {"user": "hi", "assistant": "Late answer."})
+    assert store.get("idle") is None
+
+
+def test_second_rehydration_keeps_changes_made_to_the_first_copy(tmp_path):
+    store = InMemoryStateStore()
+    manager = make_manager(tmp_path, store=store, CHUNK_MIN_NEW_WORDS=100)
+    lifecycle = make_lifecycle(store, manager.storage_service, idle_ttl=60)
+    add_session(store, "idle", last_activity_at=1000.0)
+    asyncio.run(lifecycle.sweep(now=1070.0))
+
+    # Two inputs for the spilled session both miss the store and rehydrate it
+    assert manager._rehydrate("idle")
+    store.update("idle", lambda state: state.add_chunk("first", False, 1.0)) # Not journaled yet
+    assert manager._rehydrate("idle")
+    assert store.get("idle").current_chunk_buffer == "first "
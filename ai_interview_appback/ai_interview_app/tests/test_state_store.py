@@ -0,0 +1,132 @@
+# tests/test_state_store.py - update/delete_if semantics of InMemoryStateStore and RedisStateStore
+
+import pytest
+
+from app.core.exceptions import StateStoreError
+from app.core.interview_state import InterviewState, ConversationTurn
+from app.core.state_store import InMemoryStateStore, RedisStateStore
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_redis_store(server=None) -> RedisStateStore:
+    store = RedisStateStore(redis_url="redis://localhost:6379/2", ttl_seconds=60, max_retries=3)
+    store._redis = fakeredis.FakeRedis(server=server or fakeredis.FakeServer(), decode_responses=True)
+    return store
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    return InMemoryStateStore() if request.param == "memory" else make_redis_store()
+
+
+def new_state(interview_id="int_1") -> InterviewState:
+    return InterviewState(id=interview_id, job_description_id="jd_1", resume_id="res_1")
+
+
+def test_update_applies_mutator_and_returns_its_result(store):
+    store.create(new_state())
+
+    def mutate(state):
+        state.add_chunk("hello", False, 1.0)
+        state.conversation_history.append(ConversationTurn("hi", "hello there", 5))
+        return state.next_journal_seq()
+
+    state, seq = store.update("int_1", mutate)
+    assert seq == 1
+    assert state.current_chunk_buffer == "hello "
+    stored = store.get("int_1")
+    assert stored.journal_seq == 1
+    assert stored.conversation_history == [ConversationTurn("hi", "hello there", 5)]
+    assert store.get_field("int_1", "journal_seq") == 1
+
+
+def test_update_of_missing_session_returns_none(store):
+    assert store.update("missing", lambda state: 1/0) == (None, None)
+    assert store.get("missing") is None
+    assert store.get_field("missing", "journal_seq") is None
+
+
+def test_appends_and_clears_of_segment_lists_round_trip(store):
+    store.create(new_state())
+    for n in range(3):
+        store.update("int_1", lambda state, n=n: state.add_chunk(f"c{n}", False, float(n)))
+    store.update("int_1", lambda state: state.append_transcript("q", "a"))
+    assert store.get("int_1").chunk_segments == ["c0 ", "c1 ", "c2 "]
+    store.update("int_1", lambda state: state.clear_chunk_buffer())
+    store.update("int_1", lambda state: state.add_chunk("next", True, 4.0))
+    stored = store.get("int_1")
+    assert stored.chunk_segments == ["next"]
+    assert stored.transcript == "User: q\nAI: a\n"
+
+
+def test_delete_if_only_removes_when_predicate_holds(store):
+    store.create(new_state())
+    store.update("int_1", lambda state: state.next_journal_seq())
+    assert store.delete_if("int_1", lambda state: state.journal_seq == 0) is None
+    assert store.get("int_1") is not None
+    removed = store.delete_if("int_1", lambda state: state.journal_seq == 1)
+    assert removed.journal_seq == 1
+    assert store.get("int_1") is None
+    assert store.list_ids() == []
+    assert store.delete_if("int_1", lambda state: True) is None
+
+
+def test_delete_returns_last_state(store):
+    store.create(new_state())
+    store.update("int_1", lambda state: state.add_chunk("bye", True, 1.0))
+    assert store.delete("int_1").current_chunk_buffer == "bye"
+    assert store.delete("int_1") is None
+
+
+def test_redis_update_retries_when_another_writer_commits_first():
+    server = fakeredis.FakeServer()
+    store, other = make_redis_store(server), make_redis_store(server)
+    store.create(new_state())
+    attempts = []
+
+    def mutate(state):
+        attempts.append(state.journal_seq)
+        if len(attempts) == 1:
+            other.update("int_1", lambda s: s.add_chunk("concurrent", False, 1.0)) # Lands between WATCH and EXEC
+        state.add_chunk("mine", False, 2.0)
+
+    store.update("int_1", mutate)
+    assert len(attempts) == 2 # Re-applied on the fresh state
+    assert store.get("int_1").chunk_segments == ["concurrent ", "mine "]
+
+
+def test_redis_update_gives_up_after_max_retries():
+    server = fakeredis.FakeServer()
+    store, other = make_redis_store(server), make_redis_store(server)
+    store.create(new_state())
+
+    def always_conflicting(state):
+        other.update("int_1", lambda s: s.next_journal_seq())
+
+    with pytest.raises(StateStoreError):
+        store.update("int_1", always_conflicting)
+
+
+def test_redis_delete_if_rechecks_predicate_after_concurrent_write():
+    server = fakeredis.FakeServer()
+    store, other = make_redis_store(server), make_redis_store(server)
+    store.create(new_state())
+    calls = []
+
+    def unchanged(state):
+        calls.append(state.journal_seq)
+        if len(calls) == 1:
+            other.update("int_1", lambda s: s.next_journal_seq()) # Activity while deciding to evict
+        return state.journal_seq == 0
+
+    assert store.delete_if("int_1", unchanged) is None
+    assert calls == [0, 1]
+    assert store.get("int_1").journal_seq == 1
+
+
+def test_create_if_absent_keeps_existing_session(store):
+    assert store.create_if_absent(new_state()) is True
+    store.update("int_1", lambda state: state.add_chunk("hello", False, 1.0))
+    assert store.create_if_absent(new_state()) is False
+    assert store.get("int_1").current_chunk_buffer == "hello " # Not replaced by the second copy
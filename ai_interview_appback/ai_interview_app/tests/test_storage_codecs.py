@@ -0,0 +1,50 @@
+# tests/test_storage_codecs.py - Encoding/compression round trips and reading older files
+
+import json
+
+import pytest
+
+from app.services import storage_codecs
+from app.services.storage_codecs import StorageCodec, decode_json, decode_text
+
+VALUE = {"skills": ["python", "sql"] * 100, "summary": "Senior developer – ünïcode", "years": 7, "nested": {"ok": True}}
+TEXT = "Parsed resume text – ünïcode. " * 100
+
+CONFIGURATIONS = [(encoding, compression) for encoding in ("json", "msgpack") for compression in ("none", "gzip", "zstd")]
+
+
+@pytest.mark.parametrize("encoding,compression", CONFIGURATIONS)
+def test_json_values_round_trip(encoding, compression):
+    codec = StorageCodec(encoding=encoding, compression=compression, min_compress_bytes=64)
+    assert decode_json(codec.encode_json(VALUE)) == VALUE
+
+
+@pytest.mark.parametrize("encoding,compression", CONFIGURATIONS)
+def test_text_round_trips(encoding, compression):
+    codec = StorageCodec(encoding=encoding, compression=compression, min_compress_bytes=64)
+    assert decode_text(codec.encode_text(TEXT)) == TEXT
+
+
+def test_values_below_threshold_are_stored_uncompressed():
+    codec = StorageCodec(encoding="json", compression="zstd", min_compress_bytes=512)
+    assert codec.encode_json({"a": 1}) == b'{"a":1}'
+
+
+def test_files_written_before_codecs_are_read_as_before():
+    legacy_json = json.dumps(VALUE, indent=4, ensure_ascii=False).encode("utf-8") # Old pretty-printed format
+    assert decode_json(legacy_json) == VALUE
+    assert decode_text(TEXT.encode("utf-8")) == TEXT
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_truncated_frames_raise_value_error(compression):
+    data = StorageCodec(compression=compression, min_compress_bytes=0).encode_json(VALUE)
+    with pytest.raises(ValueError):
+        decode_json(data[:len(data) // 2])
+
+
+def test_missing_optional_packages_fall_back(monkeypatch):
+    monkeypatch.setattr(storage_codecs, "msgpack", None)
+    monkeypatch.setattr(storage_codecs, "zstandard", None)
+    codec = StorageCodec(encoding="msgpack", compression="zstd")
+    assert (codec.encoding, codec.compression) == ("json", "gzip")
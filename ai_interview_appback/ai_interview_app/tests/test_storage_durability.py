@@ -0,0 +1,65 @@
+# tests/test_storage_durability.py - Error handling of the group committer
+
+import os
+
+import pytest
+
+from app.services import storage_durability
+from app.services.storage_durability import GroupCommitter
+
+
+def write_file(tmp_path, name: str) -> str:
+    path = os.path.join(str(tmp_path), name)
+    with open(path, "wb") as f:
+        f.write(b"data")
+    return path
+
+
+def wait(committer: GroupCommitter, request):
+    assert request.done.wait(5.0), "writer was never woken"
+    return committer.wait(request)
+
+
+def test_commit_returns_publish_result(tmp_path):
+    committer = GroupCommitter()
+    path = write_file(tmp_path, "a")
+    assert committer.commit(path, lambda: "published", str(tmp_path)) == "published"
+
+
+def test_failed_publish_fails_only_its_own_write(tmp_path):
+    committer = GroupCommitter(max_wait_seconds=0.2)
+
+    def fail():
+        raise OSError("rename failed")
+
+    failing = committer.submit(write_file(tmp_path, "a"), fail, str(tmp_path))
+    ok = committer.submit(write_file(tmp_path, "b"), lambda: "b", str(tmp_path))
+    with pytest.raises(OSError, match="rename failed"):
+        wait(committer, failing)
+    assert wait(committer, ok) == "b"
+
+
+def test_unexpected_error_is_raised_to_every_writer_and_committer_keeps_running(tmp_path, monkeypatch):
+    committer = GroupCommitter()
+
+    def broken_sync(*args):
+        raise RuntimeError("sync crashed")
+
+    monkeypatch.setattr(GroupCommitter, "_sync", staticmethod(broken_sync))
+    request = committer.submit(write_file(tmp_path, "a"), lambda: "a", str(tmp_path))
+    with pytest.raises(RuntimeError, match="sync crashed"):
+        wait(committer, request)
+
+    monkeypatch.undo()
+    assert wait(committer, committer.submit(write_file(tmp_path, "b"), lambda: "b", str(tmp_path))) == "b"
+
+
+def test_metrics_failure_does_not_block_writers(tmp_path, monkeypatch):
+    committer = GroupCommitter()
+
+    def broken_increment(*args):
+        raise RuntimeError("metrics unavailable")
+
+    monkeypatch.setattr(storage_durability.metrics, "increment", broken_increment)
+    assert wait(committer, committer.submit(write_file(tmp_path, "a"), lambda: "a", str(tmp_path))) == "a"
+    assert wait(committer, committer.submit(write_file(tmp_path, "b"), lambda: "b", str(tmp_path))) == "b"
@@ -0,0 +1,50 @@
+# tests/test_upload_writer.py - Upload request bodies are bounded while they are received
+
+from typing import Annotated
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.services.upload_writer import UploadSizeLimitMiddleware
+
+LIMIT = 1000
+
+
+def make_client(reached):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limit_for_path=lambda path: LIMIT if path == "/upload" else None)
+
+    @app.post("/upload")
+    async def upload(file: Annotated[UploadFile, File()]):
+        reached.append(file.filename)
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def test_upload_within_limit_reaches_the_endpoint():
+    reached = []
+    response = make_client(reached).post("/upload", files={"file": ("cv.txt", b"x" * 100)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+    assert reached == ["cv.txt"]
+
+
+def test_oversized_content_length_is_rejected_before_the_body_is_read():
+    reached = []
+    response = make_client(reached).post("/upload", files={"file": ("cv.txt", b"x" * 5000)})
+    assert response.status_code == 413
+    assert reached == []
+
+
+def test_chunked_body_is_cut_off_once_it_passes_the_limit():
+    reached = []
+
+    def body(): # No Content-Length: sent chunked
+        for _ in range(50):
+            yield b"x" * 100
+
+    response = make_client(reached).post("/upload", content=body(),
+                                         headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert reached == []